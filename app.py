@@ -25,6 +25,27 @@ load_dotenv()  # Carrega variáveis do arquivo .env (ignorado em produção se n
 from config import get_config
 from database.db_manager import DatabaseManager
 from utils.backup import SistemaBackup
+from utils.arquivo_wal import ArquivadorWAL
+from utils.replica import ReplicaLeitura
+from utils.trava_arquivo import TravaArquivo
+from utils.fluxo_caixa import (calcular_fluxo_caixa, gerar_excel_fluxo_caixa, calcular_fluxo_mensal,
+                               gerar_excel_fluxo_mensal, COMPONENTES_MENSAIS, MAXIMO_MESES)
+from utils.resumo_financeiro import ResumoFinanceiro
+from utils.indicadores import IndicadoresDiarios
+from utils.series import (SERIES, PONTOS_PADRAO, PONTOS_MINIMO, PONTOS_MAXIMO, MAXIMO_MESES_SERIE,
+                          calcular_serie, etag_serie)
+from utils.extrato import DDL_EXTRATO, extrato_imovel, extrato_proprietario
+from utils.reajuste import MotorReajuste
+from utils.varredura_status import VarreduraStatus
+from utils.baixas import baixar_lote, resultados_para_dict
+from utils.conciliacao import JANELA_DIAS, ler_extrato, conciliar, aplicar_conciliacao
+from utils.condominios import ler_formulario_condominios, previa_condominios, aplicar_condominios
+from utils.despesas_recorrentes import DespesasRecorrentes, PERIODICIDADES
+from utils.encargos import EncargosAtraso, CONFIGURACOES_ENCARGOS, colunas_encargos
+from utils.faturamento import FaturamentoMensal, DIA_MAXIMO, primeiro_dia
+from utils.dimob import DDL_DIMOB, CONFIGURACOES_DIMOB, ResumoDimob, gerar_registros, gravar_arquivo, ler_declarante
+from utils.relatorios import (MotorRelatorios, RELATORIOS, TIPOS_MIME, FAIXAS_ATRASO, MESES_ANO, ano_irpf,
+                              exportar_resultado)
 
 # Criar aplicação Flask
 app = Flask(__name__)
@@ -37,6 +58,52 @@ db = DatabaseManager()
 # Inicializar sistema de backup
 backup_system = SistemaBackup(db)
 
+# Inicializar arquivamento do WAL (ativado junto com o agendador)
+arquivador_wal = ArquivadorWAL(db.db_path, os.path.join(backup_system.dir_backups, 'arquivo_wal'))
+
+# Inicializar réplica de leitura (relatórios em Excel e exportações)
+replica = ReplicaLeitura(db.db_path, obter_geracao=db.ler_geracao)
+if app.config['REPLICA_LEITURA']:
+    db.replica = replica
+    db.replica_max_atraso = app.config['REPLICA_MAX_ATRASO']
+
+# Inicializar motor de relatórios (resultados em cache por filtros e versão dos dados)
+motor_relatorios = MotorRelatorios(db)
+
+# Inicializar resumo financeiro mensal (tabela mantida por triggers)
+resumo_financeiro = ResumoFinanceiro(db)
+resumo_financeiro.instalar()
+
+# Índices do extrato por imóvel/proprietário (bancos criados antes deles)
+db.aplicar_ddl(DDL_EXTRATO)
+
+# Configurações do declarante da DIMOB
+db.aplicar_ddl(DDL_DIMOB)
+
+# Inicializar motor de reajuste (séries dos índices em cache no banco)
+motor_reajuste = MotorReajuste(db, app.config['INDICES_DIR'])
+motor_reajuste.instalar()
+
+# Varredura diária de status (receitas em atraso, contratos vencidos)
+varredura_status = VarreduraStatus(db)
+varredura_status.instalar()
+
+# Multa e juros por atraso (regras em configuracoes)
+encargos_atraso = EncargosAtraso(db)
+encargos_atraso.instalar()
+
+# Despesas recorrentes (modelos e gerador idempotente)
+despesas_recorrentes = DespesasRecorrentes(db)
+despesas_recorrentes.instalar()
+
+# Faturamento mensal (aluguel, condomínio e IPTU) com histórico das execuções
+faturamento = FaturamentoMensal(db)
+faturamento.instalar()
+
+# Inicializar histórico diário de indicadores (kpi_snapshots)
+indicadores = IndicadoresDiarios(db)
+indicadores.instalar()
+
 # ============================================================================
 # CONFIGURAÇÃO DE LOGIN
 # ============================================================================
@@ -107,47 +174,275 @@ def admin_required(f):
 # ============================================================================
 
 def executar_backup_automatico():
-    """Executa backup automático do banco de dados."""
+    """Executa backup automático incremental do banco de dados."""
     try:
         print(f"\n[BACKUP AUTOMÁTICO] Iniciando às {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-        sucesso, caminho = backup_system.backup_sqlite()
+        sucesso, id_snapshot = backup_system.backup_incremental()
         if sucesso:
-            print(f"[BACKUP AUTOMÁTICO] Concluído: {caminho}")
-            # Limpar backups antigos (manter últimos 7)
-            backup_system.limpar_backups_antigos(manter_ultimos=7)
+            print(f"[BACKUP AUTOMÁTICO] Snapshot concluído: {id_snapshot}")
+            # Manter uma semana de snapshots de hora em hora
+            backup_system.podar_repositorio(manter_ultimos=app.config['BACKUP_INCREMENTAL_MANTER'])
         else:
-            print(f"[BACKUP AUTOMÁTICO] Falha: {caminho}")
+            print(f"[BACKUP AUTOMÁTICO] Falha: {id_snapshot}")
     except Exception as e:
         print(f"[BACKUP AUTOMÁTICO] Erro: {str(e)}")
 
 def obter_ultimo_backup():
-    """Retorna informações do último backup realizado."""
+    """Retorna informações do último backup realizado (consulta ao catálogo)."""
     try:
-        backups = backup_system.listar_backups()
-        db_backups = [b for b in backups if b['tipo'] == 'SQLite']
-        if db_backups:
-            ultimo = db_backups[0]
-            return ultimo['data'].strftime('%d/%m/%Y às %H:%M')
+        ultimo = backup_system.ultimo_backup()
+        if ultimo:
+            return datetime.fromisoformat(ultimo['criado_em']).strftime('%d/%m/%Y às %H:%M')
         return None
     except:
         return None
 
-# Configurar APScheduler para backup diário
+def executar_ensaio_restauracao():
+    """Testa semanalmente a restauração do último backup (em pasta temporária)."""
+    try:
+        resultado = backup_system.ensaio_restauracao()
+        if not resultado['ok']:
+            print(f"[TESTE DE RESTAURAÇÃO] Falhou: {'; '.join(resultado['erros'])}")
+    except Exception as e:
+        print(f"[TESTE DE RESTAURAÇÃO] Erro: {str(e)}")
+
+def executar_verificacao_backups():
+    """Confere novamente, aos poucos, os checksums dos backups catalogados."""
+    try:
+        backup_system.reverificar_catalogo()
+    except Exception as e:
+        print(f"[VERIFICAÇÃO DE BACKUPS] Erro: {str(e)}")
+
+def executar_arquivamento_wal():
+    """Copia os frames novos do WAL para o arquivo e faz o checkpoint."""
+    try:
+        resultado = arquivador_wal.arquivar()
+        if resultado['nova_cadeia']:
+            print(f"[ARQUIVO WAL] Nova cadeia iniciada com a base {resultado['base']['id']}")
+    except Exception as e:
+        print(f"[ARQUIVO WAL] Erro: {str(e)}")
+
+def executar_base_wal():
+    """Cria a base diária do arquivo de WAL e remove bases antigas."""
+    try:
+        resultado = arquivador_wal.criar_base()
+        print(f"[ARQUIVO WAL] Base criada: {resultado['base']['id']}")
+        arquivador_wal.podar(manter_bases=app.config['WAL_BASES_MANTER'])
+    except Exception as e:
+        print(f"[ARQUIVO WAL] Erro ao criar base: {str(e)}")
+
+def obter_status_wal():
+    """Retorna o status do arquivamento do WAL (ou None se desativado)."""
+    if db.wal_autocheckpoint != 0:
+        return None
+    try:
+        return arquivador_wal.status()
+    except Exception:
+        return None
+
+def executar_verificacao_resumo():
+    """Confere o resumo financeiro contra receitas/despesas e reconstrói se divergir."""
+    try:
+        divergencias = resumo_financeiro.verificar()
+        if divergencias:
+            print(f"[RESUMO FINANCEIRO] {len(divergencias)} linha(s) divergente(s); reconstruindo")
+            resumo_financeiro.reconstruir()
+    except Exception as e:
+        print(f"[RESUMO FINANCEIRO] Erro: {str(e)}")
+
+def executar_varredura_status():
+    """Marca receitas vencidas como 'Atrasado' e encerra/prorroga contratos vencidos."""
+    try:
+        varredura_status.executar()
+    except Exception as e:
+        print(f"[VARREDURA DE STATUS] Erro: {str(e)}")
+
+def executar_gravacao_encargos():
+    """Grava multa e juros nas receitas em atraso (se a regra gravar_encargos estiver ativa)."""
+    try:
+        encargos_atraso.gravar()
+    except Exception as e:
+        print(f"[ENCARGOS] Erro: {str(e)}")
+
+def executar_despesas_recorrentes():
+    """Gera as despesas recorrentes do mês corrente e dos próximos (idempotente)."""
+    try:
+        despesas_recorrentes.gerar()
+    except Exception as e:
+        print(f"[DESPESAS RECORRENTES] Erro: {str(e)}")
+
+def executar_faturamento_mensal():
+    """Gera o faturamento do mês corrente e, a partir do dia configurado, do seguinte."""
+    try:
+        faturamento.executar_agendado()
+    except Exception as e:
+        print(f"[FATURAMENTO] Erro: {str(e)}")
+
+def registrar_indicadores():
+    """Grava o registro diário de indicadores (kpi_snapshots)."""
+    try:
+        indicadores.registrar()
+    except Exception as e:
+        print(f"[INDICADORES] Erro: {str(e)}")
+
+def atualizar_replica():
+    """Atualiza a réplica de leitura se o banco principal mudou."""
+    try:
+        replica.atualizar()
+    except Exception as e:
+        print(f"[RÉPLICA] Erro ao atualizar: {str(e)}")
+
+def obter_status_replica():
+    """Retorna o status da réplica de leitura (ou None se desativada)."""
+    if db.replica is None:
+        return None
+    try:
+        return replica.status()
+    except Exception:
+        return None
+
+# Configurar APScheduler para backup incremental de hora em hora
 try:
     from apscheduler.schedulers.background import BackgroundScheduler
     from apscheduler.triggers.cron import CronTrigger
 
     scheduler = BackgroundScheduler()
-    # Executa backup todos os dias às 02:00
+    # Cada worker do Gunicorn tem seu agendador, mas só o que segura a trava do
+    # agendador registra as tarefas (senão backups e rotinas rodariam uma vez por
+    # worker). Os outros tentam a cada minuto e assumem se o líder morrer: o
+    # sistema operacional libera a trava junto com o processo.
+    trava_agendador = TravaArquivo(db.db_path + '.agendador.lock', bloquear=False)
+
+    def registrar_tarefas():
+        """Registra as tarefas agendadas (só no processo líder)."""
+        # Executa backup incremental a cada hora cheia
+        scheduler.add_job(
+            executar_backup_automatico,
+            CronTrigger(minute=0),
+            id='backup_incremental',
+            name='Backup automático incremental',
+            replace_existing=True
+        )
+        # Reverifica alguns backups a cada 15 minutos (os mais antigos primeiro)
+        scheduler.add_job(
+            executar_verificacao_backups,
+            'interval',
+            minutes=15,
+            id='verificacao_backups',
+            name='Reverificação dos checksums dos backups',
+            replace_existing=True
+        )
+        # Teste de restauração semanal (domingo de madrugada)
+        scheduler.add_job(
+            executar_ensaio_restauracao,
+            CronTrigger(day_of_week='sun', hour=3, minute=30),
+            id='ensaio_restauracao',
+            name='Teste semanal de restauração',
+            replace_existing=True
+        )
+        # Verificação diária do resumo financeiro (de madrugada)
+        scheduler.add_job(
+            executar_verificacao_resumo,
+            CronTrigger(hour=4, minute=0),
+            id='verificacao_resumo',
+            name='Verificação do resumo financeiro mensal',
+            replace_existing=True
+        )
+        # Status que dependem da data: ao iniciar e logo após a meia-noite
+        scheduler.add_job(
+            executar_varredura_status,
+            CronTrigger(hour=0, minute=5),
+            next_run_time=datetime.now(),
+            id='varredura_status',
+            name='Varredura diária de status de receitas e contratos',
+            replace_existing=True
+        )
+        # Multa e juros gravados nas receitas em atraso (só com gravar_encargos = 1)
+        scheduler.add_job(
+            executar_gravacao_encargos,
+            CronTrigger(hour=0, minute=10),
+            id='gravacao_encargos',
+            name='Gravação diária de multa e juros por atraso',
+            replace_existing=True
+        )
+        # Despesas recorrentes: ao iniciar e de madrugada (meses já gerados são ignorados)
+        scheduler.add_job(
+            executar_despesas_recorrentes,
+            CronTrigger(hour=0, minute=20),
+            next_run_time=datetime.now(),
+            id='despesas_recorrentes',
+            name='Geração das despesas recorrentes',
+            replace_existing=True
+        )
+        # Faturamento mensal: ao iniciar e de madrugada (só um worker executa; o já lançado é ignorado)
+        scheduler.add_job(
+            executar_faturamento_mensal,
+            CronTrigger(hour=0, minute=30),
+            next_run_time=datetime.now(),
+            id='faturamento_mensal',
+            name='Faturamento mensal automático',
+            replace_existing=True
+        )
+        # Indicadores do dia: ao iniciar e no fim de cada dia
+        scheduler.add_job(
+            registrar_indicadores,
+            CronTrigger(hour=23, minute=55),
+            next_run_time=datetime.now(),
+            id='indicadores_diarios',
+            name='Registro diário de indicadores',
+            replace_existing=True
+        )
+        if app.config['WAL_ARQUIVAMENTO']:
+            scheduler.add_job(
+                executar_arquivamento_wal,
+                'interval',
+                minutes=app.config['WAL_ARQUIVAMENTO_MINUTOS'],
+                next_run_time=datetime.now(),  # Primeira passagem já abre a conexão sentinela
+                id='arquivamento_wal',
+                name='Arquivamento contínuo do WAL',
+                replace_existing=True
+            )
+            scheduler.add_job(
+                executar_base_wal,
+                CronTrigger(hour=2, minute=30),
+                id='base_wal',
+                name='Base diária do arquivo de WAL',
+                replace_existing=True
+            )
+        if app.config['REPLICA_LEITURA']:
+            scheduler.add_job(
+                atualizar_replica,
+                'interval',
+                seconds=app.config['REPLICA_INTERVALO_SEGUNDOS'],
+                next_run_time=datetime.now(),
+                id='replica_leitura',
+                name='Atualização da réplica de leitura',
+                replace_existing=True
+            )
+
+    def disputar_agendador():
+        """Tenta assumir as tarefas agendadas; no processo que conseguir, registra-as."""
+        if trava_agendador.adquirida or not trava_agendador.adquirir():
+            return
+        scheduler.remove_job('disputa_agendador')
+        registrar_tarefas()
+        print(f"✓ Tarefas agendadas assumidas por este processo (PID {os.getpid()})")
+
     scheduler.add_job(
-        executar_backup_automatico,
-        CronTrigger(hour=2, minute=0),
-        id='backup_diario',
-        name='Backup automático diário',
+        disputar_agendador,
+        'interval',
+        minutes=1,
+        next_run_time=datetime.now(),
+        id='disputa_agendador',
+        name='Disputa das tarefas agendadas entre os workers',
         replace_existing=True
     )
     scheduler.start()
-    print("✓ Backup automático configurado para 02:00 diariamente")
+    print("✓ Backup automático incremental configurado de hora em hora")
+    if app.config['WAL_ARQUIVAMENTO']:
+        # Só o arquivador faz checkpoint: nenhum frame sai do WAL sem ser arquivado
+        db.wal_autocheckpoint = 0
+        print(f"✓ Arquivamento do WAL a cada {app.config['WAL_ARQUIVAMENTO_MINUTOS']} minutos")
 except ImportError:
     print("⚠ APScheduler não instalado. Backup automático desativado.")
     print("  Para ativar, execute: pip install apscheduler")
@@ -167,6 +462,14 @@ def formatar_moeda(valor):
     return f"R$ {float(valor):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
 
 
+@app.template_filter('formatar_numero')
+def formatar_numero(valor):
+    """Formata número no padrão brasileiro, sem símbolo (tabelas largas)."""
+    if not valor:
+        return "-"
+    return f"{float(valor):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
 @app.template_filter('formatar_data')
 def formatar_data(data):
     """Formata data para formato brasileiro."""
@@ -472,6 +775,8 @@ def dashboard():
     """Dashboard principal com estatísticas e resumos."""
     # Buscar estatísticas
     stats = db.get_estatisticas_dashboard()
+    # Pendências e valores do mês a partir do resumo mensal (sem varrer o histórico)
+    stats.update(resumo_financeiro.totais_pendentes())
 
     # Buscar contratos ativos
     contratos_ativos = db.get_contratos_ativos()
@@ -523,7 +828,12 @@ def dashboard():
     """)
     proximo_venc_contrato_info = proximo_venc_contrato[0] if proximo_venc_contrato else None
 
+    # Indicadores de hoje contra o mesmo dia do ano anterior (kpi_snapshots)
+    comparacao_anual = indicadores.comparacao_anual()
+
     return render_template('dashboard.html',
+                         faturamento=faturamento.resumo_dashboard(),
+                         comparacao_anual=comparacao_anual,
                          stats=stats,
                          contratos_ativos=contratos_ativos[:5],  # Últimos 5
                          despesas_pendentes=despesas_pendentes[:5],
@@ -625,6 +935,45 @@ def ver_imovel(id):
     return render_template('imoveis/ver.html', imovel=imovel, contratos=contratos, despesas=despesas)
 
 
+@app.route('/imoveis/<int:id>/extrato')
+@login_required
+def extrato_do_imovel(id):
+    """Extrato do imóvel: recebimentos e pagamentos com saldo acumulado (paginado)."""
+    imovel = db.get_by_id('imoveis', id)
+
+    if not imovel:
+        flash('Imóvel não encontrado.', 'danger')
+        return redirect(url_for('listar_imoveis'))
+
+    antes = request.args.get('antes', '')
+    pagina = extrato_imovel(db, id, antes)
+
+    return render_template('imoveis/extrato.html',
+                         titulo=imovel['endereco_completo'],
+                         imovel=imovel,
+                         proprietario=None,
+                         pagina=pagina,
+                         antes=antes,
+                         url_pagina=lambda cursor: url_for('extrato_do_imovel', id=id, antes=cursor))
+
+
+@app.route('/proprietarios/<proprietario>/extrato')
+@login_required
+def extrato_do_proprietario(proprietario):
+    """Extrato do proprietário: todos os imóveis e receitas sem imóvel (paginado)."""
+    antes = request.args.get('antes', '')
+    pagina = extrato_proprietario(db, proprietario, antes)
+
+    return render_template('imoveis/extrato.html',
+                         titulo=proprietario,
+                         imovel=None,
+                         proprietario=proprietario,
+                         pagina=pagina,
+                         antes=antes,
+                         url_pagina=lambda cursor: url_for('extrato_do_proprietario',
+                                                           proprietario=proprietario, antes=cursor))
+
+
 @app.route('/imoveis/<int:id>/editar', methods=['GET', 'POST'])
 @login_required
 def editar_imovel(id):
@@ -694,48 +1043,33 @@ def excluir_imovel(id):
 @login_required
 def atualizar_condominios():
     """Página para atualização em lote dos valores de condomínio."""
+    resultado_previa = None
     if request.method == 'POST':
         try:
-            # Dicionário para agrupar atualizações por imóvel
-            atualizacoes = {}
-
-            for key, value in request.form.items():
-                novo_valor = value.strip()
-                if not novo_valor:
-                    continue
+            novos = ler_formulario_condominios(request.form)
+            repassar = bool(request.form.get('repassar'))
 
-                # Converter para float (aceita vírgula ou ponto)
-                novo_valor = float(novo_valor.replace(',', '.'))
-
-                if key.startswith('condominio_inquilino_'):
-                    imovel_id = int(key.replace('condominio_inquilino_', ''))
-                    if imovel_id not in atualizacoes:
-                        atualizacoes[imovel_id] = {}
-                    atualizacoes[imovel_id]['condominio_inquilino'] = novo_valor
-
-                elif key.startswith('condominio_total_'):
-                    imovel_id = int(key.replace('condominio_total_', ''))
-                    if imovel_id not in atualizacoes:
-                        atualizacoes[imovel_id] = {}
-                    atualizacoes[imovel_id]['condominio_total'] = novo_valor
-
-            # Aplicar as atualizações
-            atualizados = 0
-            for imovel_id, dados in atualizacoes.items():
-                if db.update('imoveis', dados, 'id = ?', (imovel_id,)):
-                    atualizados += 1
-
-            if atualizados > 0:
-                flash(f'Valores atualizados com sucesso! {atualizados} imóvel(is) alterado(s).', 'success')
+            if request.form.get('acao') == 'previa':
+                resultado_previa = previa_condominios(db, novos)
             else:
-                flash('Nenhum valor foi alterado.', 'info')
+                alterados = aplicar_condominios(db, novos, repassar)
+                if alterados['imoveis'] > 0:
+                    mensagem = f"Valores atualizados com sucesso! {alterados['imoveis']} imóvel(is) alterado(s)."
+                    if repassar:
+                        mensagem += (f" Repassado a {alterados['receitas']} receita(s) pendente(s) e "
+                                     f"{alterados['despesas']} despesa(s) de condomínio em aberto.")
+                    flash(mensagem, 'success')
+                else:
+                    flash('Nenhum valor foi alterado.', 'info')
 
-            return redirect(url_for('listar_imoveis'))
+                return redirect(url_for('listar_imoveis'))
 
+        except ValueError as e:
+            flash(f'Valor inválido: {str(e)}', 'danger')
         except Exception as e:
             flash(f'Erro ao atualizar: {str(e)}', 'danger')
 
-    # GET: Buscar imóveis com condomínio cadastrado (inquilino ou total > 0)
+    # Imóveis com condomínio cadastrado (inquilino ou total > 0)
     imoveis = db.execute_query("""
         SELECT id, endereco_completo, condominio_inquilino, condominio_total, dia_venc_condominio
         FROM imoveis
@@ -744,7 +1078,8 @@ def atualizar_condominios():
         ORDER BY endereco_completo
     """)
 
-    return render_template('imoveis/atualizar_condominios.html', imoveis=imoveis)
+    return render_template('imoveis/atualizar_condominios.html', imoveis=imoveis, previa=resultado_previa,
+                           valores=request.form if request.method == 'POST' else {})
 
 
 # ============================================================================
@@ -1075,6 +1410,36 @@ def editar_contrato(id):
                          config=app.config)
 
 
+@app.route('/contratos/reajustes', methods=['GET', 'POST'])
+@login_required
+def reajustar_contratos():
+    """Prévia e aplicação do reajuste anual dos contratos pelo índice (IGPM/IPCA)."""
+    if request.method == 'POST':
+        ids = [int(valor) for valor in request.form.getlist('contratos') if valor.isdigit()]
+        if not ids:
+            flash('Selecione ao menos um contrato para reajustar.', 'warning')
+            return redirect(url_for('reajustar_contratos'))
+        try:
+            aplicado = motor_reajuste.aplicar(ids)
+            flash(f"Reajuste aplicado em {aplicado['contratos']} contrato(s) e "
+                  f"{aplicado['receitas']} receita(s) em aberto.", 'success')
+        except Exception as e:
+            flash(f'Erro ao aplicar reajuste: {str(e)}', 'danger')
+        return redirect(url_for('reajustar_contratos'))
+
+    try:
+        motor_reajuste.carregar_indices(forcar=request.args.get('recarregar') == '1')
+    except (OSError, ValueError) as e:
+        flash(f'Erro ao carregar índices: {str(e)}', 'danger')
+
+    previa = motor_reajuste.calcular()
+    return render_template('contratos/reajustes.html',
+                         previa=previa,
+                         aplicaveis=[item for item in previa if item['aplicavel']],
+                         indices=motor_reajuste.situacao_indices(),
+                         pasta_indices=app.config['INDICES_DIR'])
+
+
 @app.route('/contratos/<int:id>/excluir', methods=['POST'])
 @login_required
 def excluir_contrato(id):
@@ -1264,6 +1629,179 @@ def pagar_despesa(id):
     return redirect(url_for('listar_despesas'))
 
 
+# Verbo de cada operação em lote para as mensagens: (item, particípio)
+_ROTULOS_LOTE = {
+    'receber': ('receita(s)', 'recebida(s)'),
+    'estornar_receita': ('receita(s)', 'estornada(s)'),
+    'pagar': ('despesa(s)', 'paga(s)'),
+    'estornar_despesa': ('despesa(s)', 'estornada(s)'),
+}
+
+
+def _itens_lote():
+    """
+    Itens e data de um lote, do formulário (ids, valor_<id>, data) ou de JSON
+    ({"data": "AAAA-MM-DD", "itens": [{"id": 1, "valor": 100.0}, ...]}).
+    """
+    if request.is_json:
+        corpo = request.get_json(silent=True)
+        if not isinstance(corpo, dict) or not isinstance(corpo.get('itens', []), list):
+            raise ValueError('Corpo JSON inválido: esperado {"data": ..., "itens": [...]}')
+        itens = {}
+        for item in corpo.get('itens', []):
+            if not isinstance(item, dict):
+                raise ValueError('Item inválido: esperado {"id": ..., "valor": ...}')
+            valor = item.get('valor')
+            itens[int(item['id'])] = float(valor) if valor not in (None, '') else None
+        data_texto = corpo.get('data')
+    else:
+        itens = {}
+        for id_texto in request.form.getlist('ids'):
+            valor = request.form.get(f'valor_{id_texto}', '').strip().replace(',', '.')
+            itens[int(id_texto)] = float(valor) if valor else None
+        data_texto = request.form.get('data')
+    data = datetime.strptime(data_texto, '%Y-%m-%d').date() if data_texto else date.today()
+    return itens, data
+
+
+def _executar_lote(operacao, destino):
+    """Roda uma operação em lote e responde em JSON (pedido JSON) ou com flash + redirect."""
+    try:
+        itens, data = _itens_lote()
+        if not itens:
+            raise ValueError('Nenhum item selecionado')
+        resumo = resultados_para_dict(baixar_lote(db, operacao, itens, data))
+    except (ValueError, TypeError, KeyError) as e:
+        if request.is_json:
+            return jsonify({'erro': str(e)}), 400
+        flash(f'Lote não processado: {str(e)}', 'danger')
+        return redirect(url_for(destino))
+    except Exception as e:
+        if request.is_json:
+            return jsonify({'erro': str(e)}), 500
+        flash(f'Erro: {str(e)}', 'danger')
+        return redirect(url_for(destino))
+
+    if request.is_json:
+        return jsonify(resumo)
+
+    item, participio = _ROTULOS_LOTE[operacao]
+    if resumo['processados']:
+        mensagem = f"{resumo['processados']} {item} {participio}"
+        if operacao in ('receber', 'pagar'):
+            mensagem += f" (total {formatar_moeda(resumo['valor_total'])})"
+        flash(mensagem + '.', 'success')
+    recusados = [f"#{r['id']}: {r['mensagem']}" for r in resumo['itens'] if not r['ok']]
+    if recusados:
+        flash(f"{len(recusados)} {item} não processada(s) — " + '; '.join(recusados), 'warning')
+    return redirect(url_for(destino))
+
+
+@app.route('/despesas/lote/pagar', methods=['POST'])
+@login_required
+def pagar_despesas_lote():
+    """Marca várias despesas como pagas na mesma data (valor por item opcional)."""
+    return _executar_lote('pagar', 'listar_despesas')
+
+
+@app.route('/despesas/lote/estornar', methods=['POST'])
+@login_required
+def estornar_despesas_lote():
+    """Retorna várias despesas pagas para pendente."""
+    return _executar_lote('estornar_despesa', 'listar_despesas')
+
+
+def _mes_formulario(campo, padrao=None):
+    """Primeiro dia do mês informado em um campo 'AAAA-MM' do formulário."""
+    valor = request.form.get(campo, '').strip()
+    if not valor:
+        return padrao
+    return datetime.strptime(valor[:7], '%Y-%m').date()
+
+
+@app.route('/despesas/recorrentes', methods=['GET', 'POST'])
+@login_required
+def listar_despesas_recorrentes():
+    """Modelos de despesa recorrente: lista e cadastro."""
+    if request.method == 'POST':
+        try:
+            inicio = _mes_formulario('inicio')
+            fim = _mes_formulario('fim')
+            if not inicio:
+                raise ValueError('Informe o mês de início')
+            dados = {
+                'id_imovel': int(request.form.get('id_imovel')),
+                'tipo_despesa': request.form.get('tipo_despesa'),
+                'descricao': request.form.get('descricao', '').strip(),
+                'valor': float(request.form.get('valor', '').replace(',', '.')),
+                'periodicidade_meses': PERIODICIDADES[request.form.get('periodicidade', 'Mensal')],
+                'dia_vencimento': int(request.form.get('dia_vencimento') or 10),
+                'inicio': inicio.isoformat(),
+                'fim': fim.isoformat() if fim else None,
+                'observacoes': request.form.get('observacoes') or None,
+            }
+            if not dados['descricao']:
+                raise ValueError('Informe a descrição')
+            if despesas_recorrentes.criar(dados):
+                flash('Despesa recorrente cadastrada! Ela será gerada no próximo ciclo (ou use "Gerar Agora").', 'success')
+            else:
+                flash('Erro ao cadastrar a despesa recorrente. Confira os valores informados.', 'danger')
+        except (ValueError, TypeError, KeyError) as e:
+            flash(f'Dados inválidos: {str(e)}', 'danger')
+        return redirect(url_for('listar_despesas_recorrentes'))
+
+    imoveis = db.execute_query("SELECT id, endereco_completo FROM imoveis ORDER BY endereco_completo")
+    return render_template('despesas/recorrentes.html',
+                         modelos=despesas_recorrentes.listar(),
+                         imoveis=imoveis,
+                         periodicidades=PERIODICIDADES,
+                         mes_atual=date.today().strftime('%Y-%m'),
+                         config=app.config)
+
+
+@app.route('/despesas/recorrentes/<int:id>/ativo', methods=['POST'])
+@login_required
+def alternar_despesa_recorrente(id):
+    """Ativa ou suspende um modelo de despesa recorrente."""
+    ativo = request.form.get('ativo') == '1'
+    if despesas_recorrentes.definir_ativo(id, ativo):
+        flash('Despesa recorrente ' + ('reativada.' if ativo else 'suspensa.'), 'success')
+    else:
+        flash('Erro ao atualizar a despesa recorrente.', 'danger')
+    return redirect(url_for('listar_despesas_recorrentes'))
+
+
+@app.route('/despesas/recorrentes/<int:id>/excluir', methods=['POST'])
+@login_required
+def excluir_despesa_recorrente(id):
+    """Exclui um modelo (as despesas já geradas são mantidas)."""
+    if despesas_recorrentes.excluir(id):
+        flash('Despesa recorrente excluída. As despesas já lançadas foram mantidas.', 'success')
+    else:
+        flash('Erro ao excluir a despesa recorrente.', 'danger')
+    return redirect(url_for('listar_despesas_recorrentes'))
+
+
+@app.route('/despesas/recorrentes/gerar', methods=['POST'])
+@login_required
+def gerar_despesas_recorrentes():
+    """Gera as despesas recorrentes de um intervalo de meses (meses já gerados são ignorados)."""
+    try:
+        inicio = _mes_formulario('inicio', date.today().replace(day=1))
+        fim = _mes_formulario('fim', inicio)
+        criadas = despesas_recorrentes.gerar(inicio, fim)
+        if criadas:
+            flash(f'{criadas} despesa(s) recorrente(s) lançada(s) de {inicio.strftime("%m/%Y")} '
+                  f'a {fim.strftime("%m/%Y")}.', 'success')
+        else:
+            flash('Nenhuma despesa nova: o período já estava gerado.', 'info')
+    except ValueError as e:
+        flash(f'Período inválido: {str(e)}', 'danger')
+    except Exception as e:
+        flash(f'Erro ao gerar despesas recorrentes: {str(e)}', 'danger')
+    return redirect(url_for('listar_despesas_recorrentes'))
+
+
 @app.route('/despesas/gerar-iptu-anual', methods=['POST'])
 @login_required
 def gerar_iptu_anual():
@@ -1336,67 +1874,23 @@ def gerar_iptu_anual():
 @login_required
 def gerar_iptu_mensal():
     """Gera despesas de IPTU mensal (valor anual ÷ 12) para imóveis com pagamento mensal."""
+    # Receber data de vencimento do formulário
+    data_vencimento = request.form.get('data_vencimento')
+    if not data_vencimento:
+        flash('Data de vencimento é obrigatória.', 'danger')
+        return redirect(url_for('listar_despesas'))
+
     try:
-        import calendar
+        vencimento = date.fromisoformat(data_vencimento)
         hoje = date.today()
-        ano_atual = hoje.year
-        mes_atual = hoje.month
-        mes_referencia = f"{ano_atual}-{mes_atual:02d}-01"
-
-        # Receber data de vencimento do formulário
-        data_vencimento = request.form.get('data_vencimento')
-        if not data_vencimento:
-            flash('Data de vencimento é obrigatória.', 'danger')
-            return redirect(url_for('listar_despesas'))
-
-        # Buscar imóveis com IPTU cadastrado e pagamento MENSAL
-        imoveis = db.execute_query("""
-            SELECT id, endereco_completo, valor_iptu_anual
-            FROM imoveis
-            WHERE valor_iptu_anual IS NOT NULL AND valor_iptu_anual > 0
-            AND forma_pagamento_iptu = 'Mensal'
-        """)
-
-        if not imoveis:
-            flash('Nenhum imóvel com IPTU mensal cadastrado.', 'warning')
-            return redirect(url_for('listar_despesas'))
-
-        contador = 0
-        ignorados = 0
-
-        for imovel in imoveis:
-            # Verificar se já existe IPTU para este imóvel neste mês
-            existente = db.execute_query("""
-                SELECT id FROM despesas
-                WHERE id_imovel = ? AND tipo_despesa = 'IPTU'
-                AND strftime('%Y-%m', mes_referencia) = ?
-            """, (imovel['id'], f"{ano_atual}-{mes_atual:02d}"))
-
-            if existente:
-                ignorados += 1
-                continue
+        execucao = faturamento.gerar(hoje, componentes=('iptu',), vencimento_iptu=vencimento)
 
-            # Valor mensal = anual ÷ 12
-            valor_mensal = round(imovel['valor_iptu_anual'] / 12, 2)
-
-            # Criar despesa de IPTU mensal
-            dados = {
-                'id_imovel': imovel['id'],
-                'tipo_despesa': 'IPTU',
-                'motivo_despesa': f'IPTU Mensal {mes_atual:02d}/{ano_atual}',
-                'mes_referencia': mes_referencia,
-                'valor_previsto': valor_mensal,
-                'vencimento_previsto': data_vencimento,
-            }
-
-            if db.insert('despesas', dados):
-                contador += 1
-
-        if contador > 0:
-            data_formatada = f"{data_vencimento[8:10]}/{data_vencimento[5:7]}/{data_vencimento[:4]}"
-            flash(f'IPTU mensal gerado para {contador} imóvel(is)! Vencimento: {data_formatada}', 'success')
-        if ignorados > 0:
-            flash(f'{ignorados} imóvel(is) já tinham IPTU lançado para {mes_atual:02d}/{ano_atual}.', 'info')
+        if execucao['iptu'] > 0:
+            flash(f'IPTU mensal gerado para {execucao["iptu"]} imóvel(is)! '
+                  f'Vencimento: {vencimento.strftime("%d/%m/%Y")}', 'success')
+        else:
+            flash(f'Nenhum IPTU mensal novo: os imóveis com pagamento mensal já têm IPTU lançado '
+                  f'para {hoje.strftime("%m/%Y")}.', 'info')
 
     except Exception as e:
         flash(f'Erro ao gerar IPTU mensal: {str(e)}', 'danger')
@@ -1410,64 +1904,14 @@ def gerar_condominio_mensal():
     """Gera despesas de condomínio mensal para todos os imóveis com condomínio > 0."""
     try:
         hoje = date.today()
-        ano_atual = hoje.year
-        mes_atual = hoje.month
-        mes_referencia = f"{ano_atual}-{mes_atual:02d}-01"
-
-        # Buscar imóveis com condomínio total cadastrado (para despesas)
-        imoveis = db.execute_query("""
-            SELECT id, endereco_completo, condominio_total, dia_venc_condominio
-            FROM imoveis
-            WHERE condominio_total IS NOT NULL AND condominio_total > 0
-        """)
-
-        if not imoveis:
-            flash('Nenhum imóvel com valor de condomínio cadastrado.', 'warning')
-            return redirect(url_for('listar_despesas'))
-
-        contador = 0
-        ignorados = 0
-
-        for imovel in imoveis:
-            # Verificar se já existe condomínio para este imóvel neste mês
-            existente = db.execute_query("""
-                SELECT id FROM despesas
-                WHERE id_imovel = ? AND tipo_despesa = 'Condomínio'
-                AND strftime('%Y-%m', mes_referencia) = ?
-            """, (imovel['id'], f"{ano_atual}-{mes_atual:02d}"))
-
-            if existente:
-                ignorados += 1
-                continue
-
-            # Calcular data de vencimento
-            dia_venc = imovel['dia_venc_condominio'] or 10
-            # Ajustar dia se for maior que o último dia do mês
-            import calendar
-            ultimo_dia = calendar.monthrange(ano_atual, mes_atual)[1]
-            dia_venc = min(dia_venc, ultimo_dia)
-            vencimento = f"{ano_atual}-{mes_atual:02d}-{dia_venc:02d}"
+        execucao = faturamento.gerar(hoje, componentes=('condominio',))
 
-            # Criar despesa de condomínio (usa condominio_total)
-            dados = {
-                'id_imovel': imovel['id'],
-                'tipo_despesa': 'Condomínio',
-                'motivo_despesa': f'Condomínio {mes_atual:02d}/{ano_atual}',
-                'mes_referencia': mes_referencia,
-                'valor_previsto': imovel['condominio_total'],
-                'vencimento_previsto': vencimento,
-            }
-
-            if db.insert('despesas', dados):
-                contador += 1
-
-        mes_nome = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'][mes_atual]
-
-        if contador > 0:
-            flash(f'Condomínio gerado com sucesso para {contador} imóvel(is)! Referência: {mes_nome}/{ano_atual}', 'success')
-        if ignorados > 0:
-            flash(f'{ignorados} imóvel(is) já tinham condomínio lançado para {mes_nome}/{ano_atual}.', 'info')
+        if execucao['condominios'] > 0:
+            flash(f'Condomínio gerado com sucesso para {execucao["condominios"]} imóvel(is)! '
+                  f'Referência: {hoje.strftime("%m/%Y")}', 'success')
+        else:
+            flash(f'Nenhum condomínio novo: os imóveis com condomínio já têm a despesa lançada '
+                  f'para {hoje.strftime("%m/%Y")}.', 'info')
 
     except Exception as e:
         flash(f'Erro ao gerar condomínio: {str(e)}', 'danger')
@@ -1490,7 +1934,8 @@ def listar_receitas():
         SELECT r.*,
                c.valor_aluguel,
                COALESCE(i_c.endereco_completo, i_r.endereco_completo, '-') as imovel_endereco,
-               COALESCE(p.nome_completo, pr.nome, '-') as inquilino_nome
+               COALESCE(p.nome_completo, pr.nome, '-') as inquilino_nome,
+               {colunas_encargos()}
         FROM receitas r
         LEFT JOIN contratos     c   ON r.id_contrato     = c.id
         LEFT JOIN imoveis       i_c ON c.id_imovel       = i_c.id
@@ -1500,9 +1945,10 @@ def listar_receitas():
         {where_clause}
         ORDER BY r.vencimento_previsto DESC
         LIMIT 200
-    """)
+    """, {'hoje': date.today().isoformat()})
     
-    return render_template('receitas/listar.html', receitas=receitas, status=status, config=app.config)
+    hoje = date.today().strftime('%Y-%m-%d')
+    return render_template('receitas/listar.html', receitas=receitas, status=status, hoje=hoje, config=app.config)
 
 
 @app.route('/receitas/gerar-faturamento-mensal', methods=['POST'])
@@ -1510,84 +1956,15 @@ def listar_receitas():
 def gerar_faturamento_mensal():
     """Gera receitas de aluguel para todos os contratos ativos no mês corrente."""
     try:
-        import calendar
         hoje = date.today()
-        ano_atual = hoje.year
-        mes_atual = hoje.month
-        mes_referencia = f"{ano_atual}-{mes_atual:02d}-01"
-
-        # Buscar contratos ativos ou prorrogados
-        contratos = db.execute_query("""
-            SELECT c.id, c.valor_aluguel, c.dia_vencimento,
-                   i.endereco_completo as imovel_endereco,
-                   i.condominio_inquilino, i.valor_iptu_anual, i.forma_pagamento_iptu,
-                   p.nome_completo as inquilino_nome
-            FROM contratos c
-            JOIN imoveis i ON c.id_imovel = i.id
-            JOIN pessoas p ON c.id_inquilino = p.id
-            WHERE c.status_contrato IN ('Ativo', 'Prorrogado')
-        """)
+        execucao = faturamento.gerar(hoje, componentes=('aluguel',))
 
-        if not contratos:
-            flash('Nenhum contrato ativo encontrado.', 'warning')
-            return redirect(url_for('listar_receitas'))
-
-        contador = 0
-        ignorados = 0
-
-        for contrato in contratos:
-            # Verificar se já existe receita para este contrato neste mês
-            existente = db.execute_query("""
-                SELECT id FROM receitas
-                WHERE id_contrato = ?
-                AND strftime('%Y-%m', mes_referencia) = ?
-            """, (contrato['id'], f"{ano_atual}-{mes_atual:02d}"))
-
-            if existente:
-                ignorados += 1
-                continue
-
-            # Calcular data de vencimento
-            dia_venc = contrato['dia_vencimento'] or 10
-            ultimo_dia = calendar.monthrange(ano_atual, mes_atual)[1]
-            dia_venc = min(dia_venc, ultimo_dia)
-            vencimento = f"{ano_atual}-{mes_atual:02d}-{dia_venc:02d}"
-
-            # Valores (usa condominio_inquilino para receitas)
-            aluguel = contrato['valor_aluguel'] or 0
-            condominio = contrato['condominio_inquilino'] or 0
-
-            # IPTU mensal (se forma de pagamento for mensal)
-            iptu = 0
-            if contrato['forma_pagamento_iptu'] == 'Mensal' and contrato['valor_iptu_anual']:
-                iptu = round(contrato['valor_iptu_anual'] / 12, 2)
-
-            valor_total = aluguel + condominio + iptu
-
-            # Criar receita
-            dados = {
-                'id_contrato': contrato['id'],
-                'mes_referencia': mes_referencia,
-                'aluguel_devido': aluguel,
-                'condominio_devido': condominio if condominio > 0 else None,
-                'iptu_devido': iptu if iptu > 0 else None,
-                'desconto_multa': None,
-                'valor_total_devido': valor_total,
-                'vencimento_previsto': vencimento,
-                'status': 'Pendente',
-                'observacoes': f'Faturamento automático {mes_atual:02d}/{ano_atual}',
-            }
-
-            if db.insert('receitas', dados):
-                contador += 1
-
-        mes_nome = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'][mes_atual]
-
-        if contador > 0:
-            flash(f'Faturamento gerado com sucesso para {contador} contrato(s)! Referência: {mes_nome}/{ano_atual}', 'success')
-        if ignorados > 0:
-            flash(f'{ignorados} contrato(s) já tinham faturamento lançado para {mes_nome}/{ano_atual}.', 'info')
+        if execucao['receitas'] > 0:
+            flash(f'Faturamento gerado com sucesso para {execucao["receitas"]} contrato(s)! '
+                  f'Referência: {hoje.strftime("%m/%Y")}', 'success')
+        else:
+            flash(f'Nenhuma receita nova: os contratos ativos já têm faturamento lançado '
+                  f'para {hoje.strftime("%m/%Y")}.', 'info')
 
     except Exception as e:
         flash(f'Erro ao gerar faturamento: {str(e)}', 'danger')
@@ -1595,13 +1972,60 @@ def gerar_faturamento_mensal():
     return redirect(url_for('listar_receitas'))
 
 
-@app.route('/receitas/nova', methods=['GET', 'POST'])
+@app.route('/receitas/faturamento', methods=['GET', 'POST'])
 @login_required
-def nova_receita():
-    """Cadastra nova receita."""
+def faturamento_mensal():
+    """Histórico e configuração do faturamento automático; POST gera um mês agora."""
     if request.method == 'POST':
         try:
-            tipo_receita = request.form.get('tipo_receita', 'Aluguel')
+            mes = date.fromisoformat(request.form.get('mes', '') + '-01')
+        except ValueError:
+            flash('Informe o mês a faturar.', 'danger')
+            return redirect(url_for('faturamento_mensal'))
+        try:
+            execucao = faturamento.gerar(mes)
+            flash(f'Faturamento {mes.strftime("%m/%Y")}: {execucao["receitas"]} receita(s), '
+                  f'{execucao["condominios"]} condomínio(s) e {execucao["iptu"]} IPTU mensal criados.',
+                  'success' if execucao['receitas'] + execucao['condominios'] + execucao['iptu'] else 'info')
+        except Exception as e:
+            flash(f'Erro ao gerar faturamento: {str(e)}', 'danger')
+        return redirect(url_for('faturamento_mensal'))
+
+    return render_template('receitas/faturamento.html',
+                         execucoes=faturamento.historico(),
+                         config_faturamento=faturamento.configuracao(),
+                         resumo=faturamento.resumo_dashboard(),
+                         proximo_mes=primeiro_dia(date.today(), 1).strftime('%Y-%m'),
+                         dia_maximo=DIA_MAXIMO)
+
+
+@app.route('/receitas/faturamento/configuracao', methods=['POST'])
+@login_required
+@admin_required
+def salvar_configuracao_faturamento():
+    """Grava a configuração do faturamento automático."""
+    try:
+        config = {
+            'faturamento_automatico': 1 if request.form.get('faturamento_automatico') == '1' else 0,
+            'faturamento_dia': int(request.form.get('faturamento_dia', '')),
+            'faturamento_dia_iptu': int(request.form.get('faturamento_dia_iptu', '')),
+        }
+        if faturamento.salvar_configuracao(config):
+            flash('Configuração do faturamento automático atualizada.', 'success')
+        else:
+            flash('Erro ao gravar a configuração do faturamento.', 'danger')
+    except ValueError:
+        flash(f'Os dias devem ser números entre 1 e {DIA_MAXIMO}.', 'danger')
+    return redirect(url_for('faturamento_mensal'))
+
+
+@app.route('/receitas/nova', methods=['GET', 'POST'])
+@login_required
+def nova_receita():
+    """Cadastra nova receita."""
+    if request.method == 'POST':
+        try:
+            tipo_receita = request.form.get('tipo_receita', 'Aluguel')
             aluguel = float(request.form.get('aluguel_devido') or 0)
             condominio = float(request.form.get('condominio_devido') or 0)
             iptu = float(request.form.get('iptu_devido') or 0)
@@ -1851,480 +2275,218 @@ def receber_receita(id):
     return redirect(url_for('listar_receitas'))
 
 
-# ============================================================================
-# ROTAS - RELATÓRIOS
-# ============================================================================
-
-@app.route('/relatorios')
+@app.route('/receitas/lote/receber', methods=['POST'])
 @login_required
-def listar_relatorios():
-    """Página de relatórios."""
-    return render_template('relatorios/index.html')
+def receber_receitas_lote():
+    """Marca várias receitas como recebidas na mesma data (valor por item opcional)."""
+    return _executar_lote('receber', 'listar_receitas')
 
 
-@app.route('/relatorios/despesas-pendentes')
+@app.route('/receitas/lote/estornar', methods=['POST'])
 @login_required
-def relatorio_despesas_pendentes():
-    """Relatório de despesas: vincendas e pagas, com filtro de período."""
-    # Filtros
-    filtro_tipo = request.args.get('tipo', '')
-    filtro_data_inicio = request.args.get('data_inicio', '')
-    filtro_data_fim = request.args.get('data_fim', '')
+def estornar_receitas_lote():
+    """Retorna várias receitas recebidas para pendente (ou atrasada, se já vencida)."""
+    return _executar_lote('estornar_receita', 'listar_receitas')
 
-    hoje = date.today()
 
-    # === DESPESAS VINCENDAS (não pagas) ===
-    query_vincendas = """
-        SELECT d.*, i.endereco_completo as imovel_endereco
-        FROM despesas d
-        LEFT JOIN imoveis i ON d.id_imovel = i.id
-        WHERE d.data_pagamento IS NULL
-    """
-    params_vincendas = []
-
-    if filtro_tipo:
-        query_vincendas += " AND d.tipo_despesa = ?"
-        params_vincendas.append(filtro_tipo)
-
-    if filtro_data_inicio:
-        query_vincendas += " AND d.vencimento_previsto >= ?"
-        params_vincendas.append(filtro_data_inicio)
-
-    if filtro_data_fim:
-        query_vincendas += " AND d.vencimento_previsto <= ?"
-        params_vincendas.append(filtro_data_fim)
-
-    query_vincendas += " ORDER BY d.vencimento_previsto ASC"
-    despesas_vincendas = db.execute_query(query_vincendas, tuple(params_vincendas))
+@app.route('/conciliacao', methods=['GET', 'POST'])
+@login_required
+def conciliacao_bancaria():
+    """Lê o extrato bancário (OFX/CSV) e sugere as receitas/despesas de cada lançamento."""
+    sugestoes, sem_conta, lancamentos = None, [], []
+    janela_dias = JANELA_DIAS
 
-    # Adicionar flag de vencida e calcular estatísticas
-    total_vincendas_valor = 0
-    total_vencidas = 0
-    total_a_vencer = 0
+    if request.method == 'POST':
+        arquivo = request.files.get('arquivo')
+        if not arquivo or arquivo.filename == '':
+            flash('Nenhum arquivo selecionado.', 'danger')
+            return redirect(url_for('conciliacao_bancaria'))
+        try:
+            janela_dias = int(request.form.get('janela_dias') or JANELA_DIAS)
+            lancamentos = ler_extrato(arquivo.read(), arquivo.filename)
+            sugestoes, sem_conta = conciliar(db, lancamentos, janela_dias)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('conciliacao_bancaria'))
+        if not lancamentos:
+            flash('Nenhum lançamento encontrado no extrato.', 'warning')
+
+    return render_template('receitas/conciliacao.html',
+                         sugestoes=sugestoes,
+                         sem_conta=sem_conta,
+                         lancamentos=lancamentos,
+                         janela_dias=janela_dias)
+
+
+@app.route('/conciliacao/aplicar', methods=['POST'])
+@login_required
+def aplicar_conciliacao_bancaria():
+    """Baixa as sugestões confirmadas (receitas recebidas e despesas pagas) em uma transação."""
+    try:
+        baixas = []
+        # Cada sugestão marcada vem como "tipo|id|data|valor"
+        for item in request.form.getlist('baixas'):
+            tipo, id_conta, data_lancamento, valor = item.split('|')
+            if tipo not in ('receita', 'despesa'):
+                raise ValueError(f'Tipo inválido: {tipo}')
+            baixas.append((tipo, int(id_conta), date.fromisoformat(data_lancamento), float(valor)))
+        if not baixas:
+            flash('Nenhuma sugestão selecionada.', 'warning')
+            return redirect(url_for('conciliacao_bancaria'))
+
+        resultado = aplicar_conciliacao(db, baixas)
+    except ValueError as e:
+        flash(f'Conciliação não aplicada: {str(e)}', 'danger')
+        return redirect(url_for('conciliacao_bancaria'))
+    except Exception as e:
+        flash(f'Erro ao aplicar a conciliação: {str(e)}', 'danger')
+        return redirect(url_for('conciliacao_bancaria'))
 
-    for despesa in despesas_vincendas:
-        venc = despesa.get('vencimento_previsto')
-        if venc:
-            try:
-                venc_date = datetime.strptime(venc, '%Y-%m-%d').date()
-                despesa['vencida'] = venc_date < hoje
-                if despesa['vencida']:
-                    total_vencidas += 1
-                else:
-                    total_a_vencer += 1
-            except:
-                despesa['vencida'] = False
-                total_a_vencer += 1
-        else:
-            despesa['vencida'] = False
-            total_a_vencer += 1
+    recebidas = sum(1 for r in resultado['receitas'] if r.ok)
+    pagas = sum(1 for r in resultado['despesas'] if r.ok)
+    flash(f'Conciliação aplicada: {recebidas} receita(s) recebida(s) e {pagas} despesa(s) paga(s).', 'success')
+    recusadas = [f"receita #{r.id}: {r.mensagem}" for r in resultado['receitas'] if not r.ok]
+    recusadas += [f"despesa #{r.id}: {r.mensagem}" for r in resultado['despesas'] if not r.ok]
+    if recusadas:
+        flash(f'{len(recusadas)} item(ns) não baixado(s) — ' + '; '.join(recusadas), 'warning')
+    return redirect(url_for('conciliacao_bancaria'))
 
-        total_vincendas_valor += despesa.get('valor_previsto', 0) or 0
 
-    # === DESPESAS PAGAS ===
-    query_pagas = """
-        SELECT d.*, i.endereco_completo as imovel_endereco
-        FROM despesas d
-        LEFT JOIN imoveis i ON d.id_imovel = i.id
-        WHERE d.data_pagamento IS NOT NULL
-    """
-    params_pagas = []
+# ============================================================================
+# ROTAS - RELATÓRIOS
+# ============================================================================
 
-    if filtro_tipo:
-        query_pagas += " AND d.tipo_despesa = ?"
-        params_pagas.append(filtro_tipo)
+@app.route('/relatorios')
+@login_required
+def listar_relatorios():
+    """Página de relatórios."""
+    return render_template('relatorios/index.html')
 
-    if filtro_data_inicio:
-        query_pagas += " AND d.data_pagamento >= ?"
-        params_pagas.append(filtro_data_inicio)
 
-    if filtro_data_fim:
-        query_pagas += " AND d.data_pagamento <= ?"
-        params_pagas.append(filtro_data_fim)
+def _filtros_template(resultado):
+    """Variáveis filtro_<nome> usadas pelos formulários de filtro dos relatórios."""
+    return {f'filtro_{nome}': valor for nome, valor in resultado.filtros.items()}
 
-    query_pagas += " ORDER BY d.data_pagamento DESC"
-    despesas_pagas = db.execute_query(query_pagas, tuple(params_pagas))
 
-    total_pagas_valor = 0
-    for despesa in despesas_pagas:
-        total_pagas_valor += despesa.get('valor_pago', 0) or despesa.get('valor_previsto', 0) or 0
+@app.route('/relatorios/despesas-pendentes')
+@login_required
+def relatorio_despesas_pendentes():
+    """Relatório de despesas: vincendas e pagas, com filtro de período."""
+    resultado = motor_relatorios.obter(RELATORIOS['despesas-pendentes'], request.args)
 
     return render_template('relatorios/despesas_pendentes.html',
-                         despesas_vincendas=despesas_vincendas,
-                         despesas_pagas=despesas_pagas,
-                         total_vincendas=len(despesas_vincendas),
-                         total_vincendas_valor=total_vincendas_valor,
-                         total_vencidas=total_vencidas,
-                         total_a_vencer=total_a_vencer,
-                         total_pagas=len(despesas_pagas),
-                         total_pagas_valor=total_pagas_valor,
-                         filtro_tipo=filtro_tipo,
-                         filtro_data_inicio=filtro_data_inicio,
-                         filtro_data_fim=filtro_data_fim)
+                         relatorio=resultado,
+                         despesas_vincendas=resultado.linhas['vincendas'],
+                         despesas_pagas=resultado.linhas['pagas'],
+                         totais=resultado.totais,
+                         **_filtros_template(resultado))
 
 
 @app.route('/relatorios/despesas-pendentes/excel')
 @login_required
 def relatorio_despesas_pendentes_excel():
     """Exporta relatório de despesas (vincendas + pagas) para Excel com duas abas."""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-    # Filtros
-    filtro_tipo = request.args.get('tipo', '')
-    filtro_data_inicio = request.args.get('data_inicio', '')
-    filtro_data_fim = request.args.get('data_fim', '')
-
-    hoje = date.today()
-
-    # Estilos reutilizáveis
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_align = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Texto do período para o título
-    periodo_txt = ""
-    if filtro_data_inicio and filtro_data_fim:
-        di = datetime.strptime(filtro_data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
-        df = datetime.strptime(filtro_data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
-        periodo_txt = f" - Período: {di} a {df}"
-    elif filtro_data_inicio:
-        di = datetime.strptime(filtro_data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
-        periodo_txt = f" - A partir de {di}"
-    elif filtro_data_fim:
-        df = datetime.strptime(filtro_data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
-        periodo_txt = f" - Até {df}"
-
-    wb = Workbook()
-
-    # ============ ABA 1: DESPESAS VINCENDAS ============
-    ws1 = wb.active
-    ws1.title = "Vincendas"
-
-    query_vincendas = """
-        SELECT d.*, i.endereco_completo as imovel_endereco
-        FROM despesas d
-        LEFT JOIN imoveis i ON d.id_imovel = i.id
-        WHERE d.data_pagamento IS NULL
-    """
-    params_vincendas = []
-
-    if filtro_tipo:
-        query_vincendas += " AND d.tipo_despesa = ?"
-        params_vincendas.append(filtro_tipo)
-    if filtro_data_inicio:
-        query_vincendas += " AND d.vencimento_previsto >= ?"
-        params_vincendas.append(filtro_data_inicio)
-    if filtro_data_fim:
-        query_vincendas += " AND d.vencimento_previsto <= ?"
-        params_vincendas.append(filtro_data_fim)
-
-    query_vincendas += " ORDER BY d.vencimento_previsto ASC"
-    despesas_vincendas = db.execute_query(query_vincendas, tuple(params_vincendas))
-
-    # Título
-    ws1.merge_cells('A1:G1')
-    ws1['A1'] = f"DESPESAS VINCENDAS{periodo_txt}"
-    ws1['A1'].font = Font(bold=True, size=14)
-    ws1['A1'].alignment = Alignment(horizontal="center")
-
-    # Cabeçalhos
-    headers_v = ['ID', 'Imóvel', 'Tipo', 'Descrição', 'Vencimento', 'Valor Previsto', 'Situação']
-    for col, header in enumerate(headers_v, 1):
-        cell = ws1.cell(row=3, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_align
-        cell.border = border
-
-    total_vincendas = 0
-    for row_num, despesa in enumerate(despesas_vincendas, 4):
-        venc = despesa.get('vencimento_previsto')
-        try:
-            venc_date = datetime.strptime(venc, '%Y-%m-%d').date() if venc else None
-            situacao = "VENCIDA" if venc_date and venc_date < hoje else "A Vencer"
-        except:
-            situacao = "A Vencer"
-
-        venc_formatado = datetime.strptime(venc, '%Y-%m-%d').strftime('%d/%m/%Y') if venc else ""
-        valor = despesa.get('valor_previsto', 0) or 0
-        total_vincendas += valor
-
-        dados = [
-            despesa.get('id'),
-            despesa.get('imovel_endereco', ''),
-            despesa.get('tipo_despesa', ''),
-            despesa.get('motivo_despesa', ''),
-            venc_formatado,
-            valor,
-            situacao
-        ]
-        for col, valor_celula in enumerate(dados, 1):
-            cell = ws1.cell(row=row_num, column=col, value=valor_celula)
-            cell.border = border
-            if col == 6:
-                cell.number_format = 'R$ #,##0.00'
-
-    row_total = len(despesas_vincendas) + 4
-    ws1.cell(row=row_total, column=5, value="TOTAL:").font = Font(bold=True)
-    total_cell = ws1.cell(row=row_total, column=6, value=total_vincendas)
-    total_cell.font = Font(bold=True)
-    total_cell.number_format = 'R$ #,##0.00'
-
-    ws1.column_dimensions['A'].width = 8
-    ws1.column_dimensions['B'].width = 35
-    ws1.column_dimensions['C'].width = 15
-    ws1.column_dimensions['D'].width = 25
-    ws1.column_dimensions['E'].width = 15
-    ws1.column_dimensions['F'].width = 15
-    ws1.column_dimensions['G'].width = 12
-
-    # ============ ABA 2: DESPESAS PAGAS ============
-    ws2 = wb.create_sheet("Pagas")
-
-    query_pagas = """
-        SELECT d.*, i.endereco_completo as imovel_endereco
-        FROM despesas d
-        LEFT JOIN imoveis i ON d.id_imovel = i.id
-        WHERE d.data_pagamento IS NOT NULL
-    """
-    params_pagas = []
-
-    if filtro_tipo:
-        query_pagas += " AND d.tipo_despesa = ?"
-        params_pagas.append(filtro_tipo)
-    if filtro_data_inicio:
-        query_pagas += " AND d.data_pagamento >= ?"
-        params_pagas.append(filtro_data_inicio)
-    if filtro_data_fim:
-        query_pagas += " AND d.data_pagamento <= ?"
-        params_pagas.append(filtro_data_fim)
-
-    query_pagas += " ORDER BY d.data_pagamento DESC"
-    despesas_pagas = db.execute_query(query_pagas, tuple(params_pagas))
-
-    # Título
-    ws2.merge_cells('A1:G1')
-    ws2['A1'] = f"DESPESAS PAGAS{periodo_txt}"
-    ws2['A1'].font = Font(bold=True, size=14)
-    ws2['A1'].alignment = Alignment(horizontal="center")
-
-    # Cabeçalhos
-    headers_p = ['ID', 'Imóvel', 'Tipo', 'Descrição', 'Data Pagamento', 'Valor Pago', 'Vencimento']
-    for col, header in enumerate(headers_p, 1):
-        cell = ws2.cell(row=3, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_align
-        cell.border = border
-
-    total_pagas = 0
-    for row_num, despesa in enumerate(despesas_pagas, 4):
-        pgto = despesa.get('data_pagamento')
-        pgto_formatado = datetime.strptime(pgto, '%Y-%m-%d').strftime('%d/%m/%Y') if pgto else ""
-        venc = despesa.get('vencimento_previsto')
-        venc_formatado = datetime.strptime(venc, '%Y-%m-%d').strftime('%d/%m/%Y') if venc else ""
-        valor = despesa.get('valor_pago', 0) or despesa.get('valor_previsto', 0) or 0
-        total_pagas += valor
-
-        dados = [
-            despesa.get('id'),
-            despesa.get('imovel_endereco', ''),
-            despesa.get('tipo_despesa', ''),
-            despesa.get('motivo_despesa', ''),
-            pgto_formatado,
-            valor,
-            venc_formatado
-        ]
-        for col, valor_celula in enumerate(dados, 1):
-            cell = ws2.cell(row=row_num, column=col, value=valor_celula)
-            cell.border = border
-            if col == 6:
-                cell.number_format = 'R$ #,##0.00'
-
-    row_total = len(despesas_pagas) + 4
-    ws2.cell(row=row_total, column=5, value="TOTAL:").font = Font(bold=True)
-    total_cell = ws2.cell(row=row_total, column=6, value=total_pagas)
-    total_cell.font = Font(bold=True)
-    total_cell.number_format = 'R$ #,##0.00'
-
-    ws2.column_dimensions['A'].width = 8
-    ws2.column_dimensions['B'].width = 35
-    ws2.column_dimensions['C'].width = 15
-    ws2.column_dimensions['D'].width = 25
-    ws2.column_dimensions['E'].width = 15
-    ws2.column_dimensions['F'].width = 15
-    ws2.column_dimensions['G'].width = 15
-
-    # Salvar em memória
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    nome_arquivo = f'relatorio_despesas_{timestamp}.xlsx'
-
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=nome_arquivo
-    )
+    return exportar_relatorio('despesas-pendentes', 'xlsx')
 
 
 @app.route('/relatorios/imoveis-desocupados')
 @login_required
 def relatorio_imoveis_desocupados():
     """Relatório de imóveis desocupados."""
-    # Filtros
-    filtro_proprietario = request.args.get('proprietario', '')
-
-    # Query base - imóveis desocupados
-    query = """
-        SELECT * FROM imoveis
-        WHERE ocupado = 'Não'
-    """
-    params = []
-
-    # Aplicar filtro de proprietário
-    if filtro_proprietario:
-        query += " AND proprietario = ?"
-        params.append(filtro_proprietario)
-
-    query += " ORDER BY endereco_completo ASC"
-
-    imoveis = db.execute_query(query, tuple(params))
-
-    # Calcular estatísticas
-    total_imoveis = len(imoveis)
-    total_aluguel_pretendido = sum(i.get('aluguel_pretendido', 0) or 0 for i in imoveis)
-    total_valor_mercado = sum(i.get('valor_mercado', 0) or 0 for i in imoveis)
+    resultado = motor_relatorios.obter(RELATORIOS['imoveis-desocupados'], request.args)
 
     return render_template('relatorios/imoveis_desocupados.html',
-                         imoveis=imoveis,
-                         total_imoveis=total_imoveis,
-                         total_aluguel_pretendido=total_aluguel_pretendido,
-                         total_valor_mercado=total_valor_mercado,
-                         filtro_proprietario=filtro_proprietario)
+                         relatorio=resultado,
+                         imoveis=resultado.linhas['imoveis'],
+                         totais=resultado.totais['imoveis'],
+                         **_filtros_template(resultado))
 
 
 @app.route('/relatorios/imoveis-desocupados/excel')
 @login_required
 def relatorio_imoveis_desocupados_excel():
     """Exporta relatório de imóveis desocupados para Excel."""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-    # Filtros
-    filtro_proprietario = request.args.get('proprietario', '')
-
-    hoje = date.today()
-
-    # Query base - imóveis desocupados
-    query = """
-        SELECT * FROM imoveis
-        WHERE ocupado = 'Não'
-    """
-    params = []
-
-    if filtro_proprietario:
-        query += " AND proprietario = ?"
-        params.append(filtro_proprietario)
-
-    query += " ORDER BY endereco_completo ASC"
-
-    imoveis = db.execute_query(query, tuple(params))
-
-    # Criar Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Imóveis Desocupados"
-
-    # Estilos
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_align = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    return exportar_relatorio('imoveis-desocupados', 'xlsx')
 
-    # Título
-    ws.merge_cells('A1:F1')
-    ws['A1'] = f"RELATÓRIO DE IMÓVEIS DESOCUPADOS - Gerado em {hoje.strftime('%d/%m/%Y')}"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = Alignment(horizontal="center")
 
-    # Cabeçalhos
-    headers = ['ID', 'Endereço', 'Proprietário', 'Tipo/Descrição', 'Aluguel Pretendido', 'Valor de Mercado']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_align
-        cell.border = border
+@app.route('/relatorios/inadimplencia')
+@login_required
+def relatorio_inadimplencia():
+    """Receitas vencidas por faixa de atraso (0-30, 31-60, 61-90 e 90+ dias)."""
+    resultado = motor_relatorios.obter(RELATORIOS['inadimplencia'], request.args)
 
-    # Dados
-    total_aluguel = 0
-    total_mercado = 0
-    for row_num, imovel in enumerate(imoveis, 4):
-        aluguel = imovel.get('aluguel_pretendido', 0) or 0
-        mercado = imovel.get('valor_mercado', 0) or 0
-        total_aluguel += aluguel
-        total_mercado += mercado
+    return render_template('relatorios/inadimplencia.html',
+                         relatorio=resultado,
+                         contratos=resultado.linhas['contratos'],
+                         proprietarios_resumo=resultado.linhas['proprietarios'],
+                         totais=resultado.totais['contratos'],
+                         faixas=FAIXAS_ATRASO,
+                         regras=encargos_atraso.regras(),
+                         **_filtros_template(resultado))
 
-        dados = [
-            imovel.get('id'),
-            imovel.get('endereco_completo', ''),
-            imovel.get('proprietario', '') or '-',
-            imovel.get('tipo_imovel', ''),
-            aluguel,
-            mercado
-        ]
 
-        for col, valor_celula in enumerate(dados, 1):
-            cell = ws.cell(row=row_num, column=col, value=valor_celula)
-            cell.border = border
-            if col in [5, 6]:  # Valores monetários
-                cell.number_format = 'R$ #,##0.00'
-
-    # Total
-    row_total = len(imoveis) + 4
-    ws.cell(row=row_total, column=4, value="TOTAL:").font = Font(bold=True)
-    total_aluguel_cell = ws.cell(row=row_total, column=5, value=total_aluguel)
-    total_aluguel_cell.font = Font(bold=True)
-    total_aluguel_cell.number_format = 'R$ #,##0.00'
-    total_mercado_cell = ws.cell(row=row_total, column=6, value=total_mercado)
-    total_mercado_cell.font = Font(bold=True)
-    total_mercado_cell.number_format = 'R$ #,##0.00'
+@app.route('/relatorios/inadimplencia/encargos', methods=['POST'])
+@login_required
+@admin_required
+def salvar_encargos():
+    """Grava as regras de multa e juros por atraso."""
+    regras = {}
+    for chave in CONFIGURACOES_ENCARGOS:
+        try:
+            valor = float(request.form.get(chave, '').replace(',', '.'))
+        except ValueError:
+            flash('Informe valores numéricos para multa, juros e carência.', 'danger')
+            return redirect(url_for('relatorio_inadimplencia'))
+        if valor < 0:
+            flash('Multa, juros e carência não podem ser negativos.', 'danger')
+            return redirect(url_for('relatorio_inadimplencia'))
+        regras[chave] = valor
+    regras['carencia_dias'] = int(regras['carencia_dias'])
+    regras['gravar_encargos'] = 1 if regras['gravar_encargos'] else 0
+
+    if encargos_atraso.salvar_regras(regras):
+        flash('Regras de multa e juros atualizadas.', 'success')
+    else:
+        flash('Erro ao gravar as regras de multa e juros.', 'danger')
+    return redirect(url_for('relatorio_inadimplencia'))
 
-    # Ajustar largura das colunas
-    ws.column_dimensions['A'].width = 8
-    ws.column_dimensions['B'].width = 45
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 40
-    ws.column_dimensions['E'].width = 18
-    ws.column_dimensions['F'].width = 18
 
-    # Salvar em memória
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+@app.route('/relatorios/irpf')
+@login_required
+def relatorio_irpf():
+    """Aluguéis recebidos por proprietário e mês, e IPTU/condomínio pagos por imóvel, no ano."""
+    resultado = motor_relatorios.obter(RELATORIOS['irpf'], request.args)
+
+    return render_template('relatorios/irpf.html',
+                         relatorio=resultado,
+                         alugueis=resultado.linhas['alugueis'],
+                         dedutiveis=resultado.linhas['dedutiveis'],
+                         totais_alugueis=resultado.totais['alugueis'],
+                         totais_dedutiveis=resultado.totais['dedutiveis'],
+                         meses=MESES_ANO,
+                         ano=ano_irpf(resultado.filtros),
+                         **_filtros_template(resultado))
+
+
+@app.route('/relatorios/<nome>/exportar/<formato>')
+@login_required
+def exportar_relatorio(nome, formato):
+    """Exporta um relatório declarado (Excel, CSV ou PDF) com os filtros da URL."""
+    relatorio = RELATORIOS.get(nome)
+    if relatorio is None or formato not in TIPOS_MIME:
+        flash('Relatório ou formato de exportação inválido.', 'danger')
+        return redirect(url_for('listar_relatorios'))
 
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    nome_arquivo = f'imoveis_desocupados_{timestamp}.xlsx'
+    resultado = motor_relatorios.obter(relatorio, request.args)
+    try:
+        conteudo, mimetype, nome_arquivo = exportar_resultado(resultado, formato)
+    except RuntimeError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('listar_relatorios'))
 
     return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        io.BytesIO(conteudo),
+        mimetype=mimetype,
         as_attachment=True,
         download_name=nome_arquivo
     )
@@ -2373,7 +2535,7 @@ def relatorio_cobrancas_mes_excel():
         ORDER BY c.dia_vencimento ASC, i.endereco_completo ASC
     """
 
-    cobrancas = db.execute_query(query)
+    cobrancas = db.execute_query_leitura(query)
 
     if not cobrancas:
         flash('Nenhum contrato ativo ou prorrogado encontrado.', 'warning')
@@ -2570,7 +2732,7 @@ def relatorio_contratos_excel():
 
     query += " ORDER BY c.status_contrato, i.endereco_completo ASC"
 
-    contratos = db.execute_query(query, tuple(params))
+    contratos = db.execute_query_leitura(query, tuple(params))
 
     if not contratos:
         flash('Nenhum contrato encontrado.', 'warning')
@@ -2714,6 +2876,50 @@ def relatorio_contratos_excel():
     )
 
 
+def _periodo_fluxo_caixa():
+    """Lê e valida o período do fluxo de caixa (data_inicio/data_fim da URL)."""
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+    if not data_inicio or not data_fim:
+        return None, None
+    try:
+        datetime.strptime(data_inicio, '%Y-%m-%d')
+        datetime.strptime(data_fim, '%Y-%m-%d')
+    except ValueError:
+        return None, None
+    return data_inicio, data_fim
+
+
+@app.route('/relatorios/fluxo-caixa')
+@login_required
+def relatorio_fluxo_caixa():
+    """Fluxo de caixa por proprietário (página HTML)."""
+    data_inicio, data_fim = _periodo_fluxo_caixa()
+    if not data_inicio:
+        flash('Informe a data inicial e final para gerar o relatório.', 'warning')
+        return redirect(url_for('listar_relatorios'))
+
+    fluxo = calcular_fluxo_caixa(db, data_inicio, data_fim)
+
+    return render_template('relatorios/fluxo_caixa.html',
+                         fluxo=fluxo,
+                         grupos=fluxo.por_proprietario(),
+                         total=fluxo.totais(),
+                         filtro_data_inicio=data_inicio,
+                         filtro_data_fim=data_fim)
+
+
+@app.route('/relatorios/fluxo-caixa/json')
+@login_required
+def relatorio_fluxo_caixa_json():
+    """Fluxo de caixa por proprietário em JSON (colunar)."""
+    data_inicio, data_fim = _periodo_fluxo_caixa()
+    if not data_inicio:
+        return jsonify({'erro': 'Informe data_inicio e data_fim (AAAA-MM-DD).'}), 400
+
+    return jsonify(calcular_fluxo_caixa(db, data_inicio, data_fim).para_dict())
+
+
 @app.route('/relatorios/fluxo-caixa/excel')
 @login_required
 def relatorio_fluxo_caixa_excel():
@@ -2726,369 +2932,214 @@ def relatorio_fluxo_caixa_excel():
     - Condomínio Total (pago)
     - Saldo
     """
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from collections import defaultdict
-
-    # Obter parâmetros de filtro
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
-
-    if not data_inicio or not data_fim:
+    data_inicio, data_fim = _periodo_fluxo_caixa()
+    if not data_inicio:
         flash('Informe a data inicial e final para gerar o relatório.', 'warning')
         return redirect(url_for('listar_relatorios'))
 
-    # Buscar todos os imóveis (ocupados e desocupados)
-    imoveis = db.execute_query("""
-        SELECT id, endereco_completo, proprietario
-        FROM imoveis
-        ORDER BY proprietario, endereco_completo
-    """)
+    fluxo = calcular_fluxo_caixa(db, data_inicio, data_fim)
 
-    if not imoveis:
+    if not len(fluxo):
         flash('Nenhum imóvel encontrado.', 'warning')
         return redirect(url_for('listar_relatorios'))
 
-    # Buscar receitas de ALUGUEL recebidas no período (por imóvel via contrato)
-    receitas = db.execute_query("""
-        SELECT c.id_imovel, SUM(r.valor_recebido) as total_recebido
-        FROM receitas r
-        JOIN contratos c ON r.id_contrato = c.id
-        WHERE r.data_recebimento IS NOT NULL
-          AND r.data_recebimento BETWEEN ? AND ?
-        GROUP BY c.id_imovel
-    """, (data_inicio, data_fim))
-
-    receitas_por_imovel = {r['id_imovel']: r['total_recebido'] or 0 for r in receitas}
-
-    # Buscar receitas extras vinculadas a imóvel (Empréstimo/Outros com id_imovel)
-    outras_receitas_imovel_q = db.execute_query("""
-        SELECT id_imovel, SUM(valor_recebido) as total_recebido,
-               GROUP_CONCAT(COALESCE(observacoes, tipo_receita), ' | ') as descricoes
-        FROM receitas
-        WHERE tipo_receita != 'Aluguel'
-          AND id_imovel IS NOT NULL
-          AND data_recebimento IS NOT NULL
-          AND data_recebimento BETWEEN ? AND ?
-        GROUP BY id_imovel
-    """, (data_inicio, data_fim))
-
-    outras_rec_por_imovel = {r['id_imovel']: r['total_recebido'] or 0 for r in outras_receitas_imovel_q}
-    desc_rec_por_imovel   = {r['id_imovel']: r['descricoes']     or '' for r in outras_receitas_imovel_q}
-
-    # Buscar receitas extras SEM imóvel (apenas vinculadas ao proprietário)
-    receitas_extras_prop_q = db.execute_query("""
-        SELECT pr.nome as proprietario, SUM(r.valor_recebido) as total_recebido,
-               GROUP_CONCAT(COALESCE(r.observacoes, r.tipo_receita), ' | ') as descricoes
-        FROM receitas r
-        JOIN proprietarios pr ON r.id_proprietario = pr.id
-        WHERE r.id_contrato IS NULL
-          AND r.id_imovel IS NULL
-          AND r.data_recebimento IS NOT NULL
-          AND r.data_recebimento BETWEEN ? AND ?
-        GROUP BY pr.nome
-    """, (data_inicio, data_fim))
-
-    receitas_extras_por_prop = {r['proprietario']: r['total_recebido'] or 0 for r in receitas_extras_prop_q}
-    desc_extras_por_prop     = {r['proprietario']: r['descricoes']     or '' for r in receitas_extras_prop_q}
-
-    # Buscar despesas de IPTU PAGAS no período
-    despesas_iptu = db.execute_query("""
-        SELECT id_imovel, SUM(valor_pago) as total_pago
-        FROM despesas
-        WHERE tipo_despesa = 'IPTU'
-          AND data_pagamento IS NOT NULL
-          AND data_pagamento BETWEEN ? AND ?
-        GROUP BY id_imovel
-    """, (data_inicio, data_fim))
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    nome_arquivo = f'fluxo_caixa_{timestamp}.xlsx'
 
-    iptu_por_imovel = {d['id_imovel']: d['total_pago'] or 0 for d in despesas_iptu}
+    return send_file(
+        io.BytesIO(gerar_excel_fluxo_caixa(fluxo)),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=nome_arquivo
+    )
 
-    # Buscar despesas de Condomínio PAGAS no período
-    despesas_cond = db.execute_query("""
-        SELECT id_imovel, SUM(valor_pago) as total_pago
-        FROM despesas
-        WHERE tipo_despesa = 'Condomínio'
-          AND data_pagamento IS NOT NULL
-          AND data_pagamento BETWEEN ? AND ?
-        GROUP BY id_imovel
-    """, (data_inicio, data_fim))
-
-    cond_por_imovel = {d['id_imovel']: d['total_pago'] or 0 for d in despesas_cond}
-
-    # Buscar outras despesas pagas (não IPTU, não Condomínio) com descrições
-    outras_despesas_q = db.execute_query("""
-        SELECT id_imovel,
-               SUM(valor_pago) as total_pago,
-               GROUP_CONCAT(COALESCE(motivo_despesa, tipo_despesa), ' | ') as descricoes
-        FROM despesas
-        WHERE tipo_despesa NOT IN ('IPTU', 'Condomínio')
-          AND data_pagamento IS NOT NULL
-          AND data_pagamento BETWEEN ? AND ?
-        GROUP BY id_imovel
-    """, (data_inicio, data_fim))
-
-    outras_desp_por_imovel  = {d['id_imovel']: d['total_pago'] or 0   for d in outras_despesas_q}
-    desc_desp_por_imovel    = {d['id_imovel']: d['descricoes'] or ''   for d in outras_despesas_q}
-
-    # Agrupar dados por proprietário
-    dados_por_proprietario = defaultdict(list)
-    for imovel in imoveis:
-        proprietario = imovel['proprietario'] or 'Sem Proprietário'
-        imovel_id = imovel['id']
-
-        receita_aluguel = receitas_por_imovel.get(imovel_id, 0)
-        outras_receitas = outras_rec_por_imovel.get(imovel_id, 0)
-        iptu            = iptu_por_imovel.get(imovel_id, 0)
-        condominio      = cond_por_imovel.get(imovel_id, 0)
-        outras          = outras_desp_por_imovel.get(imovel_id, 0)
-        saldo           = receita_aluguel + outras_receitas - iptu - condominio - outras
-
-        dados_por_proprietario[proprietario].append({
-            'endereco':        imovel['endereco_completo'],
-            'receita_aluguel': receita_aluguel,
-            'outras_receitas': outras_receitas,
-            'iptu':            -iptu        if iptu        else 0,
-            'condominio':      -condominio  if condominio  else 0,
-            'outras_despesas': -outras      if outras      else 0,
-            'saldo':           saldo,
-            'desc_despesas':   desc_desp_por_imovel.get(imovel_id, ''),
-            'desc_receitas':   desc_rec_por_imovel.get(imovel_id, ''),
-        })
-
-    # Adicionar receitas extras SEM imóvel (Empréstimos/Outros por proprietário)
-    for prop_nome, total_extra in receitas_extras_por_prop.items():
-        if total_extra > 0:
-            dados_por_proprietario[prop_nome].append({
-                'endereco':        '   Empréstimos / Outras Receitas',
-                'receita_aluguel': 0,
-                'outras_receitas': total_extra,
-                'iptu':            0,
-                'condominio':      0,
-                'outras_despesas': 0,
-                'saldo':           total_extra,
-                'desc_despesas':   '',
-                'desc_receitas':   desc_extras_por_prop.get(prop_nome, ''),
-            })
 
-    # Criar Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Fluxo de Caixa"
+def _periodo_fluxo_mensal():
+    """Lê e valida o intervalo de meses do fluxo mensal (padrão: últimos 12 meses)."""
+    hoje = date.today()
+    padrao_fim = hoje.strftime('%Y-%m')
+    padrao_inicio = f"{hoje.year - 1}-{hoje.month:02d}" if hoje.month == 12 else f"{hoje.year - 1}-{hoje.month + 1:02d}"
+    mes_inicio = request.args.get('mes_inicio') or padrao_inicio
+    mes_fim = request.args.get('mes_fim') or padrao_fim
 
-    # Estilos
-    header_fill = PatternFill(start_color="1565C0", end_color="1565C0", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    proprietario_fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
-    proprietario_font = Font(bold=True, size=11)
-    subtotal_fill = PatternFill(start_color="BBDEFB", end_color="BBDEFB", fill_type="solid")
-    subtotal_font = Font(bold=True)
-    total_fill = PatternFill(start_color="0D47A1", end_color="0D47A1", fill_type="solid")
-    total_font = Font(bold=True, color="FFFFFF", size=12)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    money_format = 'R$ #,##0.00'
+    try:
+        inicio = datetime.strptime(mes_inicio, '%Y-%m')
+        fim = datetime.strptime(mes_fim, '%Y-%m')
+    except ValueError:
+        return None, None, 'Informe os meses no formato AAAA-MM.'
 
-    # Formatar datas para exibição
-    data_inicio_fmt = datetime.strptime(data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
-    data_fim_fmt = datetime.strptime(data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
+    quantidade = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    if quantidade < 1:
+        return None, None, 'O mês final deve ser igual ou posterior ao inicial.'
+    if quantidade > MAXIMO_MESES:
+        return None, None, f'O intervalo máximo é de {MAXIMO_MESES} meses.'
+    return mes_inicio, mes_fim, None
 
-    # Título
-    ws.merge_cells('A1:I1')
-    ws['A1'] = "FLUXO DE CAIXA POR PROPRIETÁRIO"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = Alignment(horizontal="center")
 
-    # Período
-    ws.merge_cells('A2:I2')
-    ws['A2'] = f"Período: {data_inicio_fmt} a {data_fim_fmt}"
-    ws['A2'].font = Font(size=11, italic=True)
-    ws['A2'].alignment = Alignment(horizontal="center")
+@app.route('/relatorios/fluxo-mensal')
+@login_required
+def relatorio_fluxo_mensal():
+    """Fluxo de caixa mês a mês por imóvel e proprietário (matriz)."""
+    mes_inicio, mes_fim, erro = _periodo_fluxo_mensal()
+    if erro:
+        flash(erro, 'warning')
+        return redirect(url_for('listar_relatorios'))
 
-    # Subtítulo
-    ws.merge_cells('A3:I3')
-    ws['A3'] = f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-    ws['A3'].font = Font(size=10, italic=True)
-    ws['A3'].alignment = Alignment(horizontal="center")
-
-    # Cabeçalhos (9 colunas)
-    headers = ['Proprietário / Endereço', 'Aluguel', 'Outras Receitas', 'IPTU', 'Condomínio',
-               'Outras Despesas', 'Saldo', 'Desc. Despesas', 'Desc. Receitas']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=5, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = border
+    componente = request.args.get('componente', 'saldo')
+    if componente not in COMPONENTES_MENSAIS:
+        componente = 'saldo'
 
-    # Dados
-    row_num = 6
-    total_geral_aluguel          = 0
-    total_geral_outras_receitas  = 0
-    total_geral_iptu             = 0
-    total_geral_condominio       = 0
-    total_geral_outras_despesas  = 0
-    total_geral_saldo            = 0
-
-    # Ordenar proprietários
-    proprietarios_ordenados = sorted(dados_por_proprietario.keys())
-
-    for proprietario in proprietarios_ordenados:
-        imoveis_prop = dados_por_proprietario[proprietario]
-
-        # Linha do proprietário
-        ws.merge_cells(f'A{row_num}:I{row_num}')
-        cell = ws.cell(row=row_num, column=1, value=f"📁 {proprietario}")
-        cell.fill = proprietario_fill
-        cell.font = proprietario_font
-        cell.border = border
-        for col in range(2, 10):
-            ws.cell(row=row_num, column=col).fill = proprietario_fill
-            ws.cell(row=row_num, column=col).border = border
-        row_num += 1
-
-        # Imóveis do proprietário
-        subtotal_aluguel         = 0
-        subtotal_outras_receitas = 0
-        subtotal_iptu            = 0
-        subtotal_condominio      = 0
-        subtotal_outras_despesas = 0
-        subtotal_saldo           = 0
-
-        for imovel in imoveis_prop:
-            ws.cell(row=row_num, column=1, value=f"   {imovel['endereco']}").border = border
-
-            cell_aluguel = ws.cell(row=row_num, column=2, value=imovel['receita_aluguel'])
-            cell_aluguel.number_format = money_format
-            cell_aluguel.border = border
-
-            cell_outras_rec = ws.cell(row=row_num, column=3, value=imovel['outras_receitas'])
-            cell_outras_rec.number_format = money_format
-            cell_outras_rec.border = border
-            if imovel['outras_receitas'] > 0:
-                cell_outras_rec.font = Font(color="1565C0")
-
-            cell_iptu = ws.cell(row=row_num, column=4, value=imovel['iptu'])
-            cell_iptu.number_format = money_format
-            cell_iptu.border = border
-            if imovel['iptu'] < 0:
-                cell_iptu.font = Font(color="FF0000")
-
-            cell_cond = ws.cell(row=row_num, column=5, value=imovel['condominio'])
-            cell_cond.number_format = money_format
-            cell_cond.border = border
-            if imovel['condominio'] < 0:
-                cell_cond.font = Font(color="FF0000")
-
-            cell_outras = ws.cell(row=row_num, column=6, value=imovel['outras_despesas'])
-            cell_outras.number_format = money_format
-            cell_outras.border = border
-            if imovel['outras_despesas'] < 0:
-                cell_outras.font = Font(color="FF0000")
-
-            cell_saldo = ws.cell(row=row_num, column=7, value=imovel['saldo'])
-            cell_saldo.number_format = money_format
-            cell_saldo.border = border
-            if imovel['saldo'] < 0:
-                cell_saldo.font = Font(color="FF0000")
-
-            cell_desc_d = ws.cell(row=row_num, column=8, value=imovel['desc_despesas'])
-            cell_desc_d.border = border
-            cell_desc_d.alignment = Alignment(wrap_text=True, vertical="top")
-
-            cell_desc_r = ws.cell(row=row_num, column=9, value=imovel['desc_receitas'])
-            cell_desc_r.border = border
-            cell_desc_r.alignment = Alignment(wrap_text=True, vertical="top")
-
-            subtotal_aluguel         += imovel['receita_aluguel']
-            subtotal_outras_receitas += imovel['outras_receitas']
-            subtotal_iptu            += imovel['iptu']
-            subtotal_condominio      += imovel['condominio']
-            subtotal_outras_despesas += imovel['outras_despesas']
-            subtotal_saldo           += imovel['saldo']
-
-            row_num += 1
-
-        # Subtotal do proprietário
-        ws.cell(row=row_num, column=1, value=f"   Subtotal {proprietario}").font = subtotal_font
-        ws.cell(row=row_num, column=1).fill = subtotal_fill
-        ws.cell(row=row_num, column=1).border = border
-
-        for col, valor in enumerate([subtotal_aluguel, subtotal_outras_receitas, subtotal_iptu,
-                                     subtotal_condominio, subtotal_outras_despesas, subtotal_saldo], 2):
-            cell = ws.cell(row=row_num, column=col, value=valor)
-            cell.number_format = money_format
-            cell.font = subtotal_font
-            cell.fill = subtotal_fill
-            cell.border = border
-            if valor < 0:
-                cell.font = Font(bold=True, color="FF0000")
-
-        # Colunas de descrição: vazias no subtotal
-        for col in [8, 9]:
-            ws.cell(row=row_num, column=col).fill = subtotal_fill
-            ws.cell(row=row_num, column=col).border = border
-
-        total_geral_aluguel         += subtotal_aluguel
-        total_geral_outras_receitas += subtotal_outras_receitas
-        total_geral_iptu            += subtotal_iptu
-        total_geral_condominio      += subtotal_condominio
-        total_geral_outras_despesas += subtotal_outras_despesas
-        total_geral_saldo           += subtotal_saldo
-
-        row_num += 2  # Espaço entre proprietários
-
-    # Total Geral
-    ws.cell(row=row_num, column=1, value="TOTAL GERAL").font = total_font
-    ws.cell(row=row_num, column=1).fill = total_fill
-    ws.cell(row=row_num, column=1).border = border
-
-    for col, valor in enumerate([total_geral_aluguel, total_geral_outras_receitas, total_geral_iptu,
-                                  total_geral_condominio, total_geral_outras_despesas, total_geral_saldo], 2):
-        cell = ws.cell(row=row_num, column=col, value=valor)
-        cell.number_format = money_format
-        cell.font = total_font
-        cell.fill = total_fill
-        cell.border = border
-        if valor < 0:
-            cell.font = Font(bold=True, color="FF0000", size=12)
+    fluxo = calcular_fluxo_mensal(db, mes_inicio, mes_fim)
 
-    # Colunas de descrição: vazias no total geral
-    for col in [8, 9]:
-        ws.cell(row=row_num, column=col).fill = total_fill
-        ws.cell(row=row_num, column=col).border = border
+    return render_template('relatorios/fluxo_mensal.html',
+                         fluxo=fluxo,
+                         grupos=fluxo.grupos(),
+                         matriz=fluxo.valores[componente],
+                         componentes=COMPONENTES_MENSAIS,
+                         filtro_componente=componente,
+                         filtro_mes_inicio=mes_inicio,
+                         filtro_mes_fim=mes_fim)
 
-    # Ajustar largura das colunas
-    ws.column_dimensions['A'].width = 50
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 18
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 18
-    ws.column_dimensions['G'].width = 15
-    ws.column_dimensions['H'].width = 35
-    ws.column_dimensions['I'].width = 35
 
-    # Salvar em memória
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+@app.route('/relatorios/fluxo-mensal/excel')
+@login_required
+def relatorio_fluxo_mensal_excel():
+    """Exporta o fluxo mensal (uma aba por componente) para Excel."""
+    mes_inicio, mes_fim, erro = _periodo_fluxo_mensal()
+    if erro:
+        flash(erro, 'warning')
+        return redirect(url_for('listar_relatorios'))
+
+    fluxo = calcular_fluxo_mensal(db, mes_inicio, mes_fim)
+
+    # Arquivo em disco a partir de 8 MB: a planilha não precisa caber na memória
+    arquivo = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    gerar_excel_fluxo_mensal(fluxo, arquivo)
+    arquivo.seek(0)
 
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    nome_arquivo = f'fluxo_caixa_{timestamp}.xlsx'
+    nome_arquivo = f'fluxo_mensal_{timestamp}.xlsx'
 
     return send_file(
-        output,
+        arquivo,
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         as_attachment=True,
         download_name=nome_arquivo
     )
 
 
+def _ano_dimob():
+    """Ano-calendário da DIMOB pela URL (padrão: ano anterior)."""
+    return request.args.get('ano', type=int) or date.today().year - 1
+
+
+@app.route('/relatorios/dimob')
+@login_required
+def relatorio_dimob():
+    """DIMOB: dados do declarante e conferência das locações do ano antes de gerar o arquivo."""
+    ano = _ano_dimob()
+    resumo, erro = None, None
+
+    # Passada de conferência: percorre as locações sem guardar as linhas geradas
+    if request.args.get('ano'):
+        resumo = ResumoDimob(ano=ano)
+        try:
+            for _ in gerar_registros(db, ano, resumo):
+                pass
+        except ValueError as e:
+            resumo, erro = None, str(e)
+
+    return render_template('relatorios/dimob.html',
+                         ano=ano,
+                         resumo=resumo,
+                         erro=erro,
+                         declarante=ler_declarante(db))
+
+
+@app.route('/relatorios/dimob/declarante', methods=['POST'])
+@login_required
+@admin_required
+def salvar_declarante_dimob():
+    """Grava os dados do declarante da DIMOB em configuracoes."""
+    for chave in CONFIGURACOES_DIMOB:
+        db.execute_update("UPDATE configuracoes SET valor = ?, data_atualizacao = CURRENT_TIMESTAMP WHERE chave = ?",
+                          (request.form.get(chave, '').strip(), chave))
+    flash('Dados do declarante da DIMOB atualizados.', 'success')
+    return redirect(url_for('relatorio_dimob'))
+
+
+@app.route('/relatorios/dimob/arquivo')
+@login_required
+def relatorio_dimob_arquivo():
+    """Gera o arquivo de importação da DIMOB do ano (leiaute de tamanho fixo)."""
+    ano = _ano_dimob()
+
+    # Arquivo em disco a partir de 8 MB: os registros são gravados um a um
+    arquivo = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    texto = io.TextIOWrapper(arquivo, encoding='latin-1', newline='')
+    try:
+        resumo = gravar_arquivo(db, ano, texto)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('relatorio_dimob', ano=ano))
+    texto.flush()
+    texto.detach()
+    arquivo.seek(0)
+
+    if resumo.rejeitadas:
+        print(f"⚠ DIMOB {ano}: {len(resumo.rejeitadas)} locação(ões) fora do arquivo por CPF/CNPJ inválido")
+
+    return send_file(
+        arquivo,
+        mimetype='text/plain',
+        as_attachment=True,
+        download_name=f'dimob_{ano}.txt'
+    )
+
+
+# ============================================================================
+# ROTAS - SÉRIES PARA GRÁFICOS (JSON)
+# ============================================================================
+
+@app.route('/api/series/<nome>')
+@login_required
+def api_serie(nome):
+    """Série mensal para gráficos (receitas, despesas, inadimplencia, atraso, ocupacao).
+
+    Parâmetros: mes_inicio e mes_fim (AAAA-MM, padrão: últimos 24 meses) e
+    pontos (máximo de pontos devolvidos). Responde 304 se o ETag não mudou.
+    """
+    if nome not in SERIES:
+        return jsonify({'erro': f"Série inválida. Use: {', '.join(SERIES)}."}), 404
+
+    hoje = date.today()
+    mes_fim = request.args.get('mes_fim') or hoje.strftime('%Y-%m')
+    mes_inicio = request.args.get('mes_inicio') or f"{hoje.year - 2}-{hoje.month:02d}"
+    try:
+        inicio = datetime.strptime(mes_inicio, '%Y-%m')
+        fim = datetime.strptime(mes_fim, '%Y-%m')
+        pontos = int(request.args.get('pontos', PONTOS_PADRAO))
+    except ValueError:
+        return jsonify({'erro': 'Informe mes_inicio/mes_fim no formato AAAA-MM e pontos como número.'}), 400
+
+    quantidade = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    if quantidade < 1 or quantidade > MAXIMO_MESES_SERIE:
+        return jsonify({'erro': f'O intervalo deve ter de 1 a {MAXIMO_MESES_SERIE} meses.'}), 400
+    pontos = max(PONTOS_MINIMO, min(pontos, PONTOS_MAXIMO))
+    # strptime aceita '2026-1': o SQL e o ETag recebem sempre AAAA-MM
+    mes_inicio, mes_fim = inicio.strftime('%Y-%m'), fim.strftime('%Y-%m')
+
+    # ETag sai da versão dos dados: se o navegador já tem esta resposta, nem consulta
+    etag = etag_serie(db, nome, mes_inicio, mes_fim, pontos)
+    if request.if_none_match.contains(etag):
+        resposta = app.response_class(status=304)
+    else:
+        resposta = jsonify(calcular_serie(db, nome, mes_inicio, mes_fim, pontos))
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+
 # ============================================================================
 # ROTAS - EXPORTAR E IMPORTAR DADOS
 # ============================================================================
@@ -3098,7 +3149,14 @@ def relatorio_fluxo_caixa_excel():
 def pagina_dados():
     """Pagina de exportacao e importacao de dados."""
     ultimo_backup = obter_ultimo_backup()
-    return render_template('dados/index.html', ultimo_backup=ultimo_backup)
+    status_wal = obter_status_wal()
+    status_replica = obter_status_replica()
+    ultimo_ensaio = backup_system.catalogo.ultimo_ensaio()
+    if ultimo_ensaio:
+        ultimo_ensaio = {**ultimo_ensaio, 'executado_em': datetime.fromisoformat(ultimo_ensaio['executado_em'])}
+    return render_template('dados/index.html', ultimo_backup=ultimo_backup,
+                           status_wal=status_wal, status_replica=status_replica,
+                           ultimo_ensaio=ultimo_ensaio)
 
 
 @app.route('/dados/exportar')
@@ -3114,7 +3172,7 @@ def exportar_dados():
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             for tabela in tabelas:
                 # Buscar dados da tabela
-                dados = db.get_all(tabela)
+                dados = db.execute_query_leitura(f"SELECT * FROM {tabela}")
 
                 if not dados:
                     continue
@@ -3213,7 +3271,8 @@ def importar_dados():
         ordem_tabelas = ['imoveis', 'pessoas', 'contratos', 'despesas', 'receitas']
         resultados = []
 
-        with zipfile.ZipFile(arquivo, 'r') as zip_file:
+        # Trava de escrita: uma restauração online não roda no meio da importação
+        with db.trava_escrita(), zipfile.ZipFile(arquivo, 'r') as zip_file:
             arquivos_no_zip = zip_file.namelist()
 
             for tabela in ordem_tabelas:
@@ -3307,33 +3366,41 @@ def executar_backup():
 @app.route('/dados/backup')
 @login_required
 def backup_banco():
-    """Faz download do arquivo de banco de dados SQLite."""
+    """Faz download de uma cópia consistente e compactada do banco SQLite."""
     try:
-        import shutil
-
-        # Caminho do banco de dados
-        db_path = os.path.join(os.path.dirname(__file__), 'database', 'imobipro.db')
-
-        if not os.path.exists(db_path):
+        if not os.path.exists(db.db_path):
             flash('Arquivo de banco de dados não encontrado.', 'danger')
             return redirect(url_for('pagina_dados'))
 
-        # Criar cópia temporária para evitar problemas de lock
+        # VACUUM INTO gera um snapshot consistente (inclui o -wal) sem
+        # bloquear as escritas da aplicação; o arquivo é removido após o envio
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        temp_dir = tempfile.mkdtemp()
         nome_backup = f'imobipro_backup_{timestamp}.db'
+        temp_dir = tempfile.mkdtemp()
         temp_path = os.path.join(temp_dir, nome_backup)
 
-        # Copiar banco de dados
-        shutil.copy2(db_path, temp_path)
+        sucesso, resultado = backup_system.gerar_copia_compacta(temp_path)
+        if not sucesso:
+            os.rmdir(temp_dir)
+            flash(f'Erro ao fazer backup: {resultado}', 'danger')
+            return redirect(url_for('pagina_dados'))
 
-        # Enviar arquivo para download
-        return send_file(
+        def remover_temporario():
+            try:
+                os.remove(temp_path)
+                os.rmdir(temp_dir)
+            except OSError:
+                pass
+
+        # Enviar arquivo para download (em streaming, direto do snapshot)
+        response = send_file(
             temp_path,
             mimetype='application/x-sqlite3',
             as_attachment=True,
             download_name=nome_backup
         )
+        response.call_on_close(remover_temporario)
+        return response
 
     except Exception as e:
         flash(f'Erro ao fazer backup: {str(e)}', 'danger')
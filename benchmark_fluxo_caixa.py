@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+IMOBIPRO - BENCHMARK DO FLUXO DE CAIXA
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Gera um banco sintético com 10 anos de movimentação e compara o
+           cálculo antigo do fluxo de caixa (sete consultas, uma conexão
+           cada, junção em dicionários Python) com o motor de consulta única
+           (utils/fluxo_caixa.py). Confere também se os resultados são iguais.
+================================================================================
+
+Uso:
+    python benchmark_fluxo_caixa.py                 (80 imóveis, 10 anos)
+    python benchmark_fluxo_caixa.py --imoveis 300 --anos 10 --repeticoes 10
+"""
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+import statistics
+import time
+from collections import defaultdict
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from utils.fluxo_caixa import calcular_fluxo_caixa, ROTULO_EXTRAS
+
+PROPRIETARIOS = ['Marco', 'Beatriz', 'Gilma', 'Antonio', 'Marco e Bia']
+TIPOS_OUTRAS_DESPESAS = ['Manutenção', 'Reforma', 'Outros']
+
+
+def gerar_dados(db: DatabaseManager, imoveis: int, anos: int, semente: int = 42):
+    """
+    Popula o banco com imóveis, contratos, receitas mensais e despesas.
+
+    Args:
+        db (DatabaseManager): Banco de destino (já inicializado)
+        imoveis (int): Quantidade de imóveis
+        anos (int): Anos de movimentação (terminando no ano atual)
+        semente (int): Semente do gerador aleatório (resultados reproduzíveis)
+    """
+    aleatorio = random.Random(semente)
+    ano_final = date.today().year
+    meses = [(ano, mes) for ano in range(ano_final - anos + 1, ano_final + 1) for mes in range(1, 13)]
+
+    conn = db.connect()
+    try:
+        ids_proprietarios = {nome: id_ for id_, nome in conn.execute("SELECT id, nome FROM proprietarios")}
+
+        for n in range(imoveis):
+            conn.execute("""
+                INSERT INTO imoveis (endereco_completo, tipo_imovel, proprietario, aluguel_pretendido,
+                                     valor_iptu_anual, condominio_total)
+                VALUES (?, 'Apartamento', ?, ?, ?, ?)
+            """, (f"Rua Sintética, {n + 1}", aleatorio.choice(PROPRIETARIOS + [None]),
+                  aleatorio.randint(800, 4000), aleatorio.randint(300, 3000), aleatorio.randint(0, 900)))
+
+        # Um inquilino e um contrato por imóvel em 3/4 dos imóveis
+        receitas, despesas = [], []
+        for id_imovel in range(1, imoveis + 1):
+            if id_imovel % 4:
+                conn.execute("INSERT INTO pessoas (situacao, nome_completo) VALUES ('Inquilino', ?)",
+                             (f"Inquilino {id_imovel}",))
+                id_pessoa = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                valor = aleatorio.randint(800, 4000)
+                conn.execute("""
+                    INSERT INTO contratos (id_imovel, id_inquilino, inicio_contrato, valor_aluguel, dia_vencimento)
+                    VALUES (?, ?, ?, ?, 10)
+                """, (id_imovel, id_pessoa, f"{meses[0][0]}-01-01", valor))
+                id_contrato = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+                for ano, mes in meses:
+                    recebido = aleatorio.random() < 0.9
+                    receitas.append((id_contrato, None, None, 'Aluguel', f"{ano}-{mes:02d}-01", valor, valor,
+                                     f"{ano}-{mes:02d}-10",
+                                     f"{ano}-{mes:02d}-{aleatorio.randint(5, 20):02d}" if recebido else None,
+                                     valor if recebido else None,
+                                     'Recebido' if recebido else 'Pendente', None))
+
+            for ano, mes in meses:
+                data = f"{ano}-{mes:02d}-{aleatorio.randint(1, 28):02d}"
+                if id_imovel % 2:
+                    valor = aleatorio.randint(200, 900)
+                    despesas.append((id_imovel, 'Condomínio', None, valor, valor, data, data))
+                if mes == 2:
+                    valor = aleatorio.randint(300, 3000)
+                    despesas.append((id_imovel, 'IPTU', None, valor, valor, data, data))
+                if aleatorio.random() < 0.05:
+                    valor = aleatorio.randint(100, 5000)
+                    pago = aleatorio.random() < 0.8
+                    despesas.append((id_imovel, aleatorio.choice(TIPOS_OUTRAS_DESPESAS), f"Serviço {ano}/{mes}",
+                                     valor, valor if pago else None, data, data if pago else None))
+                if aleatorio.random() < 0.02:
+                    valor = aleatorio.randint(100, 2000)
+                    receitas.append((None, id_imovel, None, 'Outros', f"{ano}-{mes:02d}-01", valor, valor,
+                                     data, data, valor, 'Recebido', f"Multa {ano}/{mes}"))
+
+        # Empréstimos sem imóvel, ligados só ao proprietário
+        for ano, mes in meses:
+            if aleatorio.random() < 0.3:
+                valor = aleatorio.randint(500, 10000)
+                data = f"{ano}-{mes:02d}-15"
+                receitas.append((None, None, ids_proprietarios[aleatorio.choice(PROPRIETARIOS)], 'Empréstimo',
+                                 f"{ano}-{mes:02d}-01", valor, valor, data, data, valor, 'Recebido', None))
+
+        conn.executemany("""
+            INSERT INTO receitas (id_contrato, id_imovel, id_proprietario, tipo_receita, mes_referencia,
+                                  aluguel_devido, valor_total_devido, vencimento_previsto, data_recebimento,
+                                  valor_recebido, status, observacoes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, receitas)
+        conn.executemany("""
+            INSERT INTO despesas (id_imovel, tipo_despesa, motivo_despesa, valor_previsto, valor_pago,
+                                  vencimento_previsto, data_pagamento)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, despesas)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    return len(receitas), len(despesas)
+
+
+def fluxo_caixa_legado(db: DatabaseManager, data_inicio: str, data_fim: str) -> list:
+    """
+    Cálculo anterior do relatório: sete consultas separadas e junção em Python.
+
+    Returns:
+        list: Linhas (proprietario, endereco, aluguel, outras, iptu, cond, outras_desp, saldo, descrições)
+    """
+    imoveis = db.execute_query("""
+        SELECT id, endereco_completo, proprietario FROM imoveis ORDER BY proprietario, endereco_completo
+    """)
+    receitas = db.execute_query("""
+        SELECT c.id_imovel, SUM(r.valor_recebido) as total_recebido
+        FROM receitas r JOIN contratos c ON r.id_contrato = c.id
+        WHERE r.data_recebimento IS NOT NULL AND r.data_recebimento BETWEEN ? AND ?
+        GROUP BY c.id_imovel
+    """, (data_inicio, data_fim))
+    outras_receitas = db.execute_query("""
+        SELECT id_imovel, SUM(valor_recebido) as total_recebido,
+               GROUP_CONCAT(COALESCE(observacoes, tipo_receita), ' | ') as descricoes
+        FROM receitas
+        WHERE tipo_receita != 'Aluguel' AND id_imovel IS NOT NULL
+          AND data_recebimento IS NOT NULL AND data_recebimento BETWEEN ? AND ?
+        GROUP BY id_imovel
+    """, (data_inicio, data_fim))
+    extras = db.execute_query("""
+        SELECT pr.nome as proprietario, SUM(r.valor_recebido) as total_recebido,
+               GROUP_CONCAT(COALESCE(r.observacoes, r.tipo_receita), ' | ') as descricoes
+        FROM receitas r JOIN proprietarios pr ON r.id_proprietario = pr.id
+        WHERE r.id_contrato IS NULL AND r.id_imovel IS NULL
+          AND r.data_recebimento IS NOT NULL AND r.data_recebimento BETWEEN ? AND ?
+        GROUP BY pr.nome
+    """, (data_inicio, data_fim))
+    iptu = db.execute_query("""
+        SELECT id_imovel, SUM(valor_pago) as total_pago FROM despesas
+        WHERE tipo_despesa = 'IPTU' AND data_pagamento IS NOT NULL AND data_pagamento BETWEEN ? AND ?
+        GROUP BY id_imovel
+    """, (data_inicio, data_fim))
+    condominio = db.execute_query("""
+        SELECT id_imovel, SUM(valor_pago) as total_pago FROM despesas
+        WHERE tipo_despesa = 'Condomínio' AND data_pagamento IS NOT NULL AND data_pagamento BETWEEN ? AND ?
+        GROUP BY id_imovel
+    """, (data_inicio, data_fim))
+    outras_despesas = db.execute_query("""
+        SELECT id_imovel, SUM(valor_pago) as total_pago,
+               GROUP_CONCAT(COALESCE(motivo_despesa, tipo_despesa), ' | ') as descricoes
+        FROM despesas
+        WHERE tipo_despesa NOT IN ('IPTU', 'Condomínio')
+          AND data_pagamento IS NOT NULL AND data_pagamento BETWEEN ? AND ?
+        GROUP BY id_imovel
+    """, (data_inicio, data_fim))
+
+    aluguel_por_imovel = {r['id_imovel']: r['total_recebido'] or 0 for r in receitas}
+    outras_por_imovel = {r['id_imovel']: (r['total_recebido'] or 0, r['descricoes'] or '') for r in outras_receitas}
+    iptu_por_imovel = {d['id_imovel']: d['total_pago'] or 0 for d in iptu}
+    cond_por_imovel = {d['id_imovel']: d['total_pago'] or 0 for d in condominio}
+    desp_por_imovel = {d['id_imovel']: (d['total_pago'] or 0, d['descricoes'] or '') for d in outras_despesas}
+
+    por_proprietario = defaultdict(list)
+    for imovel in imoveis:
+        id_imovel = imovel['id']
+        aluguel = aluguel_por_imovel.get(id_imovel, 0)
+        outras, desc_receitas = outras_por_imovel.get(id_imovel, (0, ''))
+        valor_iptu = iptu_por_imovel.get(id_imovel, 0)
+        valor_cond = cond_por_imovel.get(id_imovel, 0)
+        valor_desp, desc_despesas = desp_por_imovel.get(id_imovel, (0, ''))
+        por_proprietario[imovel['proprietario'] or 'Sem Proprietário'].append((
+            imovel['endereco_completo'], aluguel, outras, -valor_iptu, -valor_cond, -valor_desp,
+            aluguel + outras - valor_iptu - valor_cond - valor_desp, desc_despesas, desc_receitas,
+        ))
+    for extra in extras:
+        if (extra['total_recebido'] or 0) > 0:
+            por_proprietario[extra['proprietario']].append((
+                ROTULO_EXTRAS, 0, extra['total_recebido'], 0, 0, 0, extra['total_recebido'],
+                '', extra['descricoes'] or '',
+            ))
+
+    return [(proprietario,) + linha
+            for proprietario in sorted(por_proprietario)
+            for linha in por_proprietario[proprietario]]
+
+
+def _normalizar(linha: tuple) -> tuple:
+    """Arredonda valores e ordena as descrições (GROUP_CONCAT não garante ordem)."""
+    *inicio, desc_despesas, desc_receitas = linha
+    valores = tuple(round(v, 2) if isinstance(v, (int, float)) else v for v in inicio)
+    return valores + (sorted(desc_despesas.split(' | ')), sorted(desc_receitas.split(' | ')))
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    """Mediana do tempo de execução em milissegundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do fluxo de caixa (legado x consulta única)')
+    parser.add_argument('--imoveis', type=int, default=80)
+    parser.add_argument('--anos', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db = DatabaseManager(os.path.join(diretorio, 'benchmark.db'))
+        db.initialize_database()
+
+        inicio = time.perf_counter()
+        total_receitas, total_despesas = gerar_dados(db, args.imoveis, args.anos)
+        print(f"✓ Banco sintético: {args.imoveis} imóveis, {args.anos} anos, "
+              f"{total_receitas} receitas, {total_despesas} despesas "
+              f"({time.perf_counter() - inicio:.1f}s)")
+
+        ano_final = date.today().year
+        periodos = [
+            ('1 mês', f"{ano_final}-01-01", f"{ano_final}-01-31"),
+            ('1 ano', f"{ano_final}-01-01", f"{ano_final}-12-31"),
+            (f"{args.anos} anos", f"{ano_final - args.anos + 1}-01-01", f"{ano_final}-12-31"),
+        ]
+
+        print(f"\n{'Período':<10} {'Linhas':>7} {'Legado (ms)':>12} {'Único (ms)':>11} {'Ganho':>7}  Resultado")
+        print('-' * 65)
+        for rotulo, data_inicio, data_fim in periodos:
+            legado = fluxo_caixa_legado(db, data_inicio, data_fim)
+            fluxo = calcular_fluxo_caixa(db, data_inicio, data_fim)
+            novo = [
+                (l['proprietario'], l['endereco'], l['aluguel'], l['outras_receitas'], l['iptu'],
+                 l['condominio'], l['outras_despesas'], l['saldo'], l['desc_despesas'], l['desc_receitas'])
+                for l in fluxo.linhas()
+            ]
+            iguais = [_normalizar(l) for l in legado] == [_normalizar(l) for l in novo]
+
+            tempo_legado = cronometrar(lambda: fluxo_caixa_legado(db, data_inicio, data_fim), args.repeticoes)
+            tempo_novo = cronometrar(lambda: calcular_fluxo_caixa(db, data_inicio, data_fim), args.repeticoes)
+            print(f"{rotulo:<10} {len(fluxo):>7} {tempo_legado:>12.2f} {tempo_novo:>11.2f} "
+                  f"{tempo_legado / tempo_novo:>6.1f}x  {'✓ iguais' if iguais else '✗ DIFERENTES'}")
+
+
+if __name__ == '__main__':
+    main()
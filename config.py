@@ -20,6 +20,22 @@ class Config:
     # Configuração do banco de dados
     DATABASE_PATH = 'database/imobipro.db'
     
+    # Backup incremental automático (de hora em hora): snapshots mantidos
+    BACKUP_INCREMENTAL_MANTER = 168  # 7 dias × 24 horas
+    
+    # Arquivamento contínuo do WAL (recuperação pontual)
+    WAL_ARQUIVAMENTO = os.environ.get('WAL_ARQUIVAMENTO', '1') == '1'
+    WAL_ARQUIVAMENTO_MINUTOS = 5  # Intervalo entre passagens (= RPO máximo)
+    WAL_BASES_MANTER = 7          # Bases diárias mantidas
+    
+    # Réplica de leitura para relatórios em Excel e exportações
+    REPLICA_LEITURA = os.environ.get('REPLICA_LEITURA', '1') == '1'
+    REPLICA_INTERVALO_SEGUNDOS = 60  # Frequência de atualização da réplica
+    REPLICA_MAX_ATRASO = 300         # Acima disso as consultas vão para o principal
+    
+    # Séries mensais dos índices de reajuste (IGPM.csv, IPCA.csv: mês;variação %)
+    INDICES_DIR = 'dados/indices'
+    
     # Configuração de sessão
     PERMANENT_SESSION_LIFETIME = timedelta(hours=12)
     SESSION_COOKIE_SECURE = False  # True quando usar HTTPS
@@ -11,8 +11,14 @@ Descrição: Classe responsável por todas as operações com o banco de dados S
 
 import sqlite3
 import os
+import sys
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+# Adicionar o diretorio raiz ao path (permite rodar este arquivo diretamente)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.trava_arquivo import TravaArquivo
 
 class DatabaseManager:
     """
@@ -30,6 +36,22 @@ class DatabaseManager:
             db_path (str): Caminho para o arquivo do banco de dados
         """
         self.db_path = db_path
+        # Limite de páginas para checkpoint automático (None = padrão do SQLite).
+        # Com o arquivamento de WAL ativo fica em 0: só o arquivador faz checkpoint.
+        self.wal_autocheckpoint = None
+        # Réplica de leitura opcional (utils/replica.py) para relatórios pesados
+        self.replica = None
+        self.replica_max_atraso = 300  # segundos
+        
+        # Coordenação com a restauração online (entre processos):
+        #   <banco>.lock    - escritas pegam trava compartilhada; a restauração, exclusiva
+        #   <banco>.geracao - contador incrementado a cada restauração; quem o vê mudar
+        #                     descarta caches montados sobre o conteúdo anterior
+        self.caminho_trava = db_path + '.lock'
+        self.caminho_geracao = db_path + '.geracao'
+        self.geracao = self.ler_geracao()
+        self._assinatura_geracao = self._stat_geracao()
+        self._ao_mudar_geracao = []
         
         # Criar diretório do banco se não existir
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -42,6 +64,9 @@ class DatabaseManager:
         Returns:
             sqlite3.Connection: Conexão ativa com o banco
         """
+        # Outro processo restaurou o banco? Invalidar caches antes de ler
+        self.verificar_geracao()
+        
         # IMPORTANTE: Criar nova conexão com check_same_thread=False
         connection = sqlite3.connect(self.db_path, check_same_thread=False)
         # Retornar resultados como dicionários (mais fácil de trabalhar)
@@ -51,8 +76,89 @@ class DatabaseManager:
         # WAL mode: permite leituras simultâneas enquanto uma escrita ocorre
         # Evita travamentos quando dois usuários acessam ao mesmo tempo
         connection.execute("PRAGMA journal_mode = WAL")
+        if self.wal_autocheckpoint is not None:
+            connection.execute(f"PRAGMA wal_autocheckpoint = {int(self.wal_autocheckpoint)}")
         return connection
     
+    def _stat_geracao(self) -> Optional[int]:
+        """mtime do arquivo de geração (None se ainda não existe)."""
+        try:
+            return os.stat(self.caminho_geracao).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def ler_geracao(self) -> int:
+        """
+        Lê o contador de geração do banco (quantas restaurações já ocorreram).
+        
+        Returns:
+            int: Geração atual (0 se nunca houve restauração)
+        """
+        try:
+            with open(self.caminho_geracao, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+    
+    def nova_geracao(self) -> int:
+        """
+        Incrementa o contador de geração (chamado pela restauração online).
+        
+        Returns:
+            int: Nova geração
+        """
+        geracao = self.ler_geracao() + 1
+        temporario = self.caminho_geracao + '.tmp'
+        with open(temporario, 'w') as f:
+            f.write(str(geracao))
+        os.replace(temporario, self.caminho_geracao)
+        self.verificar_geracao()
+        return geracao
+    
+    def verificar_geracao(self):
+        """
+        Confere se o banco foi restaurado (por qualquer processo) e, se foi,
+        executa os callbacks registrados. Custa um stat por chamada.
+        """
+        assinatura = self._stat_geracao()
+        if assinatura == self._assinatura_geracao:
+            return
+        self._assinatura_geracao = assinatura
+        
+        geracao = self.ler_geracao()
+        if geracao != self.geracao:
+            self.geracao = geracao
+            for callback in list(self._ao_mudar_geracao):
+                try:
+                    callback(geracao)
+                except Exception as e:
+                    print(f"⚠ Erro ao invalidar cache após restauração: {e}")
+    
+    def registrar_invalidacao(self, callback: Callable[[int], None]):
+        """
+        Registra uma função chamada quando o banco for restaurado.
+        
+        Args:
+            callback: Função que recebe a nova geração (ex.: limpar um cache)
+        """
+        self._ao_mudar_geracao.append(callback)
+    
+    def trava_escrita(self, exclusiva: bool = False) -> TravaArquivo:
+        """
+        Trava entre processos para escritas no banco.
+        
+        Escritas usam a trava compartilhada (várias ao mesmo tempo); a
+        restauração online usa a exclusiva, esperando as escritas em
+        andamento terminarem e segurando as novas até concluir.
+        
+        Args:
+            exclusiva (bool): True para a trava exclusiva (restauração)
+        
+        Returns:
+            TravaArquivo: Trava (use com 'with')
+        """
+        return TravaArquivo(self.caminho_trava, compartilhada=not exclusiva)
+    
     def close(self):
         """
         Fecha a conexão com o banco de dados.
@@ -86,6 +192,32 @@ class DatabaseManager:
             print(f"✗ Erro ao inicializar banco de dados: {e}")
             return False
     
+    def aplicar_ddl(self, ddl: str) -> bool:
+        """
+        Aplica DDL idempotente (CREATE ... IF NOT EXISTS) em um banco existente.
+        
+        O schema.sql só roda na instalação; módulos que dependem de tabelas ou
+        índices novos chamam este método na inicialização para que bancos já
+        criados também os recebam.
+        
+        Args:
+            ddl (str): Comandos SQL (um ou mais, separados por ';')
+        
+        Returns:
+            bool: True se bem-sucedido, False caso contrário
+        """
+        with self.trava_escrita():
+            conn = self.connect()
+            try:
+                conn.executescript(ddl)
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"✗ Erro ao aplicar DDL: {e}")
+                return False
+            finally:
+                conn.close()
+    
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """
         Executa uma consulta SELECT e retorna os resultados.
@@ -113,6 +245,89 @@ class DatabaseManager:
         finally:
             conn.close()  # Fechar conexão após uso
     
+    def execute_query_leitura(self, query: str, params: tuple = (), max_atraso: float = None) -> List[Dict]:
+        """
+        Executa uma consulta SELECT na réplica de leitura, se ela estiver em dia.
+        
+        Usado por relatórios e exportações: não disputam o banco principal com
+        as escritas. Se não houver réplica, se ela estiver mais atrasada que o
+        limite ou se a consulta falhar nela, a consulta vai para o principal.
+        
+        Args:
+            query (str): Consulta SQL
+            params (tuple): Parâmetros para a consulta
+            max_atraso (float): Atraso máximo aceito em segundos (padrão: replica_max_atraso)
+        
+        Returns:
+            List[Dict]: Lista de dicionários com os resultados
+        """
+        limite = self.replica_max_atraso if max_atraso is None else max_atraso
+        
+        if self.replica is not None:
+            atraso = self.replica.atraso()
+            if atraso is not None and atraso <= limite:
+                try:
+                    conn = self.replica.conectar()
+                    try:
+                        cursor = conn.execute(query, params)
+                        columns = [description[0] for description in cursor.description] if cursor.description else []
+                        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    finally:
+                        conn.close()
+                except sqlite3.Error as e:
+                    print(f"⚠ Réplica indisponível, consultando o banco principal: {e}")
+        
+        return self.execute_query(query, params)
+    
+    def conectar_leitura(self, max_atraso: float = None) -> sqlite3.Connection:
+        """
+        Abre uma conexão para leitura: a réplica, se estiver em dia, ou o principal.
+        
+        Útil quando várias consultas precisam enxergar o mesmo estado do banco
+        (abra uma transação com BEGIN e rode todas na mesma conexão).
+        
+        Args:
+            max_atraso (float): Atraso máximo aceito em segundos (padrão: replica_max_atraso)
+        
+        Returns:
+            sqlite3.Connection: Conexão com row_factory = sqlite3.Row
+        """
+        limite = self.replica_max_atraso if max_atraso is None else max_atraso
+        
+        if self.replica is not None:
+            atraso = self.replica.atraso()
+            if atraso is not None and atraso <= limite:
+                try:
+                    return self.replica.conectar()
+                except sqlite3.Error as e:
+                    print(f"⚠ Réplica indisponível, consultando o banco principal: {e}")
+        
+        return self.connect()
+    
+    def versao_dados(self) -> Tuple:
+        """
+        Identifica o estado atual dos dados (muda a cada escrita ou restauração).
+        
+        Usa a geração e o mtime/tamanho do banco e do -wal, sem abrir conexão.
+        Um -wal vazio é ignorado: só existe enquanto há conexões abertas e não
+        contém dados.
+        
+        Returns:
+            Tuple: Versão comparável (usada como chave de caches de relatórios)
+        """
+        self.verificar_geracao()
+        versao = [self.geracao]
+        for caminho in (self.db_path, self.db_path + '-wal'):
+            try:
+                stat = os.stat(caminho)
+                if stat.st_size:
+                    versao.extend([stat.st_mtime_ns, stat.st_size])
+                    continue
+            except FileNotFoundError:
+                pass
+            versao.extend([0, 0])
+        return tuple(versao)
+    
     def execute_update(self, query: str, params: tuple = ()) -> bool:
         """
         Executa uma operação INSERT, UPDATE ou DELETE.
@@ -124,20 +339,21 @@ class DatabaseManager:
         Returns:
             bool: True se bem-sucedido, False caso contrário
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(query, params)
-            conn.commit()
-            return True
-        except sqlite3.Error as e:
-            print(f"✗ Erro ao executar atualização: {e}")
-            print(f"  Query: {query}")
-            conn.rollback()
-            return False
-        finally:
-            conn.close()  # Fechar conexão após uso
+        with self.trava_escrita():
+            conn = self.connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute(query, params)
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"✗ Erro ao executar atualização: {e}")
+                print(f"  Query: {query}")
+                conn.rollback()
+                return False
+            finally:
+                conn.close()  # Fechar conexão após uso
     
     def insert(self, table: str, data: Dict[str, Any]) -> Optional[int]:
         """
@@ -157,20 +373,21 @@ class DatabaseManager:
         
         query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
         
-        conn = self.connect()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(query, values)
-            conn.commit()
-            last_id = cursor.lastrowid
-            return last_id  # Retorna o ID do registro inserido
-        except sqlite3.Error as e:
-            print(f"✗ Erro ao inserir em {table}: {e}")
-            conn.rollback()
-            return None
-        finally:
-            conn.close()  # Fechar conexão após uso
+        with self.trava_escrita():
+            conn = self.connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute(query, values)
+                conn.commit()
+                last_id = cursor.lastrowid
+                return last_id  # Retorna o ID do registro inserido
+            except sqlite3.Error as e:
+                print(f"✗ Erro ao inserir em {table}: {e}")
+                conn.rollback()
+                return None
+            finally:
+                conn.close()  # Fechar conexão após uso
     
     def update(self, table: str, data: Dict[str, Any], where: str, where_params: tuple = ()) -> bool:
         """
@@ -186,18 +186,48 @@ CREATE TABLE IF NOT EXISTS despesas (
     -- Controle
     observacoes TEXT,                          -- Observacoes
     recorrente INTEGER DEFAULT 0,              -- 0=Não, 1=Sim (para despesas mensais)
+    id_despesa_recorrente INTEGER,             -- Modelo que gerou a despesa (despesas_recorrentes)
     
     -- Controle automático
     data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     -- Chaves estrangeiras
     FOREIGN KEY (id_imovel) REFERENCES imoveis(id) ON DELETE CASCADE,
+    FOREIGN KEY (id_despesa_recorrente) REFERENCES despesas_recorrentes(id) ON DELETE SET NULL,
     
     -- Validações
     CHECK(tipo_despesa IN ('Manutenção', 'Condomínio', 'Reforma', 'IPTU', 'Outros')),
     CHECK(valor_previsto >= 0)
 );
 
+-- ============================================================================
+-- TABELA: despesas_recorrentes
+-- Modelos de despesas que se repetem (seguro, administração, manutenção);
+-- o gerador (utils/despesas_recorrentes.py) lança as despesas de cada mês
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS despesas_recorrentes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_imovel INTEGER NOT NULL,
+    tipo_despesa TEXT NOT NULL,
+    descricao TEXT NOT NULL,                   -- vira motivo_despesa + ' MM/AAAA'
+    valor REAL NOT NULL,
+    periodicidade_meses INTEGER NOT NULL DEFAULT 1,
+    dia_vencimento INTEGER NOT NULL DEFAULT 10,
+    inicio DATE NOT NULL,                      -- primeiro mês (AAAA-MM-01)
+    fim DATE,                                  -- último mês (NULL = sem fim)
+    ativo INTEGER NOT NULL DEFAULT 1,
+    observacoes TEXT,
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (id_imovel) REFERENCES imoveis(id) ON DELETE CASCADE,
+
+    CHECK(tipo_despesa IN ('Manutenção', 'Condomínio', 'Reforma', 'IPTU', 'Outros')),
+    CHECK(valor >= 0),
+    CHECK(periodicidade_meses IN (1, 2, 3, 6, 12)),
+    CHECK(dia_vencimento BETWEEN 1 AND 31),
+    CHECK(fim IS NULL OR fim >= inicio)
+);
+
 -- ============================================================================
 -- TABELA: proprietarios
 -- Sócios/proprietários para vínculo com receitas não-contratuais
@@ -231,6 +261,7 @@ CREATE TABLE IF NOT EXISTS receitas (
     condominio_devido   REAL DEFAULT 0,        -- CondominioDevido
     iptu_devido         REAL DEFAULT 0,        -- IPTUDevido
     desconto_multa      REAL DEFAULT 0,        -- Desconto(-) Multa(+)
+    encargos_gravados   REAL DEFAULT 0,        -- Parte de desconto_multa gravada como multa/juros
     valor_total_devido  REAL NOT NULL,         -- ValorTotalDevido (calculado)
 
     -- Datas
@@ -270,6 +301,85 @@ CREATE TABLE IF NOT EXISTS configuracoes (
     data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ============================================================================
+-- TABELAS: indices_economicos / indices_arquivos
+-- Séries mensais dos índices de reajuste (IGPM, IPCA), carregadas dos CSVs
+-- em dados/indices por utils/reajuste.py, e a assinatura de cada arquivo lido.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS indices_economicos (
+    indice     TEXT NOT NULL,                   -- IGPM, IPCA
+    mes        TEXT NOT NULL,                   -- AAAA-MM
+    variacao   REAL NOT NULL,                   -- variação mensal em %
+    PRIMARY KEY (indice, mes)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS indices_arquivos (
+    indice       TEXT PRIMARY KEY,
+    arquivo      TEXT NOT NULL,
+    assinatura   TEXT NOT NULL,                 -- tamanho e data de modificação
+    meses        INTEGER NOT NULL,
+    carregado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================================
+-- TABELA: resumo_mensal
+-- Receitas e despesas agregadas por imóvel, proprietário, mês e categoria.
+-- Os triggers que a mantêm são criados por utils/resumo_financeiro.py
+-- (ResumoFinanceiro.instalar), que também reconstrói e verifica o resumo.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS resumo_mensal (
+    id_imovel       INTEGER NOT NULL DEFAULT 0,   -- 0 = sem imóvel
+    id_proprietario INTEGER NOT NULL DEFAULT 0,   -- 0 = proprietário do imóvel
+    mes             TEXT    NOT NULL,             -- AAAA-MM
+    origem          TEXT    NOT NULL,             -- receita | despesa
+    categoria       TEXT    NOT NULL,             -- tipo_receita / tipo_despesa
+    previsto        REAL    NOT NULL DEFAULT 0,
+    pendente        REAL    NOT NULL DEFAULT 0,
+    qtd_pendente    INTEGER NOT NULL DEFAULT 0,
+    recebido        REAL    NOT NULL DEFAULT 0,
+    pago            REAL    NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_imovel, id_proprietario, mes, origem, categoria)
+) WITHOUT ROWID;
+
+-- ============================================================================
+-- TABELA: kpi_snapshots
+-- Um registro por dia com os indicadores do dashboard (utils/indicadores.py)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS kpi_snapshots (
+    data                  DATE PRIMARY KEY,         -- AAAA-MM-DD
+    total_imoveis         INTEGER NOT NULL,
+    imoveis_vagos         INTEGER NOT NULL,
+    taxa_ocupacao         REAL    NOT NULL,         -- percentual (0-100)
+    receber_em_aberto     REAL    NOT NULL,         -- receitas Pendente/Atrasado
+    valor_em_atraso       REAL    NOT NULL,         -- idem, vencidas antes do dia
+    despesas_pendentes    REAL    NOT NULL,         -- despesas sem pagamento
+    recebido_mes          REAL    NOT NULL,         -- recebido no mês do registro
+    registrado_em         TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+-- ============================================================================
+-- TABELA: faturamento_execucoes
+-- Histórico das gerações do faturamento mensal (utils/faturamento.py)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS faturamento_execucoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mes_referencia DATE NOT NULL,              -- AAAA-MM-01
+    origem TEXT NOT NULL,                      -- Agendador | Manual
+    componentes TEXT NOT NULL,                 -- ex.: 'aluguel,condominio,iptu'
+    iniciado_em TIMESTAMP NOT NULL,
+    duracao_ms INTEGER,
+    status TEXT NOT NULL,                      -- Sucesso | Erro
+    receitas INTEGER NOT NULL DEFAULT 0,       -- receitas de aluguel criadas
+    condominios INTEGER NOT NULL DEFAULT 0,    -- despesas de condomínio criadas
+    iptu INTEGER NOT NULL DEFAULT 0,           -- despesas de IPTU mensal criadas
+    valor_receitas REAL NOT NULL DEFAULT 0,
+    valor_despesas REAL NOT NULL DEFAULT 0,
+    erro TEXT,
+
+    CHECK(origem IN ('Agendador', 'Manual')),
+    CHECK(status IN ('Sucesso', 'Erro'))
+);
+
 -- ============================================================================
 -- ÍNDICES PARA PERFORMANCE
 -- ============================================================================
@@ -283,6 +393,17 @@ CREATE INDEX IF NOT EXISTS idx_despesas_imovel ON despesas(id_imovel);
 CREATE INDEX IF NOT EXISTS idx_despesas_tipo ON despesas(tipo_despesa);
 CREATE INDEX IF NOT EXISTS idx_receitas_contrato ON receitas(id_contrato);
 CREATE INDEX IF NOT EXISTS idx_receitas_status ON receitas(status);
+CREATE INDEX IF NOT EXISTS idx_receitas_status_vencimento ON receitas(status, vencimento_previsto);
+CREATE INDEX IF NOT EXISTS idx_receitas_data_recebimento ON receitas(data_recebimento);
+CREATE INDEX IF NOT EXISTS idx_despesas_data_pagamento ON despesas(data_pagamento);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_despesas_recorrente_mes
+    ON despesas(id_despesa_recorrente, mes_referencia)
+    WHERE id_despesa_recorrente IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_receitas_imovel ON receitas(id_imovel);
+CREATE INDEX IF NOT EXISTS idx_receitas_proprietario ON receitas(id_proprietario);
+CREATE INDEX IF NOT EXISTS idx_faturamento_execucoes_mes ON faturamento_execucoes(mes_referencia, origem);
+CREATE INDEX IF NOT EXISTS idx_imoveis_proprietario ON imoveis(proprietario);
+CREATE INDEX IF NOT EXISTS idx_resumo_mensal_mes ON resumo_mensal(mes);
 
 -- ============================================================================
 -- TRIGGERS PARA ATUALIZAÇÃO AUTOMÁTICA
@@ -424,7 +545,7 @@ SELECT
     r.vencimento_previsto,
     r.status,
     CASE
-        WHEN r.vencimento_previsto < DATE('now') AND r.status = 'Pendente' THEN 'Atrasado'
+        WHEN r.status = 'Atrasado' THEN 'Atrasado'      -- gravado pela varredura diária
         WHEN r.vencimento_previsto = DATE('now') THEN 'Vence Hoje'
         ELSE 'A Receber'
     END AS situacao
@@ -480,7 +601,20 @@ INSERT OR IGNORE INTO configuracoes (chave, valor, descricao) VALUES
 ('sistema_versao', '1.0.0', 'Versão do sistema'),
 ('backup_automatico', '1', 'Ativar backup automático (0=Não, 1=Sim)'),
 ('dias_alerta_vencimento', '7', 'Dias de antecedência para alertas de vencimento'),
-('indice_reajuste_padrao', 'IGPM', 'Índice padrão para reajuste de contratos');
+('indice_reajuste_padrao', 'IGPM', 'Índice padrão para reajuste de contratos'),
+('dimob_cnpj_declarante', '', 'DIMOB: CNPJ do declarante'),
+('dimob_nome_declarante', '', 'DIMOB: nome empresarial do declarante'),
+('dimob_cpf_responsavel', '', 'DIMOB: CPF do responsável pela declaração'),
+('dimob_endereco_declarante', '', 'DIMOB: endereço completo do declarante'),
+('dimob_uf', 'MS', 'DIMOB: UF do declarante'),
+('dimob_codigo_municipio', '9051', 'DIMOB: código do município (tabela da Receita; 9051 = Campo Grande)'),
+('multa_percentual', '2', 'Multa por atraso (% sobre o valor devido)'),
+('juros_mes_percentual', '1', 'Juros de mora (% ao mês, pro rata die)'),
+('carencia_dias', '0', 'Dias de carência após o vencimento antes de cobrar multa e juros'),
+('gravar_encargos', '0', 'Gravar multa e juros nas receitas em atraso toda noite (0=Não, 1=Sim)'),
+('faturamento_automatico', '0', 'Gerar o faturamento mensal automaticamente (0=Não, 1=Sim)'),
+('faturamento_dia', '25', 'Dia do mês a partir do qual o faturamento do mês seguinte é gerado'),
+('faturamento_dia_iptu', '10', 'Dia de vencimento do IPTU mensal no faturamento automático');
 
 -- ============================================================================
 -- FIM DO SCHEMA CORRIGIDO
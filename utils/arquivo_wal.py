@@ -0,0 +1,636 @@
+"""
+================================================================================
+IMOBIPRO - ARQUIVAMENTO DO WAL E RECUPERAÇÃO PONTUAL (PITR)
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Copia os frames do arquivo -wal do SQLite para um arquivo local
+           (com SHA-256) antes de cada checkpoint e permite reconstruir o banco
+           em qualquer ponto no tempo: uma base + os segmentos de WAL
+           arquivados até o instante escolhido.
+================================================================================
+
+Funcionamento:
+
+  * Os checkpoints automáticos das conexões da aplicação são desligados
+    (PRAGMA wal_autocheckpoint = 0); só o arquivador faz checkpoint, e sempre
+    depois de ter copiado os frames. Uma conexão "sentinela" fica aberta para
+    que o fechamento da última conexão de um worker não faça checkpoint e
+    apague o -wal por conta própria.
+  * Em cada passagem o arquivador trava as escritas (BEGIN IMMEDIATE), copia
+    os frames confirmados ainda não arquivados para um segmento, faz um
+    checkpoint PASSIVE por outra conexão e libera as escritas. O estado.json
+    guarda o último frame arquivado e o checksum cumulativo até ele, então a
+    passagem seguinte só lê e confere os frames novos.
+  * Se algum frame puder ter sido perdido (checkpoint feito por fora, -wal
+    recriado), uma nova cadeia começa com uma base nova.
+
+Estrutura em disco:
+
+    backups/arquivo_wal/
+        estado.json                         Posição atual do arquivamento
+        bases/<id>.db + <id>.json           Bases (cópias completas)
+        segmentos/<numero>.wal.z + .json    Frames do WAL comprimidos
+        .lock                               Trava entre processos
+
+Uso pela linha de comando:
+
+    python3 utils/arquivo_wal.py status
+    python3 utils/arquivo_wal.py arquivar
+    python3 utils/arquivo_wal.py base
+    python3 utils/arquivo_wal.py restaurar "2026-01-20 14:30" /tmp/imobipro_1430.db
+"""
+
+import os
+import sys
+import json
+import zlib
+import shutil
+import sqlite3
+import struct
+import hashlib
+from array import array
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.trava_arquivo import TravaArquivo
+
+MAGICOS_WAL = (0x377F0682, 0x377F0683)
+TAMANHO_CABECALHO_WAL = 32
+TAMANHO_CABECALHO_FRAME = 24
+
+
+# ============================================================================
+# LEITURA DO FORMATO WAL
+# ============================================================================
+
+def _checksum_wal(dados: bytes, s0: int, s1: int, big_endian: bool) -> Tuple[int, int]:
+    """Checksum cumulativo do WAL (algoritmo descrito em sqlite.org/fileformat)."""
+    palavras = array('I', dados)
+    if big_endian != (sys.byteorder == 'big'):
+        palavras.byteswap()
+    for i in range(0, len(palavras), 2):
+        s0 = (s0 + palavras[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + palavras[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+def ler_cabecalho_wal(caminho_wal: str) -> Optional[Dict]:
+    """
+    Lê o cabeçalho de 32 bytes de um arquivo WAL.
+
+    Args:
+        caminho_wal (str): Caminho do arquivo -wal
+
+    Returns:
+        Optional[Dict]: Campos do cabeçalho, ou None se ausente/inválido
+    """
+    try:
+        with open(caminho_wal, 'rb') as f:
+            dados = f.read(TAMANHO_CABECALHO_WAL)
+    except FileNotFoundError:
+        return None
+
+    if len(dados) < TAMANHO_CABECALHO_WAL:
+        return None
+
+    magico, _, tamanho_pagina, sequencia, salt1, salt2, ck1, ck2 = struct.unpack('>8I', dados)
+    if magico not in MAGICOS_WAL:
+        return None
+
+    big_endian = bool(magico & 1)
+    if _checksum_wal(dados[:24], 0, 0, big_endian) != (ck1, ck2):
+        return None
+
+    return {
+        'big_endian': big_endian,
+        'tamanho_pagina': tamanho_pagina,
+        'sequencia': sequencia,
+        'salt1': salt1,
+        'salt2': salt2,
+        'checksum': (ck1, ck2),
+    }
+
+
+def ler_frames_wal(caminho_wal: str, inicio: int = 0,
+                   checksum: Optional[Tuple[int, int]] = None) -> Tuple[Optional[Dict], List[bytes], Tuple[int, int]]:
+    """
+    Lê os frames válidos e confirmados (até o último frame de commit) do WAL.
+
+    Um frame é válido quando os salts conferem com o cabeçalho e o checksum
+    cumulativo bate; frames após o último commit pertencem a uma transação
+    ainda em andamento e são descartados.
+
+    Para continuar de onde a leitura anterior parou, informe o número de
+    frames já lidos e o checksum cumulativo até eles: só o restante do
+    arquivo é lido e conferido.
+
+    Args:
+        caminho_wal (str): Caminho do arquivo -wal
+        inicio (int): Frames já lidos (a leitura começa no frame seguinte)
+        checksum (Tuple[int, int]): Checksum cumulativo após o frame 'inicio'
+            (obrigatório se inicio > 0)
+
+    Returns:
+        Tuple: (cabeçalho ou None, frames confirmados a partir de 'inicio' com
+            cabeçalho de 24 bytes, checksum cumulativo após o último deles)
+    """
+    cabecalho = ler_cabecalho_wal(caminho_wal)
+    if cabecalho is None:
+        return None, [], (0, 0)
+
+    big_endian = cabecalho['big_endian']
+    tamanho_frame = TAMANHO_CABECALHO_FRAME + cabecalho['tamanho_pagina']
+    s0, s1 = checksum if inicio else cabecalho['checksum']
+    checksum_confirmado = (s0, s1)
+
+    with open(caminho_wal, 'rb') as f:
+        f.seek(TAMANHO_CABECALHO_WAL + inicio * tamanho_frame)
+        dados = f.read()
+
+    frames = []
+    confirmados = 0
+    pos = 0
+    while pos + tamanho_frame <= len(dados):
+        _, tamanho_db, salt1, salt2, ck1, ck2 = struct.unpack('>6I', dados[pos:pos + 24])
+        if (salt1, salt2) != (cabecalho['salt1'], cabecalho['salt2']):
+            break
+        s0, s1 = _checksum_wal(dados[pos:pos + 8], s0, s1, big_endian)
+        s0, s1 = _checksum_wal(dados[pos + 24:pos + tamanho_frame], s0, s1, big_endian)
+        if (s0, s1) != (ck1, ck2):
+            break
+
+        frames.append(dados[pos:pos + tamanho_frame])
+        if tamanho_db:
+            confirmados = len(frames)
+            checksum_confirmado = (s0, s1)
+        pos += tamanho_frame
+
+    return cabecalho, frames[:confirmados], checksum_confirmado
+
+
+def aplicar_frames(caminho_banco: str, frames: bytes, tamanho_pagina: int) -> int:
+    """
+    Aplica frames de WAL diretamente sobre um arquivo de banco (sem SQLite).
+
+    Args:
+        caminho_banco (str): Arquivo do banco a alterar
+        frames (bytes): Frames concatenados (cabeçalho de 24 bytes + página)
+        tamanho_pagina (int): Tamanho de página do banco
+
+    Returns:
+        int: Quantidade de frames aplicados
+    """
+    tamanho_frame = TAMANHO_CABECALHO_FRAME + tamanho_pagina
+    aplicados = 0
+    with open(caminho_banco, 'r+b') as f:
+        for pos in range(0, len(frames), tamanho_frame):
+            numero_pagina, tamanho_db = struct.unpack('>2I', frames[pos:pos + 8])
+            f.seek((numero_pagina - 1) * tamanho_pagina)
+            f.write(frames[pos + TAMANHO_CABECALHO_FRAME:pos + tamanho_frame])
+            if tamanho_db:
+                f.truncate(tamanho_db * tamanho_pagina)
+            aplicados += 1
+    return aplicados
+
+
+# ============================================================================
+# ARQUIVADOR
+# ============================================================================
+
+class ArquivadorWAL:
+    """
+    Arquiva os frames do WAL e reconstrói o banco em um ponto no tempo.
+    """
+
+    def __init__(self, db_path: str, diretorio: str = 'backups/arquivo_wal'):
+        """
+        Inicializa o arquivador (cria a estrutura de diretórios se necessário).
+
+        Args:
+            db_path (str): Caminho do banco de dados ativo
+            diretorio (str): Diretório do arquivo de WAL
+        """
+        self.db_path = db_path
+        self.diretorio = diretorio
+        self.dir_bases = os.path.join(diretorio, 'bases')
+        self.dir_segmentos = os.path.join(diretorio, 'segmentos')
+        self.caminho_estado = os.path.join(diretorio, 'estado.json')
+        self._sentinela = None
+
+        os.makedirs(self.dir_bases, exist_ok=True)
+        os.makedirs(self.dir_segmentos, exist_ok=True)
+
+    # =========================================================================
+    # AUXILIARES
+    # =========================================================================
+
+    def _trava(self) -> TravaArquivo:
+        """Trava que serializa as passagens do arquivador entre processos."""
+        return TravaArquivo(os.path.join(self.diretorio, '.lock'))
+
+    def _carregar_estado(self) -> Dict:
+        """Carrega a posição atual do arquivamento."""
+        if os.path.exists(self.caminho_estado):
+            with open(self.caminho_estado, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {
+            'cadeia': 0,
+            'ultimo_segmento': 0,
+            'geracao': None,
+            'ultimo_frame': 0,
+            'checksum_wal': None,
+            'db_stat': None,
+            'ultimo_arquivamento': None,
+            'base': None,
+        }
+
+    def _salvar_estado(self, estado: Dict):
+        """Grava o estado de forma atômica."""
+        self._gravar_atomico(self.caminho_estado, json.dumps(estado, indent=2).encode('utf-8'))
+
+    @staticmethod
+    def _gravar_atomico(caminho: str, dados: bytes):
+        """Grava um arquivo via arquivo temporário + rename."""
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+    def _stat_banco(self) -> List[int]:
+        """Assinatura do arquivo principal (só checkpoints o alteram em modo WAL)."""
+        stat = os.stat(self.db_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _abrir_sentinela(self):
+        """Mantém uma conexão aberta para impedir checkpoint no fechamento."""
+        if self._sentinela is None:
+            self._sentinela = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._sentinela.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+
+    def _gravar_segmento(self, estado: Dict, cabecalho: Dict, frames: List[bytes], inicio: int) -> Dict:
+        """Grava os frames novos como um segmento comprimido com checksum."""
+        numero = estado['ultimo_segmento'] + 1
+        conteudo = zlib.compress(b''.join(frames), 6)
+        nome = f"{numero:010d}"
+
+        self._gravar_atomico(os.path.join(self.dir_segmentos, nome + '.wal.z'), conteudo)
+        segmento = {
+            'numero': numero,
+            'cadeia': estado['cadeia'],
+            'arquivado_em': datetime.now().isoformat(timespec='seconds'),
+            'sequencia_wal': cabecalho['sequencia'],
+            'frame_inicial': inicio,
+            'frame_final': inicio + len(frames),
+            'tamanho_pagina': cabecalho['tamanho_pagina'],
+            'tamanho': len(conteudo),
+            'sha256': hashlib.sha256(conteudo).hexdigest(),
+        }
+        self._gravar_atomico(os.path.join(self.dir_segmentos, nome + '.json'),
+                             json.dumps(segmento).encode('utf-8'))
+        estado['ultimo_segmento'] = numero
+        return segmento
+
+    def _gravar_base(self, estado: Dict) -> Dict:
+        """Copia o banco inteiro (estado atual, inclusive o WAL) como base da cadeia."""
+        agora = datetime.now()
+        id_base = agora.strftime('%Y%m%d_%H%M%S')
+        caminho = os.path.join(self.dir_bases, id_base + '.db')
+
+        origem = sqlite3.connect(self.db_path)
+        destino = sqlite3.connect(caminho)
+        try:
+            origem.backup(destino)
+        finally:
+            destino.close()
+            origem.close()
+
+        with open(caminho, 'rb') as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+
+        base = {
+            'id': id_base,
+            'cadeia': estado['cadeia'],
+            'criado_em': agora.isoformat(timespec='seconds'),
+            'ultimo_segmento': estado['ultimo_segmento'],
+            'tamanho': os.path.getsize(caminho),
+            'sha256': sha256,
+        }
+        self._gravar_atomico(os.path.join(self.dir_bases, id_base + '.json'),
+                             json.dumps(base).encode('utf-8'))
+        estado['base'] = id_base
+        return base
+
+    # =========================================================================
+    # OPERAÇÕES
+    # =========================================================================
+
+    def arquivar(self, forcar_base: bool = False) -> Dict:
+        """
+        Executa uma passagem do arquivador: copia os frames novos do WAL para
+        um segmento e faz o checkpoint. Cria uma base nova quando ainda não há
+        nenhuma, quando a cadeia foi quebrada ou quando `forcar_base` é True.
+
+        Args:
+            forcar_base (bool): Cria uma base nova ao final da passagem
+
+        Returns:
+            Dict: {'frames', 'segmento', 'base', 'nova_cadeia'}
+        """
+        resultado = {'frames': 0, 'segmento': None, 'base': None, 'nova_cadeia': False}
+
+        with self._trava():
+            self._abrir_sentinela()
+            estado = self._carregar_estado()
+
+            conn_escrita = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+            try:
+                # Bloqueia escritores: nenhum frame novo entra no WAL até o COMMIT
+                conn_escrita.execute("BEGIN IMMEDIATE")
+                try:
+                    caminho_wal = self.db_path + '-wal'
+                    cabecalho = ler_cabecalho_wal(caminho_wal)
+                    geracao = ([cabecalho['sequencia'], cabecalho['salt1'], cabecalho['salt2']]
+                               if cabecalho else None)
+
+                    if estado['geracao'] is not None and geracao == estado['geracao']:
+                        # Mesma geração: os frames só crescem no fim, então a leitura
+                        # continua do último frame arquivado com o checksum guardado
+                        inicio = estado['ultimo_frame']
+                        tamanho_frame = TAMANHO_CABECALHO_FRAME + cabecalho['tamanho_pagina']
+                        quebrada = os.path.getsize(caminho_wal) < TAMANHO_CABECALHO_WAL + inicio * tamanho_frame
+                        if quebrada:
+                            # A base nova cobre todos os frames atuais
+                            inicio = 0
+                            _, novos, checksum = ler_frames_wal(caminho_wal)
+                        elif estado.get('checksum_wal') and inicio:
+                            _, novos, checksum = ler_frames_wal(caminho_wal, inicio, tuple(estado['checksum_wal']))
+                        else:
+                            # Estado gravado antes do checksum guardado: lê tudo uma vez
+                            _, novos, checksum = ler_frames_wal(caminho_wal)
+                            novos = novos[inicio:]
+                    else:
+                        # WAL reiniciado: só é contínuo se reiniciou uma única vez (o salt-1
+                        # aumenta de 1 a cada reinício) e ninguém além do arquivador fez
+                        # checkpoint desde a última passagem
+                        inicio = 0
+                        quebrada = (
+                            estado['base'] is None
+                            or self._stat_banco() != estado['db_stat']
+                            or (geracao is not None and estado['geracao'] is not None
+                                and geracao[1] != (estado['geracao'][1] + 1) & 0xFFFFFFFF)
+                        )
+                        _, novos, checksum = ler_frames_wal(caminho_wal)
+
+                    if quebrada:
+                        estado['cadeia'] += 1
+                        resultado['nova_cadeia'] = True
+                    elif novos:
+                        resultado['segmento'] = self._gravar_segmento(estado, cabecalho, novos, inicio)
+                        resultado['frames'] = len(novos)
+
+                    if quebrada or forcar_base:
+                        resultado['base'] = self._gravar_base(estado)
+
+                    estado['geracao'] = geracao
+                    estado['ultimo_frame'] = inicio + len(novos)
+                    estado['checksum_wal'] = list(checksum)
+
+                    # Checkpoint por outra conexão enquanto as escritas estão travadas
+                    conn_checkpoint = sqlite3.connect(self.db_path)
+                    try:
+                        conn_checkpoint.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+                    finally:
+                        conn_checkpoint.close()
+                    estado['db_stat'] = self._stat_banco()
+                finally:
+                    conn_escrita.execute("COMMIT")
+            finally:
+                conn_escrita.close()
+
+            estado['ultimo_arquivamento'] = datetime.now().isoformat(timespec='seconds')
+            self._salvar_estado(estado)
+
+        return resultado
+
+    def criar_base(self) -> Dict:
+        """
+        Arquiva o WAL pendente e cria uma base nova (ponto de partida das restaurações).
+
+        Returns:
+            Dict: Resultado da passagem (ver arquivar)
+        """
+        return self.arquivar(forcar_base=True)
+
+    def listar_bases(self) -> List[Dict]:
+        """
+        Lista as bases, da mais antiga para a mais recente.
+
+        Returns:
+            List[Dict]: Metadados das bases
+        """
+        bases = []
+        for nome in sorted(os.listdir(self.dir_bases)):
+            if nome.endswith('.json'):
+                with open(os.path.join(self.dir_bases, nome), 'r', encoding='utf-8') as f:
+                    bases.append(json.load(f))
+        return bases
+
+    def listar_segmentos(self) -> List[Dict]:
+        """
+        Lista os segmentos arquivados, em ordem de arquivamento.
+
+        Returns:
+            List[Dict]: Metadados dos segmentos
+        """
+        segmentos = []
+        for nome in sorted(os.listdir(self.dir_segmentos)):
+            if nome.endswith('.json'):
+                with open(os.path.join(self.dir_segmentos, nome), 'r', encoding='utf-8') as f:
+                    segmentos.append(json.load(f))
+        return segmentos
+
+    def restaurar_ponto_no_tempo(self, alvo: datetime, destino: str) -> Dict:
+        """
+        Reconstrói o banco como estava no instante `alvo` em um arquivo novo.
+
+        Usa a base mais recente criada até o alvo e aplica, em ordem, os
+        segmentos da mesma cadeia arquivados até o alvo. A granularidade é a
+        de uma passagem do arquivador.
+
+        Args:
+            alvo (datetime): Instante desejado
+            destino (str): Arquivo a gerar (sobrescrito se existir)
+
+        Returns:
+            Dict: {'base', 'segmentos', 'frames', 'ponto_recuperado'}
+
+        Raises:
+            FileNotFoundError: Se não houver base anterior ao alvo
+            ValueError: Se algum arquivo não conferir com o checksum
+        """
+        bases = [b for b in self.listar_bases() if datetime.fromisoformat(b['criado_em']) <= alvo]
+        if not bases:
+            raise FileNotFoundError("Nenhuma base anterior ao ponto solicitado")
+        base = bases[-1]
+
+        caminho_base = os.path.join(self.dir_bases, base['id'] + '.db')
+        with open(caminho_base, 'rb') as f:
+            if hashlib.sha256(f.read()).hexdigest() != base['sha256']:
+                raise ValueError(f"Checksum da base {base['id']} não confere")
+
+        temporario = destino + '.tmp'
+        shutil.copyfile(caminho_base, temporario)
+
+        aplicados = 0
+        frames = 0
+        ponto = base['criado_em']
+        for segmento in self.listar_segmentos():
+            if segmento['cadeia'] != base['cadeia'] or segmento['numero'] <= base['ultimo_segmento']:
+                continue
+            if datetime.fromisoformat(segmento['arquivado_em']) > alvo:
+                break
+
+            caminho_segmento = os.path.join(self.dir_segmentos, f"{segmento['numero']:010d}.wal.z")
+            with open(caminho_segmento, 'rb') as f:
+                conteudo = f.read()
+            if hashlib.sha256(conteudo).hexdigest() != segmento['sha256']:
+                os.remove(temporario)
+                raise ValueError(f"Checksum do segmento {segmento['numero']} não confere")
+
+            frames += aplicar_frames(temporario, zlib.decompress(conteudo), segmento['tamanho_pagina'])
+            aplicados += 1
+            ponto = segmento['arquivado_em']
+
+        # Conferir o resultado antes de entregar
+        conn = sqlite3.connect(temporario)
+        try:
+            resultado_check = conn.execute("PRAGMA quick_check").fetchone()[0]
+            conn.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            conn.close()
+        if resultado_check != 'ok':
+            os.remove(temporario)
+            raise ValueError(f"Banco reconstruído falhou no quick_check: {resultado_check}")
+
+        os.replace(temporario, destino)
+        return {'base': base['id'], 'segmentos': aplicados, 'frames': frames, 'ponto_recuperado': ponto}
+
+    def podar(self, manter_bases: int = 7) -> Dict:
+        """
+        Remove bases antigas e os segmentos que só serviam a elas.
+
+        Args:
+            manter_bases (int): Quantidade de bases a manter
+
+        Returns:
+            Dict: {'bases_removidas', 'segmentos_removidos'}
+        """
+        resultado = {'bases_removidas': 0, 'segmentos_removidos': 0}
+
+        with self._trava():
+            bases = self.listar_bases()
+            if len(bases) <= manter_bases:
+                return resultado
+
+            for base in bases[:-manter_bases]:
+                for extensao in ('.db', '.json'):
+                    os.remove(os.path.join(self.dir_bases, base['id'] + extensao))
+                resultado['bases_removidas'] += 1
+
+            mais_antiga = bases[-manter_bases]
+            for segmento in self.listar_segmentos():
+                if (segmento['cadeia'], segmento['numero']) > (mais_antiga['cadeia'], mais_antiga['ultimo_segmento']):
+                    continue
+                for extensao in ('.wal.z', '.json'):
+                    os.remove(os.path.join(self.dir_segmentos, f"{segmento['numero']:010d}{extensao}"))
+                resultado['segmentos_removidos'] += 1
+
+        return resultado
+
+    def status(self) -> Dict:
+        """
+        Resume o estado do arquivamento para exibição (sem travar nada).
+
+        O RPO (objetivo de ponto de recuperação) é o tempo desde a última
+        passagem: é o máximo de dados que seria perdido se o disco do banco
+        falhasse agora. O atraso é o volume já escrito no WAL e ainda não
+        arquivado.
+
+        Returns:
+            Dict: Indicadores do arquivamento
+        """
+        estado = self._carregar_estado()
+        status = {
+            'ultimo_arquivamento': None,
+            'rpo_segundos': None,
+            'atraso_frames': 0,
+            'atraso_bytes': 0,
+            'base': estado['base'],
+            'cadeia': estado['cadeia'],
+            'segmentos': estado['ultimo_segmento'],
+        }
+
+        if estado['ultimo_arquivamento']:
+            ultimo = datetime.fromisoformat(estado['ultimo_arquivamento'])
+            status['ultimo_arquivamento'] = ultimo
+            status['rpo_segundos'] = int((datetime.now() - ultimo).total_seconds())
+
+        # Só o cabeçalho e o tamanho do -wal: percorrer os frames custaria uma
+        # leitura completa do arquivo a cada visualização. Na mesma geração os
+        # frames depois do último arquivado são o atraso; se o WAL reiniciou
+        # desde a passagem, frames antigos no fim do arquivo também entram,
+        # então o valor é um limite superior até a próxima passagem.
+        cabecalho = ler_cabecalho_wal(self.db_path + '-wal')
+        if cabecalho:
+            geracao = [cabecalho['sequencia'], cabecalho['salt1'], cabecalho['salt2']]
+            tamanho_frame = TAMANHO_CABECALHO_FRAME + cabecalho['tamanho_pagina']
+            arquivados = estado['ultimo_frame'] if geracao == estado['geracao'] else 0
+            total = (os.path.getsize(self.db_path + '-wal') - TAMANHO_CABECALHO_WAL) // tamanho_frame
+            status['atraso_frames'] = max(0, total - arquivados)
+            status['atraso_bytes'] = status['atraso_frames'] * tamanho_frame
+
+        return status
+
+
+# ============================================================================
+# EXECUÇÃO PRINCIPAL
+# ============================================================================
+
+if __name__ == "__main__":
+    """
+    Ferramenta de linha de comando do arquivamento de WAL.
+    """
+    from config import get_config
+
+    config = get_config(os.environ.get('FLASK_ENV', 'development'))
+    arquivador = ArquivadorWAL(config.DATABASE_PATH)
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'status'
+
+    if comando == 'status':
+        status = arquivador.status()
+        print(f"Cadeia: {status['cadeia']} | Base atual: {status['base'] or '-'}")
+        print(f"Segmentos arquivados: {status['segmentos']}")
+        print(f"RPO atual: {status['rpo_segundos']} s")
+        print(f"Atraso: {status['atraso_frames']} frame(s), {status['atraso_bytes']:,} bytes")
+
+    elif comando in ('arquivar', 'base'):
+        resultado = arquivador.arquivar(forcar_base=(comando == 'base'))
+        print(f"✓ {resultado['frames']} frame(s) arquivados")
+        if resultado['base']:
+            print(f"✓ Base criada: {resultado['base']['id']}")
+
+    elif comando == 'restaurar' and len(sys.argv) == 4:
+        alvo = datetime.fromisoformat(sys.argv[2])
+        resultado = arquivador.restaurar_ponto_no_tempo(alvo, sys.argv[3])
+        print(f"✓ Banco reconstruído em {sys.argv[3]}")
+        print(f"  Base: {resultado['base']} + {resultado['segmentos']} segmento(s), "
+              f"{resultado['frames']} frame(s)")
+        print(f"  Ponto recuperado: {resultado['ponto_recuperado']}")
+
+    else:
+        print("Uso: python3 utils/arquivo_wal.py [status | arquivar | base | restaurar <data/hora> <destino>]")
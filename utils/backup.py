@@ -10,12 +10,37 @@ Descrição: Sistema completo de backup e restauração do banco de dados.
 """
 
 import os
-import shutil
 import sqlite3
+import tempfile
+import time
 from datetime import datetime
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from database.db_manager import DatabaseManager
+from utils.repositorio_backup import RepositorioBackup
+from utils.catalogo_backup import CatalogoBackup, calcular_sha256, resumir_tabelas
+
+# Páginas copiadas por passo da API de backup do SQLite. Entre um passo e outro
+# o lock de leitura é liberado, então leitores e escritores não ficam parados
+# durante a cópia de bancos grandes.
+PAGINAS_POR_PASSO = 256
+
+# Pausa (segundos) entre os passos da cópia online
+PAUSA_ENTRE_PASSOS = 0.005
+
+# Se o banco de origem for alterado por outra conexão durante a cópia em passos,
+# o SQLite recomeça a cópia do zero. Depois deste número de recomeços a cópia é
+# refeita em um único passo (uma só transação de leitura, que não recomeça).
+MAXIMO_RECOMECOS = 3
+
+
+# Tabelas comparadas com o banco principal no teste de restauração
+TABELAS_PRINCIPAIS = ['imoveis', 'pessoas', 'contratos', 'despesas', 'receitas']
+
+
+class _CopiaRecomecada(Exception):
+    """Interrompe uma cópia em passos que recomeçou vezes demais."""
+
 
 class SistemaBackup:
     """
@@ -34,6 +59,37 @@ class SistemaBackup:
         
         # Criar diretório de backups se não existir
         os.makedirs(self.dir_backups, exist_ok=True)
+        
+        # Repositório de snapshots incrementais (deduplicados e comprimidos)
+        self.repositorio = RepositorioBackup(os.path.join(self.dir_backups, 'repositorio'))
+        
+        # Catálogo dos backups (evita varrer a pasta a cada consulta)
+        self.catalogo = CatalogoBackup(os.path.join(self.dir_backups, 'catalogo.json'))
+        if not self.catalogo.existe:
+            self._importar_para_catalogo()
+    
+    def _importar_para_catalogo(self):
+        """Cria o catálogo a partir dos backups e snapshots já existentes."""
+        snapshots = []
+        for id_snapshot in self.repositorio.listar_snapshots():
+            manifesto = self.repositorio.carregar_manifesto(id_snapshot)
+            snapshots.append(self._entrada_snapshot(manifesto, duracao=None))
+        self.catalogo.importar_diretorio(self.dir_backups, entradas_extras=snapshots)
+    
+    def _entrada_snapshot(self, manifesto: dict, duracao: float = None, tabelas: dict = None) -> dict:
+        """Monta a entrada do catálogo para um snapshot incremental."""
+        return {
+            'nome': manifesto['id'],
+            'tipo': 'Incremental',
+            'caminho': self.repositorio._caminho_manifesto(manifesto['id']),
+            'criado_em': manifesto['criado_em'],
+            'tamanho': manifesto['tamanho'],
+            'sha256': manifesto['sha256'],
+            'duracao': duracao,
+            'paginas': manifesto['tamanho'] // manifesto['tamanho_pagina'],
+            'bytes_gravados': manifesto['bytes_gravados'],
+            'tabelas': tabelas,
+        }
     
     def gerar_nome_arquivo(self, tipo: str = 'db', extensao: str = 'db') -> str:
         """
@@ -49,6 +105,82 @@ class SistemaBackup:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         return f"imobipro_backup_{tipo}_{timestamp}.{extensao}"
     
+    def copiar_banco_online(self, origem: str, destino: str,
+                            paginas: int = PAGINAS_POR_PASSO,
+                            pausa: float = PAUSA_ENTRE_PASSOS) -> int:
+        """
+        Copia um banco SQLite usando a API de backup (sqlite3.Connection.backup).
+        
+        Diferente de copiar o arquivo, a API enxerga o conteúdo do arquivo -wal
+        e gera sempre uma cópia consistente, mesmo com escritas em andamento.
+        A cópia é feita em passos de `paginas` páginas com uma pausa entre eles.
+        
+        Args:
+            origem (str): Caminho do banco de origem
+            destino (str): Caminho do banco de destino
+            paginas (int): Páginas copiadas por passo (-1 copia tudo de uma vez)
+            pausa (float): Pausa em segundos entre os passos
+        
+        Returns:
+            int: Quantidade de páginas copiadas
+        """
+        total_paginas = 0
+        restantes_anterior = None
+        recomecos = 0
+        
+        def progresso(status, restantes, total):
+            nonlocal total_paginas, restantes_anterior, recomecos
+            total_paginas = total
+            # Restantes aumentou: a origem mudou e a cópia recomeçou
+            if restantes_anterior is not None and restantes > restantes_anterior:
+                recomecos += 1
+                if recomecos > MAXIMO_RECOMECOS:
+                    raise _CopiaRecomecada()
+            restantes_anterior = restantes
+            if restantes and pausa:
+                time.sleep(pausa)
+        
+        conn_origem = sqlite3.connect(origem)
+        conn_destino = sqlite3.connect(destino)
+        try:
+            try:
+                conn_origem.backup(conn_destino, pages=paginas, progress=progresso)
+            except _CopiaRecomecada:
+                conn_origem.backup(conn_destino)
+                total_paginas = conn_destino.execute("PRAGMA page_count").fetchone()[0]
+            return total_paginas
+        finally:
+            conn_destino.close()
+            conn_origem.close()
+    
+    def gerar_copia_compacta(self, destino: str) -> tuple[bool, str]:
+        """
+        Gera uma cópia compactada e consistente do banco com VACUUM INTO.
+        
+        O VACUUM INTO lê um snapshot dentro de uma transação de leitura (em modo
+        WAL não bloqueia escritores) e grava um arquivo único, sem -wal, já
+        desfragmentado. Usado para downloads do banco.
+        
+        Args:
+            destino (str): Caminho do arquivo a gerar (não pode existir)
+        
+        Returns:
+            tuple: (sucesso, caminho_arquivo ou mensagem_erro)
+        """
+        try:
+            if not os.path.exists(self.db.db_path):
+                return False, "Banco de dados não encontrado"
+            
+            conn = sqlite3.connect(self.db.db_path)
+            try:
+                conn.execute("VACUUM INTO ?", (destino,))
+            finally:
+                conn.close()
+            
+            return True, destino
+        except Exception as e:
+            return False, f"Erro ao gerar cópia do banco: {str(e)}"
+    
     def backup_sqlite(self) -> tuple[bool, str]:
         """
         Cria backup do banco de dados SQLite.
@@ -67,19 +199,38 @@ class SistemaBackup:
             if not os.path.exists(db_original):
                 return False, "Banco de dados não encontrado"
             
+            inicio = time.time()
+            criado_em = datetime.now()
+            
             # Gerar nome do backup
             nome_backup = self.gerar_nome_arquivo('db', 'db')
             caminho_backup = os.path.join(self.dir_backups, nome_backup)
             
-            # Copiar arquivo do banco
-            shutil.copy2(db_original, caminho_backup)
+            # Copiar o banco pela API de backup (inclui o conteúdo do -wal)
+            paginas = self.copiar_banco_online(db_original, caminho_backup)
+            
+            # O backup herda o modo WAL do original; voltar para arquivo único
+            conn_backup = sqlite3.connect(caminho_backup)
+            conn_backup.execute("PRAGMA journal_mode = DELETE")
+            conn_backup.close()
             
             # Verificar se o backup foi criado
             if os.path.exists(caminho_backup):
                 tamanho = os.path.getsize(caminho_backup)
+                self.catalogo.registrar({
+                    'nome': nome_backup,
+                    'tipo': 'SQLite',
+                    'caminho': caminho_backup,
+                    'criado_em': criado_em.isoformat(timespec='seconds'),
+                    'tamanho': tamanho,
+                    'sha256': calcular_sha256(caminho_backup),
+                    'duracao': round(time.time() - inicio, 3),
+                    'paginas': paginas,
+                    'tabelas': resumir_tabelas(caminho_backup),
+                })
                 print(f"✓ Backup criado com sucesso!")
                 print(f"  Arquivo: {caminho_backup}")
-                print(f"  Tamanho: {tamanho:,} bytes")
+                print(f"  Tamanho: {tamanho:,} bytes ({paginas} páginas)")
                 return True, caminho_backup
             else:
                 return False, "Erro ao criar arquivo de backup"
@@ -87,6 +238,101 @@ class SistemaBackup:
         except Exception as e:
             return False, f"Erro ao criar backup: {str(e)}"
     
+    def backup_incremental(self) -> tuple[bool, str]:
+        """
+        Grava um snapshot incremental no repositório de backups.
+        
+        Uma cópia consistente do banco é feita pela API de backup em um
+        diretório temporário; só os blocos de páginas ainda não armazenados
+        são comprimidos e gravados.
+        
+        Returns:
+            tuple: (sucesso, id_snapshot ou mensagem_erro)
+        """
+        print("\n" + "="*70)
+        print("CRIANDO BACKUP INCREMENTAL")
+        print("="*70)
+        
+        try:
+            if not os.path.exists(self.db.db_path):
+                return False, "Banco de dados não encontrado"
+            
+            inicio = time.time()
+            with tempfile.TemporaryDirectory(dir=self.dir_backups) as temp_dir:
+                copia = os.path.join(temp_dir, 'snapshot.db')
+                self.copiar_banco_online(self.db.db_path, copia)
+                manifesto = self.repositorio.gravar_snapshot(copia)
+                tabelas = resumir_tabelas(copia)
+            
+            self.catalogo.registrar(
+                self._entrada_snapshot(manifesto, round(time.time() - inicio, 3), tabelas)
+            )
+            
+            print(f"✓ Snapshot {manifesto['id']} gravado!")
+            print(f"  Blocos: {len(manifesto['blocos'])} ({manifesto['novos_blocos']} novos)")
+            print(f"  Gravado em disco: {manifesto['bytes_gravados']:,} bytes")
+            return True, manifesto['id']
+            
+        except Exception as e:
+            return False, f"Erro ao criar backup incremental: {str(e)}"
+    
+    def restaurar_incremental(self, id_snapshot: str, destino: str = None) -> tuple[bool, str]:
+        """
+        Restaura um snapshot do repositório incremental.
+        
+        Args:
+            id_snapshot (str): Identificador do snapshot
+            destino (str): Arquivo onde remontar o snapshot. Se omitido, o
+                           snapshot substitui o banco ativo (via restaurar_sqlite)
+        
+        Returns:
+            tuple: (sucesso, mensagem)
+        """
+        try:
+            if destino:
+                self.repositorio.restaurar_snapshot(id_snapshot, destino)
+                return True, f"Snapshot {id_snapshot} restaurado em {destino}"
+            
+            with tempfile.TemporaryDirectory(dir=self.dir_backups) as temp_dir:
+                copia = os.path.join(temp_dir, 'restaurar.db')
+                self.repositorio.restaurar_snapshot(id_snapshot, copia)
+                return self.restaurar_sqlite(copia)
+                
+        except Exception as e:
+            return False, f"Erro ao restaurar snapshot: {str(e)}"
+    
+    def verificar_repositorio(self) -> tuple[bool, dict]:
+        """
+        Verifica a integridade de todos os blocos do repositório incremental.
+        
+        Returns:
+            tuple: (sucesso, resultado da verificação)
+        """
+        resultado = self.repositorio.verificar()
+        return len(resultado['erros']) == 0, resultado
+    
+    def podar_repositorio(self, manter_ultimos: int = 168) -> dict:
+        """
+        Remove snapshots antigos do repositório e os blocos sem referência.
+        
+        Args:
+            manter_ultimos (int): Quantidade de snapshots a manter
+                                  (168 = uma semana de snapshots de hora em hora)
+        
+        Returns:
+            dict: Quantidades removidas e bytes liberados
+        """
+        resultado = self.repositorio.podar(manter_ultimos)
+        if resultado['snapshots_removidos']:
+            existentes = set(self.repositorio.listar_snapshots())
+            self.catalogo.remover([
+                e['nome'] for e in self.catalogo.listar(('Incremental',)) if e['nome'] not in existentes
+            ])
+            print(f"✓ {resultado['snapshots_removidos']} snapshot(s) e "
+                  f"{resultado['blocos_removidos']} bloco(s) removidos "
+                  f"({formatar_tamanho(resultado['bytes_liberados'])})")
+        return resultado
+    
     def exportar_para_excel(self) -> tuple[bool, str]:
         """
         Exporta todos os dados do banco para um arquivo Excel.
@@ -99,6 +345,9 @@ class SistemaBackup:
         print("="*70)
         
         try:
+            inicio = time.time()
+            criado_em = datetime.now()
+            
             # Criar workbook
             wb = Workbook()
             wb.remove(wb.active)  # Remover sheet padrão
@@ -161,6 +410,17 @@ class SistemaBackup:
             caminho_excel = os.path.join(self.dir_backups, nome_excel)
             wb.save(caminho_excel)
             
+            self.catalogo.registrar({
+                'nome': nome_excel,
+                'tipo': 'Excel',
+                'caminho': caminho_excel,
+                'criado_em': criado_em.isoformat(timespec='seconds'),
+                'tamanho': os.path.getsize(caminho_excel),
+                'sha256': calcular_sha256(caminho_excel),
+                'duracao': round(time.time() - inicio, 3),
+                'paginas': None,
+            })
+            
             print(f"\n✓ Exportação concluída com sucesso!")
             print(f"  Arquivo: {caminho_excel}")
             
@@ -187,25 +447,49 @@ class SistemaBackup:
             if not os.path.exists(caminho_backup):
                 return False, f"Arquivo de backup não encontrado: {caminho_backup}"
             
-            # Criar backup do banco atual antes de restaurar
-            print("\nCriando backup de segurança do banco atual...")
-            backup_seguranca = os.path.join(
-                self.dir_backups,
-                f"pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            )
-            
-            if os.path.exists(self.db.db_path):
-                shutil.copy2(self.db.db_path, backup_seguranca)
-                print(f"✓ Backup de segurança criado: {backup_seguranca}")
+            # Conferir o backup antes de pausar as escritas
+            conn_backup = sqlite3.connect(caminho_backup)
+            try:
+                check = conn_backup.execute("PRAGMA quick_check").fetchone()[0]
+                pagina_backup = conn_backup.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                conn_backup.close()
+            if check != 'ok':
+                return False, f"Backup corrompido (quick_check: {check})"
             
-            # Fechar conexão atual
-            self.db.close()
+            conn_atual = sqlite3.connect(self.db.db_path)
+            try:
+                pagina_atual = conn_atual.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                conn_atual.close()
+            if pagina_backup != pagina_atual:
+                # Em modo WAL o SQLite não permite trocar o tamanho de página do destino
+                return False, (f"Tamanho de página diferente (backup {pagina_backup}, "
+                               f"banco {pagina_atual}); restaure com a aplicação parada")
             
-            # Restaurar backup
-            shutil.copy2(caminho_backup, self.db.db_path)
+            # Restauração online: a trava exclusiva espera as escritas em andamento
+            # e segura as novas (em todos os workers) até a cópia terminar. A API de
+            # backup grava as páginas no banco ativo como uma transação comum, então
+            # quem estiver lendo vê o conteúdo antigo até o commit e o novo depois.
+            inicio = time.time()
+            with self.db.trava_escrita(exclusiva=True):
+                espera = time.time() - inicio
+                
+                # Backup de segurança do banco atual (com as escritas já pausadas,
+                # é exatamente o estado substituído pela restauração)
+                backup_seguranca = os.path.join(
+                    self.dir_backups,
+                    f"pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+                )
+                self.copiar_banco_online(self.db.db_path, backup_seguranca, pausa=0)
+                print(f"✓ Backup de segurança criado: {backup_seguranca}")
+                
+                self.copiar_banco_online(caminho_backup, self.db.db_path, pausa=0)
+                # Avisar todos os processos para descartar caches do conteúdo anterior
+                geracao = self.db.nova_geracao()
             
-            # Reconectar
-            self.db.connect()
+            print(f"✓ Banco restaurado online em {time.time() - inicio:.2f} s "
+                  f"(espera pelas escritas: {espera:.2f} s, geração {geracao})")
             
             # Verificar integridade
             integridade_ok, erros = self.db.verificar_integridade()
@@ -223,37 +507,153 @@ class SistemaBackup:
         except Exception as e:
             return False, f"Erro ao restaurar backup: {str(e)}"
     
-    def listar_backups(self) -> list:
+    def ensaio_restauracao(self) -> dict:
         """
-        Lista todos os backups disponíveis.
+        Testa a restauração do backup mais recente sem tocar no banco ativo.
+        
+        O backup é restaurado em uma pasta temporária e conferido com
+        quick_check e foreign_key_check; a contagem e o checksum de cada
+        tabela são comparados com os registrados no catálogo quando o backup
+        foi feito, e a contagem das tabelas principais é comparada com o
+        banco atual (pela réplica de leitura, quando disponível). O resultado,
+        com os tempos de cada etapa, fica registrado no catálogo.
         
         Returns:
-            list: Lista de dicionários com informações dos backups
+            dict: Resultado do ensaio ('ok', 'backup', 'tempos', 'erros', ...)
         """
-        backups = []
+        print("\n" + "="*70)
+        print("TESTE DE RESTAURAÇÃO")
+        print("="*70)
+        
+        resultado = {
+            'executado_em': datetime.now().isoformat(timespec='seconds'),
+            'backup': None,
+            'tipo': None,
+            'ok': False,
+            'tempos': {},
+            'erros': [],
+            'diferencas_atual': {},
+        }
+        
+        entrada = self.ultimo_backup()
+        if not entrada:
+            resultado['erros'].append("Nenhum backup no catálogo")
+            self.catalogo.registrar_ensaio(resultado)
+            return resultado
+        
+        resultado['backup'] = entrada['nome']
+        resultado['tipo'] = entrada['tipo']
+        print(f"Backup: {entrada['nome']} ({entrada['tipo']})")
         
         try:
-            arquivos = os.listdir(self.dir_backups)
-            arquivos = [f for f in arquivos if f.startswith('imobipro_backup_')]
-            arquivos.sort(reverse=True)  # Mais recentes primeiro
-            
-            for arquivo in arquivos:
-                caminho = os.path.join(self.dir_backups, arquivo)
-                stat = os.stat(caminho)
+            with tempfile.TemporaryDirectory(dir=self.dir_backups) as temp_dir:
+                copia = os.path.join(temp_dir, 'ensaio.db')
                 
-                backups.append({
-                    'nome': arquivo,
-                    'caminho': caminho,
-                    'tamanho': stat.st_size,
-                    'data': datetime.fromtimestamp(stat.st_mtime),
-                    'tipo': 'SQLite' if arquivo.endswith('.db') else 'Excel'
-                })
+                # 1. Restaurar (o tempo medido é o tempo real de restauração)
+                inicio = time.time()
+                if entrada['tipo'] == 'Incremental':
+                    self.repositorio.restaurar_snapshot(entrada['nome'], copia)
+                else:
+                    self.copiar_banco_online(entrada['caminho'], copia, pausa=0)
+                resultado['tempos']['restauracao'] = round(time.time() - inicio, 3)
+                
+                # 2. Verificações estruturais
+                conn = sqlite3.connect(copia)
+                try:
+                    inicio = time.time()
+                    check = conn.execute("PRAGMA quick_check").fetchone()[0]
+                    resultado['tempos']['quick_check'] = round(time.time() - inicio, 3)
+                    if check != 'ok':
+                        resultado['erros'].append(f"quick_check: {check}")
+                    
+                    inicio = time.time()
+                    violacoes = conn.execute("PRAGMA foreign_key_check").fetchall()
+                    resultado['tempos']['foreign_key_check'] = round(time.time() - inicio, 3)
+                    if violacoes:
+                        resultado['erros'].append(f"foreign_key_check: {len(violacoes)} violação(ões)")
+                finally:
+                    conn.close()
+                
+                # 3. Conteúdo igual ao registrado quando o backup foi feito
+                inicio = time.time()
+                tabelas = resumir_tabelas(copia)
+                resultado['tempos']['checksums'] = round(time.time() - inicio, 3)
+                
+                if entrada.get('tabelas'):
+                    for tabela, esperado in entrada['tabelas'].items():
+                        obtido = tabelas.get(tabela)
+                        if obtido is None:
+                            resultado['erros'].append(f"{tabela}: tabela ausente")
+                        elif obtido != esperado:
+                            resultado['erros'].append(
+                                f"{tabela}: {obtido['linhas']} linhas (esperado {esperado['linhas']}), checksum diferente"
+                            )
+                else:
+                    resultado['erros'].append("Backup sem checksums por tabela no catálogo (não comparado)")
+            
+            # 4. Distância para o banco atual (informativo: o banco mudou desde o backup)
+            for tabela in TABELAS_PRINCIPAIS:
+                if tabela not in tabelas:
+                    continue
+                atual = self.db.execute_query_leitura(f"SELECT COUNT(*) AS n FROM {tabela}")
+                if atual and atual[0]['n'] != tabelas[tabela]['linhas']:
+                    resultado['diferencas_atual'][tabela] = atual[0]['n'] - tabelas[tabela]['linhas']
             
+        except Exception as e:
+            resultado['erros'].append(f"Erro no ensaio: {str(e)}")
+        
+        resultado['tempos']['total'] = round(sum(resultado['tempos'].values()), 3)
+        resultado['ok'] = not resultado['erros']
+        self.catalogo.registrar_ensaio(resultado)
+        self.catalogo.atualizar(
+            entrada['nome'],
+            verificado=resultado['ok'],
+            verificado_em=resultado['executado_em'],
+            erro_verificacao='; '.join(resultado['erros']) or None
+        )
+        
+        if resultado['ok']:
+            print(f"✓ Backup restaurável e íntegro")
+        else:
+            for erro in resultado['erros']:
+                print(f"  ✗ {erro}")
+        print(f"  Tempo de restauração: {resultado['tempos'].get('restauracao', '-')} s "
+              f"(total do ensaio: {resultado['tempos']['total']} s)")
+        for tabela, diferenca in resultado['diferencas_atual'].items():
+            print(f"  {tabela}: {diferenca:+d} linha(s) no banco atual desde o backup")
+        
+        return resultado
+    
+    def listar_backups(self) -> list:
+        """
+        Lista os backups completos (SQLite e Excel) registrados no catálogo.
+        
+        Returns:
+            list: Lista de dicionários com informações dos backups (mais recentes primeiro)
+        """
+        backups = []
+        
+        try:
+            for entrada in self.catalogo.listar(('SQLite', 'Excel')):
+                backups.append({**entrada, 'data': datetime.fromisoformat(entrada['criado_em'])})
         except Exception as e:
             print(f"Erro ao listar backups: {e}")
         
         return backups
     
+    def ultimo_backup(self) -> dict:
+        """
+        Retorna o backup mais recente do banco (completo ou incremental),
+        consultando diretamente os apontadores do catálogo.
+        
+        Returns:
+            dict: Entrada do catálogo ou None
+        """
+        candidatos = [e for e in (self.catalogo.ultimo('SQLite'), self.catalogo.ultimo('Incremental')) if e]
+        if not candidatos:
+            return None
+        return max(candidatos, key=lambda e: e['criado_em'])
+    
     def limpar_backups_antigos(self, manter_ultimos: int = 10) -> int:
         """
         Remove backups antigos, mantendo apenas os N mais recentes.
@@ -265,18 +665,61 @@ class SistemaBackup:
             int: Quantidade de backups removidos
         """
         backups = self.listar_backups()
-        removidos = 0
+        removidos = []
         
         if len(backups) > manter_ultimos:
             for backup in backups[manter_ultimos:]:
                 try:
-                    os.remove(backup['caminho'])
-                    removidos += 1
+                    if os.path.exists(backup['caminho']):
+                        os.remove(backup['caminho'])
+                    removidos.append(backup['nome'])
                     print(f"✓ Removido: {backup['nome']}")
                 except Exception as e:
                     print(f"✗ Erro ao remover {backup['nome']}: {e}")
         
-        return removidos
+        self.catalogo.remover(removidos)
+        return len(removidos)
+    
+    def reverificar_catalogo(self, quantidade: int = 3, pausa: float = 0.01) -> list:
+        """
+        Confere novamente os backups verificados há mais tempo.
+        
+        Arquivos completos têm o SHA-256 recalculado (leitura lenta, com pausas);
+        snapshots incrementais têm todos os seus blocos conferidos.
+        
+        Args:
+            quantidade (int): Máximo de backups verificados nesta chamada
+            pausa (float): Pausa entre as leituras de 1 MB
+        
+        Returns:
+            list: Tuplas (nome, ok, erro)
+        """
+        resultados = []
+        
+        for entrada in self.catalogo.pendentes_verificacao(quantidade):
+            erro = None
+            try:
+                if entrada['tipo'] == 'Incremental':
+                    erros = self.repositorio.verificar_snapshot(entrada['nome'])
+                    erro = '; '.join(erros) if erros else None
+                elif not os.path.exists(entrada['caminho']):
+                    erro = "Arquivo não encontrado"
+                elif calcular_sha256(entrada['caminho'], pausa) != entrada['sha256']:
+                    erro = "SHA-256 não confere"
+            except Exception as e:
+                erro = str(e)
+            
+            self.catalogo.atualizar(
+                entrada['nome'],
+                verificado=erro is None,
+                verificado_em=datetime.now().isoformat(timespec='seconds'),
+                erro_verificacao=erro
+            )
+            resultados.append((entrada['nome'], erro is None, erro))
+            if erro:
+                print(f"✗ Backup {entrada['nome']} falhou na verificação: {erro}")
+        
+        return resultados
     
     def backup_completo(self, limpar_antigos: bool = True) -> dict:
         """
@@ -382,6 +825,10 @@ if __name__ == "__main__":
     print("3. Exportar somente para Excel")
     print("4. Listar backups disponíveis")
     print("5. Restaurar backup")
+    print("6. Backup incremental (repositório)")
+    print("7. Verificar repositório incremental")
+    print("8. Restaurar snapshot incremental")
+    print("9. Testar restauração do último backup")
     print("0. Sair")
     
     try:
@@ -439,6 +886,46 @@ if __name__ == "__main__":
                 except ValueError:
                     print("\nEntrada inválida.")
         
+        elif opcao == '6':
+            sucesso, msg = backup.backup_incremental()
+            if not sucesso:
+                print(f"\n✗ Erro: {msg}")
+                
+        elif opcao == '7':
+            sucesso, resultado = backup.verificar_repositorio()
+            print(f"\n{resultado['snapshots']} snapshot(s), {resultado['blocos']} bloco(s) verificados")
+            for erro in resultado['erros']:
+                print(f"  ✗ {erro}")
+            if sucesso:
+                print("✓ Repositório íntegro!")
+                
+        elif opcao == '8':
+            snapshots = backup.repositorio.listar_snapshots()
+            if not snapshots:
+                print("\nNenhum snapshot disponível.")
+            else:
+                print("\nSnapshots disponíveis:\n")
+                for i, id_snapshot in enumerate(snapshots, 1):
+                    print(f"{i}. {id_snapshot}")
+                
+                try:
+                    escolha = int(input("\nEscolha o snapshot para restaurar (número): "))
+                    if 1 <= escolha <= len(snapshots):
+                        confirmacao = input(f"\n⚠ ATENÇÃO: O banco atual será substituído!\nConfirma a restauração? (sim/não): ")
+                        if confirmacao.lower() == 'sim':
+                            sucesso, msg = backup.restaurar_incremental(snapshots[escolha-1])
+                            if not sucesso:
+                                print(f"\n✗ Erro: {msg}")
+                        else:
+                            print("\nRestauração cancelada.")
+                    else:
+                        print("\nOpção inválida.")
+                except ValueError:
+                    print("\nEntrada inválida.")
+        
+        elif opcao == '9':
+            backup.ensaio_restauracao()
+        
         elif opcao == '0':
             print("\nSaindo...")
         else:
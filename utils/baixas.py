@@ -0,0 +1,178 @@
+"""
+================================================================================
+IMOBIPRO - BAIXAS EM LOTE
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Recebimento de receitas, pagamento de despesas e estornos de
+           vários itens de uma vez: uma transação e um executemany por lote,
+           com o resultado de cada item.
+================================================================================
+
+  * A situação de todos os itens é lida dentro da mesma transação (uma
+    consulta só), então o resultado por item reflete o que foi gravado.
+  * Os UPDATEs repetem a condição de situação no WHERE: um item que mudou
+    entre a tela e o envio não é baixado duas vezes.
+  * Valor em branco no item usa o valor previsto (despesas) ou o valor
+    atualizado na data do recebimento (receitas: com multa e juros se estiver
+    em atraso, a mesma expressão de utils/encargos.py mostrada na lista).
+  * Estorno de receita volta a 'Atrasado' se já venceu, senão 'Pendente'
+    (mesma regra da varredura de status).
+"""
+
+import math
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import Dict, List, Optional
+
+from utils.encargos import expressoes_encargos
+
+# Situação que permite cada operação: (tabela, condição SQL, mensagem se não puder)
+_OPERACOES = {
+    'receber': ('receitas', "status IN ('Pendente', 'Atrasado')", 'Receita não está pendente'),
+    'estornar_receita': ('receitas', "status = 'Recebido'", 'Receita não está recebida'),
+    'pagar': ('despesas', "data_pagamento IS NULL", 'Despesa já está paga'),
+    'estornar_despesa': ('despesas', "data_pagamento IS NOT NULL", 'Despesa não está paga'),
+}
+
+_UPDATES = {
+    'receber': f"""
+        UPDATE receitas
+        SET status = 'Recebido', data_recebimento = :data,
+            valor_recebido = COALESCE(:valor, {expressoes_encargos('receitas', ':data')['valor_atualizado']})
+        WHERE id = :id AND status IN ('Pendente', 'Atrasado')
+    """,
+    'estornar_receita': """
+        UPDATE receitas
+        SET status = CASE WHEN vencimento_previsto < :data THEN 'Atrasado' ELSE 'Pendente' END,
+            data_recebimento = NULL, valor_recebido = NULL
+        WHERE id = :id AND status = 'Recebido'
+    """,
+    'pagar': """
+        UPDATE despesas
+        SET data_pagamento = :data, valor_pago = COALESCE(:valor, valor_previsto)
+        WHERE id = :id AND data_pagamento IS NULL
+    """,
+    'estornar_despesa': """
+        UPDATE despesas
+        SET data_pagamento = NULL, valor_pago = NULL
+        WHERE id = :id AND data_pagamento IS NOT NULL
+    """,
+}
+
+OPERACOES_LOTE = list(_OPERACOES)
+
+
+@dataclass
+class ResultadoItem:
+    """Resultado da baixa de um item do lote."""
+    id: int
+    ok: bool
+    mensagem: str
+    valor: Optional[float] = None
+
+
+def baixar_lote(db, operacao: str, itens: Dict[int, Optional[float]], data: date = None,
+                datas: Dict[int, date] = None) -> List[ResultadoItem]:
+    """
+    Aplica uma operação a vários itens em uma única transação.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        operacao (str): 'receber', 'estornar_receita', 'pagar' ou 'estornar_despesa'
+        itens (Dict[int, Optional[float]]): {id: valor} (None = valor devido/previsto;
+            ignorado nos estornos)
+        data (date): Data do recebimento/pagamento (no estorno de receita, a data
+            que decide entre 'Atrasado' e 'Pendente'); padrão: hoje
+        datas (Dict[int, date]): Data própria de alguns itens (ex.: conciliação bancária)
+
+    Returns:
+        List[ResultadoItem]: Um resultado por item, na ordem recebida
+
+    Raises:
+        ValueError: Operação desconhecida ou valor negativo/não finito (nan, inf)
+    """
+    if not itens:
+        return []
+
+    with db.trava_escrita():
+        conn = db.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            resultados = baixar_na_transacao(conn, operacao, itens, data, datas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    baixados = sum(1 for r in resultados if r.ok)
+    print(f"✓ Lote '{operacao}' ({_OPERACOES[operacao][0]}): {baixados} de {len(itens)} item(ns) baixado(s)")
+    return resultados
+
+
+def baixar_na_transacao(conn, operacao: str, itens: Dict[int, Optional[float]], data: date = None,
+                        datas: Dict[int, date] = None) -> List[ResultadoItem]:
+    """
+    Mesma operação de baixar_lote, dentro de uma transação já aberta pelo chamador
+    (que faz o commit/rollback). Permite juntar operações em uma transação só.
+
+    Raises:
+        ValueError: Operação desconhecida ou valor negativo/não finito (nan, inf)
+        RuntimeError: Se o UPDATE alterar menos itens que os liberados
+    """
+    if operacao not in _OPERACOES:
+        raise ValueError(f"Operação inválida: {operacao}")
+    if not itens:
+        return []
+    if any(valor is not None and not math.isfinite(valor) for valor in itens.values()):
+        raise ValueError('O valor precisa ser um número finito')
+    if any(valor is not None and valor < 0 for valor in itens.values()):
+        raise ValueError('O valor não pode ser negativo')
+
+    tabela, condicao, recusa = _OPERACOES[operacao]
+    data_iso = (data or date.today()).isoformat()
+    datas = datas or {}
+    # Receitas: valor atualizado (multa e juros) na data de cada item, igual ao UPDATE
+    valor_base = (expressoes_encargos(tabela, 'lote.data_item')['valor_atualizado']
+                  if tabela == 'receitas' else 'valor_previsto')
+
+    marcadores = ', '.join('(?, ?)' for _ in itens)
+    valores = [campo for id_item in itens
+               for campo in (id_item, datas[id_item].isoformat() if id_item in datas else data_iso)]
+    situacao = {linha['id']: linha for linha in conn.execute(f"""
+        WITH lote(id_item, data_item) AS (VALUES {marcadores})
+        SELECT {tabela}.id, ({condicao}) AS permitido, {valor_base} AS valor_base
+        FROM {tabela} JOIN lote ON lote.id_item = {tabela}.id
+    """, valores)}
+
+    resultados, parametros = [], []
+    for id_item, valor in itens.items():
+        linha = situacao.get(id_item)
+        if linha is None:
+            resultados.append(ResultadoItem(id_item, False, 'Não encontrado'))
+        elif not linha['permitido']:
+            resultados.append(ResultadoItem(id_item, False, recusa))
+        else:
+            if operacao.startswith('estornar'):
+                valor = None
+            resultados.append(ResultadoItem(id_item, True, 'OK',
+                                            valor if valor is not None else linha['valor_base']))
+            parametros.append({'id': id_item, 'valor': valor,
+                               'data': datas[id_item].isoformat() if id_item in datas else data_iso})
+
+    alterados = conn.executemany(_UPDATES[operacao], parametros).rowcount if parametros else 0
+    if alterados != len(parametros):
+        raise RuntimeError(f"Lote alterou {alterados} de {len(parametros)} itens; nada foi gravado")
+    return resultados
+
+
+def resultados_para_dict(resultados: List[ResultadoItem]) -> Dict[str, object]:
+    """Resumo serializável (JSON) de um lote: totais e resultado de cada item."""
+    return {
+        'processados': sum(1 for r in resultados if r.ok),
+        'recusados': sum(1 for r in resultados if not r.ok),
+        'valor_total': round(sum(r.valor or 0 for r in resultados if r.ok), 2),
+        'itens': [asdict(r) for r in resultados],
+    }
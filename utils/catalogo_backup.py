@@ -0,0 +1,315 @@
+"""
+================================================================================
+IMOBIPRO - CATÁLOGO DE BACKUPS
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Índice JSON de todos os backups gerados (tipo, tamanho, SHA-256,
+           duração, páginas, contagem e checksum por tabela, verificação).
+           Substitui a varredura da pasta de backups: o último backup de cada
+           tipo fica apontado diretamente no índice.
+================================================================================
+
+Formato de backups/catalogo.json:
+
+    {
+        "ultimo": {"SQLite": "<nome>", "Excel": "<nome>", "Incremental": "<id>"},
+        "backups": {"<nome>": {...entrada...}, ...},    (em ordem de criação)
+        "ensaios": [{...resultado...}, ...]             (testes de restauração)
+    }
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from utils.trava_arquivo import TravaArquivo
+
+# Bytes lidos por vez ao calcular o SHA-256 de um arquivo
+TAMANHO_LEITURA = 1024 * 1024
+
+# Resultados de testes de restauração mantidos no catálogo
+ENSAIOS_MANTIDOS = 52
+
+
+def calcular_sha256(caminho: str, pausa: float = 0) -> str:
+    """
+    Calcula o SHA-256 de um arquivo lendo em partes.
+
+    Args:
+        caminho (str): Arquivo a ler
+        pausa (float): Pausa em segundos entre as partes (verificação lenta)
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    hash_arquivo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        while True:
+            dados = f.read(TAMANHO_LEITURA)
+            if not dados:
+                break
+            hash_arquivo.update(dados)
+            if pausa:
+                time.sleep(pausa)
+    return hash_arquivo.hexdigest()
+
+
+def resumir_tabelas(caminho_banco: str) -> Dict[str, Dict]:
+    """
+    Conta as linhas e calcula um checksum do conteúdo de cada tabela.
+
+    O checksum é o SHA-256 das linhas em ordem de rowid, então dois bancos
+    com os mesmos dados têm os mesmos checksums mesmo com arquivos diferentes
+    (páginas em outra ordem, espaço livre, modo de journal).
+
+    Args:
+        caminho_banco (str): Banco a resumir
+
+    Returns:
+        Dict: {tabela: {'linhas': int, 'checksum': str}}
+    """
+    resumo = {}
+    conn = sqlite3.connect(caminho_banco)
+    try:
+        tabelas = [linha[0] for linha in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        for tabela in tabelas:
+            hash_tabela = hashlib.sha256()
+            linhas = 0
+            for linha in conn.execute(f'SELECT * FROM "{tabela}" ORDER BY rowid'):
+                hash_tabela.update(repr(linha).encode('utf-8'))
+                linhas += 1
+            resumo[tabela] = {'linhas': linhas, 'checksum': hash_tabela.hexdigest()}
+    finally:
+        conn.close()
+    return resumo
+
+
+class CatalogoBackup:
+    """
+    Catálogo de backups persistido em JSON, com leitura em cache.
+    """
+
+    def __init__(self, caminho: str = 'backups/catalogo.json'):
+        """
+        Inicializa o catálogo (o arquivo é criado na primeira gravação).
+
+        Args:
+            caminho (str): Caminho do arquivo do catálogo
+        """
+        self.caminho = caminho
+        self._cache = None
+        self._cache_mtime = None
+
+    # =========================================================================
+    # AUXILIARES
+    # =========================================================================
+
+    def _trava(self) -> TravaArquivo:
+        """Trava que serializa alterações do catálogo entre processos."""
+        return TravaArquivo(self.caminho + '.lock')
+
+    def _carregar(self) -> Dict:
+        """Lê o catálogo do disco, reaproveitando o cache se o arquivo não mudou."""
+        try:
+            mtime = os.stat(self.caminho).st_mtime_ns
+        except FileNotFoundError:
+            return {'ultimo': {}, 'backups': {}, 'ensaios': []}
+
+        if self._cache is None or mtime != self._cache_mtime:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                self._cache = json.load(f)
+            self._cache_mtime = mtime
+        return self._cache
+
+    def _salvar(self, catalogo: Dict):
+        """Grava o catálogo de forma atômica (arquivo temporário + rename)."""
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(catalogo, f, indent=1, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+        self._cache = catalogo
+        self._cache_mtime = os.stat(self.caminho).st_mtime_ns
+
+    @staticmethod
+    def _recalcular_ultimos(catalogo: Dict):
+        """Refaz os apontadores para o backup mais recente de cada tipo."""
+        catalogo['ultimo'] = {}
+        for nome, entrada in catalogo['backups'].items():
+            catalogo['ultimo'][entrada['tipo']] = nome
+
+    # =========================================================================
+    # OPERAÇÕES
+    # =========================================================================
+
+    @property
+    def existe(self) -> bool:
+        """Indica se o catálogo já foi criado em disco."""
+        return os.path.exists(self.caminho)
+
+    def registrar(self, entrada: Dict):
+        """
+        Registra um backup novo e o torna o último do seu tipo.
+
+        Args:
+            entrada (Dict): Dados do backup (exige 'nome', 'tipo' e 'criado_em')
+        """
+        entrada.setdefault('verificado', None)
+        entrada.setdefault('verificado_em', None)
+        with self._trava():
+            catalogo = self._carregar()
+            catalogo['backups'][entrada['nome']] = entrada
+            catalogo['ultimo'][entrada['tipo']] = entrada['nome']
+            self._salvar(catalogo)
+
+    def remover(self, nomes: List[str]):
+        """
+        Remove entradas do catálogo (não apaga os arquivos).
+
+        Args:
+            nomes (List[str]): Nomes das entradas a remover
+        """
+        if not nomes:
+            return
+        with self._trava():
+            catalogo = self._carregar()
+            for nome in nomes:
+                catalogo['backups'].pop(nome, None)
+            self._recalcular_ultimos(catalogo)
+            self._salvar(catalogo)
+
+    def atualizar(self, nome: str, **campos):
+        """
+        Altera campos de uma entrada existente.
+
+        Args:
+            nome (str): Nome da entrada
+            **campos: Campos a alterar
+        """
+        with self._trava():
+            catalogo = self._carregar()
+            if nome in catalogo['backups']:
+                catalogo['backups'][nome].update(campos)
+                self._salvar(catalogo)
+
+    def obter(self, nome: str) -> Optional[Dict]:
+        """
+        Retorna uma entrada do catálogo.
+
+        Args:
+            nome (str): Nome da entrada
+
+        Returns:
+            Optional[Dict]: Entrada ou None
+        """
+        return self._carregar()['backups'].get(nome)
+
+    def ultimo(self, tipo: str) -> Optional[Dict]:
+        """
+        Retorna o backup mais recente de um tipo (consulta direta, sem varredura).
+
+        Args:
+            tipo (str): 'SQLite', 'Excel' ou 'Incremental'
+
+        Returns:
+            Optional[Dict]: Entrada ou None
+        """
+        catalogo = self._carregar()
+        nome = catalogo['ultimo'].get(tipo)
+        return catalogo['backups'].get(nome) if nome else None
+
+    def listar(self, tipos: tuple = None) -> List[Dict]:
+        """
+        Lista as entradas, da mais recente para a mais antiga.
+
+        Args:
+            tipos (tuple): Filtrar por tipos (opcional)
+
+        Returns:
+            List[Dict]: Entradas do catálogo
+        """
+        entradas = reversed(list(self._carregar()['backups'].values()))
+        return [e for e in entradas if tipos is None or e['tipo'] in tipos]
+
+    def registrar_ensaio(self, resultado: Dict):
+        """
+        Registra o resultado de um teste de restauração (mantém os mais recentes).
+
+        Args:
+            resultado (Dict): Resultado do ensaio (ver SistemaBackup.ensaio_restauracao)
+        """
+        with self._trava():
+            catalogo = self._carregar()
+            ensaios = catalogo.setdefault('ensaios', [])
+            ensaios.append(resultado)
+            del ensaios[:-ENSAIOS_MANTIDOS]
+            self._salvar(catalogo)
+
+    def ultimo_ensaio(self) -> Optional[Dict]:
+        """
+        Retorna o teste de restauração mais recente.
+
+        Returns:
+            Optional[Dict]: Resultado ou None se nunca houve ensaio
+        """
+        ensaios = self._carregar().get('ensaios')
+        return ensaios[-1] if ensaios else None
+
+    def pendentes_verificacao(self, quantidade: int) -> List[Dict]:
+        """
+        Entradas verificadas há mais tempo (nunca verificadas primeiro).
+
+        Args:
+            quantidade (int): Máximo de entradas
+
+        Returns:
+            List[Dict]: Entradas a verificar
+        """
+        entradas = list(self._carregar()['backups'].values())
+        entradas.sort(key=lambda e: e['verificado_em'] or '')
+        return entradas[:quantidade]
+
+    def importar_diretorio(self, diretorio: str, entradas_extras: List[Dict] = None):
+        """
+        Cria entradas para os backups completos já existentes na pasta
+        (migração única, quando o catálogo ainda não existe).
+
+        Args:
+            diretorio (str): Pasta dos backups
+            entradas_extras (List[Dict]): Outras entradas a incluir (ex.: snapshots)
+        """
+        with self._trava():
+            catalogo = self._carregar()
+            entradas = list(entradas_extras or [])
+
+            for arquivo in os.listdir(diretorio):
+                if not arquivo.startswith('imobipro_backup_') or arquivo in catalogo['backups']:
+                    continue
+                caminho = os.path.join(diretorio, arquivo)
+                stat = os.stat(caminho)
+                entradas.append({
+                    'nome': arquivo,
+                    'tipo': 'SQLite' if arquivo.endswith('.db') else 'Excel',
+                    'caminho': caminho,
+                    'criado_em': datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'),
+                    'tamanho': stat.st_size,
+                    'sha256': calcular_sha256(caminho),
+                    'duracao': None,
+                    'paginas': None,
+                    'verificado': None,
+                    'verificado_em': None,
+                })
+
+            entradas.sort(key=lambda e: e['criado_em'])
+            for entrada in entradas:
+                catalogo['backups'][entrada['nome']] = entrada
+            self._recalcular_ultimos(catalogo)
+            self._salvar(catalogo)
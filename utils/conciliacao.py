@@ -0,0 +1,409 @@
+"""
+================================================================================
+IMOBIPRO - CONCILIAÇÃO BANCÁRIA
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Lê o extrato do banco (OFX ou CSV) e sugere, para cada crédito,
+           a receita pendente correspondente e, para cada débito, a despesa
+           em aberto. As sugestões confirmadas são baixadas em lote, em uma
+           única transação.
+================================================================================
+
+Casamento:
+
+  * Receitas pendentes e despesas em aberto são lidas uma vez cada e
+    indexadas por valor em centavos (dicionário); cada lista fica ordenada
+    por vencimento. Para um lançamento, bisect acha só os candidatos com o
+    mesmo valor dentro da janela de datas — nada de comparar todos os
+    lançamentos com todas as contas.
+  * Receitas que já têm multa e juros na data de um crédito também entram no
+    índice pelo valor atualizado naquela data (utils/encargos.py), valendo só
+    para os créditos do mesmo dia; continuam casando com um lançamento só.
+  * Entre os candidatos, ganha quem tem o CPF/CNPJ do pagador no histórico,
+    depois quem tem o nome, depois o vencimento mais próximo.
+  * Duas passadas: primeiro os casamentos por documento/nome, depois os só
+    por valor e data, para que um lançamento sem nome não tome a conta que
+    outro identificaria pelo nome.
+"""
+
+import csv
+import io
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from utils.baixas import baixar_na_transacao
+from utils.encargos import expressoes_encargos
+
+# Dias antes/depois do vencimento em que um lançamento pode casar com a conta
+JANELA_DIAS = 10
+
+# Critérios de casamento, do mais forte ao mais fraco
+CRITERIOS = {3: 'CPF/CNPJ', 2: 'Nome', 1: 'Valor e data'}
+
+_PALAVRAS_IGNORADAS = {'DA', 'DE', 'DO', 'DAS', 'DOS', 'E', 'LTDA', 'ME', 'SA'}
+
+
+@dataclass
+class Lancamento:
+    """Um lançamento do extrato (valor > 0 = crédito, < 0 = débito)."""
+    indice: int
+    data: date
+    centavos: int
+    historico: str
+    documento: str = ''
+
+    @property
+    def valor(self) -> float:
+        return self.centavos / 100
+
+
+@dataclass
+class Conta:
+    """Receita pendente ou despesa em aberto candidata ao casamento."""
+    tipo: str                 # 'receita' ou 'despesa'
+    id: int
+    vencimento: date
+    centavos: int
+    nome: str
+    documento: str
+    data_valor: Optional[date] = None   # Valor atualizado: só casa com lançamentos desta data
+
+
+@dataclass
+class Sugestao:
+    """Casamento sugerido entre um lançamento e uma conta."""
+    lancamento: Lancamento
+    conta: Conta
+    criterio: str
+
+    @property
+    def dias(self) -> int:
+        """Dias entre o vencimento e o lançamento (negativo = antecipado)."""
+        return (self.lancamento.data - self.conta.vencimento).days
+
+
+# ============================================================================
+# LEITURA DO EXTRATO
+# ============================================================================
+
+def _centavos(texto: str) -> int:
+    """Valor em centavos de '1.234,56', '-1234.56', '1234,5' etc."""
+    texto = texto.strip().replace('R$', '').replace(' ', '')
+    if ',' in texto and '.' in texto:
+        # O separador mais à direita é o decimal
+        if texto.rfind(',') > texto.rfind('.'):
+            texto = texto.replace('.', '').replace(',', '.')
+        else:
+            texto = texto.replace(',', '')
+    else:
+        texto = texto.replace(',', '.')
+    return int(round(float(texto) * 100))
+
+
+def _data(texto: str) -> date:
+    """Data de 'AAAAMMDD[hhmmss...]', 'AAAA-MM-DD' ou 'DD/MM/AAAA'."""
+    texto = texto.strip()
+    if re.match(r'^\d{8}', texto):
+        return datetime.strptime(texto[:8], '%Y%m%d').date()
+    if re.match(r'^\d{4}-\d{2}-\d{2}', texto):
+        return date.fromisoformat(texto[:10])
+    return datetime.strptime(texto[:10], '%d/%m/%Y').date()
+
+
+def _ler_ofx(texto: str) -> List[Lancamento]:
+    """Lançamentos de um OFX (SGML ou XML): blocos <STMTTRN>."""
+    lancamentos = []
+    for bloco in re.findall(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|</BANKTRANLIST>)', texto, re.S | re.I):
+        campos = {chave.upper(): valor.strip()
+                  for chave, valor in re.findall(r'<(\w+)>([^<\r\n]*)', bloco)}
+        if 'DTPOSTED' not in campos or 'TRNAMT' not in campos:
+            continue
+        historico = ' '.join(filter(None, [campos.get('NAME', ''), campos.get('MEMO', '')]))
+        lancamentos.append(Lancamento(len(lancamentos), _data(campos['DTPOSTED']),
+                                      _centavos(campos['TRNAMT']), historico, campos.get('CHECKNUM', '')))
+    return lancamentos
+
+
+def _coluna(cabecalho: List[str], *nomes: str) -> Optional[int]:
+    """Índice da primeira coluna cujo nome (sem acento, minúsculo) começa com um dos nomes."""
+    for i, titulo in enumerate(cabecalho):
+        titulo = _normalizar(titulo).lower()
+        if any(titulo.startswith(nome) for nome in nomes):
+            return i
+    return None
+
+
+def _ler_csv(texto: str) -> List[Lancamento]:
+    """
+    Lançamentos de um CSV com cabeçalho: data, histórico/descrição, valor
+    (ou crédito e débito separados) e, opcionalmente, documento/CPF.
+    """
+    amostra = texto[:4096]
+    separador = ';' if amostra.count(';') >= amostra.count(',') else ','
+    linhas = list(csv.reader(io.StringIO(texto), delimiter=separador))
+    if not linhas:
+        return []
+    cabecalho = linhas[0]
+    col_data = _coluna(cabecalho, 'data')
+    col_historico = _coluna(cabecalho, 'hist', 'desc', 'lanc', 'memo')
+    col_valor = _coluna(cabecalho, 'valor')
+    col_credito = _coluna(cabecalho, 'cred', 'entrada')
+    col_debito = _coluna(cabecalho, 'deb', 'saida')
+    col_documento = _coluna(cabecalho, 'doc', 'cpf', 'cnpj')
+    if col_data is None or (col_valor is None and col_credito is None and col_debito is None):
+        raise ValueError('CSV sem as colunas de data e valor (ou crédito/débito)')
+
+    def celula(linha, coluna):
+        return linha[coluna].strip() if coluna is not None and coluna < len(linha) else ''
+
+    lancamentos = []
+    for linha in linhas[1:]:
+        if not celula(linha, col_data):
+            continue
+        if col_valor is not None and celula(linha, col_valor):
+            centavos = _centavos(celula(linha, col_valor))
+        else:
+            credito, debito = celula(linha, col_credito), celula(linha, col_debito)
+            centavos = _centavos(credito) if credito else -abs(_centavos(debito or '0'))
+        if not centavos:
+            continue
+        lancamentos.append(Lancamento(len(lancamentos), _data(celula(linha, col_data)), centavos,
+                                      celula(linha, col_historico), celula(linha, col_documento)))
+    return lancamentos
+
+
+def ler_extrato(conteudo: bytes, nome_arquivo: str = '') -> List[Lancamento]:
+    """
+    Lê um extrato OFX ou CSV (detectado pelo conteúdo).
+
+    Args:
+        conteudo (bytes): Arquivo enviado
+        nome_arquivo (str): Nome do arquivo (só para a detecção do formato)
+
+    Returns:
+        List[Lancamento]: Lançamentos na ordem do arquivo
+
+    Raises:
+        ValueError: Arquivo em formato não reconhecido ou com valores inválidos
+    """
+    try:
+        texto = conteudo.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        texto = conteudo.decode('latin-1')
+    try:
+        if '<STMTTRN>' in texto.upper() or nome_arquivo.lower().endswith('.ofx'):
+            return _ler_ofx(texto)
+        return _ler_csv(texto)
+    except (ValueError, IndexError) as e:
+        raise ValueError(f'Extrato inválido: {e}')
+
+
+# ============================================================================
+# CASAMENTO
+# ============================================================================
+
+def _normalizar(texto: str) -> str:
+    """Maiúsculas, sem acentos."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).upper()
+
+
+def _digitos(texto: str) -> str:
+    return re.sub(r'\D', '', texto or '')
+
+
+def _palavras(texto: str) -> set:
+    return {p for p in re.findall(r'[A-Z]{2,}', _normalizar(texto)) if p not in _PALAVRAS_IGNORADAS}
+
+
+def _criterio(lancamento: Lancamento, conta: Conta, palavras: set, digitos: str) -> int:
+    """3 = documento no histórico, 2 = nome (2 palavras, ou a única), 1 = só valor e data."""
+    documento = _digitos(conta.documento)
+    if len(documento) >= 11 and documento in digitos:
+        return 3
+    nome = _palavras(conta.nome)
+    if nome and len(nome & palavras) >= min(2, len(nome)):
+        return 2
+    return 1
+
+
+def ler_contas(db, inicio: date, fim: date, datas_creditos: List[date] = ()) -> List[Conta]:
+    """
+    Receitas pendentes e despesas em aberto com vencimento no período (já com a janela).
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        inicio (date): Vencimento inicial
+        fim (date): Vencimento final
+        datas_creditos (List[date]): Datas dos créditos do extrato; receitas em
+            atraso nessas datas entram de novo pelo valor com multa e juros
+
+    Returns:
+        List[Conta]: Receitas e despesas candidatas
+    """
+    parametros = {'inicio': inicio.isoformat(), 'fim': fim.isoformat()}
+    datas = {f'data_{i}': dia.isoformat() for i, dia in enumerate(sorted(set(datas_creditos)))}
+    conn = db.conectar_leitura(max_atraso=0)
+    try:
+        conn.execute("BEGIN")
+        receitas = conn.execute("""
+            SELECT 'receita' AS tipo, r.id, r.vencimento_previsto AS vencimento,
+                   r.valor_total_devido AS valor,
+                   COALESCE(p.nome_completo, pr.nome, '') AS nome,
+                   COALESCE(p.cpf_cnpj, '') AS documento,
+                   NULL AS data_valor
+            FROM receitas r
+            LEFT JOIN contratos     c  ON r.id_contrato     = c.id
+            LEFT JOIN pessoas       p  ON c.id_inquilino    = p.id
+            LEFT JOIN proprietarios pr ON r.id_proprietario = pr.id
+            WHERE r.status IN ('Pendente', 'Atrasado')
+              AND r.vencimento_previsto BETWEEN :inicio AND :fim
+        """, parametros).fetchall()
+        if datas:
+            # Mesma receita pelo valor atualizado em cada data de crédito em que já tem encargos
+            encargos = expressoes_encargos('r', 'x.data')
+            marcadores = ', '.join(f'(:{chave})' for chave in datas)
+            receitas += conn.execute(f"""
+                WITH x(data) AS (VALUES {marcadores})
+                SELECT 'receita' AS tipo, r.id, r.vencimento_previsto AS vencimento,
+                       {encargos['valor_atualizado']} AS valor,
+                       COALESCE(p.nome_completo, pr.nome, '') AS nome,
+                       COALESCE(p.cpf_cnpj, '') AS documento,
+                       x.data AS data_valor
+                FROM receitas r
+                JOIN x ON x.data > r.vencimento_previsto
+                LEFT JOIN contratos     c  ON r.id_contrato     = c.id
+                LEFT JOIN pessoas       p  ON c.id_inquilino    = p.id
+                LEFT JOIN proprietarios pr ON r.id_proprietario = pr.id
+                WHERE r.status IN ('Pendente', 'Atrasado')
+                  AND r.vencimento_previsto BETWEEN :inicio AND :fim
+                  AND ({encargos['encargos']}) > 0
+            """, {**parametros, **datas}).fetchall()
+        despesas = conn.execute("""
+            SELECT 'despesa' AS tipo, d.id, d.vencimento_previsto AS vencimento,
+                   d.valor_previsto AS valor,
+                   d.tipo_despesa || ' ' || COALESCE(d.motivo_despesa, '') AS nome,
+                   '' AS documento, NULL AS data_valor
+            FROM despesas d
+            WHERE d.data_pagamento IS NULL
+              AND d.vencimento_previsto BETWEEN :inicio AND :fim
+        """, parametros).fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    return [Conta(linha['tipo'], linha['id'], date.fromisoformat(linha['vencimento'][:10]),
+                  int(round((linha['valor'] or 0) * 100)), linha['nome'], linha['documento'],
+                  date.fromisoformat(linha['data_valor']) if linha['data_valor'] else None)
+            for linha in (*receitas, *despesas)]
+
+
+def _indexar(contas: List[Conta]) -> Dict[Tuple[str, int], Tuple[List[date], List[Conta]]]:
+    """Índice {(tipo, centavos): (vencimentos ordenados, contas na mesma ordem)}."""
+    grupos: Dict[Tuple[str, int], List[Conta]] = {}
+    for conta in contas:
+        grupos.setdefault((conta.tipo, conta.centavos), []).append(conta)
+    indice = {}
+    for chave, grupo in grupos.items():
+        grupo.sort(key=lambda c: (c.vencimento, c.id))
+        indice[chave] = ([c.vencimento for c in grupo], grupo)
+    return indice
+
+
+def conciliar(db, lancamentos: List[Lancamento], janela_dias: int = JANELA_DIAS) -> Tuple[List[Sugestao], List[Lancamento]]:
+    """
+    Sugere a conta de cada lançamento do extrato.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        lancamentos (List[Lancamento]): Lançamentos lidos por ler_extrato
+        janela_dias (int): Dias antes/depois do vencimento aceitos
+
+    Returns:
+        Tuple[List[Sugestao], List[Lancamento]]: Sugestões (na ordem do extrato)
+            e lançamentos sem conta correspondente
+    """
+    if not lancamentos:
+        return [], []
+    janela = timedelta(days=janela_dias)
+    contas = ler_contas(db, min(l.data for l in lancamentos) - janela,
+                        max(l.data for l in lancamentos) + janela,
+                        [l.data for l in lancamentos if l.centavos > 0])
+    indice = _indexar(contas)
+
+    # Candidatos de cada lançamento: mesmo tipo e valor, vencimento na janela
+    candidatos: Dict[int, List[Tuple[int, int, Conta]]] = {}
+    for lancamento in lancamentos:
+        tipo = 'receita' if lancamento.centavos > 0 else 'despesa'
+        vencimentos, grupo = indice.get((tipo, abs(lancamento.centavos)), ([], []))
+        inicio = bisect_left(vencimentos, lancamento.data - janela)
+        fim = bisect_right(vencimentos, lancamento.data + janela)
+        if inicio == fim:
+            continue
+        palavras = _palavras(lancamento.historico)
+        digitos = _digitos(lancamento.historico) + ' ' + _digitos(lancamento.documento)
+        candidatos[lancamento.indice] = sorted(
+            ((_criterio(lancamento, conta, palavras, digitos), abs((lancamento.data - conta.vencimento).days), conta)
+             for conta in grupo[inicio:fim] if conta.data_valor in (None, lancamento.data)),
+            key=lambda c: (-c[0], c[1], c[2].id))
+
+    # Primeiro quem se identifica por documento/nome, depois só por valor e data
+    escolhidas: Dict[int, Sugestao] = {}
+    usadas = set()
+    for minimo in (2, 1):
+        for lancamento in lancamentos:
+            if lancamento.indice in escolhidas:
+                continue
+            for criterio, _, conta in candidatos.get(lancamento.indice, []):
+                if criterio < minimo:
+                    break
+                if (conta.tipo, conta.id) not in usadas:
+                    usadas.add((conta.tipo, conta.id))
+                    escolhidas[lancamento.indice] = Sugestao(lancamento, conta, CRITERIOS[criterio])
+                    break
+
+    sugestoes = [escolhidas[l.indice] for l in lancamentos if l.indice in escolhidas]
+    sem_conta = [l for l in lancamentos if l.indice not in escolhidas]
+    return sugestoes, sem_conta
+
+
+def aplicar_conciliacao(db, baixas: List[Tuple[str, int, date, float]]) -> Dict[str, list]:
+    """
+    Baixa as sugestões confirmadas (receitas e despesas) em uma única transação.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        baixas (List): (tipo 'receita'/'despesa', id, data do lançamento, valor)
+
+    Returns:
+        Dict[str, list]: ResultadoItem das 'receitas' e das 'despesas'
+    """
+    valores = {'receita': {}, 'despesa': {}}
+    datas = {'receita': {}, 'despesa': {}}
+    for tipo, id_conta, data, valor in baixas:
+        valores[tipo][id_conta] = valor
+        datas[tipo][id_conta] = data
+
+    with db.trava_escrita():
+        conn = db.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            resultado = {
+                'receitas': baixar_na_transacao(conn, 'receber', valores['receita'], datas=datas['receita']),
+                'despesas': baixar_na_transacao(conn, 'pagar', valores['despesa'], datas=datas['despesa']),
+            }
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    print(f"✓ Conciliação bancária: {sum(r.ok for r in resultado['receitas'])} receita(s) recebida(s), "
+          f"{sum(r.ok for r in resultado['despesas'])} despesa(s) paga(s)")
+    return resultado
@@ -0,0 +1,213 @@
+"""
+================================================================================
+IMOBIPRO - ATUALIZAÇÃO DE CONDOMÍNIOS EM LOTE
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Grava os novos valores de condomínio dos imóveis em uma única
+           transação (executemany) e, opcionalmente, repassa os valores às
+           receitas pendentes e às despesas de condomínio ainda não pagas,
+           com prévia das linhas afetadas.
+================================================================================
+
+  * condominio_inquilino → receitas 'Pendente' de aluguel com vencimento a
+    partir de hoje (condominio_devido; o trigger calcular_total_receita_update
+    recalcula valor_total_devido).
+  * condominio_total → despesas de 'Condomínio' sem pagamento com vencimento
+    a partir de hoje (valor_previsto).
+  * Os novos valores entram nas consultas como uma CTE (VALUES), então a
+    prévia e o repasse são uma consulta/UPDATE cada, sobre o conjunto todo.
+"""
+
+from datetime import date
+from typing import Dict, List, Tuple
+
+# Campos do formulário: prefixo -> coluna de imoveis
+CAMPOS_CONDOMINIO = {
+    'condominio_inquilino_': 'condominio_inquilino',
+    'condominio_total_': 'condominio_total',
+}
+
+# Linhas que o repasse altera ({juncoes}: tabelas extras só para a prévia)
+_RECEITAS_AFETADAS = """
+    FROM receitas r
+    JOIN contratos c ON c.id = r.id_contrato
+    JOIN novos     n ON n.id_imovel = c.id_imovel
+    {juncoes}
+    WHERE n.condominio_inquilino IS NOT NULL
+      AND r.status = 'Pendente'
+      AND r.tipo_receita = 'Aluguel'
+      AND r.vencimento_previsto >= :hoje
+      AND COALESCE(r.condominio_devido, 0) <> n.condominio_inquilino
+"""
+
+_DESPESAS_AFETADAS = """
+    FROM despesas d
+    JOIN novos    n ON n.id_imovel = d.id_imovel
+    {juncoes}
+    WHERE n.condominio_total IS NOT NULL
+      AND d.tipo_despesa = 'Condomínio'
+      AND d.data_pagamento IS NULL
+      AND d.vencimento_previsto >= :hoje
+      AND d.valor_previsto <> n.condominio_total
+"""
+
+
+def ler_formulario_condominios(formulario) -> Dict[int, Dict[str, float]]:
+    """
+    Lê os novos valores do formulário (campos em branco não mudam).
+
+    Args:
+        formulario: request.form (condominio_inquilino_<id>, condominio_total_<id>)
+
+    Returns:
+        Dict[int, Dict[str, float]]: {id_imovel: {coluna: valor}}
+
+    Raises:
+        ValueError: Se algum valor não for numérico ou for negativo
+    """
+    novos: Dict[int, Dict[str, float]] = {}
+    for chave, valor in formulario.items():
+        valor = valor.strip()
+        if not valor:
+            continue
+        for prefixo, coluna in CAMPOS_CONDOMINIO.items():
+            if chave.startswith(prefixo):
+                numero = float(valor.replace(',', '.'))
+                if numero < 0:
+                    raise ValueError('O valor do condomínio não pode ser negativo')
+                novos.setdefault(int(chave[len(prefixo):]), {})[coluna] = numero
+    return novos
+
+
+def _cte_novos(novos: Dict[int, Dict[str, float]], hoje: date) -> Tuple[str, Dict[str, object]]:
+    """CTE 'novos' (id_imovel, condominio_inquilino, condominio_total) e seus parâmetros."""
+    valores, parametros = [], {'hoje': (hoje or date.today()).isoformat()}
+    for n, (id_imovel, dados) in enumerate(novos.items()):
+        valores.append(f"(:id_{n}, :inquilino_{n}, :total_{n})")
+        parametros[f'id_{n}'] = id_imovel
+        parametros[f'inquilino_{n}'] = dados.get('condominio_inquilino')
+        parametros[f'total_{n}'] = dados.get('condominio_total')
+    cte = f"WITH novos(id_imovel, condominio_inquilino, condominio_total) AS (VALUES {', '.join(valores)})"
+    return cte, parametros
+
+
+def previa_condominios(db, novos: Dict[int, Dict[str, float]], hoje: date = None) -> Dict[str, List[Dict]]:
+    """
+    Linhas afetadas pela atualização, sem gravar nada.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        novos (Dict): {id_imovel: {coluna: valor}} (de ler_formulario_condominios)
+        hoje (date): Data de corte do repasse (padrão: hoje)
+
+    Returns:
+        Dict[str, List[Dict]]: 'imoveis', 'receitas' e 'despesas' com valor atual e novo
+    """
+    if not novos:
+        return {'imoveis': [], 'receitas': [], 'despesas': []}
+    cte, parametros = _cte_novos(novos, hoje)
+
+    # max_atraso=0: a prévia tem de mostrar exatamente o que aplicar_condominios() vai alterar
+    conn = db.conectar_leitura(max_atraso=0)
+    try:
+        conn.execute("BEGIN")
+        imoveis = conn.execute(f"""
+            {cte}
+            SELECT i.id, i.endereco_completo,
+                   i.condominio_inquilino, COALESCE(n.condominio_inquilino, i.condominio_inquilino) AS novo_inquilino,
+                   i.condominio_total,     COALESCE(n.condominio_total, i.condominio_total)         AS novo_total
+            FROM novos n JOIN imoveis i ON i.id = n.id_imovel
+            ORDER BY i.endereco_completo
+        """, parametros).fetchall()
+        receitas = conn.execute(f"""
+            {cte}
+            SELECT r.id, r.mes_referencia, r.vencimento_previsto, i.endereco_completo AS imovel,
+                   p.nome_completo AS inquilino,
+                   r.condominio_devido, n.condominio_inquilino AS novo_condominio,
+                   r.valor_total_devido,
+                   r.valor_total_devido - COALESCE(r.condominio_devido, 0) + n.condominio_inquilino AS novo_total
+            {_RECEITAS_AFETADAS.format(juncoes='JOIN imoveis i ON i.id = c.id_imovel '
+                                              'LEFT JOIN pessoas p ON p.id = c.id_inquilino')}
+            ORDER BY r.vencimento_previsto, i.endereco_completo
+        """, parametros).fetchall()
+        despesas = conn.execute(f"""
+            {cte}
+            SELECT d.id, d.mes_referencia, d.vencimento_previsto, i.endereco_completo AS imovel,
+                   d.valor_previsto, n.condominio_total AS novo_valor
+            {_DESPESAS_AFETADAS.format(juncoes='JOIN imoveis i ON i.id = d.id_imovel')}
+            ORDER BY d.vencimento_previsto, i.endereco_completo
+        """, parametros).fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    return {
+        'imoveis': [dict(linha) for linha in imoveis],
+        'receitas': [dict(linha) for linha in receitas],
+        'despesas': [dict(linha) for linha in despesas],
+    }
+
+
+def aplicar_condominios(db, novos: Dict[int, Dict[str, float]], repassar: bool = False, hoje: date = None) -> Dict[str, int]:
+    """
+    Grava os novos valores (e o repasse, se pedido) em uma única transação.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        novos (Dict): {id_imovel: {coluna: valor}} (de ler_formulario_condominios)
+        repassar (bool): Atualizar também receitas pendentes e despesas não pagas
+        hoje (date): Data de corte do repasse (padrão: hoje)
+
+    Returns:
+        Dict[str, int]: Quantidades de 'imoveis', 'receitas' e 'despesas' alteradas
+    """
+    resultado = {'imoveis': 0, 'receitas': 0, 'despesas': 0}
+    if not novos:
+        return resultado
+    cte, parametros = _cte_novos(novos, hoje)
+
+    with db.trava_escrita():
+        conn = db.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            resultado['imoveis'] = conn.executemany("""
+                UPDATE imoveis
+                SET condominio_inquilino = COALESCE(:condominio_inquilino, condominio_inquilino),
+                    condominio_total     = COALESCE(:condominio_total, condominio_total)
+                WHERE id = :id
+            """, [{'id': id_imovel,
+                   'condominio_inquilino': dados.get('condominio_inquilino'),
+                   'condominio_total': dados.get('condominio_total')}
+                  for id_imovel, dados in novos.items()]).rowcount
+
+            if repassar:
+                # rowcount é -1 em comandos que começam com WITH: contagem por changes()
+                conn.execute(f"""
+                    {cte}
+                    UPDATE receitas
+                    SET condominio_devido = (SELECT NULLIF(n.condominio_inquilino, 0)
+                                             FROM contratos c JOIN novos n ON n.id_imovel = c.id_imovel
+                                             WHERE c.id = receitas.id_contrato)
+                    WHERE id IN (SELECT r.id {_RECEITAS_AFETADAS.format(juncoes='')})
+                """, parametros)
+                resultado['receitas'] = conn.execute("SELECT changes()").fetchone()[0]
+                conn.execute(f"""
+                    {cte}
+                    UPDATE despesas
+                    SET valor_previsto = (SELECT n.condominio_total FROM novos n
+                                          WHERE n.id_imovel = despesas.id_imovel)
+                    WHERE id IN (SELECT d.id {_DESPESAS_AFETADAS.format(juncoes='')})
+                """, parametros)
+                resultado['despesas'] = conn.execute("SELECT changes()").fetchone()[0]
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    print(f"✓ Condomínios atualizados: {resultado['imoveis']} imóvel(is), "
+          f"{resultado['receitas']} receita(s), {resultado['despesas']} despesa(s)")
+    return resultado
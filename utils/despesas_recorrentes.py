@@ -0,0 +1,195 @@
+"""
+================================================================================
+IMOBIPRO - DESPESAS RECORRENTES
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Modelos de despesa que se repetem (seguro, taxa de administração,
+           contratos de manutenção) com periodicidade, dia de vencimento e
+           data final. O gerador cria as despesas devidas de um intervalo de
+           meses com um único INSERT ... SELECT idempotente.
+================================================================================
+
+  * Cada despesa gerada guarda o modelo em despesas.id_despesa_recorrente
+    (com recorrente = 1). O índice único (id_despesa_recorrente,
+    mes_referencia) faz do INSERT OR IGNORE um no-op para os meses que já
+    foram gerados: rodar de novo, ou com intervalos sobrepostos, não duplica.
+  * Os meses do intervalo vêm de uma CTE recursiva; um modelo entra no mês
+    se o mês está entre o início e o fim e a distância (em meses) desde o
+    início é múltipla da periodicidade.
+  * Dia de vencimento maior que o mês (ex.: 31 em fevereiro) cai no último dia.
+  * O agendador gera o mês corrente e os MESES_ANTECEDENCIA seguintes todo dia.
+"""
+
+from datetime import date
+from typing import Dict, List
+
+# Periodicidade -> intervalo em meses
+PERIODICIDADES = {'Mensal': 1, 'Bimestral': 2, 'Trimestral': 3, 'Semestral': 6, 'Anual': 12}
+
+# Meses à frente gerados pelo agendador, além do corrente
+MESES_ANTECEDENCIA = 1
+
+# Tabela de modelos (também em database/schema.sql). A coluna
+# despesas.id_despesa_recorrente é criada por instalar() em bancos antigos.
+DDL_DESPESAS_RECORRENTES = """
+CREATE TABLE IF NOT EXISTS despesas_recorrentes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_imovel INTEGER NOT NULL,
+    tipo_despesa TEXT NOT NULL,
+    descricao TEXT NOT NULL,                   -- vira motivo_despesa + ' MM/AAAA'
+    valor REAL NOT NULL,
+    periodicidade_meses INTEGER NOT NULL DEFAULT 1,
+    dia_vencimento INTEGER NOT NULL DEFAULT 10,
+    inicio DATE NOT NULL,                      -- primeiro mês (AAAA-MM-01)
+    fim DATE,                                  -- último mês (NULL = sem fim)
+    ativo INTEGER NOT NULL DEFAULT 1,
+    observacoes TEXT,
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (id_imovel) REFERENCES imoveis(id) ON DELETE CASCADE,
+
+    CHECK(tipo_despesa IN ('Manutenção', 'Condomínio', 'Reforma', 'IPTU', 'Outros')),
+    CHECK(valor >= 0),
+    CHECK(periodicidade_meses IN (1, 2, 3, 6, 12)),
+    CHECK(dia_vencimento BETWEEN 1 AND 31),
+    CHECK(fim IS NULL OR fim >= inicio)
+);
+"""
+
+_DDL_INDICE = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_despesas_recorrente_mes
+    ON despesas(id_despesa_recorrente, mes_referencia)
+    WHERE id_despesa_recorrente IS NOT NULL;
+"""
+
+_SQL_GERAR = """
+WITH RECURSIVE meses(mes) AS (
+    SELECT date(:inicio, 'start of month')
+    UNION ALL
+    SELECT date(mes, '+1 month') FROM meses WHERE mes < date(:fim, 'start of month')
+)
+INSERT OR IGNORE INTO despesas (id_imovel, tipo_despesa, motivo_despesa, mes_referencia, valor_previsto,
+                                vencimento_previsto, observacoes, recorrente, id_despesa_recorrente)
+SELECT t.id_imovel,
+       t.tipo_despesa,
+       t.descricao || ' ' || strftime('%m/%Y', m.mes),
+       m.mes,
+       t.valor,
+       date(m.mes, '+' || (MIN(t.dia_vencimento,
+                               CAST(strftime('%d', date(m.mes, '+1 month', '-1 day')) AS INTEGER)) - 1) || ' days'),
+       'Gerada pela despesa recorrente #' || t.id,
+       1,
+       t.id
+FROM despesas_recorrentes t
+JOIN meses m ON m.mes >= date(t.inicio, 'start of month')
+            AND (t.fim IS NULL OR m.mes <= t.fim)
+WHERE t.ativo = 1
+  AND ((CAST(strftime('%Y', m.mes) AS INTEGER) - CAST(strftime('%Y', t.inicio) AS INTEGER)) * 12
+       + CAST(strftime('%m', m.mes) AS INTEGER) - CAST(strftime('%m', t.inicio) AS INTEGER))
+      % t.periodicidade_meses = 0
+"""
+
+
+def _somar_meses(dia: date, meses: int) -> date:
+    """Primeiro dia do mês 'meses' depois do mês de 'dia'."""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class DespesasRecorrentes:
+    """
+    Cadastro dos modelos de despesa recorrente e geração das despesas.
+    """
+
+    def __init__(self, db):
+        """
+        Inicializa o gerador.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+        """
+        self.db = db
+
+    def instalar(self) -> bool:
+        """Cria a tabela de modelos, a coluna de vínculo em despesas e o índice único (idempotente)."""
+        if not self.db.aplicar_ddl(DDL_DESPESAS_RECORRENTES):
+            return False
+        with self.db.trava_escrita():
+            conn = self.db.connect()
+            try:
+                colunas = [linha[1] for linha in conn.execute("PRAGMA table_info(despesas)")]
+                if 'id_despesa_recorrente' not in colunas:
+                    conn.execute("ALTER TABLE despesas ADD COLUMN id_despesa_recorrente INTEGER "
+                                 "REFERENCES despesas_recorrentes(id) ON DELETE SET NULL")
+                    conn.commit()
+                    print("✓ Coluna despesas.id_despesa_recorrente criada")
+            finally:
+                conn.close()
+        return self.db.aplicar_ddl(_DDL_INDICE)
+
+    def listar(self) -> List[Dict]:
+        """Modelos cadastrados, com o imóvel e a quantidade de despesas já geradas."""
+        return self.db.execute_query("""
+            SELECT t.*, i.endereco_completo AS imovel_endereco,
+                   (SELECT COUNT(*) FROM despesas d WHERE d.id_despesa_recorrente = t.id) AS geradas,
+                   (SELECT MAX(d.mes_referencia) FROM despesas d WHERE d.id_despesa_recorrente = t.id) AS ultimo_mes
+            FROM despesas_recorrentes t
+            JOIN imoveis i ON i.id = t.id_imovel
+            ORDER BY t.ativo DESC, i.endereco_completo, t.descricao
+        """)
+
+    def criar(self, dados: Dict) -> bool:
+        """
+        Cadastra um modelo.
+
+        Args:
+            dados (Dict): id_imovel, tipo_despesa, descricao, valor, periodicidade_meses,
+                dia_vencimento, inicio, fim (opcional) e observacoes (opcional)
+
+        Returns:
+            bool: True se gravado
+        """
+        return self.db.insert('despesas_recorrentes', dados) is not None
+
+    def definir_ativo(self, id_modelo: int, ativo: bool) -> bool:
+        """Ativa ou suspende um modelo (as despesas já geradas não mudam)."""
+        return self.db.execute_update("UPDATE despesas_recorrentes SET ativo = ? WHERE id = ?",
+                                      (1 if ativo else 0, id_modelo))
+
+    def excluir(self, id_modelo: int) -> bool:
+        """Exclui um modelo; as despesas já geradas ficam, sem o vínculo."""
+        return self.db.execute_update("DELETE FROM despesas_recorrentes WHERE id = ?", (id_modelo,))
+
+    def gerar(self, inicio: date = None, fim: date = None) -> int:
+        """
+        Cria as despesas devidas entre dois meses (inclusive) que ainda não existem.
+
+        Args:
+            inicio (date): Primeiro mês (padrão: mês corrente)
+            fim (date): Último mês (padrão: MESES_ANTECEDENCIA depois do início)
+
+        Returns:
+            int: Despesas criadas (0 se tudo já estava gerado)
+        """
+        inicio = inicio or date.today()
+        fim = fim or _somar_meses(inicio, MESES_ANTECEDENCIA)
+        if fim < inicio:
+            raise ValueError('O mês final deve ser igual ou posterior ao inicial')
+
+        with self.db.trava_escrita():
+            conn = self.db.connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(_SQL_GERAR, {'inicio': inicio.isoformat(), 'fim': fim.isoformat()})
+                # rowcount vem -1 em comandos iniciados por WITH; changes() não conta os triggers
+                criadas = conn.execute("SELECT changes()").fetchone()[0]
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        print(f"✓ Despesas recorrentes {inicio.strftime('%m/%Y')} a {fim.strftime('%m/%Y')}: {criadas} criada(s)")
+        return criadas
@@ -0,0 +1,353 @@
+"""
+================================================================================
+IMOBIPRO - ARQUIVO DA DIMOB (DECLARAÇÃO DE INFORMAÇÕES SOBRE ATIVIDADES
+           IMOBILIÁRIAS)
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Gera o arquivo de importação da DIMOB (leiaute de tamanho fixo da
+           Receita Federal) com os aluguéis recebidos mês a mês em cada
+           locação do ano-calendário, registro a registro.
+================================================================================
+
+Registros gerados:
+  * Cabeçalho "DIMOB", R01 (dados do declarante), um R02 por locação com
+    aluguel recebido no ano e o trailer T9.
+  * Os dados do declarante (CNPJ, nome, CPF do responsável, endereço, UF e
+    código do município) ficam na tabela configuracoes (chaves dimob_*).
+  * Locador: pessoa vinculada ao imóvel (imoveis.id_proprietario); sem ela,
+    o nome do proprietário e o CPF/CNPJ em 'dimob_cpf_locador:<nome>'.
+  * Valor do aluguel: valor recebido menos condomínio e IPTU repassados, pelo
+    mês do recebimento. Comissão e imposto retido não são controlados pelo
+    sistema e saem zerados.
+
+Uma única consulta agrupada por contrato é lida em lotes de TAMANHO_LOTE
+linhas (o CROSS JOIN fixa contratos como laço externo, então os grupos saem
+na ordem da chave, sem ordenação temporária); os CPF/CNPJ de cada lote são
+validados de uma vez, com cache dos documentos já vistos. Locações com
+documento ausente ou inválido não entram no arquivo e aparecem no resumo.
+"""
+
+import argparse
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Linhas lidas do banco por vez
+TAMANHO_LOTE = 500
+
+# Fim de linha exigido pelo programa da Receita
+FIM_LINHA = '\r\n'
+
+# Configurações do declarante (também em database/schema.sql)
+DDL_DIMOB = """
+INSERT OR IGNORE INTO configuracoes (chave, valor, descricao) VALUES
+('dimob_cnpj_declarante', '', 'DIMOB: CNPJ do declarante'),
+('dimob_nome_declarante', '', 'DIMOB: nome empresarial do declarante'),
+('dimob_cpf_responsavel', '', 'DIMOB: CPF do responsável pela declaração'),
+('dimob_endereco_declarante', '', 'DIMOB: endereço completo do declarante'),
+('dimob_uf', 'MS', 'DIMOB: UF do declarante'),
+('dimob_codigo_municipio', '9051', 'DIMOB: código do município (tabela da Receita; 9051 = Campo Grande)');
+"""
+
+CONFIGURACOES_DIMOB = ['dimob_cnpj_declarante', 'dimob_nome_declarante', 'dimob_cpf_responsavel',
+                       'dimob_endereco_declarante', 'dimob_uf', 'dimob_codigo_municipio']
+
+_ALUGUEL_MES = ("TOTAL(CASE WHEN substr(r.data_recebimento, 6, 2) = '{mes:02d}' THEN "
+                "MAX(r.valor_recebido - COALESCE(r.condominio_devido, 0) - COALESCE(r.iptu_devido, 0), 0) END) "
+                "AS mes_{mes:02d}")
+
+SQL_LOCACOES = f"""
+    SELECT c.id AS id_contrato, c.inicio_contrato,
+           i.endereco_completo, i.cep, i.estado,
+           COALESCE(loc.nome_completo, i.proprietario) AS nome_locador,
+           COALESCE(NULLIF(loc.cpf_cnpj, ''), cfg.valor) AS documento_locador,
+           inq.nome_completo AS nome_locatario, inq.cpf_cnpj AS documento_locatario,
+           {', '.join(_ALUGUEL_MES.format(mes=mes) for mes in range(1, 13))}
+    FROM contratos c
+    CROSS JOIN receitas r ON r.id_contrato = c.id
+    JOIN imoveis i ON i.id = c.id_imovel
+    JOIN pessoas inq ON inq.id = c.id_inquilino
+    LEFT JOIN pessoas loc ON loc.id = i.id_proprietario
+    LEFT JOIN configuracoes cfg ON cfg.chave = 'dimob_cpf_locador:' || i.proprietario
+    WHERE r.data_recebimento BETWEEN :inicio AND :fim
+      AND r.valor_recebido > 0
+    GROUP BY c.id
+    ORDER BY c.id
+"""
+
+
+# =============================================================================
+# VALIDAÇÃO DE CPF/CNPJ
+# =============================================================================
+
+def _digitos(documento: Optional[str]) -> str:
+    """Somente os dígitos do documento (remove máscara)."""
+    return re.sub(r'\D', '', documento or '')
+
+
+def _digito_verificador(numeros: str, pesos: Iterable[int]) -> str:
+    """Dígito verificador módulo 11 (CPF e CNPJ)."""
+    resto = sum(int(n) * p for n, p in zip(numeros, pesos)) % 11
+    return '0' if resto < 2 else str(11 - resto)
+
+
+def cpf_valido(cpf: str) -> bool:
+    """Valida os dígitos verificadores de um CPF (11 dígitos, sem máscara)."""
+    if len(cpf) != 11 or cpf == cpf[0] * 11:
+        return False
+    primeiro = _digito_verificador(cpf[:9], range(10, 1, -1))
+    segundo = _digito_verificador(cpf[:9] + primeiro, range(11, 1, -1))
+    return cpf[9:] == primeiro + segundo
+
+
+def cnpj_valido(cnpj: str) -> bool:
+    """Valida os dígitos verificadores de um CNPJ (14 dígitos, sem máscara)."""
+    if len(cnpj) != 14 or cnpj == cnpj[0] * 14:
+        return False
+    pesos = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    primeiro = _digito_verificador(cnpj[:12], pesos[1:])
+    segundo = _digito_verificador(cnpj[:12] + primeiro, pesos)
+    return cnpj[12:] == primeiro + segundo
+
+
+def validar_documentos(documentos: Iterable[Optional[str]],
+                       cache: Dict[str, Optional[str]] = None) -> Dict[str, Optional[str]]:
+    """
+    Valida um lote de CPF/CNPJ.
+
+    Args:
+        documentos (Iterable[str]): Documentos como estão no cadastro (com ou sem máscara)
+        cache (Dict): Resultados já conhecidos, atualizado com os novos
+
+    Returns:
+        Dict: {documento original: dígitos se válido, None se inválido}
+    """
+    cache = {} if cache is None else cache
+    for documento in set(documentos) - cache.keys():
+        digitos = _digitos(documento)
+        valido = cpf_valido(digitos) if len(digitos) == 11 else cnpj_valido(digitos)
+        cache[documento] = digitos if valido else None
+    return cache
+
+
+# =============================================================================
+# CAMPOS DE TAMANHO FIXO
+# =============================================================================
+
+def _texto(valor: Optional[str], tamanho: int) -> str:
+    """Texto em maiúsculas, sem acentos, alinhado à esquerda e completado com brancos."""
+    texto = unicodedata.normalize('NFKD', valor or '').encode('ascii', 'ignore').decode('ascii')
+    texto = ' '.join(texto.upper().split())
+    return texto[:tamanho].ljust(tamanho)
+
+
+def _numero(valor, tamanho: int) -> str:
+    """Número alinhado à direita e completado com zeros."""
+    return str(int(valor or 0)).zfill(tamanho)[-tamanho:]
+
+
+def _valor(valor: Optional[float], tamanho: int = 14) -> str:
+    """Valor monetário em centavos (duas casas implícitas)."""
+    return _numero(round((valor or 0) * 100), tamanho)
+
+
+def _data(valor: Optional[str]) -> str:
+    """AAAA-MM-DD em DDMMAAAA (zeros se vazio)."""
+    if not valor or len(valor) < 10:
+        return '0' * 8
+    return valor[8:10] + valor[5:7] + valor[0:4]
+
+
+# =============================================================================
+# GERAÇÃO
+# =============================================================================
+
+@dataclass
+class Rejeicao:
+    """Locação que ficou fora do arquivo."""
+    id_contrato: int
+    locatario: str
+    motivo: str
+
+
+@dataclass
+class ResumoDimob:
+    """Totais da geração e locações rejeitadas."""
+    ano: int
+    locacoes: int = 0
+    valor_total: float = 0.0
+    rejeitadas: List[Rejeicao] = field(default_factory=list)
+
+
+def ler_declarante(db) -> Dict[str, str]:
+    """
+    Dados do declarante gravados em configuracoes.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+
+    Returns:
+        Dict: {chave: valor} para cada chave de CONFIGURACOES_DIMOB
+    """
+    marcadores = ', '.join('?' for _ in CONFIGURACOES_DIMOB)
+    linhas = db.execute_query(f"SELECT chave, valor FROM configuracoes WHERE chave IN ({marcadores})",
+                              tuple(CONFIGURACOES_DIMOB))
+    declarante = {chave: '' for chave in CONFIGURACOES_DIMOB}
+    declarante.update({linha['chave']: linha['valor'] or '' for linha in linhas})
+    return declarante
+
+
+def _registro_r02(cnpj: str, ano: int, sequencial: int, locacao: Dict,
+                  documento_locador: str, documento_locatario: str, codigo_municipio: str) -> str:
+    """Registro R02 (uma locação)."""
+    meses = ''.join(_valor(locacao[f'mes_{mes:02d}']) + _valor(0) + _valor(0) for mes in range(1, 13))
+    return ''.join([
+        'R02',
+        cnpj,
+        _numero(ano, 4),
+        _numero(sequencial, 5),
+        documento_locador.ljust(14),
+        _texto(locacao['nome_locador'], 60),
+        documento_locatario.ljust(14),
+        _texto(locacao['nome_locatario'], 60),
+        _numero(locacao['id_contrato'], 6),
+        _data(locacao['inicio_contrato']),
+        meses,
+        'U',                                                 # Imóvel urbano
+        _texto(locacao['endereco_completo'], 60),
+        _numero(_digitos(locacao['cep']), 8),
+        _numero(codigo_municipio, 4),
+        ' ' * 20,
+        _texto(locacao['estado'], 2),
+        ' ' * 10,
+    ])
+
+
+def gerar_registros(db, ano: int, resumo: ResumoDimob = None) -> Iterator[str]:
+    """
+    Gera as linhas do arquivo, uma a uma (sem montar o arquivo em memória).
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        ano (int): Ano-calendário
+        resumo (ResumoDimob): Preenchido durante a geração (locações, total e rejeitadas)
+
+    Yields:
+        str: Cada registro, já com o fim de linha
+
+    Raises:
+        ValueError: Se os dados do declarante estiverem incompletos ou inválidos
+    """
+    resumo = resumo if resumo is not None else ResumoDimob(ano=ano)
+    declarante = ler_declarante(db)
+    cnpj = _digitos(declarante['dimob_cnpj_declarante'])
+    cpf_responsavel = _digitos(declarante['dimob_cpf_responsavel'])
+    if not cnpj_valido(cnpj):
+        raise ValueError('CNPJ do declarante ausente ou inválido (configuração dimob_cnpj_declarante).')
+    if not cpf_valido(cpf_responsavel):
+        raise ValueError('CPF do responsável ausente ou inválido (configuração dimob_cpf_responsavel).')
+    if not declarante['dimob_nome_declarante'].strip():
+        raise ValueError('Nome do declarante não configurado (configuração dimob_nome_declarante).')
+
+    yield 'DIMOB' + ' ' * 369 + FIM_LINHA
+    yield ''.join([
+        'R01',
+        cnpj,
+        _numero(ano, 4),
+        '0',                                                 # Declaração original
+        '0' * 10,                                            # Número do recibo (retificadora)
+        '0',                                                 # Sem situação especial
+        '0' * 8,
+        '00',
+        _texto(declarante['dimob_nome_declarante'], 60),
+        cpf_responsavel,
+        _texto(declarante['dimob_endereco_declarante'], 120),
+        _texto(declarante['dimob_uf'], 2),
+        _numero(declarante['dimob_codigo_municipio'], 4),
+        ' ' * 20,
+        ' ' * 10,
+    ]) + FIM_LINHA
+
+    documentos: Dict[str, Optional[str]] = {}
+    conn = db.conectar_leitura()
+    try:
+        cursor = conn.execute(SQL_LOCACOES, {'inicio': f'{ano}-01-01', 'fim': f'{ano}-12-31'})
+        while True:
+            lote = cursor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            validar_documentos([l['documento_locador'] for l in lote] +
+                               [l['documento_locatario'] for l in lote], documentos)
+
+            for locacao in lote:
+                documento_locador = documentos[locacao['documento_locador']]
+                documento_locatario = documentos[locacao['documento_locatario']]
+                motivos = []
+                if documento_locador is None:
+                    motivos.append('CPF/CNPJ do locador ausente ou inválido'
+                                   if locacao['documento_locador'] else 'Locador sem CPF/CNPJ cadastrado')
+                if documento_locatario is None:
+                    motivos.append('CPF/CNPJ do locatário ausente ou inválido'
+                                   if locacao['documento_locatario'] else 'Locatário sem CPF/CNPJ cadastrado')
+                if motivos:
+                    resumo.rejeitadas.append(Rejeicao(locacao['id_contrato'], locacao['nome_locatario'],
+                                                      '; '.join(motivos)))
+                    continue
+
+                resumo.locacoes += 1
+                resumo.valor_total += sum(locacao[f'mes_{mes:02d}'] for mes in range(1, 13))
+                yield _registro_r02(cnpj, ano, resumo.locacoes, locacao, documento_locador,
+                                    documento_locatario, declarante['dimob_codigo_municipio']) + FIM_LINHA
+    finally:
+        conn.close()
+
+    yield 'T9' + ' ' * 100 + FIM_LINHA
+
+
+def gravar_arquivo(db, ano: int, destino: TextIO) -> ResumoDimob:
+    """
+    Grava o arquivo da DIMOB em um arquivo de texto aberto.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        ano (int): Ano-calendário
+        destino (TextIO): Arquivo aberto para escrita (latin-1, newline='')
+
+    Returns:
+        ResumoDimob: Totais e locações rejeitadas
+    """
+    resumo = ResumoDimob(ano=ano)
+    for linha in gerar_registros(db, ano, resumo):
+        destino.write(linha)
+    return resumo
+
+
+def main():
+    """Linha de comando: gera o arquivo da DIMOB de um ano."""
+    from database.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Gera o arquivo de importação da DIMOB')
+    parser.add_argument('ano', type=int, help='Ano-calendário')
+    parser.add_argument('arquivo', help='Arquivo de saída (.txt)')
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.aplicar_ddl(DDL_DIMOB)
+    try:
+        with open(args.arquivo, 'w', encoding='latin-1', newline='') as destino:
+            resumo = gravar_arquivo(db, args.ano, destino)
+    except ValueError as e:
+        print(f"✗ {e}")
+        raise SystemExit(1)
+
+    print(f"✓ DIMOB {args.ano}: {resumo.locacoes} locação(ões), total R$ {resumo.valor_total:,.2f}")
+    if resumo.rejeitadas:
+        print(f"⚠ {len(resumo.rejeitadas)} locação(ões) fora do arquivo:")
+        for rejeicao in resumo.rejeitadas:
+            print(f"  Contrato {rejeicao.id_contrato} ({rejeicao.locatario}): {rejeicao.motivo}")
+
+
+if __name__ == '__main__':
+    main()
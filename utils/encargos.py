@@ -0,0 +1,187 @@
+"""
+================================================================================
+IMOBIPRO - MULTA E JUROS POR ATRASO
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Calcula, no próprio SQL, o valor atualizado das receitas em atraso
+           (multa fixa + juros de mora pro rata die) a partir das regras
+           gravadas em configuracoes. Listas e relatórios incluem as
+           expressões na consulta; nada é calculado linha a linha no Python.
+================================================================================
+
+Regras (tabela configuracoes):
+  * multa_percentual      multa única sobre o valor devido (padrão 2%)
+  * juros_mes_percentual  juros simples ao mês, proporcionais aos dias (padrão 1%)
+  * carencia_dias         dias após o vencimento sem encargos; passada a
+                          carência, multa e juros contam desde o vencimento
+  * gravar_encargos       1 = gravar os encargos em desconto_multa toda noite
+
+A base é aluguel + condomínio + IPTU (sem desconto_multa). A parte de
+desconto_multa que veio da gravação fica em receitas.encargos_gravados: a
+gravação troca só essa parte (o desconto ou multa manual é preservado) e o
+valor atualizado soma o ajuste manual aos encargos do dia. As regras são
+lidas por subconsultas constantes (avaliadas uma vez por consulta), e as
+expressões só dependem de :hoje.
+"""
+
+from datetime import date
+from typing import Dict
+
+# Regras padrão (também em database/schema.sql)
+DDL_ENCARGOS = """
+INSERT OR IGNORE INTO configuracoes (chave, valor, descricao) VALUES
+('multa_percentual', '2', 'Multa por atraso (% sobre o valor devido)'),
+('juros_mes_percentual', '1', 'Juros de mora (% ao mês, pro rata die)'),
+('carencia_dias', '0', 'Dias de carência após o vencimento antes de cobrar multa e juros'),
+('gravar_encargos', '0', 'Gravar multa e juros nas receitas em atraso toda noite (0=Não, 1=Sim)');
+"""
+
+CONFIGURACOES_ENCARGOS = ['multa_percentual', 'juros_mes_percentual', 'carencia_dias', 'gravar_encargos']
+
+
+def _regra(chave: str) -> str:
+    """Subconsulta constante com o valor numérico de uma regra."""
+    return f"COALESCE((SELECT CAST(valor AS REAL) FROM configuracoes WHERE chave = '{chave}'), 0)"
+
+
+def expressoes_encargos(r: str = 'r', hoje: str = ':hoje') -> Dict[str, str]:
+    """
+    Expressões SQL dos encargos de uma receita.
+
+    Args:
+        r (str): Alias da tabela receitas na consulta
+        hoje (str): Expressão da data de cálculo (padrão: parâmetro :hoje)
+
+    Returns:
+        Dict[str, str]: 'dias_atraso', 'multa', 'juros', 'encargos' e
+            'valor_atualizado' (valor_total_devido quando não há encargos)
+    """
+    base = f"(COALESCE({r}.aluguel_devido, 0) + COALESCE({r}.condominio_devido, 0) + COALESCE({r}.iptu_devido, 0))"
+    # Desconto(-)/multa(+) lançado à mão, sem os encargos já gravados
+    ajuste = f"(COALESCE({r}.desconto_multa, 0) - COALESCE({r}.encargos_gravados, 0))"
+    dias = f"CAST(julianday({hoje}) - julianday({r}.vencimento_previsto) AS INTEGER)"
+    em_atraso = f"({r}.status IN ('Pendente', 'Atrasado') AND {dias} > {_regra('carencia_dias')})"
+    multa = f"CASE WHEN {em_atraso} THEN ROUND({base} * {_regra('multa_percentual')} / 100, 2) ELSE 0 END"
+    juros = (f"CASE WHEN {em_atraso} THEN ROUND({base} * {_regra('juros_mes_percentual')} / 100 / 30 * {dias}, 2) "
+             f"ELSE 0 END")
+    return {
+        'dias_atraso': f"MAX({dias}, 0)",
+        'multa': multa,
+        'juros': juros,
+        'encargos': f"({multa}) + ({juros})",
+        'valor_atualizado': f"CASE WHEN {em_atraso} THEN {base} + {ajuste} + ({multa}) + ({juros}) "
+                            f"ELSE {r}.valor_total_devido END",
+    }
+
+
+def colunas_encargos(r: str = 'r', hoje: str = ':hoje') -> str:
+    """Lista de colunas 'expressão AS nome' para incluir em um SELECT."""
+    return ', '.join(f"{expressao} AS {nome}" for nome, expressao in expressoes_encargos(r, hoje).items())
+
+
+class EncargosAtraso:
+    """
+    Regras de multa/juros e gravação noturna dos encargos.
+    """
+
+    def __init__(self, db):
+        """
+        Inicializa o cálculo de encargos.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+        """
+        self.db = db
+
+    def instalar(self) -> bool:
+        """Grava as regras padrão e cria a coluna receitas.encargos_gravados (idempotente)."""
+        if not self.db.aplicar_ddl(DDL_ENCARGOS):
+            return False
+        with self.db.trava_escrita():
+            conn = self.db.connect()
+            try:
+                colunas = [linha[1] for linha in conn.execute("PRAGMA table_info(receitas)")]
+                if 'encargos_gravados' not in colunas:
+                    conn.execute("ALTER TABLE receitas ADD COLUMN encargos_gravados REAL DEFAULT 0")
+                    conn.commit()
+                    print("✓ Coluna receitas.encargos_gravados criada")
+            finally:
+                conn.close()
+        return True
+
+    def regras(self) -> Dict[str, float]:
+        """Regras atuais: {chave: valor} para cada chave de CONFIGURACOES_ENCARGOS."""
+        marcadores = ', '.join('?' for _ in CONFIGURACOES_ENCARGOS)
+        linhas = self.db.execute_query(f"SELECT chave, valor FROM configuracoes WHERE chave IN ({marcadores})",
+                                       tuple(CONFIGURACOES_ENCARGOS))
+        regras = {chave: 0.0 for chave in CONFIGURACOES_ENCARGOS}
+        for linha in linhas:
+            try:
+                regras[linha['chave']] = float(linha['valor'])
+            except (TypeError, ValueError):
+                pass
+        return regras
+
+    def salvar_regras(self, regras: Dict[str, float]) -> bool:
+        """
+        Atualiza as regras informadas.
+
+        Args:
+            regras (Dict): {chave: valor} (chaves fora de CONFIGURACOES_ENCARGOS são ignoradas)
+
+        Returns:
+            bool: True se todas foram gravadas
+        """
+        ok = True
+        for chave in CONFIGURACOES_ENCARGOS:
+            if chave in regras:
+                valor = regras[chave]
+                texto = str(int(valor)) if float(valor).is_integer() else str(valor)
+                ok = self.db.execute_update(
+                    "UPDATE configuracoes SET valor = ?, data_atualizacao = CURRENT_TIMESTAMP WHERE chave = ?",
+                    (texto, chave)
+                ) and ok
+        return ok
+
+    def gravar(self, hoje: date = None) -> int:
+        """
+        Grava multa + juros em desconto_multa das receitas em atraso.
+
+        Só roda com a regra gravar_encargos = 1. Os encargos gravados antes
+        (encargos_gravados) são trocados pelos do dia, e o desconto ou multa
+        manual continua em desconto_multa; o trigger de receitas recalcula
+        valor_total_devido.
+
+        Args:
+            hoje (date): Data de cálculo (padrão: hoje)
+
+        Returns:
+            int: Receitas atualizadas
+        """
+        if not self.regras()['gravar_encargos']:
+            return 0
+        encargos = expressoes_encargos('receitas')
+        with self.db.trava_escrita():
+            conn = self.db.connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                # Encargos > 0 só depois da carência: receitas dentro dela não são tocadas
+                atualizadas = conn.execute(f"""
+                    UPDATE receitas
+                    SET desconto_multa = COALESCE(desconto_multa, 0) - COALESCE(encargos_gravados, 0)
+                                         + ({encargos['encargos']}),
+                        encargos_gravados = {encargos['encargos']}
+                    WHERE status IN ('Pendente', 'Atrasado')
+                      AND vencimento_previsto < :hoje
+                      AND ({encargos['encargos']}) > 0
+                      AND encargos_gravados IS NOT ({encargos['encargos']})
+                """, {'hoje': (hoje or date.today()).isoformat()}).rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        print(f"✓ Encargos por atraso gravados em {atualizadas} receita(s)")
+        return atualizadas
@@ -0,0 +1,167 @@
+"""
+================================================================================
+IMOBIPRO - EXTRATO POR IMÓVEL E POR PROPRIETÁRIO
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Receitas recebidas e despesas pagas em ordem cronológica, com
+           saldo acumulado calculado no SQL (UNION ALL + SUM() OVER) e
+           paginação por chave (keyset), das mais recentes para as antigas.
+================================================================================
+
+Cada página traz no máximo TAMANHO_PAGINA linhas; o saldo acumulado é
+calculado pelo SQLite sobre o histórico inteiro, mas só as linhas da página
+chegam ao Python. O cursor da próxima página é a chave (data, ordem, id) da
+última linha exibida: nada de OFFSET, que relê as páginas anteriores.
+
+As regras de imóvel seguem o fluxo de caixa: receita de contrato vale para o
+imóvel do contrato; sem contrato, para r.id_imovel; sem contrato e sem imóvel,
+para o proprietário (id_proprietario) — essas só aparecem no extrato do
+proprietário.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Linhas por página
+TAMANHO_PAGINA = 50
+
+# Índices usados pelo extrato (também em database/schema.sql)
+DDL_EXTRATO = """
+CREATE INDEX IF NOT EXISTS idx_receitas_imovel ON receitas(id_imovel);
+CREATE INDEX IF NOT EXISTS idx_receitas_proprietario ON receitas(id_proprietario);
+CREATE INDEX IF NOT EXISTS idx_imoveis_proprietario ON imoveis(proprietario);
+"""
+
+_SQL_EXTRATO = """
+    WITH
+    imoveis_extrato AS (
+        SELECT id FROM imoveis WHERE {filtro_imoveis}
+    ),
+    movimentos AS (
+        SELECT r.data_recebimento AS data, 0 AS ordem, r.id, 'Receita' AS origem,
+               r.tipo_receita AS categoria,
+               COALESCE(NULLIF(r.observacoes, ''), r.tipo_receita || ' ' || strftime('%m/%Y', r.mes_referencia)) AS descricao,
+               c.id_imovel, COALESCE(r.valor_recebido, 0) AS valor
+        FROM imoveis_extrato ie
+        CROSS JOIN contratos c ON c.id_imovel = ie.id
+        CROSS JOIN receitas r ON r.id_contrato = c.id
+        WHERE r.data_recebimento IS NOT NULL
+        UNION ALL
+        SELECT r.data_recebimento, 0, r.id, 'Receita', r.tipo_receita,
+               COALESCE(NULLIF(r.observacoes, ''), r.tipo_receita || ' ' || strftime('%m/%Y', r.mes_referencia)),
+               r.id_imovel, COALESCE(r.valor_recebido, 0)
+        FROM imoveis_extrato ie
+        CROSS JOIN receitas r ON r.id_imovel = ie.id
+        WHERE r.id_contrato IS NULL
+          AND r.data_recebimento IS NOT NULL
+        UNION ALL
+        SELECT r.data_recebimento, 0, r.id, 'Receita', r.tipo_receita,
+               COALESCE(NULLIF(r.observacoes, ''), r.tipo_receita || ' ' || strftime('%m/%Y', r.mes_referencia)),
+               NULL, COALESCE(r.valor_recebido, 0)
+        FROM proprietarios pr
+        CROSS JOIN receitas r ON r.id_proprietario = pr.id
+        WHERE pr.nome = :proprietario
+          AND r.id_contrato IS NULL
+          AND r.id_imovel IS NULL
+          AND r.data_recebimento IS NOT NULL
+        UNION ALL
+        SELECT d.data_pagamento, 1, d.id, 'Despesa', d.tipo_despesa,
+               COALESCE(NULLIF(d.motivo_despesa, ''), d.tipo_despesa),
+               d.id_imovel, -COALESCE(d.valor_pago, 0)
+        FROM imoveis_extrato ie
+        CROSS JOIN despesas d ON d.id_imovel = ie.id
+        WHERE d.data_pagamento IS NOT NULL
+    ),
+    extrato AS (
+        SELECT *, SUM(valor) OVER (ORDER BY data, ordem, id ROWS UNBOUNDED PRECEDING) AS saldo
+        FROM movimentos
+    )
+    SELECT e.data, e.ordem, e.id, e.origem, e.categoria, e.descricao, e.id_imovel,
+           i.endereco_completo AS imovel, e.valor, e.saldo
+    FROM extrato e
+    LEFT JOIN imoveis i ON i.id = e.id_imovel
+    WHERE :antes_data IS NULL OR (e.data, e.ordem, e.id) < (:antes_data, :antes_ordem, :antes_id)
+    ORDER BY e.data DESC, e.ordem DESC, e.id DESC
+    LIMIT :limite
+"""
+
+SQL_EXTRATO_IMOVEL = _SQL_EXTRATO.format(filtro_imoveis='id = :id_imovel')
+SQL_EXTRATO_PROPRIETARIO = _SQL_EXTRATO.format(filtro_imoveis='proprietario = :proprietario')
+
+
+@dataclass
+class PaginaExtrato:
+    """Uma página do extrato (mais recentes primeiro)."""
+    linhas: List[Dict] = field(default_factory=list)
+    proximo: Optional[str] = None      # Cursor da página seguinte (mais antiga)
+
+    @property
+    def saldo(self) -> Optional[float]:
+        """Saldo acumulado após a linha mais recente da página."""
+        return self.linhas[0]['saldo'] if self.linhas else None
+
+
+def ler_cursor(cursor: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """
+    Converte o cursor 'AAAA-MM-DD.ordem.id' em (data, ordem, id).
+
+    Args:
+        cursor (str): Valor do parâmetro 'antes' (vazio = primeira página)
+
+    Returns:
+        Tuple: (data, ordem, id), ou (None, None, None) se vazio ou inválido
+    """
+    try:
+        data, ordem, id_ = (cursor or '').rsplit('.', 2)
+        return data, int(ordem), int(id_)
+    except ValueError:
+        return None, None, None
+
+
+def _pagina(db, sql: str, parametros: Dict, antes: str, tamanho: int) -> PaginaExtrato:
+    """Executa a consulta do extrato e monta a página e o cursor seguinte."""
+    antes_data, antes_ordem, antes_id = ler_cursor(antes)
+    parametros = dict(parametros, antes_data=antes_data, antes_ordem=antes_ordem,
+                      antes_id=antes_id, limite=tamanho + 1)
+    # max_atraso=0: a réplica só serve se estiver em dia (o extrato mostra a baixa recém-feita)
+    linhas = db.execute_query_leitura(sql, parametros, max_atraso=0)
+
+    pagina = PaginaExtrato(linhas=linhas[:tamanho])
+    if len(linhas) > tamanho:
+        ultima = pagina.linhas[-1]
+        pagina.proximo = f"{ultima['data']}.{ultima['ordem']}.{ultima['id']}"
+    return pagina
+
+
+def extrato_imovel(db, id_imovel: int, antes: str = None, tamanho: int = TAMANHO_PAGINA) -> PaginaExtrato:
+    """
+    Página do extrato de um imóvel.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        id_imovel (int): ID do imóvel
+        antes (str): Cursor da página (vazio = mais recentes)
+        tamanho (int): Linhas por página
+
+    Returns:
+        PaginaExtrato: Linhas da página e cursor da seguinte
+    """
+    return _pagina(db, SQL_EXTRATO_IMOVEL, {'id_imovel': id_imovel, 'proprietario': None}, antes, tamanho)
+
+
+def extrato_proprietario(db, proprietario: str, antes: str = None,
+                         tamanho: int = TAMANHO_PAGINA) -> PaginaExtrato:
+    """
+    Página do extrato de um proprietário (todos os imóveis e receitas sem imóvel).
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        proprietario (str): Nome do proprietário
+        antes (str): Cursor da página (vazio = mais recentes)
+        tamanho (int): Linhas por página
+
+    Returns:
+        PaginaExtrato: Linhas da página e cursor da seguinte
+    """
+    return _pagina(db, SQL_EXTRATO_PROPRIETARIO, {'proprietario': proprietario}, antes, tamanho)
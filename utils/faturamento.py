@@ -0,0 +1,377 @@
+"""
+================================================================================
+IMOBIPRO - FATURAMENTO MENSAL
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Geração das receitas de aluguel e das despesas de condomínio e
+           IPTU mensal de um mês, com um INSERT ... SELECT por componente em
+           uma única transação, e o agendamento que gera o mês seguinte a
+           partir de um dia configurável, com histórico das execuções.
+================================================================================
+
+  * Idempotente: cada INSERT só inclui contratos/imóveis que ainda não têm o
+    lançamento no mês (NOT EXISTS), então rodar de novo não duplica.
+  * Contratos entram se estão 'Ativo'/'Prorrogado', já começaram até o fim do
+    mês e (se 'Ativo') não terminam antes dele. No mês em que um contrato
+    'Ativo' termina, o vencimento fica limitado a fim_contrato: nenhuma
+    cobrança vence depois do fim.
+  * Agendador (desligado por padrão: faturamento_automatico = 0): todo dia
+    gera o mês corrente (recupera dias com o servidor parado) e, a partir de
+    faturamento_dia, também o mês seguinte.
+  * Só o worker líder do Gunicorn registra as tarefas agendadas (trava do
+    agendador em app.py). Mesmo assim, executar_agendado pega a própria trava
+    de arquivo (não bloqueante) e não refaz um mês já faturado pelo agendador
+    no dia, caso seja chamado por outro processo.
+  * Cada execução (agendada ou manual) grava uma linha em faturamento_execucoes;
+    a de sucesso entra na mesma transação dos lançamentos.
+"""
+
+import calendar
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from utils.trava_arquivo import TravaArquivo
+
+COMPONENTES = ('aluguel', 'condominio', 'iptu')
+
+# Histórico e configurações (também em database/schema.sql)
+DDL_FATURAMENTO = """
+CREATE TABLE IF NOT EXISTS faturamento_execucoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mes_referencia DATE NOT NULL,              -- AAAA-MM-01
+    origem TEXT NOT NULL,                      -- Agendador | Manual
+    componentes TEXT NOT NULL,                 -- ex.: 'aluguel,condominio,iptu'
+    iniciado_em TIMESTAMP NOT NULL,
+    duracao_ms INTEGER,
+    status TEXT NOT NULL,                      -- Sucesso | Erro
+    receitas INTEGER NOT NULL DEFAULT 0,       -- receitas de aluguel criadas
+    condominios INTEGER NOT NULL DEFAULT 0,    -- despesas de condomínio criadas
+    iptu INTEGER NOT NULL DEFAULT 0,           -- despesas de IPTU mensal criadas
+    valor_receitas REAL NOT NULL DEFAULT 0,
+    valor_despesas REAL NOT NULL DEFAULT 0,
+    erro TEXT,
+
+    CHECK(origem IN ('Agendador', 'Manual')),
+    CHECK(status IN ('Sucesso', 'Erro'))
+);
+CREATE INDEX IF NOT EXISTS idx_faturamento_execucoes_mes ON faturamento_execucoes(mes_referencia, origem);
+
+INSERT OR IGNORE INTO configuracoes (chave, valor, descricao) VALUES
+('faturamento_automatico', '0', 'Gerar o faturamento mensal automaticamente (0=Não, 1=Sim)'),
+('faturamento_dia', '25', 'Dia do mês a partir do qual o faturamento do mês seguinte é gerado'),
+('faturamento_dia_iptu', '10', 'Dia de vencimento do IPTU mensal no faturamento automático');
+"""
+
+CONFIGURACOES_FATURAMENTO = ['faturamento_automatico', 'faturamento_dia', 'faturamento_dia_iptu']
+
+# Dia até 28 para existir em todos os meses
+DIA_MAXIMO = 28
+
+_SQL_ALUGUEL = """
+INSERT INTO receitas (id_contrato, mes_referencia, aluguel_devido, condominio_devido, iptu_devido,
+                      valor_total_devido, vencimento_previsto, status, observacoes)
+SELECT c.id, :mes, c.valor_aluguel, v.condominio, v.iptu,
+       c.valor_aluguel + COALESCE(v.condominio, 0) + COALESCE(v.iptu, 0),
+       -- No mês do fim de um contrato 'Ativo', vence no máximo em fim_contrato
+       MIN(date(:mes, '+' || (MIN(c.dia_vencimento, :ultimo_dia) - 1) || ' days'),
+           CASE WHEN c.status_contrato = 'Ativo' THEN COALESCE(c.fim_contrato, '9999-12-31') ELSE '9999-12-31' END),
+       'Pendente',
+       'Faturamento automático ' || :mes_ano
+FROM contratos c
+JOIN (SELECT id,
+             CASE WHEN condominio_inquilino > 0 THEN condominio_inquilino END AS condominio,
+             CASE WHEN forma_pagamento_iptu = 'Mensal' AND valor_iptu_anual > 0
+                  THEN ROUND(valor_iptu_anual / 12.0, 2) END AS iptu
+      FROM imoveis) v ON v.id = c.id_imovel
+WHERE c.status_contrato IN ('Ativo', 'Prorrogado')
+  AND c.inicio_contrato < :proximo
+  AND (c.status_contrato = 'Prorrogado' OR c.fim_contrato IS NULL OR c.fim_contrato >= :mes)
+  AND NOT EXISTS (SELECT 1 FROM receitas r
+                  WHERE r.id_contrato = c.id AND r.mes_referencia >= :mes AND r.mes_referencia < :proximo)
+"""
+
+_SQL_CONDOMINIO = """
+INSERT INTO despesas (id_imovel, tipo_despesa, motivo_despesa, mes_referencia, valor_previsto, vencimento_previsto)
+SELECT i.id, 'Condomínio', 'Condomínio ' || :mes_ano, :mes, i.condominio_total,
+       date(:mes, '+' || (MIN(COALESCE(NULLIF(i.dia_venc_condominio, 0), 10), :ultimo_dia) - 1) || ' days')
+FROM imoveis i
+WHERE i.condominio_total > 0
+  AND NOT EXISTS (SELECT 1 FROM despesas d
+                  WHERE d.id_imovel = i.id AND d.tipo_despesa = 'Condomínio'
+                    AND d.mes_referencia >= :mes AND d.mes_referencia < :proximo)
+"""
+
+_SQL_IPTU = """
+INSERT INTO despesas (id_imovel, tipo_despesa, motivo_despesa, mes_referencia, valor_previsto, vencimento_previsto)
+SELECT i.id, 'IPTU', 'IPTU Mensal ' || :mes_ano, :mes, ROUND(i.valor_iptu_anual / 12.0, 2), :vencimento_iptu
+FROM imoveis i
+WHERE i.valor_iptu_anual > 0 AND i.forma_pagamento_iptu = 'Mensal'
+  AND NOT EXISTS (SELECT 1 FROM despesas d
+                  WHERE d.id_imovel = i.id AND d.tipo_despesa = 'IPTU'
+                    AND d.mes_referencia >= :mes AND d.mes_referencia < :proximo)
+"""
+
+# Componente -> (INSERT, coluna do histórico)
+_GERADORES = {
+    'aluguel': (_SQL_ALUGUEL, 'receitas'),
+    'condominio': (_SQL_CONDOMINIO, 'condominios'),
+    'iptu': (_SQL_IPTU, 'iptu'),
+}
+
+
+def primeiro_dia(dia: date, meses: int = 0) -> date:
+    """Primeiro dia do mês 'meses' depois do mês de 'dia'."""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class FaturamentoMensal:
+    """
+    Geração do faturamento de um mês e execução agendada com histórico.
+    """
+
+    def __init__(self, db, caminho_trava: str = None):
+        """
+        Inicializa o faturamento.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+            caminho_trava (str): Arquivo da trava entre workers
+                (padrão: <banco>.faturamento.lock)
+        """
+        self.db = db
+        self.caminho_trava = caminho_trava or db.db_path + '.faturamento.lock'
+
+    def instalar(self) -> bool:
+        """Cria a tabela do histórico e as configurações padrão (idempotente)."""
+        return self.db.aplicar_ddl(DDL_FATURAMENTO)
+
+    def configuracao(self) -> Dict[str, int]:
+        """Configuração atual: {chave: valor} para cada chave de CONFIGURACOES_FATURAMENTO."""
+        marcadores = ', '.join('?' for _ in CONFIGURACOES_FATURAMENTO)
+        linhas = self.db.execute_query(f"SELECT chave, valor FROM configuracoes WHERE chave IN ({marcadores})",
+                                       tuple(CONFIGURACOES_FATURAMENTO))
+        config = {'faturamento_automatico': 0, 'faturamento_dia': 25, 'faturamento_dia_iptu': 10}
+        for linha in linhas:
+            try:
+                config[linha['chave']] = int(linha['valor'])
+            except (TypeError, ValueError):
+                pass
+        return config
+
+    def salvar_configuracao(self, config: Dict[str, int]) -> bool:
+        """
+        Atualiza a configuração informada.
+
+        Args:
+            config (Dict): {chave: valor} (chaves fora de CONFIGURACOES_FATURAMENTO são ignoradas)
+
+        Returns:
+            bool: True se todas foram gravadas
+
+        Raises:
+            ValueError: Dia fora de 1 a DIA_MAXIMO
+        """
+        for chave in ('faturamento_dia', 'faturamento_dia_iptu'):
+            if chave in config and not 1 <= int(config[chave]) <= DIA_MAXIMO:
+                raise ValueError(f'O dia deve estar entre 1 e {DIA_MAXIMO}')
+        ok = True
+        for chave in CONFIGURACOES_FATURAMENTO:
+            if chave in config:
+                ok = self.db.execute_update(
+                    "UPDATE configuracoes SET valor = ?, data_atualizacao = CURRENT_TIMESTAMP WHERE chave = ?",
+                    (str(int(config[chave])), chave)
+                ) and ok
+        return ok
+
+    def gerar(self, mes: date, componentes: Sequence[str] = COMPONENTES, vencimento_iptu: date = None,
+              origem: str = 'Manual') -> Dict[str, object]:
+        """
+        Gera os lançamentos de um mês que ainda não existem e registra a execução.
+
+        Args:
+            mes (date): Qualquer dia do mês de referência
+            componentes (Sequence[str]): Partes de COMPONENTES a gerar
+            vencimento_iptu (date): Vencimento do IPTU mensal (padrão: faturamento_dia_iptu do mês)
+            origem (str): 'Agendador' ou 'Manual'
+
+        Returns:
+            Dict: Linha gravada no histórico (receitas, condominios, iptu, valor_receitas, valor_despesas...)
+
+        Raises:
+            ValueError: Componente desconhecido
+        """
+        invalidos = [c for c in componentes if c not in _GERADORES]
+        if invalidos:
+            raise ValueError(f"Componente inválido: {', '.join(invalidos)}")
+
+        mes = primeiro_dia(mes)
+        ultimo_dia = calendar.monthrange(mes.year, mes.month)[1]
+        if vencimento_iptu is None:
+            dia_iptu = min(self.configuracao()['faturamento_dia_iptu'], ultimo_dia)
+            vencimento_iptu = mes.replace(day=dia_iptu)
+        parametros = {
+            'mes': mes.isoformat(),
+            'proximo': primeiro_dia(mes, 1).isoformat(),
+            'mes_ano': mes.strftime('%m/%Y'),
+            'ultimo_dia': ultimo_dia,
+            'vencimento_iptu': vencimento_iptu.isoformat(),
+        }
+        execucao = {
+            'mes_referencia': parametros['mes'],
+            'origem': origem,
+            'componentes': ','.join(componentes),
+            'iniciado_em': datetime.now().isoformat(timespec='seconds'),
+            'status': 'Sucesso',
+            'receitas': 0, 'condominios': 0, 'iptu': 0,
+            'valor_receitas': 0.0, 'valor_despesas': 0.0,
+        }
+        inicio = datetime.now()
+
+        try:
+            with self.db.trava_escrita():
+                conn = self.db.connect()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    # Lançamentos novos são os de id acima do maior atual (escrita exclusiva na transação)
+                    ultima_receita = conn.execute("SELECT COALESCE(MAX(id), 0) FROM receitas").fetchone()[0]
+                    ultima_despesa = conn.execute("SELECT COALESCE(MAX(id), 0) FROM despesas").fetchone()[0]
+
+                    for componente in componentes:
+                        sql, coluna = _GERADORES[componente]
+                        execucao[coluna] = conn.execute(sql, parametros).rowcount
+
+                    execucao['valor_receitas'] = round(conn.execute(
+                        "SELECT COALESCE(SUM(valor_total_devido), 0) FROM receitas WHERE id > ?",
+                        (ultima_receita,)).fetchone()[0], 2)
+                    execucao['valor_despesas'] = round(conn.execute(
+                        "SELECT COALESCE(SUM(valor_previsto), 0) FROM despesas WHERE id > ?",
+                        (ultima_despesa,)).fetchone()[0], 2)
+                    execucao['duracao_ms'] = int((datetime.now() - inicio).total_seconds() * 1000)
+                    self._registrar(conn, execucao)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.close()
+        except Exception as e:
+            execucao.pop('id', None)
+            execucao.update({'status': 'Erro', 'erro': str(e), 'receitas': 0, 'condominios': 0, 'iptu': 0,
+                             'valor_receitas': 0.0, 'valor_despesas': 0.0,
+                             'duracao_ms': int((datetime.now() - inicio).total_seconds() * 1000)})
+            self._registrar_erro(execucao)
+            print(f"✗ Faturamento {parametros['mes_ano']} ({origem}): {e}")
+            raise
+
+        print(f"✓ Faturamento {parametros['mes_ano']} ({origem}): {execucao['receitas']} receita(s), "
+              f"{execucao['condominios']} condomínio(s), {execucao['iptu']} IPTU mensal "
+              f"em {execucao['duracao_ms']} ms")
+        return execucao
+
+    def executar_agendado(self, hoje: date = None) -> Optional[List[Dict[str, object]]]:
+        """
+        Execução do agendador: mês corrente e, a partir de faturamento_dia, o seguinte.
+
+        Args:
+            hoje (date): Dia de referência (padrão: hoje)
+
+        Returns:
+            Optional[List[Dict]]: Execuções feitas, ou None se o faturamento automático
+                está desligado ou outro worker está com a trava
+        """
+        hoje = hoje or date.today()
+        config = self.configuracao()
+        if not config['faturamento_automatico']:
+            return None
+
+        meses = [primeiro_dia(hoje)]
+        if hoje.day >= config['faturamento_dia']:
+            meses.append(primeiro_dia(hoje, 1))
+
+        trava = TravaArquivo(self.caminho_trava, bloquear=False)
+        if not trava.adquirir():
+            print("⚠ Faturamento automático já em execução em outro processo")
+            return None
+        try:
+            execucoes = []
+            for mes in meses:
+                if self._feito_hoje(mes, hoje):
+                    continue
+                try:
+                    execucoes.append(self.gerar(mes, origem='Agendador'))
+                except Exception:
+                    # Já registrado no histórico; o próximo mês ainda é tentado
+                    continue
+            return execucoes
+        finally:
+            trava.liberar()
+
+    def historico(self, limite: int = 50) -> List[Dict]:
+        """Execuções mais recentes primeiro."""
+        return self.db.execute_query("SELECT * FROM faturamento_execucoes ORDER BY id DESC LIMIT ?", (limite,))
+
+    def resumo_dashboard(self, hoje: date = None) -> Dict[str, object]:
+        """
+        Resumo para o dashboard.
+
+        Returns:
+            Dict: 'ultima' (última execução), 'ultimo_lancamento' (última que criou
+                lançamentos), 'erro' (última execução com erro, se for a mais recente),
+                'proximo_mes' e 'proxima_data' (None se o automático está desligado)
+        """
+        hoje = hoje or date.today()
+        config = self.configuracao()
+        ultima = self.db.execute_query("SELECT * FROM faturamento_execucoes ORDER BY id DESC LIMIT 1")
+        lancamento = self.db.execute_query("""
+            SELECT * FROM faturamento_execucoes
+            WHERE status = 'Sucesso' AND receitas + condominios + iptu > 0
+            ORDER BY id DESC LIMIT 1
+        """)
+        ultima = ultima[0] if ultima else None
+
+        proximo_mes = proxima_data = None
+        if config['faturamento_automatico']:
+            if hoje.day < config['faturamento_dia']:
+                proxima_data = hoje.replace(day=config['faturamento_dia'])
+                proximo_mes = primeiro_dia(hoje, 1)
+            else:
+                proxima_data = primeiro_dia(hoje, 1).replace(day=config['faturamento_dia'])
+                proximo_mes = primeiro_dia(hoje, 2)
+        return {
+            'ultima': ultima,
+            'ultimo_lancamento': lancamento[0] if lancamento else None,
+            'erro': ultima if ultima and ultima['status'] == 'Erro' else None,
+            'proximo_mes': proximo_mes,
+            'proxima_data': proxima_data,
+        }
+
+    def _feito_hoje(self, mes: date, hoje: date) -> bool:
+        """Indica se o agendador já faturou o mês com sucesso no dia."""
+        return bool(self.db.execute_query("""
+            SELECT 1 FROM faturamento_execucoes
+            WHERE mes_referencia = ? AND origem = 'Agendador' AND status = 'Sucesso' AND iniciado_em >= ?
+            LIMIT 1
+        """, (mes.isoformat(), hoje.isoformat())))
+
+    @staticmethod
+    def _registrar(conn, execucao: Dict[str, object]):
+        """Grava a execução no histórico usando a conexão informada."""
+        colunas = ', '.join(execucao)
+        marcadores = ', '.join(f':{coluna}' for coluna in execucao)
+        execucao['id'] = conn.execute(f"INSERT INTO faturamento_execucoes ({colunas}) VALUES ({marcadores})",
+                                      execucao).lastrowid
+
+    def _registrar_erro(self, execucao: Dict[str, object]):
+        """Grava uma execução com erro em transação própria (a do faturamento foi desfeita)."""
+        try:
+            with self.db.trava_escrita():
+                conn = self.db.connect()
+                try:
+                    self._registrar(conn, execucao)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except Exception as e:
+            print(f"✗ Erro ao registrar a execução do faturamento: {e}")
@@ -0,0 +1,636 @@
+"""
+================================================================================
+IMOBIPRO - MOTOR DE FLUXO DE CAIXA
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Calcula o fluxo de caixa por imóvel e por proprietário (valores
+           efetivamente recebidos e pagos no período) em uma única consulta
+           com CTEs. O resultado é colunar e alimenta o Excel, a página HTML
+           e o JSON.
+================================================================================
+
+Componentes (mesmas regras do relatório em Excel original):
+
+  * Aluguel .......... receitas com contrato, pelo imóvel do contrato
+  * Outras receitas .. receitas não-aluguel com id_imovel
+  * Extras ........... receitas sem contrato e sem imóvel, por proprietário
+                       (linha "Empréstimos / Outras Receitas")
+  * IPTU, Condomínio e Outras despesas: despesas pagas, pelo valor pago
+
+Receitas e despesas são lidas uma única vez cada (receitas_periodo e
+despesas_pagas); os demais componentes saem dessas duas passagens.
+
+O fluxo mensal (calcular_fluxo_mensal) aplica as mesmas regras mês a mês e
+devolve uma matriz meses × imóveis para cada componente.
+
+Observação: uma receita não-aluguel que tenha contrato E id_imovel entra tanto
+no aluguel (via contrato) quanto em outras receitas, exatamente como no
+relatório anterior; a regra foi mantida para os totais não mudarem.
+"""
+
+import io
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+# Rótulo da linha de receitas extras (sem imóvel) de cada proprietário
+ROTULO_EXTRAS = '   Empréstimos / Outras Receitas'
+
+# Colunas numéricas do resultado, na ordem do relatório
+COLUNAS_VALORES = ['aluguel', 'outras_receitas', 'iptu', 'condominio', 'outras_despesas', 'saldo']
+
+SQL_FLUXO_CAIXA = """
+    WITH
+    receitas_periodo AS (
+        SELECT id_contrato, id_imovel, id_proprietario, tipo_receita, valor_recebido, observacoes
+        FROM receitas
+        WHERE data_recebimento BETWEEN :inicio AND :fim
+    ),
+    -- CROSS JOIN fixa a ordem: percorre as receitas do período (já filtradas)
+    -- e busca contrato/proprietário pela chave primária
+    aluguel AS (
+        SELECT c.id_imovel, SUM(r.valor_recebido) AS total
+        FROM receitas_periodo r
+        CROSS JOIN contratos c ON r.id_contrato = c.id
+        GROUP BY c.id_imovel
+    ),
+    outras_receitas AS (
+        SELECT id_imovel, SUM(valor_recebido) AS total,
+               GROUP_CONCAT(COALESCE(observacoes, tipo_receita), ' | ') AS descricoes
+        FROM receitas_periodo
+        WHERE tipo_receita != 'Aluguel'
+          AND id_imovel IS NOT NULL
+        GROUP BY id_imovel
+    ),
+    extras AS (
+        SELECT pr.nome AS proprietario, SUM(r.valor_recebido) AS total,
+               GROUP_CONCAT(COALESCE(r.observacoes, r.tipo_receita), ' | ') AS descricoes
+        FROM receitas_periodo r
+        CROSS JOIN proprietarios pr ON r.id_proprietario = pr.id
+        WHERE r.id_contrato IS NULL
+          AND r.id_imovel IS NULL
+        GROUP BY pr.nome
+    ),
+    despesas_pagas AS (
+        SELECT id_imovel,
+               SUM(CASE WHEN tipo_despesa = 'IPTU' THEN valor_pago END) AS iptu,
+               SUM(CASE WHEN tipo_despesa = 'Condomínio' THEN valor_pago END) AS condominio,
+               SUM(CASE WHEN tipo_despesa NOT IN ('IPTU', 'Condomínio') THEN valor_pago END) AS outras,
+               GROUP_CONCAT(CASE WHEN tipo_despesa NOT IN ('IPTU', 'Condomínio')
+                                 THEN COALESCE(motivo_despesa, tipo_despesa) END, ' | ') AS descricoes
+        FROM despesas
+        WHERE data_pagamento BETWEEN :inicio AND :fim
+        GROUP BY id_imovel
+    ),
+    linhas AS (
+        SELECT COALESCE(i.proprietario, 'Sem Proprietário') AS proprietario,
+               0 AS ordem,
+               i.id AS id_imovel,
+               i.endereco_completo AS endereco,
+               COALESCE(a.total, 0) AS aluguel,
+               COALESCE(o.total, 0) AS outras_receitas,
+               -COALESCE(d.iptu, 0) AS iptu,
+               -COALESCE(d.condominio, 0) AS condominio,
+               -COALESCE(d.outras, 0) AS outras_despesas,
+               COALESCE(d.descricoes, '') AS desc_despesas,
+               COALESCE(o.descricoes, '') AS desc_receitas
+        FROM imoveis i
+        LEFT JOIN aluguel a ON a.id_imovel = i.id
+        LEFT JOIN outras_receitas o ON o.id_imovel = i.id
+        LEFT JOIN despesas_pagas d ON d.id_imovel = i.id
+        UNION ALL
+        SELECT proprietario, 1, NULL, :rotulo_extras, 0, total, 0, 0, 0, '', COALESCE(descricoes, '')
+        FROM extras
+        WHERE total > 0
+    )
+    SELECT proprietario, id_imovel, endereco, aluguel, outras_receitas, iptu, condominio,
+           outras_despesas,
+           aluguel + outras_receitas + iptu + condominio + outras_despesas AS saldo,
+           desc_despesas, desc_receitas
+    FROM linhas
+    ORDER BY proprietario, ordem, endereco
+"""
+
+
+@dataclass
+class FluxoCaixa:
+    """
+    Resultado colunar do fluxo de caixa: uma lista por coluna, uma posição
+    por linha (imóvel ou receitas extras de um proprietário). Despesas vêm
+    negativas, como no relatório.
+    """
+    data_inicio: str
+    data_fim: str
+    gerado_em: datetime
+    proprietario: List[str] = field(default_factory=list)
+    id_imovel: List[int] = field(default_factory=list)
+    endereco: List[str] = field(default_factory=list)
+    aluguel: List[float] = field(default_factory=list)
+    outras_receitas: List[float] = field(default_factory=list)
+    iptu: List[float] = field(default_factory=list)
+    condominio: List[float] = field(default_factory=list)
+    outras_despesas: List[float] = field(default_factory=list)
+    saldo: List[float] = field(default_factory=list)
+    desc_despesas: List[str] = field(default_factory=list)
+    desc_receitas: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.endereco)
+
+    def linhas(self) -> Iterator[Dict]:
+        """Percorre o resultado linha a linha (dicionários)."""
+        colunas = ['proprietario', 'id_imovel', 'endereco'] + COLUNAS_VALORES + ['desc_despesas', 'desc_receitas']
+        for i in range(len(self)):
+            yield {coluna: getattr(self, coluna)[i] for coluna in colunas}
+
+    def totais(self, indices: List[int] = None) -> Dict[str, float]:
+        """
+        Soma as colunas de valores.
+
+        Args:
+            indices (List[int]): Linhas a somar (padrão: todas)
+
+        Returns:
+            Dict: {coluna: soma}
+        """
+        if indices is None:
+            return {coluna: sum(getattr(self, coluna)) for coluna in COLUNAS_VALORES}
+        return {coluna: sum(getattr(self, coluna)[i] for i in indices) for coluna in COLUNAS_VALORES}
+
+    def por_proprietario(self) -> 'OrderedDict[str, Dict]':
+        """
+        Agrupa as linhas por proprietário (já vêm ordenadas pela consulta).
+
+        Returns:
+            OrderedDict: {proprietario: {'linhas': [...], 'subtotal': {...}}}
+        """
+        indices = OrderedDict()
+        for i, proprietario in enumerate(self.proprietario):
+            indices.setdefault(proprietario, []).append(i)
+
+        linhas = list(self.linhas())
+        return OrderedDict(
+            (proprietario, {'linhas': [linhas[i] for i in posicoes], 'subtotal': self.totais(posicoes)})
+            for proprietario, posicoes in indices.items()
+        )
+
+    def para_dict(self) -> Dict:
+        """Representação para JSON (colunas, subtotais e total geral)."""
+        grupos = self.por_proprietario()
+        return {
+            'data_inicio': self.data_inicio,
+            'data_fim': self.data_fim,
+            'gerado_em': self.gerado_em.isoformat(timespec='seconds'),
+            'colunas': {
+                coluna: getattr(self, coluna)
+                for coluna in ['proprietario', 'id_imovel', 'endereco'] + COLUNAS_VALORES
+                              + ['desc_despesas', 'desc_receitas']
+            },
+            'subtotais': {proprietario: grupo['subtotal'] for proprietario, grupo in grupos.items()},
+            'total': self.totais(),
+        }
+
+
+def calcular_fluxo_caixa(db, data_inicio: str, data_fim: str) -> FluxoCaixa:
+    """
+    Calcula o fluxo de caixa do período em uma única consulta.
+
+    Uma só instrução SELECT roda dentro de uma única transação de leitura, ou
+    seja, todos os componentes enxergam o mesmo estado do banco. Usa a
+    réplica de leitura quando ela estiver dentro do atraso aceito.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        data_inicio (str): Data inicial (AAAA-MM-DD)
+        data_fim (str): Data final (AAAA-MM-DD)
+
+    Returns:
+        FluxoCaixa: Resultado colunar, ordenado por proprietário e endereço
+    """
+    fluxo = FluxoCaixa(data_inicio=data_inicio, data_fim=data_fim, gerado_em=datetime.now())
+    colunas = ['proprietario', 'id_imovel', 'endereco'] + COLUNAS_VALORES + ['desc_despesas', 'desc_receitas']
+    listas = [getattr(fluxo, coluna) for coluna in colunas]
+
+    conn = db.conectar_leitura()
+    try:
+        cursor = conn.execute(SQL_FLUXO_CAIXA, {
+            'inicio': data_inicio,
+            'fim': data_fim,
+            'rotulo_extras': ROTULO_EXTRAS,
+        })
+        for linha in cursor:
+            for lista, valor in zip(listas, linha):
+                lista.append(valor)
+    finally:
+        conn.close()
+    return fluxo
+
+
+def gerar_excel_fluxo_caixa(fluxo: FluxoCaixa) -> bytes:
+    """
+    Gera a planilha do fluxo de caixa por proprietário.
+
+    Args:
+        fluxo (FluxoCaixa): Resultado calculado
+
+    Returns:
+        bytes: Arquivo .xlsx
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Fluxo de Caixa"
+
+    # Estilos
+    header_fill = PatternFill(start_color="1565C0", end_color="1565C0", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    proprietario_fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
+    proprietario_font = Font(bold=True, size=11)
+    subtotal_fill = PatternFill(start_color="BBDEFB", end_color="BBDEFB", fill_type="solid")
+    subtotal_font = Font(bold=True)
+    total_fill = PatternFill(start_color="0D47A1", end_color="0D47A1", fill_type="solid")
+    total_font = Font(bold=True, color="FFFFFF", size=12)
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    money_format = 'R$ #,##0.00'
+
+    # Formatar datas para exibição
+    data_inicio_fmt = datetime.strptime(fluxo.data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
+    data_fim_fmt = datetime.strptime(fluxo.data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
+
+    # Título
+    ws.merge_cells('A1:I1')
+    ws['A1'] = "FLUXO DE CAIXA POR PROPRIETÁRIO"
+    ws['A1'].font = Font(bold=True, size=14)
+    ws['A1'].alignment = Alignment(horizontal="center")
+
+    # Período
+    ws.merge_cells('A2:I2')
+    ws['A2'] = f"Período: {data_inicio_fmt} a {data_fim_fmt}"
+    ws['A2'].font = Font(size=11, italic=True)
+    ws['A2'].alignment = Alignment(horizontal="center")
+
+    # Subtítulo
+    ws.merge_cells('A3:I3')
+    ws['A3'] = f"Gerado em {fluxo.gerado_em.strftime('%d/%m/%Y %H:%M')}"
+    ws['A3'].font = Font(size=10, italic=True)
+    ws['A3'].alignment = Alignment(horizontal="center")
+
+    # Cabeçalhos (9 colunas)
+    headers = ['Proprietário / Endereço', 'Aluguel', 'Outras Receitas', 'IPTU', 'Condomínio',
+               'Outras Despesas', 'Saldo', 'Desc. Despesas', 'Desc. Receitas']
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=5, column=col, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        cell.border = border
+
+    row_num = 6
+    for proprietario, grupo in fluxo.por_proprietario().items():
+        # Linha do proprietário
+        ws.merge_cells(f'A{row_num}:I{row_num}')
+        cell = ws.cell(row=row_num, column=1, value=f"📁 {proprietario}")
+        cell.fill = proprietario_fill
+        cell.font = proprietario_font
+        cell.border = border
+        for col in range(2, 10):
+            ws.cell(row=row_num, column=col).fill = proprietario_fill
+            ws.cell(row=row_num, column=col).border = border
+        row_num += 1
+
+        # Imóveis do proprietário
+        for linha in grupo['linhas']:
+            ws.cell(row=row_num, column=1, value=f"   {linha['endereco']}").border = border
+
+            for col, coluna in enumerate(COLUNAS_VALORES, 2):
+                cell = ws.cell(row=row_num, column=col, value=linha[coluna])
+                cell.number_format = money_format
+                cell.border = border
+                if coluna == 'outras_receitas' and linha[coluna] > 0:
+                    cell.font = Font(color="1565C0")
+                elif coluna not in ('aluguel', 'outras_receitas') and linha[coluna] < 0:
+                    cell.font = Font(color="FF0000")
+
+            for col, coluna in [(8, 'desc_despesas'), (9, 'desc_receitas')]:
+                cell = ws.cell(row=row_num, column=col, value=linha[coluna])
+                cell.border = border
+                cell.alignment = Alignment(wrap_text=True, vertical="top")
+
+            row_num += 1
+
+        # Subtotal do proprietário
+        ws.cell(row=row_num, column=1, value=f"   Subtotal {proprietario}").font = subtotal_font
+        ws.cell(row=row_num, column=1).fill = subtotal_fill
+        ws.cell(row=row_num, column=1).border = border
+
+        for col, coluna in enumerate(COLUNAS_VALORES, 2):
+            valor = grupo['subtotal'][coluna]
+            cell = ws.cell(row=row_num, column=col, value=valor)
+            cell.number_format = money_format
+            cell.font = subtotal_font
+            cell.fill = subtotal_fill
+            cell.border = border
+            if valor < 0:
+                cell.font = Font(bold=True, color="FF0000")
+
+        # Colunas de descrição: vazias no subtotal
+        for col in [8, 9]:
+            ws.cell(row=row_num, column=col).fill = subtotal_fill
+            ws.cell(row=row_num, column=col).border = border
+
+        row_num += 2  # Espaço entre proprietários
+
+    # Total Geral
+    ws.cell(row=row_num, column=1, value="TOTAL GERAL").font = total_font
+    ws.cell(row=row_num, column=1).fill = total_fill
+    ws.cell(row=row_num, column=1).border = border
+
+    totais = fluxo.totais()
+    for col, coluna in enumerate(COLUNAS_VALORES, 2):
+        valor = totais[coluna]
+        cell = ws.cell(row=row_num, column=col, value=valor)
+        cell.number_format = money_format
+        cell.font = total_font
+        cell.fill = total_fill
+        cell.border = border
+        if valor < 0:
+            cell.font = Font(bold=True, color="FF0000", size=12)
+
+    # Colunas de descrição: vazias no total geral
+    for col in [8, 9]:
+        ws.cell(row=row_num, column=col).fill = total_fill
+        ws.cell(row=row_num, column=col).border = border
+
+    # Ajustar largura das colunas
+    for letra, largura in zip('ABCDEFGHI', [50, 15, 18, 12, 15, 18, 15, 35, 35]):
+        ws.column_dimensions[letra].width = largura
+
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+# =============================================================================
+# FLUXO MENSAL (MESES × IMÓVEIS)
+# =============================================================================
+
+# Componentes do fluxo mensal, na ordem das abas do Excel
+COMPONENTES_MENSAIS = OrderedDict([
+    ('receita', 'Receita'),
+    ('iptu', 'IPTU'),
+    ('condominio', 'Condomínio'),
+    ('outras_despesas', 'Outras Despesas'),
+    ('saldo', 'Saldo'),
+])
+
+# Maior intervalo aceito no fluxo mensal (10 anos)
+MAXIMO_MESES = 120
+
+# Dimensão de meses sem lacunas: um mês por linha, mesmo sem movimento
+SQL_MESES = """
+    WITH RECURSIVE meses(mes) AS (
+        SELECT date(:mes_inicio || '-01')
+        UNION ALL
+        SELECT date(mes, '+1 month') FROM meses WHERE mes < date(:mes_fim || '-01')
+    )
+    SELECT strftime('%Y-%m', mes) FROM meses
+"""
+
+# Linhas da matriz: imóveis e, para receitas sem imóvel, o próprio proprietário
+SQL_IMOVEIS_MENSAL = """
+    SELECT id, endereco_completo, COALESCE(proprietario, 'Sem Proprietário') AS proprietario
+    FROM imoveis
+    ORDER BY proprietario, endereco_completo
+"""
+
+# Movimentos agrupados por (imóvel ou proprietário, mês): mesmas regras do
+# fluxo de caixa, uma única passagem por receitas e por despesas
+SQL_FLUXO_MENSAL = """
+    WITH
+    receitas_periodo AS (
+        SELECT id_contrato, id_imovel, id_proprietario, tipo_receita, valor_recebido,
+               substr(data_recebimento, 1, 7) AS mes
+        FROM receitas
+        WHERE data_recebimento BETWEEN :inicio AND :fim
+    ),
+    movimentos AS (
+        SELECT c.id_imovel, NULL AS proprietario, r.mes, r.valor_recebido AS receita,
+               NULL AS iptu, NULL AS condominio, NULL AS outras
+        FROM receitas_periodo r
+        CROSS JOIN contratos c ON r.id_contrato = c.id
+        UNION ALL
+        SELECT id_imovel, NULL, mes, valor_recebido, NULL, NULL, NULL
+        FROM receitas_periodo
+        WHERE tipo_receita != 'Aluguel'
+          AND id_imovel IS NOT NULL
+        UNION ALL
+        SELECT NULL, pr.nome, r.mes, r.valor_recebido, NULL, NULL, NULL
+        FROM receitas_periodo r
+        CROSS JOIN proprietarios pr ON r.id_proprietario = pr.id
+        WHERE r.id_contrato IS NULL
+          AND r.id_imovel IS NULL
+        UNION ALL
+        SELECT id_imovel, NULL, substr(data_pagamento, 1, 7), NULL,
+               CASE WHEN tipo_despesa = 'IPTU' THEN valor_pago END,
+               CASE WHEN tipo_despesa = 'Condomínio' THEN valor_pago END,
+               CASE WHEN tipo_despesa NOT IN ('IPTU', 'Condomínio') THEN valor_pago END
+        FROM despesas
+        WHERE data_pagamento BETWEEN :inicio AND :fim
+    )
+    SELECT id_imovel, proprietario, mes,
+           TOTAL(receita), TOTAL(iptu), TOTAL(condominio), TOTAL(outras)
+    FROM movimentos
+    GROUP BY id_imovel, proprietario, mes
+"""
+
+
+@dataclass
+class FluxoMensal:
+    """
+    Matriz do fluxo mensal: para cada componente, uma linha (array de
+    floats, um valor por mês) por imóvel ou por "Empréstimos / Outras
+    Receitas" de um proprietário. Despesas vêm negativas.
+    """
+    mes_inicio: str
+    mes_fim: str
+    gerado_em: datetime
+    meses: List[str] = field(default_factory=list)
+    linhas: List[Dict] = field(default_factory=list)
+    valores: Dict[str, List[array]] = field(default_factory=dict)
+
+    def grupos(self) -> 'OrderedDict[str, List[int]]':
+        """Índices das linhas de cada proprietário, na ordem de exibição."""
+        grupos = OrderedDict()
+        for i, linha in enumerate(self.linhas):
+            grupos.setdefault(linha['proprietario'], []).append(i)
+        return grupos
+
+    def soma(self, componente: str, indices: List[int] = None) -> array:
+        """
+        Soma mês a mês as linhas indicadas de um componente.
+
+        Args:
+            componente (str): Chave de COMPONENTES_MENSAIS
+            indices (List[int]): Linhas a somar (padrão: todas)
+
+        Returns:
+            array: Um valor por mês
+        """
+        total = array('d', bytes(8 * len(self.meses)))
+        matriz = self.valores[componente]
+        for i in (range(len(matriz)) if indices is None else indices):
+            for posicao, valor in enumerate(matriz[i]):
+                total[posicao] += valor
+        return total
+
+
+def calcular_fluxo_mensal(db, mes_inicio: str, mes_fim: str) -> FluxoMensal:
+    """
+    Monta a matriz meses × imóveis do fluxo de caixa.
+
+    Os meses vêm de uma CTE recursiva (sem lacunas) e os valores de uma única
+    consulta agrupada; cada grupo é somado na posição do seu mês em arrays
+    pré-alocados, sem consultas por célula. As três consultas rodam na mesma
+    transação de leitura.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        mes_inicio (str): Primeiro mês (AAAA-MM)
+        mes_fim (str): Último mês (AAAA-MM)
+
+    Returns:
+        FluxoMensal: Matriz por componente
+    """
+    fluxo = FluxoMensal(mes_inicio=mes_inicio, mes_fim=mes_fim, gerado_em=datetime.now())
+    parametros = {
+        'mes_inicio': mes_inicio,
+        'mes_fim': mes_fim,
+        'inicio': f"{mes_inicio}-01",
+        'fim': f"{mes_fim}-31",
+    }
+
+    conn = db.conectar_leitura()
+    try:
+        conn.execute("BEGIN")
+        fluxo.meses = [linha[0] for linha in conn.execute(SQL_MESES, parametros)]
+        imoveis = conn.execute(SQL_IMOVEIS_MENSAL).fetchall()
+        movimentos = conn.execute(SQL_FLUXO_MENSAL, parametros).fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    # Linhas: imóveis do proprietário e, em seguida, a linha de extras dele
+    extras = sorted({proprietario for _, proprietario, *_ in movimentos if proprietario is not None})
+    por_proprietario = OrderedDict()
+    for id_imovel, endereco, proprietario in imoveis:
+        por_proprietario.setdefault(proprietario, []).append(
+            {'proprietario': proprietario, 'id_imovel': id_imovel, 'endereco': endereco})
+    for proprietario in extras:
+        por_proprietario.setdefault(proprietario, []).append(
+            {'proprietario': proprietario, 'id_imovel': None, 'endereco': ROTULO_EXTRAS.strip()})
+    for proprietario in sorted(por_proprietario):
+        fluxo.linhas.extend(por_proprietario[proprietario])
+
+    posicao_linha = {}
+    for i, linha in enumerate(fluxo.linhas):
+        chave = ('imovel', linha['id_imovel']) if linha['id_imovel'] is not None else ('extras', linha['proprietario'])
+        posicao_linha[chave] = i
+    posicao_mes = {mes: i for i, mes in enumerate(fluxo.meses)}
+
+    zeros = bytes(8 * len(fluxo.meses))
+    fluxo.valores = {componente: [array('d', zeros) for _ in fluxo.linhas] for componente in COMPONENTES_MENSAIS}
+    receita, iptu, condominio, outras, saldo = (fluxo.valores[c] for c in COMPONENTES_MENSAIS)
+
+    for id_imovel, proprietario, mes, v_receita, v_iptu, v_condominio, v_outras in movimentos:
+        chave = ('imovel', id_imovel) if proprietario is None else ('extras', proprietario)
+        i, m = posicao_linha.get(chave), posicao_mes.get(mes)
+        if i is None or m is None:
+            continue  # Despesa de imóvel sem cadastro ou data fora do padrão AAAA-MM-DD
+        receita[i][m] += v_receita
+        iptu[i][m] -= v_iptu
+        condominio[i][m] -= v_condominio
+        outras[i][m] -= v_outras
+        saldo[i][m] += v_receita - v_iptu - v_condominio - v_outras
+
+    return fluxo
+
+
+def gerar_excel_fluxo_mensal(fluxo: FluxoMensal, destino):
+    """
+    Grava o fluxo mensal em Excel no modo write_only do openpyxl: as linhas
+    vão direto para o arquivo, sem montar a planilha inteira em memória.
+    Uma aba por componente, com subtotal por proprietário e total geral.
+
+    Args:
+        fluxo (FluxoMensal): Matriz calculada
+        destino: Caminho ou arquivo aberto em modo binário
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    header_fill = PatternFill(start_color="1565C0", end_color="1565C0", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    subtotal_fill = PatternFill(start_color="BBDEFB", end_color="BBDEFB", fill_type="solid")
+    total_fill = PatternFill(start_color="0D47A1", end_color="0D47A1", fill_type="solid")
+    total_font = Font(bold=True, color="FFFFFF")
+    money_format = 'R$ #,##0.00'
+
+    wb = Workbook(write_only=True)
+    grupos = fluxo.grupos()
+    titulos_meses = [f"{mes[5:7]}/{mes[:4]}" for mes in fluxo.meses]
+
+    def celula(ws, valor, fill=None, font=None, moeda=False):
+        cell = WriteOnlyCell(ws, value=valor)
+        if fill:
+            cell.fill = fill
+        if font:
+            cell.font = font
+        if moeda:
+            cell.number_format = money_format
+        return cell
+
+    for componente, titulo in COMPONENTES_MENSAIS.items():
+        ws = wb.create_sheet(titulo)
+        # Larguras e painel congelado precisam ser definidos antes da primeira linha
+        ws.column_dimensions['A'].width = 14
+        ws.column_dimensions['B'].width = 45
+        for col in range(3, len(fluxo.meses) + 4):
+            ws.column_dimensions[get_column_letter(col)].width = 13
+        ws.freeze_panes = 'C3'
+
+        ws.append([celula(ws, f"FLUXO MENSAL - {titulo.upper()} - "
+                              f"{titulos_meses[0]} a {titulos_meses[-1]}", font=Font(bold=True, size=14))])
+        ws.append([celula(ws, texto, header_fill, header_font)
+                   for texto in ['Proprietário', 'Endereço'] + titulos_meses + ['Total']])
+
+        matriz = fluxo.valores[componente]
+        for proprietario, indices in grupos.items():
+            for i in indices:
+                valores = matriz[i]
+                ws.append([proprietario, fluxo.linhas[i]['endereco']]
+                          + [celula(ws, v, moeda=True) for v in valores]
+                          + [celula(ws, sum(valores), font=Font(bold=True), moeda=True)])
+            subtotal = fluxo.soma(componente, indices)
+            ws.append([celula(ws, proprietario, subtotal_fill, Font(bold=True)),
+                       celula(ws, f"Subtotal {proprietario}", subtotal_fill, Font(bold=True))]
+                      + [celula(ws, v, subtotal_fill, Font(bold=True), True) for v in subtotal]
+                      + [celula(ws, sum(subtotal), subtotal_fill, Font(bold=True), True)])
+
+        total = fluxo.soma(componente)
+        ws.append([celula(ws, 'TOTAL GERAL', total_fill, total_font), celula(ws, '', total_fill)]
+                  + [celula(ws, v, total_fill, total_font, True) for v in total]
+                  + [celula(ws, sum(total), total_fill, total_font, True)])
+
+    wb.save(destino)
@@ -0,0 +1,137 @@
+"""
+================================================================================
+IMOBIPRO - HISTÓRICO DIÁRIO DE INDICADORES
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Grava uma linha por dia na tabela kpi_snapshots com os
+           indicadores do dashboard (ocupação, vagos, contas a receber,
+           atraso, despesas pendentes e recebido no mês). A comparação ano a
+           ano do dashboard e a série 'atraso' de /api/series leem essas
+           linhas em vez de recalcular o histórico.
+================================================================================
+
+O registro do dia é refeito a cada execução (INSERT OR REPLACE pela data):
+a última execução do dia é a que fica. Valores a receber, despesas pendentes
+e recebido no mês vêm do resumo mensal (utils/resumo_financeiro.py); o valor
+em atraso usa o índice receitas(status, vencimento_previsto).
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+DDL_INDICADORES = """
+CREATE TABLE IF NOT EXISTS kpi_snapshots (
+    data                  DATE PRIMARY KEY,         -- AAAA-MM-DD
+    total_imoveis         INTEGER NOT NULL,
+    imoveis_vagos         INTEGER NOT NULL,
+    taxa_ocupacao         REAL    NOT NULL,         -- percentual (0-100)
+    receber_em_aberto     REAL    NOT NULL,         -- receitas Pendente/Atrasado
+    valor_em_atraso       REAL    NOT NULL,         -- idem, vencidas antes do dia
+    despesas_pendentes    REAL    NOT NULL,         -- despesas sem pagamento
+    recebido_mes          REAL    NOT NULL,         -- recebido no mês do registro
+    registrado_em         TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+"""
+
+CAMPOS_INDICADORES = ['total_imoveis', 'imoveis_vagos', 'taxa_ocupacao', 'receber_em_aberto',
+                      'valor_em_atraso', 'despesas_pendentes', 'recebido_mes']
+
+SQL_INDICADORES = """
+    SELECT
+        (SELECT COUNT(*) FROM imoveis)                          AS total_imoveis,
+        (SELECT COUNT(*) FROM imoveis WHERE ocupado = 'Não')    AS imoveis_vagos,
+        (SELECT TOTAL(pendente) FROM resumo_mensal WHERE origem = 'receita') AS receber_em_aberto,
+        (SELECT TOTAL(valor_total_devido) FROM receitas
+          WHERE status IN ('Pendente', 'Atrasado') AND vencimento_previsto < :dia) AS valor_em_atraso,
+        (SELECT TOTAL(pendente) FROM resumo_mensal WHERE origem = 'despesa') AS despesas_pendentes,
+        (SELECT TOTAL(recebido) FROM resumo_mensal WHERE mes = :mes) AS recebido_mes
+"""
+
+
+class IndicadoresDiarios:
+    """
+    Grava e consulta o histórico diário de indicadores (kpi_snapshots).
+    """
+
+    def __init__(self, db):
+        """
+        Inicializa o histórico.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+        """
+        self.db = db
+
+    def instalar(self) -> bool:
+        """Cria a tabela kpi_snapshots (idempotente)."""
+        return self.db.aplicar_ddl(DDL_INDICADORES)
+
+    def calcular(self, dia: date = None) -> Dict:
+        """
+        Calcula os indicadores atuais.
+
+        Args:
+            dia (date): Data de referência do atraso e do mês (padrão: hoje)
+
+        Returns:
+            Dict: Um valor por campo de CAMPOS_INDICADORES
+        """
+        dia = dia or date.today()
+        conn = self.db.connect()
+        try:
+            linha = dict(conn.execute(SQL_INDICADORES, {
+                'dia': dia.isoformat(),
+                'mes': dia.strftime('%Y-%m'),
+            }).fetchone())
+        finally:
+            conn.close()
+        ocupados = linha['total_imoveis'] - linha['imoveis_vagos']
+        linha['taxa_ocupacao'] = (ocupados / linha['total_imoveis'] * 100) if linha['total_imoveis'] else 0
+        return linha
+
+    def registrar(self, dia: date = None) -> Dict:
+        """
+        Grava (ou regrava) o registro do dia.
+
+        Args:
+            dia (date): Dia do registro (padrão: hoje)
+
+        Returns:
+            Dict: Indicadores gravados
+        """
+        dia = dia or date.today()
+        indicadores = self.calcular(dia)
+        colunas = ', '.join(CAMPOS_INDICADORES)
+        marcadores = ', '.join('?' for _ in CAMPOS_INDICADORES)
+        self.db.execute_update(
+            f"INSERT OR REPLACE INTO kpi_snapshots (data, {colunas}) VALUES (?, {marcadores})",
+            (dia.isoformat(), *[indicadores[campo] for campo in CAMPOS_INDICADORES])
+        )
+        return indicadores
+
+    def registro_em(self, dia: date) -> Optional[Dict]:
+        """Registro do dia ou, se faltar, o último anterior a ele (até 7 dias antes)."""
+        resultado = self.db.execute_query(
+            f"SELECT data, {', '.join(CAMPOS_INDICADORES)} FROM kpi_snapshots "
+            "WHERE data BETWEEN ? AND ? ORDER BY data DESC LIMIT 1",
+            ((dia - timedelta(days=7)).isoformat(), dia.isoformat())
+        )
+        return resultado[0] if resultado else None
+
+    def comparacao_anual(self, dia: date = None) -> Dict:
+        """
+        Indicadores do dia comparados com o mesmo dia do ano anterior.
+
+        Args:
+            dia (date): Dia de referência (padrão: hoje)
+
+        Returns:
+            Dict: {'atual': {...}, 'ano_anterior': {...} ou None}
+        """
+        dia = dia or date.today()
+        try:
+            mesmo_dia = dia.replace(year=dia.year - 1)
+        except ValueError:  # 29/02
+            mesmo_dia = dia.replace(year=dia.year - 1, day=28)
+        return {'atual': self.registro_em(dia), 'ano_anterior': self.registro_em(mesmo_dia)}
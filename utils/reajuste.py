@@ -0,0 +1,315 @@
+"""
+================================================================================
+IMOBIPRO - REAJUSTE DE ALUGUÉIS POR ÍNDICE (IGPM / IPCA)
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Carrega as séries mensais dos índices a partir de CSVs locais para
+           a tabela indices_economicos, calcula o fator acumulado de todos os
+           contratos com aniversário vencido em uma única consulta e aplica
+           os novos aluguéis (contratos e receitas pendentes) em uma única
+           transação.
+================================================================================
+
+  * CSVs em Config.INDICES_DIR, um por índice (IGPM.csv, IPCA.csv), com o mês
+    (AAAA-MM, MM/AAAA ou uma data) e a variação mensal em % (vírgula ou
+    ponto). Um arquivo só é relido quando muda (tamanho/data de modificação).
+  * Referência do contrato: último reajuste, senão a data base, senão o
+    início. Todos os ciclos de 12 meses completos até hoje são aplicados de
+    uma vez; o fator é o produto de (1 + variação) dos meses do período, a
+    partir do mês da referência.
+  * Período com mês sem índice publicado não é reajustado (fica na prévia
+    como pendente). Fator acumulado negativo não reduz o aluguel.
+  * Ao aplicar, receitas em aberto ('Pendente' ou 'Atrasado') a partir do mês
+    do reajuste recebem o novo aluguel, inclusive as que a varredura de status
+    já marcou como atrasadas quando o reajuste é aplicado com atraso;
+    valor_total_devido é recomposto com os demais componentes.
+"""
+
+import csv
+import os
+import re
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DDL_REAJUSTE = """
+CREATE TABLE IF NOT EXISTS indices_economicos (
+    indice     TEXT NOT NULL,                   -- IGPM, IPCA
+    mes        TEXT NOT NULL,                   -- AAAA-MM
+    variacao   REAL NOT NULL,                   -- variação mensal em %
+    PRIMARY KEY (indice, mes)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS indices_arquivos (
+    indice       TEXT PRIMARY KEY,
+    arquivo      TEXT NOT NULL,
+    assinatura   TEXT NOT NULL,                 -- tamanho e data de modificação
+    meses        INTEGER NOT NULL,
+    carregado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Índice do contrato → série em indices_economicos
+SERIES_INDICE = {'IGPM': 'IGPM', 'IGP-M': 'IGPM', 'IPCA': 'IPCA'}
+
+SQL_PREVIA = """
+    WITH
+    base AS (
+        SELECT c.id, c.valor_aluguel, c.indice_reajuste,
+               COALESCE(c.ultimo_reajuste, c.data_base_reajuste, c.inicio_contrato) AS referencia,
+               p.nome_completo AS inquilino, i.endereco_completo AS imovel,
+               CASE REPLACE(UPPER(c.indice_reajuste), '-', '') WHEN 'IGPM' THEN 'IGPM'
+                                                             WHEN 'IPCA' THEN 'IPCA' END AS serie
+        FROM contratos c
+        JOIN imoveis i ON i.id = c.id_imovel
+        JOIN pessoas p ON p.id = c.id_inquilino
+        WHERE c.status_contrato IN ('Ativo', 'Prorrogado')
+    ),
+    devidos AS (
+        SELECT *,
+               ((CAST(strftime('%Y', :hoje) AS INTEGER) - CAST(strftime('%Y', referencia) AS INTEGER)) * 12
+                + CAST(strftime('%m', :hoje) AS INTEGER) - CAST(strftime('%m', referencia) AS INTEGER)
+                - (strftime('%d', :hoje) < strftime('%d', referencia))) / 12 AS ciclos
+        FROM base
+    )
+    SELECT d.id, d.inquilino, d.imovel, d.indice_reajuste, d.serie, d.valor_aluguel,
+           d.referencia, d.ciclos,
+           date(d.referencia, '+' || (d.ciclos * 12) || ' months') AS data_reajuste,
+           strftime('%Y-%m', d.referencia) AS mes_inicio,
+           strftime('%Y-%m', date(d.referencia, 'start of month', '+' || (d.ciclos * 12 - 1) || ' months')) AS mes_fim,
+           COUNT(ie.variacao) AS meses_publicados,
+           PRODUTO(1 + ie.variacao / 100.0) AS fator
+    FROM devidos d
+    LEFT JOIN indices_economicos ie
+           ON ie.indice = d.serie
+          AND ie.mes >= strftime('%Y-%m', d.referencia)
+          AND ie.mes < strftime('%Y-%m', date(d.referencia, 'start of month', '+' || (d.ciclos * 12) || ' months'))
+    WHERE d.ciclos >= 1
+    GROUP BY d.id
+    ORDER BY data_reajuste, d.id
+"""
+
+
+class _Produto:
+    """Agregado PRODUTO(x) para o SQLite (produtório; NULL sem linhas)."""
+
+    def __init__(self):
+        self.resultado = None
+
+    def step(self, valor):
+        if valor is not None:
+            self.resultado = (self.resultado if self.resultado is not None else 1.0) * valor
+
+    def finalize(self):
+        return self.resultado
+
+
+def _mes_csv(valor: str) -> Optional[str]:
+    """Mês AAAA-MM a partir de AAAA-MM[-DD], MM/AAAA ou DD/MM/AAAA (None se não reconhecido)."""
+    iso = re.match(r'(\d{4})-(\d{2})', valor)
+    if iso:
+        return f"{iso.group(1)}-{iso.group(2)}"
+    brasileiro = re.match(r'(?:\d{2}/)?(\d{2})/(\d{4})', valor)
+    if brasileiro:
+        return f"{brasileiro.group(2)}-{brasileiro.group(1)}"
+    return None
+
+
+def ler_csv_indice(caminho: str) -> Iterator[Tuple[str, float]]:
+    """
+    Lê um CSV de índice mensal.
+
+    Args:
+        caminho (str): Arquivo com colunas mês e variação (%), com ou sem cabeçalho
+
+    Yields:
+        Tuple[str, float]: (mês AAAA-MM, variação em %); linhas não reconhecidas são ignoradas
+    """
+    with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+        amostra = arquivo.readline()
+        arquivo.seek(0)
+        separador = ';' if ';' in amostra else ','
+        for linha in csv.reader(arquivo, delimiter=separador):
+            if len(linha) < 2:
+                continue
+            mes = _mes_csv(linha[0].strip())
+            texto = linha[1].strip().replace('%', '')
+            if ',' in texto:
+                texto = texto.replace('.', '').replace(',', '.')
+            try:
+                variacao = float(texto)
+            except ValueError:
+                continue                            # Cabeçalho ou linha inválida
+            if mes is not None:
+                yield mes, variacao
+
+
+class MotorReajuste:
+    """
+    Reajuste anual dos aluguéis pelos índices dos contratos.
+    """
+
+    def __init__(self, db, pasta_indices: str):
+        """
+        Inicializa o motor.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+            pasta_indices (str): Pasta com os CSVs dos índices (IGPM.csv, IPCA.csv)
+        """
+        self.db = db
+        self.pasta_indices = pasta_indices
+
+    def instalar(self) -> bool:
+        """Cria as tabelas dos índices (idempotente)."""
+        return self.db.aplicar_ddl(DDL_REAJUSTE)
+
+    def _conectar(self):
+        """Conexão com o agregado PRODUTO registrado."""
+        conn = self.db.connect()
+        conn.create_aggregate('PRODUTO', 1, _Produto)
+        return conn
+
+    def carregar_indices(self, forcar: bool = False) -> Dict[str, int]:
+        """
+        Carrega para o banco os CSVs novos ou alterados.
+
+        Args:
+            forcar (bool): Recarregar mesmo sem alteração
+
+        Returns:
+            Dict[str, int]: {série: meses carregados} (só as séries relidas)
+        """
+        carregados = {}
+        for serie in sorted(set(SERIES_INDICE.values())):
+            caminho = os.path.join(self.pasta_indices, f'{serie}.csv')
+            if not os.path.exists(caminho):
+                continue
+            estado = os.stat(caminho)
+            assinatura = f'{estado.st_size}:{estado.st_mtime_ns}'
+            atual = self.db.execute_query("SELECT assinatura FROM indices_arquivos WHERE indice = ?", (serie,))
+            if atual and atual[0]['assinatura'] == assinatura and not forcar:
+                continue
+
+            meses = list(ler_csv_indice(caminho))
+            with self.db.trava_escrita():
+                conn = self.db.connect()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute("DELETE FROM indices_economicos WHERE indice = ?", (serie,))
+                    conn.executemany("INSERT OR REPLACE INTO indices_economicos (indice, mes, variacao) VALUES (?, ?, ?)",
+                                     [(serie, mes, variacao) for mes, variacao in meses])
+                    conn.execute("""
+                        INSERT OR REPLACE INTO indices_arquivos (indice, arquivo, assinatura, meses, carregado_em)
+                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    """, (serie, caminho, assinatura, len(meses)))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.close()
+            carregados[serie] = len(meses)
+            print(f"✓ Índice {serie} carregado: {len(meses)} meses ({caminho})")
+        return carregados
+
+    def situacao_indices(self) -> List[Dict]:
+        """Séries carregadas: meses, primeiro e último mês disponíveis."""
+        return self.db.execute_query("""
+            SELECT a.indice, a.meses, a.carregado_em, MIN(ie.mes) AS primeiro_mes, MAX(ie.mes) AS ultimo_mes
+            FROM indices_arquivos a
+            LEFT JOIN indices_economicos ie ON ie.indice = a.indice
+            GROUP BY a.indice
+            ORDER BY a.indice
+        """)
+
+    @staticmethod
+    def _calcular(conn, hoje: date) -> List[Dict]:
+        """Prévia calculada na conexão informada (ver calcular)."""
+        previa = []
+        for linha in conn.execute(SQL_PREVIA, {'hoje': hoje.isoformat()}):
+            item = dict(linha)
+            meses_periodo = item['ciclos'] * 12
+            if item['serie'] is None:
+                item['situacao'] = f"Índice '{item['indice_reajuste'] or '-'}' sem série carregada"
+            elif item['meses_publicados'] < meses_periodo:
+                item['situacao'] = (f"Índice incompleto ({item['meses_publicados']} de {meses_periodo} meses "
+                                    f"entre {item['mes_inicio']} e {item['mes_fim']})")
+            else:
+                item['situacao'] = None
+            fator = max(item['fator'] or 1.0, 1.0)
+            item['aplicavel'] = item['situacao'] is None
+            item['percentual'] = round((fator - 1) * 100, 4) if item['aplicavel'] else None
+            item['novo_valor'] = round(item['valor_aluguel'] * fator, 2) if item['aplicavel'] else None
+            previa.append(item)
+        return previa
+
+    def calcular(self, hoje: date = None) -> List[Dict]:
+        """
+        Prévia do reajuste: um item por contrato com aniversário vencido.
+
+        Args:
+            hoje (date): Data de referência (padrão: hoje)
+
+        Returns:
+            List[Dict]: Contrato, período, fator, percentual, valor atual e novo;
+                'aplicavel' False e 'situacao' com o motivo quando não pode ser reajustado
+        """
+        conn = self._conectar()
+        try:
+            return self._calcular(conn, hoje or date.today())
+        finally:
+            conn.close()
+
+    def aplicar(self, ids_contratos: Optional[List[int]] = None, hoje: date = None) -> Dict[str, int]:
+        """
+        Aplica o reajuste (contratos e receitas em aberto) em uma única transação.
+
+        A prévia é recalculada dentro da transação, então o que é gravado
+        corresponde ao estado do banco no momento da aplicação.
+
+        Args:
+            ids_contratos (List[int]): Contratos a reajustar (padrão: todos os aplicáveis)
+            hoje (date): Data de referência (padrão: hoje)
+
+        Returns:
+            Dict[str, int]: {'contratos': reajustados, 'receitas': receitas atualizadas}
+        """
+        hoje = hoje or date.today()
+        selecionados = set(ids_contratos) if ids_contratos is not None else None
+
+        with self.db.trava_escrita():
+            conn = self._conectar()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                itens = [item for item in self._calcular(conn, hoje)
+                         if item['aplicavel'] and (selecionados is None or item['id'] in selecionados)]
+
+                contratos = conn.executemany("""
+                    UPDATE contratos
+                    SET valor_aluguel = ?, ultimo_reajuste = ?, percentual_ultimo_reajuste = ?,
+                        data_atualizacao = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, [(item['novo_valor'], item['data_reajuste'], item['percentual'], item['id'])
+                      for item in itens]).rowcount
+
+                receitas = conn.executemany("""
+                    UPDATE receitas
+                    SET aluguel_devido = ?,
+                        valor_total_devido = ? + COALESCE(condominio_devido, 0) + COALESCE(iptu_devido, 0)
+                                               + COALESCE(desconto_multa, 0)
+                    WHERE id_contrato = ?
+                      AND status IN ('Pendente', 'Atrasado')
+                      AND mes_referencia >= date(?, 'start of month')
+                """, [(item['novo_valor'], item['novo_valor'], item['id'], item['data_reajuste'])
+                      for item in itens]).rowcount
+
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        print(f"✓ Reajuste aplicado: {contratos} contrato(s), {receitas} receita(s) em aberto atualizada(s)")
+        return {'contratos': contratos, 'receitas': receitas}
@@ -0,0 +1,830 @@
+"""
+================================================================================
+IMOBIPRO - MOTOR DE RELATÓRIOS
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Cada relatório é declarado uma única vez (consultas, filtros,
+           colunas e totais em SQL). O resultado fica em cache por conjunto de
+           filtros e versão dos dados, e os renderizadores (HTML, Excel, CSV e
+           PDF) trabalham todos sobre o mesmo resultado.
+================================================================================
+
+Funcionamento:
+
+  * Um Relatorio tem uma ou mais Secoes (ex.: despesas vincendas e pagas).
+    Cada seção tem a origem (FROM/WHERE com parâmetros nomeados), os campos,
+    a ordenação e os totais, que são calculados por uma consulta agregada
+    sobre a mesma origem.
+  * Filtros vazios viram NULL; as origens usam "(:filtro IS NULL OR ...)".
+    O parâmetro :hoje (data atual, ISO) está sempre disponível.
+  * Todas as consultas de um relatório rodam em uma única transação de
+    leitura (mesmo estado do banco para linhas e totais), na réplica se ela
+    estiver em dia ou no banco principal.
+  * O cache é indexado por (relatório, filtros, versão dos dados): qualquer
+    escrita ou restauração muda a versão e a próxima consulta refaz o cálculo.
+"""
+
+import io
+import csv
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.encargos import expressoes_encargos
+
+# Resultados mantidos no cache (combinações de relatório + filtros)
+CAPACIDADE_CACHE = 32
+
+# Formatos de exportação: extensão -> tipo MIME
+TIPOS_MIME = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'pdf': 'application/pdf',
+}
+
+# Índices usados pelos relatórios (também em database/schema.sql)
+DDL_RELATORIOS = """
+CREATE INDEX IF NOT EXISTS idx_receitas_status_vencimento ON receitas(status, vencimento_previsto);
+CREATE INDEX IF NOT EXISTS idx_receitas_data_recebimento ON receitas(data_recebimento);
+CREATE INDEX IF NOT EXISTS idx_despesas_data_pagamento ON despesas(data_pagamento);
+"""
+
+
+# =============================================================================
+# DECLARAÇÃO DOS RELATÓRIOS
+# =============================================================================
+
+@dataclass
+class Coluna:
+    """Coluna exibida nas exportações (Excel, CSV e PDF)."""
+    campo: str
+    titulo: str
+    largura: int = 15
+    formato: str = 'texto'        # 'texto', 'moeda' ou 'data'
+    total: Optional[str] = None   # Nome do total da seção mostrado na linha TOTAL
+    vazio: str = ''               # Texto para valores nulos/vazios
+
+
+@dataclass
+class Secao:
+    """Uma consulta do relatório (vira uma aba no Excel)."""
+    nome: str
+    aba: str
+    cabecalho: str
+    campos: str
+    origem: str
+    ordem: str
+    colunas: List[Coluna]
+    totais: Dict[str, str] = field(default_factory=dict)
+    agrupamento: str = ''         # GROUP BY das linhas (os totais somam a origem inteira)
+
+    def sql_linhas(self) -> str:
+        """Consulta das linhas da seção."""
+        agrupamento = f" GROUP BY {self.agrupamento}" if self.agrupamento else ''
+        return f"SELECT {self.campos} {self.origem}{agrupamento} ORDER BY {self.ordem}"
+
+    def sql_totais(self) -> str:
+        """Consulta agregada com os totais da seção (mesma origem das linhas)."""
+        expressoes = ', '.join(f"{expr} AS {nome}" for nome, expr in self.totais.items())
+        return f"SELECT {expressoes} {self.origem}"
+
+
+@dataclass
+class Relatorio:
+    """Relatório declarado: filtros aceitos e suas seções."""
+    nome: str
+    titulo: str
+    filtros: List[str]
+    secoes: List[Secao]
+    arquivo: str
+    subtitulo: Callable[[Dict], str] = lambda filtros: ''
+    # Parâmetros derivados da data atual e dos filtros (ex.: limites das faixas
+    # de atraso), calculados uma vez por execução em vez de linha a linha no SQL
+    parametros: Callable[[date, Dict], Dict[str, Any]] = lambda hoje, filtros: {}
+
+
+@dataclass
+class ResultadoRelatorio:
+    """Resultado de um relatório para um conjunto de filtros."""
+    relatorio: Relatorio
+    filtros: Dict[str, str]
+    linhas: Dict[str, List[Dict]]
+    totais: Dict[str, Dict]
+    gerado_em: datetime
+
+    @property
+    def subtitulo(self) -> str:
+        """Texto dos filtros aplicados (ex.: período), usado nos títulos."""
+        return self.relatorio.subtitulo(self.filtros)
+
+
+def _data_br(valor: str) -> str:
+    """Converte AAAA-MM-DD em DD/MM/AAAA (devolve o texto original se não for data)."""
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').strftime('%d/%m/%Y')
+    except (TypeError, ValueError):
+        return valor or ''
+
+
+def _subtitulo_periodo(filtros: Dict) -> str:
+    """Texto do período filtrado (data_inicio / data_fim)."""
+    inicio, fim = filtros.get('data_inicio'), filtros.get('data_fim')
+    if inicio and fim:
+        return f" - Período: {_data_br(inicio)} a {_data_br(fim)}"
+    if inicio:
+        return f" - A partir de {_data_br(inicio)}"
+    if fim:
+        return f" - Até {_data_br(fim)}"
+    return ''
+
+
+def _subtitulo_gerado_em(filtros: Dict) -> str:
+    """Data de geração do relatório."""
+    return f" - Gerado em {date.today().strftime('%d/%m/%Y')}"
+
+
+_ORIGEM_DESPESAS = """
+    FROM despesas d
+    LEFT JOIN imoveis i ON d.id_imovel = i.id
+    WHERE d.data_pagamento IS {nulo}
+      AND (:tipo IS NULL OR d.tipo_despesa = :tipo)
+      AND (:data_inicio IS NULL OR d.{data} >= :data_inicio)
+      AND (:data_fim IS NULL OR d.{data} <= :data_fim)
+"""
+
+RELATORIO_DESPESAS = Relatorio(
+    nome='despesas-pendentes',
+    titulo='Relatório de Despesas',
+    filtros=['tipo', 'data_inicio', 'data_fim'],
+    arquivo='relatorio_despesas',
+    subtitulo=_subtitulo_periodo,
+    secoes=[
+        Secao(
+            nome='vincendas',
+            aba='Vincendas',
+            cabecalho='DESPESAS VINCENDAS',
+            campos="""d.*, i.endereco_completo AS imovel_endereco,
+                      COALESCE(d.vencimento_previsto < :hoje, 0) AS vencida,
+                      CASE WHEN d.vencimento_previsto < :hoje THEN 'VENCIDA' ELSE 'A Vencer' END AS situacao""",
+            origem=_ORIGEM_DESPESAS.format(nulo='NULL', data='vencimento_previsto'),
+            ordem='d.vencimento_previsto ASC',
+            colunas=[
+                Coluna('id', 'ID', 8),
+                Coluna('imovel_endereco', 'Imóvel', 35),
+                Coluna('tipo_despesa', 'Tipo', 15),
+                Coluna('motivo_despesa', 'Descrição', 25),
+                Coluna('vencimento_previsto', 'Vencimento', 15, 'data'),
+                Coluna('valor_previsto', 'Valor Previsto', 15, 'moeda', total='valor'),
+                Coluna('situacao', 'Situação', 12),
+            ],
+            totais={
+                'quantidade': 'COUNT(*)',
+                'valor': 'COALESCE(SUM(d.valor_previsto), 0)',
+                'vencidas': 'COALESCE(SUM(d.vencimento_previsto < :hoje), 0)',
+                'a_vencer': 'COUNT(*) - COALESCE(SUM(d.vencimento_previsto < :hoje), 0)',
+            },
+        ),
+        Secao(
+            nome='pagas',
+            aba='Pagas',
+            cabecalho='DESPESAS PAGAS',
+            campos="""d.*, i.endereco_completo AS imovel_endereco,
+                      COALESCE(NULLIF(d.valor_pago, 0), d.valor_previsto, 0) AS valor_efetivo""",
+            origem=_ORIGEM_DESPESAS.format(nulo='NOT NULL', data='data_pagamento'),
+            ordem='d.data_pagamento DESC',
+            colunas=[
+                Coluna('id', 'ID', 8),
+                Coluna('imovel_endereco', 'Imóvel', 35),
+                Coluna('tipo_despesa', 'Tipo', 15),
+                Coluna('motivo_despesa', 'Descrição', 25),
+                Coluna('data_pagamento', 'Data Pagamento', 15, 'data'),
+                Coluna('valor_efetivo', 'Valor Pago', 15, 'moeda', total='valor'),
+                Coluna('vencimento_previsto', 'Vencimento', 15, 'data'),
+            ],
+            totais={
+                'quantidade': 'COUNT(*)',
+                'valor': 'COALESCE(SUM(COALESCE(NULLIF(d.valor_pago, 0), d.valor_previsto, 0)), 0)',
+            },
+        ),
+    ],
+)
+
+RELATORIO_IMOVEIS_DESOCUPADOS = Relatorio(
+    nome='imoveis-desocupados',
+    titulo='Imóveis Desocupados',
+    filtros=['proprietario'],
+    arquivo='imoveis_desocupados',
+    subtitulo=_subtitulo_gerado_em,
+    secoes=[
+        Secao(
+            nome='imoveis',
+            aba='Imóveis Desocupados',
+            cabecalho='RELATÓRIO DE IMÓVEIS DESOCUPADOS',
+            campos='*',
+            origem="""
+                FROM imoveis
+                WHERE ocupado = 'Não'
+                  AND (:proprietario IS NULL OR proprietario = :proprietario)
+            """,
+            ordem='endereco_completo ASC',
+            colunas=[
+                Coluna('id', 'ID', 8),
+                Coluna('endereco_completo', 'Endereço', 45),
+                Coluna('proprietario', 'Proprietário', 15, vazio='-'),
+                Coluna('tipo_imovel', 'Tipo/Descrição', 40),
+                Coluna('aluguel_pretendido', 'Aluguel Pretendido', 18, 'moeda', total='aluguel_pretendido'),
+                Coluna('valor_mercado', 'Valor de Mercado', 18, 'moeda', total='valor_mercado'),
+            ],
+            totais={
+                'quantidade': 'COUNT(*)',
+                'aluguel_pretendido': 'COALESCE(SUM(aluguel_pretendido), 0)',
+                'valor_mercado': 'COALESCE(SUM(valor_mercado), 0)',
+            },
+        ),
+    ],
+)
+
+# Faixas de atraso: (campo, título, dias máximos — None = sem limite)
+FAIXAS_ATRASO = [
+    ('ate_30', '0-30 dias', 30),
+    ('de_31_a_60', '31-60 dias', 60),
+    ('de_61_a_90', '61-90 dias', 90),
+    ('acima_90', '90+ dias', None),
+]
+
+
+def _limites_atraso(hoje: date, filtros: Dict) -> Dict[str, str]:
+    """
+    Datas de vencimento que separam as faixas de atraso.
+
+    Calculadas uma vez por execução: cada receita cai na faixa por comparação
+    direta de vencimento_previsto (que está no índice), sem calcular dias de
+    atraso linha a linha.
+    """
+    return {f'limite_{dias}': (hoje - timedelta(days=dias)).isoformat()
+            for _, _, dias in FAIXAS_ATRASO if dias}
+
+
+def _somas_faixas() -> Dict[str, str]:
+    """Expressão da soma de cada faixa de atraso: {campo: expressão SQL}."""
+    somas, anterior = OrderedDict(), None
+    for campo, _, dias in FAIXAS_ATRASO:
+        condicoes = []
+        if dias:
+            condicoes.append(f"a.vencimento_previsto >= :limite_{dias}")
+        if anterior:
+            condicoes.append(f"a.vencimento_previsto < :limite_{anterior}")
+        somas[campo] = f"TOTAL(CASE WHEN {' AND '.join(condicoes)} THEN a.valor END)"
+        anterior = dias
+    return somas
+
+
+def _subtitulo_inadimplencia(filtros: Dict) -> str:
+    """Posição do relatório de inadimplência (e proprietário filtrado)."""
+    texto = f" - Posição em {date.today().strftime('%d/%m/%Y')}"
+    if filtros.get('proprietario'):
+        texto += f" - {filtros['proprietario']}"
+    return texto
+
+
+_ENCARGOS = expressoes_encargos('r')
+
+# Receitas vencidas e não recebidas. O filtro por status + vencimento usa o
+# índice idx_receitas_status_vencimento; os demais dados vêm por chave primária.
+# Multa e juros (utils.encargos) são calculados na mesma passada, com :hoje.
+_ORIGEM_INADIMPLENCIA = f"""
+    FROM (
+        SELECT r.id_contrato,
+               COALESCE(c.id_imovel, r.id_imovel)                        AS id_imovel,
+               COALESCE(p.nome_completo, r.tipo_receita)                 AS inquilino,
+               COALESCE(i.endereco_completo, '-')                        AS imovel,
+               COALESCE(CASE WHEN r.id_contrato IS NOT NULL THEN i.proprietario END,
+                        pr.nome, i.proprietario, 'Sem Proprietário')      AS proprietario,
+               r.vencimento_previsto,
+               COALESCE(r.valor_total_devido, 0)                         AS valor,
+               {_ENCARGOS['encargos']}                                    AS encargos,
+               COALESCE({_ENCARGOS['valor_atualizado']}, 0)              AS valor_atualizado
+        FROM receitas r
+        LEFT JOIN contratos     c  ON r.id_contrato     = c.id
+        LEFT JOIN imoveis       i  ON i.id              = COALESCE(c.id_imovel, r.id_imovel)
+        LEFT JOIN pessoas       p  ON c.id_inquilino    = p.id
+        LEFT JOIN proprietarios pr ON r.id_proprietario = pr.id
+        WHERE r.status IN ('Pendente', 'Atrasado')
+          AND r.vencimento_previsto < :hoje
+    ) a
+    WHERE (:proprietario IS NULL OR a.proprietario = :proprietario)
+"""
+
+_COLUNAS_FAIXAS = [Coluna(campo, titulo, 14, 'moeda', total=campo) for campo, titulo, _ in FAIXAS_ATRASO]
+
+_CAMPOS_FAIXAS = ', '.join(f"{expressao} AS {campo}" for campo, expressao in _somas_faixas().items())
+
+_TOTAIS_INADIMPLENCIA = {'quantidade': 'COUNT(*)', 'valor': 'TOTAL(a.valor)', **_somas_faixas(),
+                         'encargos': 'TOTAL(a.encargos)', 'valor_atualizado': 'TOTAL(a.valor_atualizado)'}
+
+_COLUNAS_ENCARGOS = [
+    Coluna('encargos', 'Multa + Juros', 15, 'moeda', total='encargos'),
+    Coluna('valor_atualizado', 'Atualizado', 15, 'moeda', total='valor_atualizado'),
+]
+
+RELATORIO_INADIMPLENCIA = Relatorio(
+    nome='inadimplencia',
+    titulo='Inadimplência por Faixa de Atraso',
+    filtros=['proprietario'],
+    arquivo='inadimplencia',
+    subtitulo=_subtitulo_inadimplencia,
+    parametros=_limites_atraso,
+    secoes=[
+        Secao(
+            nome='contratos',
+            aba='Por Contrato',
+            cabecalho='INADIMPLÊNCIA POR CONTRATO',
+            campos=f"""a.id_contrato, a.inquilino, a.imovel, a.proprietario,
+                       COUNT(*) AS parcelas, MIN(a.vencimento_previsto) AS vencimento_mais_antigo,
+                       {_CAMPOS_FAIXAS},
+                       TOTAL(a.valor) AS valor,
+                       TOTAL(a.encargos) AS encargos, TOTAL(a.valor_atualizado) AS valor_atualizado""",
+            origem=_ORIGEM_INADIMPLENCIA,
+            agrupamento='a.id_contrato, a.id_imovel, a.inquilino, a.proprietario',
+            ordem='a.proprietario, valor DESC',
+            colunas=[
+                Coluna('id_contrato', 'Contrato', 10, vazio='-'),
+                Coluna('inquilino', 'Inquilino', 30),
+                Coluna('imovel', 'Imóvel', 35),
+                Coluna('proprietario', 'Proprietário', 15),
+                Coluna('parcelas', 'Parcelas', 10),
+                Coluna('vencimento_mais_antigo', 'Mais Antiga', 12, 'data'),
+                *_COLUNAS_FAIXAS,
+                Coluna('valor', 'Total', 15, 'moeda', total='valor'),
+                *_COLUNAS_ENCARGOS,
+            ],
+            totais=_TOTAIS_INADIMPLENCIA,
+        ),
+        Secao(
+            nome='proprietarios',
+            aba='Por Proprietário',
+            cabecalho='INADIMPLÊNCIA POR PROPRIETÁRIO',
+            campos=f"""a.proprietario, COUNT(DISTINCT COALESCE(a.id_contrato, -a.id_imovel)) AS devedores,
+                       COUNT(*) AS parcelas,
+                       {_CAMPOS_FAIXAS},
+                       TOTAL(a.valor) AS valor,
+                       TOTAL(a.encargos) AS encargos, TOTAL(a.valor_atualizado) AS valor_atualizado""",
+            origem=_ORIGEM_INADIMPLENCIA,
+            agrupamento='a.proprietario',
+            ordem='valor DESC',
+            colunas=[
+                Coluna('proprietario', 'Proprietário', 20),
+                Coluna('devedores', 'Contratos', 10),
+                Coluna('parcelas', 'Parcelas', 10),
+                *_COLUNAS_FAIXAS,
+                Coluna('valor', 'Total', 15, 'moeda', total='valor'),
+                *_COLUNAS_ENCARGOS,
+            ],
+            totais=_TOTAIS_INADIMPLENCIA,
+        ),
+    ],
+)
+
+
+# Meses do relatório anual: (campo, título, número do mês 'MM')
+MESES_ANO = [
+    ('mes_01', 'Jan', '01'), ('mes_02', 'Fev', '02'), ('mes_03', 'Mar', '03'), ('mes_04', 'Abr', '04'),
+    ('mes_05', 'Mai', '05'), ('mes_06', 'Jun', '06'), ('mes_07', 'Jul', '07'), ('mes_08', 'Ago', '08'),
+    ('mes_09', 'Set', '09'), ('mes_10', 'Out', '10'), ('mes_11', 'Nov', '11'), ('mes_12', 'Dez', '12'),
+]
+
+
+def ano_irpf(filtros: Dict, hoje: date = None) -> int:
+    """Ano-calendário do relatório de IR (padrão: ano anterior, o da declaração)."""
+    try:
+        return int(filtros.get('ano'))
+    except (TypeError, ValueError):
+        return (hoje or date.today()).year - 1
+
+
+def _periodo_irpf(hoje: date, filtros: Dict) -> Dict[str, str]:
+    """Primeiro e último dia do ano-calendário (comparação direta nas datas)."""
+    ano = ano_irpf(filtros, hoje)
+    return {'inicio_ano': f"{ano}-01-01", 'fim_ano': f"{ano}-12-31"}
+
+
+def _subtitulo_irpf(filtros: Dict) -> str:
+    """Ano-calendário do relatório de IR."""
+    return f" - Ano-calendário {ano_irpf(filtros)}"
+
+
+# Aluguel recebido no ano: receitas de contrato (imóvel do contrato) e
+# receitas de aluguel lançadas direto no imóvel, como no fluxo de caixa
+_ORIGEM_IRPF_ALUGUEIS = """
+    FROM receitas r
+    LEFT JOIN contratos c ON c.id = r.id_contrato
+    JOIN imoveis i ON i.id = COALESCE(c.id_imovel, CASE WHEN r.tipo_receita = 'Aluguel' THEN r.id_imovel END)
+    WHERE r.data_recebimento BETWEEN :inicio_ano AND :fim_ano
+      AND (r.id_contrato IS NOT NULL OR r.tipo_receita = 'Aluguel')
+      AND (:proprietario IS NULL OR i.proprietario = :proprietario)
+"""
+
+_ORIGEM_IRPF_DEDUTIVEIS = """
+    FROM despesas d
+    JOIN imoveis i ON i.id = d.id_imovel
+    WHERE d.data_pagamento BETWEEN :inicio_ano AND :fim_ano
+      AND d.tipo_despesa IN ('IPTU', 'Condomínio')
+      AND (:proprietario IS NULL OR i.proprietario = :proprietario)
+"""
+
+_MESES_IRPF = {campo: f"TOTAL(CASE WHEN substr(r.data_recebimento, 6, 2) = '{numero}' THEN r.valor_recebido END)"
+               for campo, _, numero in MESES_ANO}
+
+RELATORIO_IRPF = Relatorio(
+    nome='irpf',
+    titulo='Rendimentos de Aluguel (IRPF / Carnê-Leão)',
+    filtros=['ano', 'proprietario'],
+    arquivo='irpf_alugueis',
+    subtitulo=_subtitulo_irpf,
+    parametros=_periodo_irpf,
+    secoes=[
+        Secao(
+            nome='alugueis',
+            aba='Aluguéis por Mês',
+            cabecalho='ALUGUÉIS RECEBIDOS POR PROPRIETÁRIO',
+            campos="COALESCE(i.proprietario, 'Sem Proprietário') AS proprietario, "
+                   + ', '.join(f"{expressao} AS {campo}" for campo, expressao in _MESES_IRPF.items())
+                   + ", TOTAL(r.valor_recebido) AS total",
+            origem=_ORIGEM_IRPF_ALUGUEIS,
+            agrupamento="COALESCE(i.proprietario, 'Sem Proprietário')",
+            ordem='proprietario',
+            colunas=[
+                Coluna('proprietario', 'Proprietário', 18),
+                *[Coluna(campo, titulo, 12, 'moeda', total=campo) for campo, titulo, _ in MESES_ANO],
+                Coluna('total', 'Total', 15, 'moeda', total='total'),
+            ],
+            totais={**_MESES_IRPF, 'total': 'TOTAL(r.valor_recebido)'},
+        ),
+        Secao(
+            nome='dedutiveis',
+            aba='Despesas Dedutíveis',
+            cabecalho='IPTU E CONDOMÍNIO PAGOS POR IMÓVEL',
+            campos="""COALESCE(i.proprietario, 'Sem Proprietário') AS proprietario, i.id AS id_imovel,
+                      i.endereco_completo, i.inscricao_imobiliaria,
+                      TOTAL(CASE WHEN d.tipo_despesa = 'IPTU' THEN d.valor_pago END) AS iptu,
+                      TOTAL(CASE WHEN d.tipo_despesa = 'Condomínio' THEN d.valor_pago END) AS condominio,
+                      TOTAL(d.valor_pago) AS total""",
+            origem=_ORIGEM_IRPF_DEDUTIVEIS,
+            agrupamento='i.id',
+            ordem='proprietario, i.endereco_completo',
+            colunas=[
+                Coluna('proprietario', 'Proprietário', 18),
+                Coluna('endereco_completo', 'Imóvel', 45),
+                Coluna('inscricao_imobiliaria', 'Inscrição', 18, vazio='-'),
+                Coluna('iptu', 'IPTU', 15, 'moeda', total='iptu'),
+                Coluna('condominio', 'Condomínio', 15, 'moeda', total='condominio'),
+                Coluna('total', 'Total', 15, 'moeda', total='total'),
+            ],
+            totais={
+                'iptu': "TOTAL(CASE WHEN d.tipo_despesa = 'IPTU' THEN d.valor_pago END)",
+                'condominio': "TOTAL(CASE WHEN d.tipo_despesa = 'Condomínio' THEN d.valor_pago END)",
+                'total': 'TOTAL(d.valor_pago)',
+            },
+        ),
+    ],
+)
+
+RELATORIOS = {r.nome: r for r in (RELATORIO_DESPESAS, RELATORIO_IMOVEIS_DESOCUPADOS, RELATORIO_INADIMPLENCIA,
+                                 RELATORIO_IRPF)}
+
+
+# =============================================================================
+# EXECUÇÃO E CACHE
+# =============================================================================
+
+class MotorRelatorios:
+    """
+    Executa relatórios declarados e guarda os resultados em cache.
+    """
+
+    def __init__(self, db, capacidade: int = CAPACIDADE_CACHE):
+        """
+        Inicializa o motor.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+            capacidade (int): Máximo de resultados em cache
+        """
+        self.db = db
+        self.capacidade = capacidade
+        self._cache = OrderedDict()
+        self._trava = threading.Lock()
+        # Restauração do banco: descartar tudo (a versão também muda, mas
+        # assim a memória dos resultados antigos é liberada na hora)
+        db.registrar_invalidacao(lambda geracao: self.limpar())
+        db.aplicar_ddl(DDL_RELATORIOS)
+
+    def limpar(self):
+        """Descarta todos os resultados em cache."""
+        with self._trava:
+            self._cache.clear()
+
+    @staticmethod
+    def _parametros(relatorio: Relatorio, filtros: Dict[str, str]) -> Dict[str, Any]:
+        """Parâmetros das consultas: filtros vazios viram NULL, mais :hoje e os derivados."""
+        hoje = date.today()
+        parametros = {nome: (filtros.get(nome) or None) for nome in relatorio.filtros}
+        parametros['hoje'] = hoje.isoformat()
+        parametros.update(relatorio.parametros(hoje, filtros))
+        return parametros
+
+    def _executar(self, relatorio: Relatorio, parametros: Dict[str, Any]) -> Tuple[Dict, Dict]:
+        """Roda todas as consultas do relatório em uma única transação de leitura."""
+        linhas, totais = {}, {}
+        # max_atraso=0: a réplica só é usada se estiver idêntica ao principal,
+        # já que o resultado fica em cache sob a versão atual dos dados
+        conn = self.db.conectar_leitura(max_atraso=0)
+        try:
+            conn.execute("BEGIN")
+            for secao in relatorio.secoes:
+                cursor = conn.execute(secao.sql_linhas(), parametros)
+                colunas = [descricao[0] for descricao in cursor.description]
+                linhas[secao.nome] = [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+                if secao.totais:
+                    totais[secao.nome] = dict(conn.execute(secao.sql_totais(), parametros).fetchone())
+                else:
+                    totais[secao.nome] = {}
+            conn.rollback()
+        finally:
+            conn.close()
+        return linhas, totais
+
+    def obter(self, relatorio: Relatorio, filtros: Dict[str, str]) -> ResultadoRelatorio:
+        """
+        Retorna o resultado do relatório, do cache se os dados não mudaram.
+
+        Args:
+            relatorio (Relatorio): Relatório declarado
+            filtros (Dict): Valores dos filtros (ex.: request.args)
+
+        Returns:
+            ResultadoRelatorio: Linhas e totais de cada seção
+        """
+        filtros = {nome: filtros.get(nome, '') for nome in relatorio.filtros}
+        parametros = self._parametros(relatorio, filtros)
+        # Versão lida antes da consulta: uma escrita durante a execução faz a
+        # próxima chamada recalcular, nunca servir dados antigos como novos
+        chave = (relatorio.nome, tuple(sorted(parametros.items())), self.db.versao_dados())
+
+        with self._trava:
+            resultado = self._cache.get(chave)
+            if resultado is not None:
+                self._cache.move_to_end(chave)
+                return resultado
+
+        linhas, totais = self._executar(relatorio, parametros)
+        resultado = ResultadoRelatorio(relatorio, filtros, linhas, totais, datetime.now())
+
+        with self._trava:
+            self._cache[chave] = resultado
+            while len(self._cache) > self.capacidade:
+                self._cache.popitem(last=False)
+        return resultado
+
+
+# =============================================================================
+# RENDERIZADORES
+# =============================================================================
+
+def _valor_exportado(coluna: Coluna, linha: Dict) -> Any:
+    """Valor da coluna pronto para exportação (datas em DD/MM/AAAA, moeda numérica)."""
+    valor = linha.get(coluna.campo)
+    if coluna.formato == 'moeda':
+        return valor or 0
+    if coluna.formato == 'data':
+        return _data_br(valor) if valor else coluna.vazio
+    if valor is None or valor == '':
+        return coluna.vazio
+    return valor
+
+
+def _coluna_rotulo_total(colunas: List[Coluna]) -> Optional[int]:
+    """
+    Coluna (índice base 0) que recebe o rótulo "TOTAL:" na linha de totais.
+
+    É a coluna logo antes do primeiro total; se o primeiro total estiver na
+    primeira coluna, a primeira coluna sem total. None quando todas as
+    colunas têm total (o rótulo vai numa linha própria).
+    """
+    primeiro = next(i for i, coluna in enumerate(colunas) if coluna.total)
+    if primeiro > 0:
+        return primeiro - 1
+    return next((i for i, coluna in enumerate(colunas) if not coluna.total), None)
+
+
+def _moeda_br(valor: float) -> str:
+    """Formata valor como R$ 1.234,56 (para o PDF)."""
+    return f"R$ {valor or 0:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def renderizar_xlsx(resultado: ResultadoRelatorio) -> bytes:
+    """
+    Gera a planilha Excel: uma aba por seção, com título, cabeçalho e linha de total.
+
+    Args:
+        resultado (ResultadoRelatorio): Resultado do relatório
+
+    Returns:
+        bytes: Arquivo .xlsx
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    # Estilos reutilizáveis
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_align = Alignment(horizontal="center", vertical="center")
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    for secao in resultado.relatorio.secoes:
+        ws = wb.create_sheet(secao.aba[:31])
+        linhas = resultado.linhas[secao.nome]
+
+        # Título
+        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(secao.colunas))
+        ws['A1'] = f"{secao.cabecalho}{resultado.subtitulo}"
+        ws['A1'].font = Font(bold=True, size=14)
+        ws['A1'].alignment = Alignment(horizontal="center")
+
+        # Cabeçalhos
+        for col, coluna in enumerate(secao.colunas, 1):
+            cell = ws.cell(row=3, column=col, value=coluna.titulo)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_align
+            cell.border = border
+            ws.column_dimensions[get_column_letter(col)].width = coluna.largura
+
+        # Dados
+        for row_num, linha in enumerate(linhas, 4):
+            for col, coluna in enumerate(secao.colunas, 1):
+                cell = ws.cell(row=row_num, column=col, value=_valor_exportado(coluna, linha))
+                cell.border = border
+                if coluna.formato == 'moeda':
+                    cell.number_format = 'R$ #,##0.00'
+
+        # Totais (já calculados em SQL)
+        colunas_total = [col for col, coluna in enumerate(secao.colunas, 1) if coluna.total]
+        if colunas_total:
+            row_total = len(linhas) + 4
+            rotulo = _coluna_rotulo_total(secao.colunas)
+            if rotulo is None:
+                ws.cell(row=row_total, column=1, value="TOTAL:").font = Font(bold=True)
+                row_total += 1
+            else:
+                ws.cell(row=row_total, column=rotulo + 1, value="TOTAL:").font = Font(bold=True)
+            for col in colunas_total:
+                coluna = secao.colunas[col - 1]
+                total_cell = ws.cell(row=row_total, column=col,
+                                     value=resultado.totais[secao.nome][coluna.total])
+                total_cell.font = Font(bold=True)
+                total_cell.number_format = 'R$ #,##0.00'
+
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def renderizar_csv(resultado: ResultadoRelatorio) -> bytes:
+    """
+    Gera o CSV com as linhas de todas as seções (coluna "Seção" quando houver mais de uma).
+
+    Args:
+        resultado (ResultadoRelatorio): Resultado do relatório
+
+    Returns:
+        bytes: Arquivo .csv (UTF-8)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    varias_secoes = len(resultado.relatorio.secoes) > 1
+
+    for secao in resultado.relatorio.secoes:
+        cabecalho = [coluna.titulo for coluna in secao.colunas]
+        writer.writerow((['Seção'] if varias_secoes else []) + cabecalho)
+        for linha in resultado.linhas[secao.nome]:
+            valores = [_valor_exportado(coluna, linha) for coluna in secao.colunas]
+            writer.writerow(([secao.aba] if varias_secoes else []) + valores)
+
+    return buffer.getvalue().encode('utf-8')
+
+
+def renderizar_pdf(resultado: ResultadoRelatorio) -> bytes:
+    """
+    Gera o PDF (A4 paisagem): uma tabela por seção, com linha de total.
+
+    Args:
+        resultado (ResultadoRelatorio): Resultado do relatório
+
+    Returns:
+        bytes: Arquivo .pdf
+
+    Raises:
+        RuntimeError: Se o reportlab não estiver instalado
+    """
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import mm
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    except ImportError:
+        raise RuntimeError("Exportação em PDF requer o pacote reportlab (pip install reportlab)")
+
+    estilos = getSampleStyleSheet()
+    celula = estilos['BodyText'].clone('celula', fontSize=8, leading=10)
+    output = io.BytesIO()
+    doc = SimpleDocTemplate(output, pagesize=landscape(A4), title=resultado.relatorio.titulo,
+                            leftMargin=12 * mm, rightMargin=12 * mm,
+                            topMargin=12 * mm, bottomMargin=12 * mm)
+    largura_util = landscape(A4)[0] - 24 * mm
+
+    elementos = []
+    for secao in resultado.relatorio.secoes:
+        linhas = resultado.linhas[secao.nome]
+        elementos.append(Paragraph(f"{secao.cabecalho}{resultado.subtitulo}", estilos['Heading2']))
+
+        tabela = [[coluna.titulo for coluna in secao.colunas]]
+        for linha in linhas:
+            valores = []
+            for coluna in secao.colunas:
+                valor = _valor_exportado(coluna, linha)
+                valores.append(_moeda_br(valor) if coluna.formato == 'moeda'
+                               else Paragraph(str(valor), celula))
+            tabela.append(valores)
+
+        colunas_total = [i for i, coluna in enumerate(secao.colunas) if coluna.total]
+        if colunas_total:
+            total = [''] * len(secao.colunas)
+            rotulo = _coluna_rotulo_total(secao.colunas)
+            if rotulo is None:
+                tabela.append(['TOTAL:'] + [''] * (len(secao.colunas) - 1))
+            else:
+                total[rotulo] = 'TOTAL:'
+            for i in colunas_total:
+                total[i] = _moeda_br(resultado.totais[secao.nome][secao.colunas[i].total])
+            tabela.append(total)
+
+        soma_larguras = sum(coluna.largura for coluna in secao.colunas)
+        larguras = [largura_util * coluna.largura / soma_larguras for coluna in secao.colunas]
+        estilo = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#366092')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]
+        if colunas_total:
+            inicio_total = -2 if _coluna_rotulo_total(secao.colunas) is None else -1
+            estilo.append(('FONTNAME', (0, inicio_total), (-1, -1), 'Helvetica-Bold'))
+        elementos.append(Table(tabela, colWidths=larguras, repeatRows=1, style=TableStyle(estilo)))
+        elementos.append(Spacer(1, 8 * mm))
+
+    doc.build(elementos)
+    return output.getvalue()
+
+
+RENDERIZADORES = {
+    'xlsx': renderizar_xlsx,
+    'csv': renderizar_csv,
+    'pdf': renderizar_pdf,
+}
+
+
+def exportar_resultado(resultado: ResultadoRelatorio, formato: str) -> Tuple[bytes, str, str]:
+    """
+    Renderiza o resultado em um formato de arquivo.
+
+    Args:
+        resultado (ResultadoRelatorio): Resultado do relatório
+        formato (str): 'xlsx', 'csv' ou 'pdf'
+
+    Returns:
+        Tuple[bytes, str, str]: (conteúdo, tipo MIME, nome do arquivo)
+
+    Raises:
+        ValueError: Formato desconhecido
+    """
+    if formato not in RENDERIZADORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    conteudo = RENDERIZADORES[formato](resultado)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return conteudo, TIPOS_MIME[formato], f"{resultado.relatorio.arquivo}_{timestamp}.{formato}"
@@ -0,0 +1,185 @@
+"""
+================================================================================
+IMOBIPRO - RÉPLICA DE LEITURA
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Mantém uma cópia somente leitura do banco, atualizada continuamente,
+           para que relatórios em Excel e exportações não disputem o arquivo
+           principal com as escritas do dia a dia.
+================================================================================
+
+Funcionamento:
+
+  * A cada passagem, se o banco principal (ou seu -wal) mudou desde a última
+    cópia, a API de backup gera uma cópia consistente em um arquivo de
+    preparação, que depois substitui a réplica com os.replace (atômico).
+    Leitores que já estavam com a réplica antiga aberta continuam lendo o
+    arquivo antigo até fechar a conexão.
+  * Um arquivo <replica>.json guarda o momento da cópia e a "impressão
+    digital" (mtime e tamanho) do principal, usada para medir o atraso.
+  * A réplica é aberta com mode=ro&immutable=1: sem travas e sem -wal/-shm.
+  * A cópia guarda a geração do banco (contador de restaurações); depois de
+    uma restauração a réplica antiga deixa de ser usada até ser refeita.
+"""
+
+import os
+import json
+import time
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+from utils.trava_arquivo import TravaArquivo
+
+
+class ReplicaLeitura:
+    """
+    Réplica somente leitura do banco principal, com medição de atraso.
+    """
+
+    def __init__(self, db_path: str, caminho_replica: str = None,
+                 obter_geracao: Callable[[], int] = None):
+        """
+        Inicializa a réplica (não copia nada ainda).
+
+        Args:
+            db_path (str): Caminho do banco principal
+            caminho_replica (str): Caminho da réplica (padrão: <banco>_replica.db)
+            obter_geracao (Callable): Lê a geração atual do banco
+                                      (DatabaseManager.ler_geracao)
+        """
+        self.db_path = db_path
+        self.obter_geracao = obter_geracao or (lambda: 0)
+        self.caminho = caminho_replica or os.path.splitext(db_path)[0] + '_replica.db'
+        self.caminho_metadados = self.caminho + '.json'
+
+    def _impressao_digital(self) -> List[int]:
+        """mtime e tamanho do banco principal e do seu -wal (muda a cada escrita)."""
+        digital = []
+        for caminho in (self.db_path, self.db_path + '-wal'):
+            try:
+                stat = os.stat(caminho)
+                digital.extend([stat.st_mtime_ns, stat.st_size])
+            except FileNotFoundError:
+                digital.extend([0, 0])
+        return digital
+
+    def carregar_metadados(self) -> Optional[Dict]:
+        """
+        Carrega os metadados da última cópia.
+
+        Returns:
+            Optional[Dict]: Metadados ou None se a réplica ainda não existir
+        """
+        if not os.path.exists(self.caminho) or not os.path.exists(self.caminho_metadados):
+            return None
+        with open(self.caminho_metadados, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def atualizar(self, forcar: bool = False) -> Dict:
+        """
+        Atualiza a réplica se o banco principal mudou desde a última cópia.
+
+        A cópia é feita em um único passo da API de backup: uma só transação
+        de leitura, que em modo WAL não bloqueia os escritores e não precisa
+        recomeçar quando alguém grava durante a cópia.
+
+        Args:
+            forcar (bool): Copia mesmo sem alterações no principal
+
+        Returns:
+            Dict: {'atualizada', 'paginas', 'duracao'}
+        """
+        with TravaArquivo(self.caminho + '.lock'):
+            # Impressão digital lida ANTES da cópia: uma escrita durante a cópia
+            # deixa a réplica "desatualizada" e força nova cópia na próxima vez
+            digital = self._impressao_digital()
+            geracao = self.obter_geracao()
+            metadados = self.carregar_metadados()
+            if (not forcar and metadados and metadados['impressao_digital'] == digital
+                    and metadados.get('geracao', 0) == geracao):
+                return {'atualizada': False, 'paginas': metadados['paginas'], 'duracao': 0.0}
+
+            inicio = time.time()
+            preparacao = self.caminho + '.novo'
+            if os.path.exists(preparacao):
+                os.remove(preparacao)
+
+            conn_origem = sqlite3.connect(self.db_path)
+            conn_destino = sqlite3.connect(preparacao)
+            try:
+                conn_origem.backup(conn_destino)
+                paginas = conn_destino.execute("PRAGMA page_count").fetchone()[0]
+                # Arquivo único, sem -wal: requisito para abrir com immutable=1
+                conn_destino.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                conn_destino.close()
+                conn_origem.close()
+
+            os.replace(preparacao, self.caminho)
+            duracao = time.time() - inicio
+
+            metadados = {
+                'sincronizado_em': datetime.fromtimestamp(inicio).isoformat(),
+                'impressao_digital': digital,
+                'geracao': geracao,
+                'paginas': paginas,
+                'duracao': round(duracao, 3),
+            }
+            temporario = self.caminho_metadados + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(metadados, f)
+            os.replace(temporario, self.caminho_metadados)
+
+        return {'atualizada': True, 'paginas': paginas, 'duracao': duracao}
+
+    def atraso(self) -> Optional[float]:
+        """
+        Atraso da réplica em segundos.
+
+        Zero se o principal não mudou desde a cópia; caso contrário, o tempo
+        desde o início da última cópia (a réplica pode não ter alterações
+        feitas a partir desse momento).
+
+        Returns:
+            Optional[float]: Atraso em segundos, ou None se não houver réplica
+                             utilizável (inexistente ou anterior a uma restauração)
+        """
+        metadados = self.carregar_metadados()
+        if metadados is None or metadados.get('geracao', 0) != self.obter_geracao():
+            return None
+        if self._impressao_digital() == metadados['impressao_digital']:
+            return 0.0
+        sincronizado_em = datetime.fromisoformat(metadados['sincronizado_em'])
+        return (datetime.now() - sincronizado_em).total_seconds()
+
+    def conectar(self) -> sqlite3.Connection:
+        """
+        Abre uma conexão somente leitura com a réplica.
+
+        Returns:
+            sqlite3.Connection: Conexão com row_factory = sqlite3.Row
+        """
+        uri = f"file:{quote(os.path.abspath(self.caminho))}?mode=ro&immutable=1"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def status(self) -> Dict:
+        """
+        Resume o estado da réplica para exibição.
+
+        Returns:
+            Dict: {'sincronizado_em', 'atraso', 'paginas', 'duracao'}
+        """
+        metadados = self.carregar_metadados()
+        if metadados is None:
+            return {'sincronizado_em': None, 'atraso': None, 'paginas': 0, 'duracao': None}
+        return {
+            'sincronizado_em': datetime.fromisoformat(metadados['sincronizado_em']),
+            'atraso': self.atraso(),
+            'paginas': metadados['paginas'],
+            'duracao': metadados['duracao'],
+        }
@@ -0,0 +1,346 @@
+"""
+================================================================================
+IMOBIPRO - REPOSITÓRIO DE BACKUPS INCREMENTAIS
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Repositório endereçado por conteúdo para snapshots do banco SQLite.
+           Cada snapshot é dividido em blocos de páginas de tamanho fixo; cada
+           bloco é identificado pelo seu SHA-256 e gravado (comprimido) uma
+           única vez. Um snapshot é só um manifesto JSON com a lista de blocos,
+           então backups de um banco que mudou pouco custam poucos kilobytes.
+================================================================================
+
+Estrutura em disco:
+
+    backups/repositorio/
+        blocos/ab/ab12...ef.zlib     Blocos comprimidos (nome = SHA-256)
+        snapshots/<id>.json          Manifesto de cada snapshot
+        .lock                        Trava entre processos
+"""
+
+import os
+import json
+import lzma
+import zlib
+import hashlib
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from utils.trava_arquivo import TravaArquivo
+
+# Páginas do SQLite agrupadas em cada bloco (16 × 4096 = 64 KB no padrão)
+PAGINAS_POR_BLOCO = 16
+
+# Compressores suportados: nome -> (extensão, comprimir, descomprimir)
+COMPRESSORES = {
+    'zlib': ('.zlib', lambda dados: zlib.compress(dados, 6), zlib.decompress),
+    'lzma': ('.xz', lambda dados: lzma.compress(dados, preset=6), lzma.decompress),
+}
+
+
+class RepositorioBackup:
+    """
+    Repositório de snapshots deduplicados e comprimidos do banco de dados.
+    """
+
+    def __init__(self, diretorio: str = 'backups/repositorio', compressao: str = 'zlib'):
+        """
+        Inicializa o repositório (cria a estrutura de diretórios se necessário).
+
+        Args:
+            diretorio (str): Diretório raiz do repositório
+            compressao (str): Algoritmo de compressão dos novos blocos ('zlib' ou 'lzma')
+        """
+        if compressao not in COMPRESSORES:
+            raise ValueError(f"Compressão não suportada: {compressao}")
+
+        self.diretorio = diretorio
+        self.compressao = compressao
+        self.dir_blocos = os.path.join(diretorio, 'blocos')
+        self.dir_snapshots = os.path.join(diretorio, 'snapshots')
+
+        os.makedirs(self.dir_blocos, exist_ok=True)
+        os.makedirs(self.dir_snapshots, exist_ok=True)
+
+    # =========================================================================
+    # AUXILIARES
+    # =========================================================================
+
+    def _trava(self) -> TravaArquivo:
+        """Trava usada para serializar gravação e poda entre processos."""
+        return TravaArquivo(os.path.join(self.diretorio, '.lock'))
+
+    def _caminho_bloco(self, hash_bloco: str, compressao: str) -> str:
+        """Caminho do arquivo de um bloco (subdiretório pelos 2 primeiros caracteres)."""
+        extensao = COMPRESSORES[compressao][0]
+        return os.path.join(self.dir_blocos, hash_bloco[:2], hash_bloco + extensao)
+
+    def _caminho_manifesto(self, id_snapshot: str) -> str:
+        """Caminho do manifesto JSON de um snapshot."""
+        return os.path.join(self.dir_snapshots, f"{id_snapshot}.json")
+
+    @staticmethod
+    def _gravar_atomico(caminho: str, dados: bytes):
+        """Grava um arquivo via arquivo temporário + rename (nunca fica pela metade)."""
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+    @staticmethod
+    def _tamanho_pagina(caminho_banco: str) -> int:
+        """Lê o tamanho de página do cabeçalho do arquivo SQLite (bytes 16-17)."""
+        with open(caminho_banco, 'rb') as f:
+            cabecalho = f.read(100)
+        tamanho = int.from_bytes(cabecalho[16:18], 'big')
+        return 65536 if tamanho == 1 else tamanho
+
+    def _ler_bloco(self, hash_bloco: str, compressao: str) -> bytes:
+        """Lê e descomprime um bloco do repositório."""
+        with open(self._caminho_bloco(hash_bloco, compressao), 'rb') as f:
+            return COMPRESSORES[compressao][2](f.read())
+
+    def carregar_manifesto(self, id_snapshot: str) -> Optional[Dict]:
+        """
+        Carrega o manifesto de um snapshot.
+
+        Args:
+            id_snapshot (str): Identificador do snapshot
+
+        Returns:
+            Optional[Dict]: Manifesto ou None se não existir
+        """
+        caminho = self._caminho_manifesto(id_snapshot)
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    # =========================================================================
+    # OPERAÇÕES
+    # =========================================================================
+
+    def gravar_snapshot(self, caminho_banco: str) -> Dict:
+        """
+        Grava um snapshot a partir de uma cópia consistente do banco.
+
+        O arquivo informado não deve estar sendo alterado (use uma cópia feita
+        pela API de backup). Apenas blocos ainda inexistentes são gravados.
+
+        Args:
+            caminho_banco (str): Caminho da cópia do banco
+
+        Returns:
+            Dict: Manifesto do snapshot gravado
+        """
+        inicio = datetime.now()
+        tamanho_pagina = self._tamanho_pagina(caminho_banco)
+        tamanho_bloco = tamanho_pagina * PAGINAS_POR_BLOCO
+        comprimir = COMPRESSORES[self.compressao][1]
+
+        blocos = []
+        novos_blocos = 0
+        bytes_gravados = 0
+        hash_total = hashlib.sha256()
+        tamanho_total = 0
+
+        with self._trava():
+            with open(caminho_banco, 'rb') as f:
+                while True:
+                    dados = f.read(tamanho_bloco)
+                    if not dados:
+                        break
+
+                    hash_total.update(dados)
+                    tamanho_total += len(dados)
+                    hash_bloco = hashlib.sha256(dados).hexdigest()
+                    blocos.append(hash_bloco)
+
+                    caminho = self._caminho_bloco(hash_bloco, self.compressao)
+                    if os.path.exists(caminho):
+                        continue
+
+                    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                    comprimido = comprimir(dados)
+                    self._gravar_atomico(caminho, comprimido)
+                    novos_blocos += 1
+                    bytes_gravados += len(comprimido)
+
+            id_snapshot = inicio.strftime('%Y%m%d_%H%M%S')
+            sufixo = 1
+            while os.path.exists(self._caminho_manifesto(id_snapshot)):
+                sufixo += 1
+                id_snapshot = f"{inicio.strftime('%Y%m%d_%H%M%S')}_{sufixo}"
+
+            manifesto = {
+                'id': id_snapshot,
+                'criado_em': inicio.isoformat(timespec='seconds'),
+                'tamanho': tamanho_total,
+                'tamanho_pagina': tamanho_pagina,
+                'tamanho_bloco': tamanho_bloco,
+                'compressao': self.compressao,
+                'sha256': hash_total.hexdigest(),
+                'blocos': blocos,
+                'novos_blocos': novos_blocos,
+                'bytes_gravados': bytes_gravados,
+            }
+            conteudo = json.dumps(manifesto, separators=(',', ':')).encode('utf-8')
+            self._gravar_atomico(self._caminho_manifesto(id_snapshot), conteudo)
+
+        return manifesto
+
+    def listar_snapshots(self) -> List[str]:
+        """
+        Lista os identificadores dos snapshots, do mais recente para o mais antigo.
+
+        Returns:
+            List[str]: Identificadores dos snapshots
+        """
+        ids = [nome[:-5] for nome in os.listdir(self.dir_snapshots) if nome.endswith('.json')]
+        ids.sort(reverse=True)
+        return ids
+
+    def restaurar_snapshot(self, id_snapshot: str, destino: str) -> Dict:
+        """
+        Remonta um snapshot em um arquivo de banco.
+
+        Args:
+            id_snapshot (str): Identificador do snapshot
+            destino (str): Caminho do arquivo a gerar (sobrescrito se existir)
+
+        Returns:
+            Dict: Manifesto do snapshot restaurado
+
+        Raises:
+            FileNotFoundError: Se o snapshot não existir
+            ValueError: Se o conteúdo remontado não conferir com o manifesto
+        """
+        manifesto = self.carregar_manifesto(id_snapshot)
+        if not manifesto:
+            raise FileNotFoundError(f"Snapshot não encontrado: {id_snapshot}")
+
+        hash_total = hashlib.sha256()
+        temporario = destino + '.tmp'
+        with open(temporario, 'wb') as f:
+            for hash_bloco in manifesto['blocos']:
+                dados = self._ler_bloco(hash_bloco, manifesto['compressao'])
+                hash_total.update(dados)
+                f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if hash_total.hexdigest() != manifesto['sha256']:
+            os.remove(temporario)
+            raise ValueError(f"Checksum do snapshot {id_snapshot} não confere")
+
+        os.replace(temporario, destino)
+        return manifesto
+
+    def verificar_snapshot(self, id_snapshot: str, blocos_ok: set = None) -> List[str]:
+        """
+        Verifica um snapshot: cada bloco referenciado deve existir,
+        descomprimir sem erro e ter o SHA-256 igual ao seu nome.
+
+        Args:
+            id_snapshot (str): Identificador do snapshot
+            blocos_ok (set): Blocos já verificados (pulados e atualizados)
+
+        Returns:
+            List[str]: Erros encontrados (vazia se íntegro)
+        """
+        manifesto = self.carregar_manifesto(id_snapshot)
+        if not manifesto:
+            return [f"{id_snapshot}: manifesto ausente"]
+
+        erros = []
+        if blocos_ok is None:
+            blocos_ok = set()
+
+        for hash_bloco in manifesto['blocos']:
+            chave = (hash_bloco, manifesto['compressao'])
+            if chave in blocos_ok:
+                continue
+            try:
+                dados = self._ler_bloco(hash_bloco, manifesto['compressao'])
+            except FileNotFoundError:
+                erros.append(f"{id_snapshot}: bloco ausente {hash_bloco[:12]}")
+                continue
+            except (zlib.error, lzma.LZMAError):
+                erros.append(f"{id_snapshot}: bloco corrompido {hash_bloco[:12]}")
+                continue
+
+            if hashlib.sha256(dados).hexdigest() != hash_bloco:
+                erros.append(f"{id_snapshot}: checksum divergente {hash_bloco[:12]}")
+                continue
+            blocos_ok.add(chave)
+
+        return erros
+
+    def verificar(self) -> Dict:
+        """
+        Verifica todos os snapshots (ver verificar_snapshot).
+
+        Returns:
+            Dict: {'snapshots', 'blocos', 'erros': [...]}
+        """
+        erros = []
+        blocos_ok = set()
+
+        ids = self.listar_snapshots()
+        for id_snapshot in ids:
+            erros.extend(self.verificar_snapshot(id_snapshot, blocos_ok))
+
+        return {'snapshots': len(ids), 'blocos': len(blocos_ok), 'erros': erros}
+
+    def podar(self, manter_ultimos: int) -> Dict:
+        """
+        Remove os snapshots mais antigos e os blocos que ficaram sem referência.
+
+        Args:
+            manter_ultimos (int): Quantidade de snapshots a manter
+
+        Returns:
+            Dict: {'snapshots_removidos', 'blocos_removidos', 'bytes_liberados'}
+        """
+        resultado = {'snapshots_removidos': 0, 'blocos_removidos': 0, 'bytes_liberados': 0}
+
+        with self._trava():
+            ids = self.listar_snapshots()
+            for id_snapshot in ids[manter_ultimos:]:
+                os.remove(self._caminho_manifesto(id_snapshot))
+                resultado['snapshots_removidos'] += 1
+
+            # Marcar blocos ainda referenciados
+            referenciados = set()
+            for id_snapshot in ids[:manter_ultimos]:
+                manifesto = self.carregar_manifesto(id_snapshot)
+                extensao = COMPRESSORES[manifesto['compressao']][0]
+                referenciados.update(h + extensao for h in manifesto['blocos'])
+
+            # Varrer blocos órfãos
+            for subdir in os.listdir(self.dir_blocos):
+                caminho_subdir = os.path.join(self.dir_blocos, subdir)
+                for nome in os.listdir(caminho_subdir):
+                    if nome in referenciados:
+                        continue
+                    caminho = os.path.join(caminho_subdir, nome)
+                    resultado['bytes_liberados'] += os.path.getsize(caminho)
+                    os.remove(caminho)
+                    resultado['blocos_removidos'] += 1
+
+        return resultado
+
+    def tamanho_em_disco(self) -> int:
+        """
+        Soma o tamanho de todos os arquivos do repositório.
+
+        Returns:
+            int: Tamanho total em bytes
+        """
+        total = 0
+        for raiz, _, arquivos in os.walk(self.diretorio):
+            total += sum(os.path.getsize(os.path.join(raiz, nome)) for nome in arquivos)
+        return total
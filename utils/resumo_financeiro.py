@@ -0,0 +1,330 @@
+"""
+================================================================================
+IMOBIPRO - RESUMO FINANCEIRO MENSAL
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Tabela resumo_mensal com os valores de receitas e despesas já
+           agregados por imóvel, proprietário, mês e categoria, mantida por
+           triggers. Inclui reconstrução completa e verificação de
+           consistência contra as tabelas de origem.
+================================================================================
+
+Cada linha de receitas/despesas contribui para até duas linhas do resumo:
+
+  * pelo mês do vencimento: previsto (exceto canceladas), pendente e
+    quantidade pendente (receitas Pendente/Atrasado, despesas sem pagamento)
+  * pelo mês do recebimento/pagamento: recebido (receitas) ou pago (despesas)
+
+Chave: (id_imovel, id_proprietario, mes, origem, categoria). Receitas de
+contrato usam o imóvel do contrato; id_proprietario só é preenchido para
+receitas sem contrato (nas demais vale o proprietário do imóvel, resolvido na
+leitura). Zero significa "sem imóvel" / "proprietário do imóvel".
+
+Os triggers aplicam a diferença (linha antiga com sinal negativo, linha nova
+com sinal positivo), então cada escrita mexe em no máximo quatro linhas do
+resumo. Uso pela linha de comando:
+
+    python -m utils.resumo_financeiro reconstruir
+    python -m utils.resumo_financeiro verificar
+"""
+
+import argparse
+from datetime import date
+from typing import Dict, List
+
+# Diferença máxima aceita pela verificação (resíduos de ponto flutuante)
+TOLERANCIA = 0.005
+
+CHAVE_RESUMO = 'id_imovel, id_proprietario, mes, origem, categoria'
+VALORES_RESUMO = ['previsto', 'pendente', 'qtd_pendente', 'recebido', 'pago']
+
+
+def _contribuicoes_receita(r: str, imovel: str, sinal: str = '', origem: str = '') -> str:
+    """
+    SELECTs com a contribuição de uma receita para o resumo.
+
+    Args:
+        r (str): Referência da linha (NEW, OLD ou alias de tabela)
+        imovel (str): Expressão do imóvel da receita
+        sinal (str): '' para somar, '-' para subtrair
+        origem (str): FROM/WHERE quando r é um alias de tabela
+    """
+    proprietario = f"CASE WHEN {r}.id_contrato IS NULL THEN COALESCE({r}.id_proprietario, 0) ELSE 0 END"
+    # Mesma fórmula do trigger calcular_total_receita (valor_total_devido pode
+    # ainda não estar recalculado quando este trigger roda)
+    total = (f"(COALESCE({r}.aluguel_devido, 0) + COALESCE({r}.condominio_devido, 0) + "
+             f"COALESCE({r}.iptu_devido, 0) + COALESCE({r}.desconto_multa, 0))")
+    pendente = f"{r}.status IN ('Pendente', 'Atrasado')"
+    return f"""
+        SELECT {imovel} AS id_imovel, {proprietario} AS id_proprietario,
+               strftime('%Y-%m', {r}.vencimento_previsto) AS mes, 'receita' AS origem,
+               {r}.tipo_receita AS categoria,
+               {sinal}CASE WHEN {r}.status != 'Cancelado' THEN {total} ELSE 0 END AS previsto,
+               {sinal}CASE WHEN {pendente} THEN {total} ELSE 0 END AS pendente,
+               {sinal}({pendente}) AS qtd_pendente,
+               0 AS recebido, 0 AS pago
+        {origem}
+        UNION ALL
+        SELECT {imovel}, {proprietario}, strftime('%Y-%m', {r}.data_recebimento), 'receita',
+               {r}.tipo_receita, 0, 0, 0, {sinal}COALESCE({r}.valor_recebido, 0), 0
+        {origem}"""
+
+
+def _contribuicoes_despesa(d: str, sinal: str = '', origem: str = '') -> str:
+    """SELECTs com a contribuição de uma despesa para o resumo (ver _contribuicoes_receita)."""
+    return f"""
+        SELECT COALESCE({d}.id_imovel, 0) AS id_imovel, 0 AS id_proprietario,
+               strftime('%Y-%m', COALESCE({d}.vencimento_previsto, {d}.mes_referencia, {d}.data_cadastro)) AS mes,
+               'despesa' AS origem, {d}.tipo_despesa AS categoria,
+               {sinal}COALESCE({d}.valor_previsto, 0) AS previsto,
+               {sinal}CASE WHEN {d}.data_pagamento IS NULL THEN COALESCE({d}.valor_previsto, 0) ELSE 0 END AS pendente,
+               {sinal}({d}.data_pagamento IS NULL) AS qtd_pendente,
+               0 AS recebido, 0 AS pago
+        {origem}
+        UNION ALL
+        SELECT COALESCE({d}.id_imovel, 0), 0, strftime('%Y-%m', {d}.data_pagamento), 'despesa',
+               {d}.tipo_despesa, 0, 0, 0, 0, {sinal}COALESCE({d}.valor_pago, 0)
+        {origem}"""
+
+
+def _aplicar(contribuicoes: str) -> str:
+    """INSERT ... ON CONFLICT que soma as contribuições às linhas do resumo."""
+    atualizacoes = ', '.join(f"{campo} = {campo} + excluded.{campo}" for campo in VALORES_RESUMO)
+    return f"""
+    INSERT INTO resumo_mensal ({CHAVE_RESUMO}, {', '.join(VALORES_RESUMO)})
+    SELECT {CHAVE_RESUMO}, {', '.join(VALORES_RESUMO)}
+    FROM ({contribuicoes}
+    ) WHERE mes IS NOT NULL
+    ON CONFLICT ({CHAVE_RESUMO}) DO UPDATE SET {atualizacoes};"""
+
+
+# Imóvel de uma receita lida em trigger (contrato ainda existente)
+_IMOVEL_NEW = "COALESCE((SELECT id_imovel FROM contratos WHERE id = NEW.id_contrato), NEW.id_imovel, 0)"
+_IMOVEL_OLD = "COALESCE((SELECT id_imovel FROM contratos WHERE id = OLD.id_contrato), OLD.id_imovel, 0)"
+
+_CAMPOS_RECEITA = ('id_contrato, id_imovel, id_proprietario, tipo_receita, aluguel_devido, condominio_devido, '
+                   'iptu_devido, desconto_multa, vencimento_previsto, data_recebimento, valor_recebido, status')
+_CAMPOS_DESPESA = ('id_imovel, tipo_despesa, valor_previsto, valor_pago, vencimento_previsto, '
+                   'mes_referencia, data_pagamento')
+
+DDL_RESUMO = f"""
+CREATE TABLE IF NOT EXISTS resumo_mensal (
+    id_imovel       INTEGER NOT NULL DEFAULT 0,   -- 0 = sem imóvel
+    id_proprietario INTEGER NOT NULL DEFAULT 0,   -- 0 = proprietário do imóvel
+    mes             TEXT    NOT NULL,             -- AAAA-MM
+    origem          TEXT    NOT NULL,             -- receita | despesa
+    categoria       TEXT    NOT NULL,             -- tipo_receita / tipo_despesa
+    previsto        REAL    NOT NULL DEFAULT 0,
+    pendente        REAL    NOT NULL DEFAULT 0,
+    qtd_pendente    INTEGER NOT NULL DEFAULT 0,
+    recebido        REAL    NOT NULL DEFAULT 0,
+    pago            REAL    NOT NULL DEFAULT 0,
+    PRIMARY KEY ({CHAVE_RESUMO})
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_resumo_mensal_mes ON resumo_mensal(mes);
+
+CREATE TRIGGER IF NOT EXISTS resumo_receitas_insert
+AFTER INSERT ON receitas
+BEGIN{_aplicar(_contribuicoes_receita('NEW', _IMOVEL_NEW))}
+END;
+
+-- valor_total_devido fica de fora: é recalculado pelo trigger calcular_total_receita
+CREATE TRIGGER IF NOT EXISTS resumo_receitas_update
+AFTER UPDATE OF {_CAMPOS_RECEITA} ON receitas
+BEGIN{_aplicar(_contribuicoes_receita('OLD', _IMOVEL_OLD, '-') + ' UNION ALL' + _contribuicoes_receita('NEW', _IMOVEL_NEW))}
+END;
+
+-- Receitas apagadas junto com o contrato já foram descontadas em resumo_contratos_delete
+CREATE TRIGGER IF NOT EXISTS resumo_receitas_delete
+AFTER DELETE ON receitas
+WHEN OLD.id_contrato IS NULL OR EXISTS (SELECT 1 FROM contratos WHERE id = OLD.id_contrato)
+BEGIN{_aplicar(_contribuicoes_receita('OLD', _IMOVEL_OLD, '-'))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumo_contratos_delete
+BEFORE DELETE ON contratos
+BEGIN{_aplicar(_contribuicoes_receita('r', 'OLD.id_imovel', '-', 'FROM receitas r WHERE r.id_contrato = OLD.id'))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumo_contratos_imovel
+AFTER UPDATE OF id_imovel ON contratos
+WHEN OLD.id_imovel IS NOT NEW.id_imovel
+BEGIN{_aplicar(_contribuicoes_receita('r', 'COALESCE(OLD.id_imovel, r.id_imovel, 0)', '-', 'FROM receitas r WHERE r.id_contrato = NEW.id')
+       + ' UNION ALL'
+       + _contribuicoes_receita('r', 'COALESCE(NEW.id_imovel, r.id_imovel, 0)', '', 'FROM receitas r WHERE r.id_contrato = NEW.id'))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumo_despesas_insert
+AFTER INSERT ON despesas
+BEGIN{_aplicar(_contribuicoes_despesa('NEW'))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumo_despesas_update
+AFTER UPDATE OF {_CAMPOS_DESPESA} ON despesas
+BEGIN{_aplicar(_contribuicoes_despesa('OLD', '-') + ' UNION ALL' + _contribuicoes_despesa('NEW'))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumo_despesas_delete
+AFTER DELETE ON despesas
+BEGIN{_aplicar(_contribuicoes_despesa('OLD', '-'))}
+END;
+"""
+
+# Resumo calculado do zero a partir das tabelas de origem
+SQL_RESUMO_COMPLETO = f"""
+    SELECT {CHAVE_RESUMO}, {', '.join(f'TOTAL({campo}) AS {campo}' for campo in VALORES_RESUMO)}
+    FROM ({_contribuicoes_receita('r', 'COALESCE(c.id_imovel, r.id_imovel, 0)', '',
+                                  'FROM receitas r LEFT JOIN contratos c ON c.id = r.id_contrato')}
+          UNION ALL
+          {_contribuicoes_despesa('d', '', 'FROM despesas d')}
+    )
+    WHERE mes IS NOT NULL
+    GROUP BY {CHAVE_RESUMO}
+"""
+
+
+class ResumoFinanceiro:
+    """
+    Mantém e consulta a tabela resumo_mensal.
+    """
+
+    def __init__(self, db):
+        """
+        Inicializa o resumo.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+        """
+        self.db = db
+
+    def instalar(self) -> bool:
+        """
+        Cria tabela e triggers (idempotente) e preenche o resumo se estiver vazio.
+
+        Returns:
+            bool: True se o resumo está pronto para uso
+        """
+        if not self.db.aplicar_ddl(DDL_RESUMO):
+            return False
+        vazio = self.db.execute_query("""
+            SELECT NOT EXISTS (SELECT 1 FROM resumo_mensal)
+               AND (EXISTS (SELECT 1 FROM receitas) OR EXISTS (SELECT 1 FROM despesas)) AS precisa
+        """)
+        if vazio and vazio[0]['precisa']:
+            self.reconstruir()
+        return True
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula o resumo inteiro a partir de receitas e despesas.
+
+        Returns:
+            int: Número de linhas do resumo
+        """
+        with self.db.trava_escrita():
+            conn = self.db.connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM resumo_mensal")
+                conn.execute(f"""
+                    INSERT INTO resumo_mensal ({CHAVE_RESUMO}, {', '.join(VALORES_RESUMO)})
+                    {SQL_RESUMO_COMPLETO}
+                """)
+                linhas = conn.execute("SELECT COUNT(*) FROM resumo_mensal").fetchone()[0]
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        print(f"✓ Resumo financeiro reconstruído: {linhas} linhas")
+        return linhas
+
+    def verificar(self, tolerancia: float = TOLERANCIA) -> List[Dict]:
+        """
+        Compara o resumo com o cálculo completo a partir das tabelas de origem.
+
+        Args:
+            tolerancia (float): Diferença máxima aceita em cada valor
+
+        Returns:
+            List[Dict]: Chaves divergentes com a diferença (resumo - origem) de cada valor
+        """
+        diferencas = ', '.join(f"TOTAL({campo}) AS {campo}" for campo in VALORES_RESUMO)
+        divergente = ' OR '.join(f"ABS(TOTAL({campo})) > :tolerancia" for campo in VALORES_RESUMO)
+        negativos = ', '.join(f"-{campo}" for campo in VALORES_RESUMO)
+        conn = self.db.connect()
+        try:
+            # Mesma transação de leitura para o resumo e para as tabelas de origem
+            conn.execute("BEGIN")
+            cursor = conn.execute(f"""
+                SELECT {CHAVE_RESUMO}, {diferencas}
+                FROM (
+                    SELECT {CHAVE_RESUMO}, {', '.join(VALORES_RESUMO)} FROM resumo_mensal
+                    UNION ALL
+                    SELECT {CHAVE_RESUMO}, {negativos} FROM ({SQL_RESUMO_COMPLETO})
+                )
+                GROUP BY {CHAVE_RESUMO}
+                HAVING {divergente}
+            """, {'tolerancia': tolerancia})
+            divergencias = [dict(linha) for linha in cursor.fetchall()]
+            conn.rollback()
+        finally:
+            conn.close()
+        return divergencias
+
+    def totais_pendentes(self, hoje: date = None) -> Dict:
+        """
+        Totais do dashboard: pendências e valores realizados no mês atual.
+
+        Args:
+            hoje (date): Data de referência (padrão: hoje)
+
+        Returns:
+            Dict: receitas_pendentes, valor_receitas_pendentes, despesas_pendentes,
+                  valor_despesas_pendentes, recebido_mes e pago_mes
+        """
+        mes = (hoje or date.today()).strftime('%Y-%m')
+        resultado = self.db.execute_query("""
+            SELECT CAST(TOTAL(CASE WHEN origem = 'receita' THEN qtd_pendente END) AS INTEGER) AS receitas_pendentes,
+                   TOTAL(CASE WHEN origem = 'receita' THEN pendente END)                      AS valor_receitas_pendentes,
+                   CAST(TOTAL(CASE WHEN origem = 'despesa' THEN qtd_pendente END) AS INTEGER) AS despesas_pendentes,
+                   TOTAL(CASE WHEN origem = 'despesa' THEN pendente END)                      AS valor_despesas_pendentes,
+                   TOTAL(CASE WHEN mes = ? THEN recebido END)                                 AS recebido_mes,
+                   TOTAL(CASE WHEN mes = ? THEN pago END)                                     AS pago_mes
+            FROM resumo_mensal
+        """, (mes, mes))
+        return resultado[0] if resultado else {}
+
+
+def main():
+    """Linha de comando: reconstruir ou verificar o resumo."""
+    from database.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Resumo financeiro mensal (tabela resumo_mensal)')
+    parser.add_argument('acao', choices=['reconstruir', 'verificar'])
+    args = parser.parse_args()
+
+    resumo = ResumoFinanceiro(DatabaseManager())
+    if not resumo.instalar():
+        raise SystemExit(1)
+
+    if args.acao == 'reconstruir':
+        resumo.reconstruir()
+        return
+
+    divergencias = resumo.verificar()
+    if not divergencias:
+        print("✓ Resumo financeiro consistente com receitas e despesas")
+        return
+    print(f"✗ {len(divergencias)} linha(s) divergente(s) no resumo financeiro:")
+    for linha in divergencias[:20]:
+        print(f"  {linha}")
+    print("  Para corrigir, execute: python -m utils.resumo_financeiro reconstruir")
+    raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+================================================================================
+IMOBIPRO - SÉRIES TEMPORAIS PARA GRÁFICOS
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Séries mensais (receitas, despesas, ocupação e inadimplência)
+           calculadas no servidor sobre uma dimensão de calendário e
+           reduzidas ao número de pontos pedido, para os gráficos receberem
+           poucas centenas de números em vez das linhas do banco.
+================================================================================
+
+  * O calendário (CTE recursiva de meses) garante um ponto por mês, mesmo sem
+    movimento; cada série é uma única consulta agrupada.
+  * Receitas, despesas e inadimplência leem o resumo mensal
+    (utils/resumo_financeiro.py); a ocupação sai dos períodos dos contratos.
+  * O valor em atraso não pode ser recalculado para o passado (o status das
+    receitas muda): a série 'atraso' lê o último registro de cada mês em
+    kpi_snapshots (utils/indicadores.py).
+  * A redução usa LTTB (Largest-Triangle-Three-Buckets): mantém pontos reais
+    da série escolhendo, em cada faixa, o que preserva o formato da curva.
+  * etag_serie() depende só dos parâmetros e da versão dos dados, então a
+    rota responde 304 sem consultar o banco quando nada mudou.
+"""
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional
+
+# Limites do número de pontos devolvidos
+PONTOS_PADRAO = 240
+PONTOS_MINIMO = 3
+PONTOS_MAXIMO = 1000
+
+# Intervalo máximo aceito (meses)
+MAXIMO_MESES_SERIE = 600
+
+_CALENDARIO = """
+    WITH RECURSIVE calendario(inicio) AS (
+        SELECT date(:mes_inicio || '-01')
+        UNION ALL
+        SELECT date(inicio, '+1 month') FROM calendario WHERE inicio < date(:mes_fim || '-01')
+    )
+"""
+
+
+@dataclass
+class Serie:
+    """Série mensal: consulta que devolve (mes, valor) para cada mês do calendário."""
+    nome: str
+    titulo: str
+    unidade: str
+    sql: str
+
+
+def _serie_resumo(origem: str, campo: str) -> str:
+    """Consulta de um valor do resumo mensal, mês a mês."""
+    return _CALENDARIO + f"""
+    SELECT strftime('%Y-%m', c.inicio) AS mes, TOTAL(r.{campo}) AS valor
+    FROM calendario c
+    LEFT JOIN resumo_mensal r ON r.mes = strftime('%Y-%m', c.inicio) AND r.origem = '{origem}'
+    GROUP BY c.inicio
+    ORDER BY c.inicio
+    """
+
+
+SERIES = OrderedDict((serie.nome, serie) for serie in [
+    Serie('receitas', 'Receitas recebidas', 'moeda', _serie_resumo('receita', 'recebido')),
+    Serie('despesas', 'Despesas pagas', 'moeda', _serie_resumo('despesa', 'pago')),
+    Serie('inadimplencia', 'Em aberto por mês de vencimento', 'moeda', _CALENDARIO + """
+    SELECT strftime('%Y-%m', c.inicio) AS mes,
+           CASE WHEN c.inicio <= :hoje THEN TOTAL(r.pendente) END AS valor
+    FROM calendario c
+    LEFT JOIN resumo_mensal r ON r.mes = strftime('%Y-%m', c.inicio) AND r.origem = 'receita'
+    GROUP BY c.inicio
+    ORDER BY c.inicio
+    """),
+    # Último registro diário de cada mês (meses sem registro ficam sem ponto)
+    Serie('atraso', 'Valor em atraso (fim do mês)', 'moeda', _CALENDARIO + """
+    SELECT strftime('%Y-%m', c.inicio) AS mes,
+           (SELECT k.valor_em_atraso FROM kpi_snapshots k
+            WHERE k.data >= c.inicio AND k.data < date(c.inicio, '+1 month')
+            ORDER BY k.data DESC LIMIT 1) AS valor
+    FROM calendario c
+    ORDER BY c.inicio
+    """),
+    # Contratos ativos/prorrogados valem até hoje; encerrados até o fim do contrato
+    Serie('ocupacao', 'Taxa de ocupação', 'percentual', _CALENDARIO + """
+    SELECT strftime('%Y-%m', c.inicio) AS mes,
+           CASE WHEN c.inicio > :hoje THEN NULL
+                ELSE COUNT(DISTINCT ct.id_imovel) * 100.0 / MAX((SELECT COUNT(*) FROM imoveis), 1)
+           END AS valor
+    FROM calendario c
+    LEFT JOIN contratos ct
+           ON ct.inicio_contrato <= date(c.inicio, '+1 month', '-1 day')
+          AND (ct.status_contrato IN ('Ativo', 'Prorrogado')
+               OR COALESCE(ct.fim_contrato, date(ct.data_atualizacao)) >= c.inicio)
+    GROUP BY c.inicio
+    ORDER BY c.inicio
+    """),
+])
+
+
+def reduzir_lttb(valores: List[Optional[float]], pontos: int) -> List[int]:
+    """
+    Escolhe os índices dos pontos mantidos pelo LTTB.
+
+    Args:
+        valores (List[float]): Valores da série (None = sem dado, nunca escolhido
+            no meio de uma faixa que tenha dados)
+        pontos (int): Número de pontos desejado
+
+    Returns:
+        List[int]: Índices escolhidos, em ordem (sempre inclui o primeiro e o último)
+    """
+    total = len(valores)
+    if pontos >= total or pontos < 3:
+        return list(range(total))
+
+    y = [v if v is not None else 0.0 for v in valores]
+    escolhidos = [0]
+    largura = (total - 2) / (pontos - 2)
+    anterior = 0
+
+    for faixa in range(pontos - 2):
+        inicio = int(faixa * largura) + 1
+        fim = int((faixa + 1) * largura) + 1
+
+        # Média da próxima faixa (o terceiro vértice do triângulo)
+        proximo_inicio, proximo_fim = fim, min(int((faixa + 2) * largura) + 1, total)
+        if faixa == pontos - 3:
+            proximo_inicio, proximo_fim = total - 1, total
+        media_x = (proximo_inicio + proximo_fim - 1) / 2
+        media_y = sum(y[proximo_inicio:proximo_fim]) / (proximo_fim - proximo_inicio)
+
+        melhor, maior_area = inicio, -1.0
+        for i in range(inicio, fim):
+            if valores[i] is None:
+                continue
+            area = abs((anterior - media_x) * (y[i] - y[anterior]) - (anterior - i) * (media_y - y[anterior]))
+            if area > maior_area:
+                melhor, maior_area = i, area
+        escolhidos.append(melhor)
+        anterior = melhor
+
+    escolhidos.append(total - 1)
+    return escolhidos
+
+
+def etag_serie(db, nome: str, mes_inicio: str, mes_fim: str, pontos: int) -> str:
+    """
+    ETag da série: muda com os parâmetros, com o dia e com qualquer escrita no banco.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        nome (str): Nome da série
+        mes_inicio (str): Mês inicial (AAAA-MM)
+        mes_fim (str): Mês final (AAAA-MM)
+        pontos (int): Número máximo de pontos
+
+    Returns:
+        str: Identificador hexadecimal
+    """
+    chave = repr((nome, mes_inicio, mes_fim, pontos, date.today().isoformat(), db.versao_dados()))
+    return hashlib.sha1(chave.encode('utf-8')).hexdigest()
+
+
+def calcular_serie(db, nome: str, mes_inicio: str, mes_fim: str, pontos: int = PONTOS_PADRAO) -> Dict:
+    """
+    Calcula uma série mensal e reduz ao número de pontos pedido.
+
+    Args:
+        db (DatabaseManager): Gerenciador do banco
+        nome (str): Chave de SERIES
+        mes_inicio (str): Mês inicial (AAAA-MM)
+        mes_fim (str): Mês final (AAAA-MM)
+        pontos (int): Número máximo de pontos
+
+    Returns:
+        Dict: Metadados da série e as listas colunares 'x' (meses) e 'y' (valores)
+    """
+    serie = SERIES[nome]
+    # max_atraso=0: a resposta leva um ETag da versão atual dos dados
+    conn = db.conectar_leitura(max_atraso=0)
+    try:
+        linhas = conn.execute(serie.sql, {
+            'mes_inicio': mes_inicio,
+            'mes_fim': mes_fim,
+            'hoje': date.today().isoformat(),
+        }).fetchall()
+    finally:
+        conn.close()
+
+    meses = [linha[0] for linha in linhas]
+    valores = [round(linha[1], 2) if linha[1] is not None else None for linha in linhas]
+    indices = reduzir_lttb(valores, pontos)
+
+    return {
+        'serie': serie.nome,
+        'titulo': serie.titulo,
+        'unidade': serie.unidade,
+        'mes_inicio': mes_inicio,
+        'mes_fim': mes_fim,
+        'pontos_originais': len(valores),
+        'x': [meses[i] for i in indices],
+        'y': [valores[i] for i in indices],
+    }
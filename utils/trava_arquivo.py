@@ -0,0 +1,85 @@
+"""
+================================================================================
+IMOBIPRO - TRAVA ENTRE PROCESSOS
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Lock baseado em arquivo (fcntl.flock) para coordenar os workers do
+           Gunicorn e os scripts de manutenção que mexem nos mesmos arquivos.
+================================================================================
+"""
+
+import os
+import fcntl
+
+
+class TravaArquivo:
+    """
+    Lock exclusivo ou compartilhado sobre um arquivo, válido entre processos.
+
+    Uso:
+        with TravaArquivo('backups/.repositorio.lock'):
+            ...  # só um processo por vez executa este bloco
+
+    O lock é liberado automaticamente pelo sistema operacional se o processo
+    morrer, então não há risco de trava "esquecida" no disco.
+    """
+
+    def __init__(self, caminho: str, compartilhada: bool = False, bloquear: bool = True):
+        """
+        Inicializa a trava (não adquire).
+
+        Args:
+            caminho (str): Arquivo usado como lock (criado se não existir)
+            compartilhada (bool): True para lock compartilhado (vários leitores)
+            bloquear (bool): False para falhar imediatamente se já estiver travado
+        """
+        self.caminho = caminho
+        self.compartilhada = compartilhada
+        self.bloquear = bloquear
+        self._fd = None
+
+    def adquirir(self) -> bool:
+        """
+        Adquire a trava.
+
+        Returns:
+            bool: True se adquiriu, False se não bloqueante e já estava travada
+        """
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self._fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+        modo = fcntl.LOCK_SH if self.compartilhada else fcntl.LOCK_EX
+        if not self.bloquear:
+            modo |= fcntl.LOCK_NB
+
+        try:
+            fcntl.flock(self._fd, modo)
+            return True
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            return False
+
+    def liberar(self):
+        """Libera a trava, se estiver adquirida."""
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def adquirida(self) -> bool:
+        """Indica se a trava está em posse deste objeto."""
+        return self._fd is not None
+
+    def __enter__(self):
+        """Suporte para context manager (with statement)."""
+        self.adquirir()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Libera a trava ao sair do context manager."""
+        self.liberar()
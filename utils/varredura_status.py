@@ -0,0 +1,140 @@
+"""
+================================================================================
+IMOBIPRO - VARREDURA DIÁRIA DE STATUS
+================================================================================
+Autor: Sistema ImobiPro
+Data: Janeiro 2026
+Descrição: Atualiza os status gravados que dependem da data: receitas
+           vencidas passam a 'Atrasado' e contratos com o prazo vencido são
+           encerrados ou marcados como prorrogados. Roda de madrugada e na
+           inicialização; cada passo é um UPDATE único sobre o conjunto.
+================================================================================
+
+  * Receitas: 'Pendente' com vencimento anterior ao dia → 'Atrasado'; e o
+    inverso ('Atrasado' com vencimento reaberto para o futuro → 'Pendente').
+  * Contratos 'Ativo' com fim_contrato vencido: se há receita de um mês de
+    referência posterior ao mês do fim, a locação continua por prazo
+    indeterminado → 'Prorrogado'; senão → 'Encerrado'. Conta o mês de
+    referência, não o vencimento: o último aluguel (pago no mês seguinte, ou
+    com vencimento depois de um fim no meio do mês) não prorroga o contrato.
+    O trigger atualizar_imovel_ocupado_update acerta imoveis.ocupado.
+  * Com o status gravado, vw_receitas_pendentes lê r.status (índice
+    idx_receitas_status) em vez de recalcular o atraso linha a linha.
+"""
+
+from datetime import date
+from typing import Dict, List
+
+# View de receitas pendentes sobre o status gravado (também em database/schema.sql)
+DDL_VARREDURA = """
+DROP VIEW IF EXISTS vw_receitas_pendentes;
+CREATE VIEW vw_receitas_pendentes AS
+SELECT
+    r.id,
+    r.id_contrato,
+    r.tipo_receita,
+    COALESCE(c.id_imovel, r.id_imovel)                          AS id_imovel,
+    COALESCE(i_c.endereco_completo, i_r.endereco_completo, '-') AS imovel,
+    COALESCE(p.nome_completo, pr.nome, '-')                     AS inquilino,
+    r.mes_referencia,
+    r.valor_total_devido,
+    r.vencimento_previsto,
+    r.status,
+    CASE
+        WHEN r.status = 'Atrasado' THEN 'Atrasado'
+        WHEN r.vencimento_previsto = DATE('now') THEN 'Vence Hoje'
+        ELSE 'A Receber'
+    END AS situacao
+FROM receitas r
+LEFT JOIN contratos     c   ON r.id_contrato     = c.id
+LEFT JOIN imoveis       i_c ON c.id_imovel       = i_c.id
+LEFT JOIN imoveis       i_r ON r.id_imovel       = i_r.id
+LEFT JOIN pessoas       p   ON c.id_inquilino    = p.id
+LEFT JOIN proprietarios pr  ON r.id_proprietario = pr.id
+WHERE r.status IN ('Pendente', 'Atrasado')
+ORDER BY r.vencimento_previsto DESC;
+"""
+
+# Contratos 'Ativo' já vencidos e o novo status de cada um
+_CONTRATOS_VENCIDOS = "status_contrato = 'Ativo' AND fim_contrato IS NOT NULL AND fim_contrato < :hoje"
+_NOVO_STATUS_CONTRATO = """
+    CASE WHEN EXISTS (SELECT 1 FROM receitas r
+                      WHERE r.id_contrato = contratos.id
+                        AND r.mes_referencia >= date(contratos.fim_contrato, 'start of month', '+1 month'))
+         THEN 'Prorrogado' ELSE 'Encerrado' END
+"""
+
+
+class VarreduraStatus:
+    """
+    Varredura dos status de receitas e contratos que mudam com a data.
+    """
+
+    def __init__(self, db):
+        """
+        Inicializa a varredura.
+
+        Args:
+            db (DatabaseManager): Gerenciador do banco
+        """
+        self.db = db
+
+    def instalar(self) -> bool:
+        """Recria vw_receitas_pendentes sobre o status gravado (idempotente)."""
+        return self.db.aplicar_ddl(DDL_VARREDURA)
+
+    def executar(self, hoje: date = None) -> Dict[str, object]:
+        """
+        Executa a varredura em uma única transação.
+
+        Args:
+            hoje (date): Dia de referência (padrão: hoje)
+
+        Returns:
+            Dict: Quantidades alteradas ('receitas_atrasadas', 'receitas_reabertas')
+                e os IDs dos contratos 'prorrogados' e 'encerrados'
+        """
+        parametros = {'hoje': (hoje or date.today()).isoformat()}
+
+        with self.db.trava_escrita():
+            conn = self.db.connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                atrasadas = conn.execute("""
+                    UPDATE receitas SET status = 'Atrasado'
+                    WHERE status = 'Pendente' AND vencimento_previsto < :hoje
+                """, parametros).rowcount
+                reabertas = conn.execute("""
+                    UPDATE receitas SET status = 'Pendente'
+                    WHERE status = 'Atrasado' AND vencimento_previsto >= :hoje
+                """, parametros).rowcount
+
+                # Lidos antes só para o log; o UPDATE abaixo decide sozinho
+                contratos: Dict[str, List[int]] = {'Prorrogado': [], 'Encerrado': []}
+                for contrato in conn.execute(f"SELECT id, {_NOVO_STATUS_CONTRATO} AS novo_status "
+                                             f"FROM contratos WHERE {_CONTRATOS_VENCIDOS}", parametros):
+                    contratos[contrato['novo_status']].append(contrato['id'])
+                conn.execute(f"UPDATE contratos SET status_contrato = {_NOVO_STATUS_CONTRATO} "
+                             f"WHERE {_CONTRATOS_VENCIDOS}", parametros)
+
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        resultado = {
+            'receitas_atrasadas': atrasadas,
+            'receitas_reabertas': reabertas,
+            'prorrogados': contratos['Prorrogado'],
+            'encerrados': contratos['Encerrado'],
+        }
+        print(f"✓ Varredura de status ({parametros['hoje']}): {atrasadas} receita(s) em atraso, "
+              f"{reabertas} reaberta(s), {len(contratos['Encerrado'])} contrato(s) encerrado(s), "
+              f"{len(contratos['Prorrogado'])} prorrogado(s)")
+        if contratos['Encerrado']:
+            print(f"  Encerrados: {', '.join(map(str, contratos['Encerrado']))}")
+        if contratos['Prorrogado']:
+            print(f"  Prorrogados: {', '.join(map(str, contratos['Prorrogado']))}")
+        return resultado